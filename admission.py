@@ -0,0 +1,324 @@
+"""
+Modul jendela registrasi bertahap dan kontrol penerimaan (admission control)
+- Jendela registrasi per angkatan diatur di system_config, misalnya semester
+  7-8 lebih dulu lalu angkatan di bawahnya; diperiksa di jalur pendaftaran
+  (enrollment.check_enrollment)
+- Permintaan tulis melewati token bucket (laju rata-rata + ledakan singkat) dan
+  antrian adil round-robin per mahasiswa sebelum menyentuh kunci SQLite, sehingga
+  beban puncak diratakan dan satu mahasiswa yang mengklik berulang tidak
+  menyerobot giliran mahasiswa lain
+- Kedalaman antrian dan laju penerimaan bisa dipantau admin (stats())
+- Kontrol penerimaan bersifat lokal per proses: hanya meratakan permintaan dari
+  satu instance GUI, bukan kuota bersama. cli.py, holds, dan instance GUI lain
+  tidak ikut antrian ini; perebutan kunci antarproses tetap diatur SQLite
+  (busy timeout dan BEGIN IMMEDIATE di jalur penulisan)
+- Menunggu giliran (admit) boleh dilakukan di thread pekerja sementara aksi
+  database dijalankan di thread pemilik koneksi, lalu ditutup dengan release()
+
+Format registration_windows (waktu 'YYYY-MM-DD HH:MM:SS', dipisah titik koma):
+    7-8=2024-08-01 08:00:00; 5-6=2024-08-02 08:00:00; 1-4=2024-08-03 08:00:00
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import datetime
+
+import database
+
+# Lokasi default database KRS
+DATABASE_PATH = 'krs_database.db'
+
+# Nilai default kontrol penerimaan (bisa diubah lewat system_config)
+ADMISSION_RATE = 50.0         # token per detik
+ADMISSION_BURST = 20          # kapasitas bucket
+ADMISSION_MAX_IN_FLIGHT = 1   # penulisan yang boleh berjalan bersamaan (SQLite: satu penulis)
+ADMISSION_TIMEOUT = 10.0      # batas tunggu di antrian (detik)
+
+# Rentang waktu penghitungan laju penerimaan (detik)
+RATE_WINDOW = 10.0
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+class AdmissionTimeout(Exception):
+    """Permintaan tidak mendapat giliran sebelum batas tunggu habis"""
+
+
+def _config(cursor, key, default=''):
+    cursor.execute("SELECT config_value FROM system_config WHERE config_key = ?", (key,))
+    row = cursor.fetchone()
+    return row[0] if row else default
+
+
+def parse_windows(text):
+    """
+    Membaca jendela registrasi 'min-max=waktu; ...' menjadi daftar (min, max, waktu buka)
+    - Semester tunggal boleh ditulis tanpa rentang ('8=...')
+    - Melempar ValueError jika format salah
+    """
+    windows = []
+    for part in text.split(';'):
+        part = part.strip()
+        if not part:
+            continue
+        cohort, opens_at = (item.strip() for item in part.split('=', 1))
+        low, _, high = cohort.partition('-')
+        datetime.strptime(opens_at, TIME_FORMAT)
+        windows.append((int(low), int(high or low), opens_at))
+    return sorted(windows, key=lambda window: window[2])
+
+
+def registration_opens_at(cursor, semester):
+    """
+    Waktu buka registrasi untuk semester mahasiswa ('' = sudah/selalu dibuka)
+    - Semester yang tidak tercakup jendela mana pun ikut jendela terakhir
+    """
+    windows = parse_windows(_config(cursor, 'registration_windows'))
+    if not windows:
+        return ''
+    for low, high, opens_at in windows:
+        if low <= semester <= high:
+            return opens_at
+    return windows[-1][2]
+
+
+def registration_status(cursor, semester, now=None):
+    """
+    Mengecek jendela registrasi untuk semester mahasiswa
+    - Mengembalikan (terbuka, pesan); pesan kosong jika terbuka
+    """
+    now = now or datetime.now().strftime(TIME_FORMAT)
+    opens_at = registration_opens_at(cursor, semester)
+    end = _config(cursor, 'registration_end')
+    if opens_at and now < opens_at:
+        return False, f"Registrasi untuk mahasiswa semester {semester} dibuka pada {opens_at}"
+    if end and now > end:
+        return False, f"Registrasi sudah ditutup pada {end}"
+    return True, ''
+
+
+class TokenBucket:
+    """
+    Token bucket: laju rata-rata `rate` per detik dengan ledakan hingga `burst`
+    - take() mengambil satu token dan mengembalikan 0, atau lama tunggu (detik)
+      sampai token berikutnya tersedia
+    """
+
+    def __init__(self, rate, burst):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self):
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0
+        return (1 - self.tokens) / self.rate
+
+
+class AdmissionController:
+    """
+    Pengendali penerimaan di depan penulis database
+    - Setiap permintaan masuk antrian milik kuncinya (mis. ID mahasiswa); giliran
+      berputar round-robin antar kunci sehingga adil
+    - Permintaan di kepala antrian berjalan jika ada token dan slot in-flight
+    - Thread-safe; aman dipanggil dari thread GUI maupun thread pekerja
+    - Antrian hanya berlaku di dalam proses ini (lihat docstring modul)
+    """
+
+    def __init__(self, rate=ADMISSION_RATE, burst=ADMISSION_BURST,
+                 max_in_flight=ADMISSION_MAX_IN_FLIGHT, timeout=ADMISSION_TIMEOUT):
+        self.bucket = TokenBucket(rate, burst)
+        self.max_in_flight = max(int(max_in_flight), 1)
+        self.timeout = timeout
+        self.condition = threading.Condition()
+        self.queues = OrderedDict()   # kunci -> deque tiket
+        self.depth = 0
+        self.max_depth = 0
+        self.in_flight = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.recent = deque()         # waktu penerimaan dalam RATE_WINDOW terakhir
+        self.total_wait = 0.0
+        self.created = time.monotonic()
+
+    @classmethod
+    def from_config(cls, cursor):
+        """Membuat pengendali dari system_config (admission_rate, admission_burst, ...)"""
+        def number(key, default):
+            try:
+                return float(_config(cursor, key, default))
+            except ValueError:
+                return default
+        return cls(number('admission_rate', ADMISSION_RATE),
+                   number('admission_burst', ADMISSION_BURST),
+                   number('admission_max_in_flight', ADMISSION_MAX_IN_FLIGHT),
+                   number('admission_timeout', ADMISSION_TIMEOUT))
+
+    def _is_next(self, ticket):
+        key = next(iter(self.queues))
+        return self.queues[key][0] is ticket
+
+    def _remove(self, key, ticket, rotate=True):
+        waiting = self.queues[key]
+        waiting.remove(ticket)
+        if waiting:
+            # Kunci yang baru mendapat giliran pindah ke belakang (round-robin)
+            if rotate:
+                self.queues.move_to_end(key)
+        else:
+            del self.queues[key]
+        self.depth -= 1
+
+    def admit(self, key, timeout=None):
+        """
+        Menunggu giliran tanpa menjalankan apa pun
+        - Melempar AdmissionTimeout jika giliran tidak didapat dalam batas tunggu
+        - Setelah berhasil, satu slot in-flight terpakai sampai release() dipanggil
+        """
+        ticket = object()
+        started = time.monotonic()
+        deadline = started + (self.timeout if timeout is None else timeout)
+        with self.condition:
+            self.queues.setdefault(key, deque()).append(ticket)
+            self.depth += 1
+            self.max_depth = max(self.max_depth, self.depth)
+            while True:
+                wait = None
+                if self._is_next(ticket) and self.in_flight < self.max_in_flight:
+                    wait = self.bucket.take()
+                    if wait == 0:
+                        break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._remove(key, ticket, rotate=False)
+                    self.rejected += 1
+                    self.condition.notify_all()
+                    raise AdmissionTimeout("Antrian registrasi sedang penuh, silakan coba lagi")
+                self.condition.wait(min(wait, remaining) if wait else remaining)
+            self._remove(key, ticket)
+            self.in_flight += 1
+            now = time.monotonic()
+            self.admitted += 1
+            self.total_wait += now - started
+            self.recent.append(now)
+            self.condition.notify_all()
+
+    def release(self):
+        """Mengembalikan slot in-flight yang didapat lewat admit()"""
+        with self.condition:
+            self.in_flight -= 1
+            self.condition.notify_all()
+
+    def run(self, key, action, timeout=None):
+        """
+        Menjalankan action() setelah mendapat giliran (menunggu di thread pemanggil)
+        - Melempar AdmissionTimeout jika giliran tidak didapat dalam batas tunggu
+        - Mengembalikan hasil action()
+        """
+        self.admit(key, timeout)
+        try:
+            return action()
+        finally:
+            self.release()
+
+    def stats(self):
+        """Ringkasan untuk admin: kedalaman antrian, laju penerimaan, dan jumlah ditolak"""
+        with self.condition:
+            now = time.monotonic()
+            while self.recent and now - self.recent[0] > RATE_WINDOW:
+                self.recent.popleft()
+            return {
+                'depth': self.depth,
+                'max_depth': self.max_depth,
+                'in_flight': self.in_flight,
+                'admitted': self.admitted,
+                'rejected': self.rejected,
+                'rate': len(self.recent) / max(min(RATE_WINDOW, now - self.created), 1.0),
+                'avg_wait': self.total_wait / self.admitted if self.admitted else 0.0,
+            }
+
+
+def format_stats(stats):
+    """Memformat statistik penerimaan menjadi satu baris"""
+    return (f"Antrian: {stats['depth']} (maks {stats['max_depth']}), berjalan {stats['in_flight']}, "
+            f"diterima {stats['admitted']} ({stats['rate']:.1f}/detik), ditolak {stats['rejected']}, "
+            f"rata-rata tunggu {stats['avg_wait'] * 1000:.0f} ms")
+
+
+def main():
+    """Menampilkan jendela registrasi dan mensimulasikan lonjakan pendaftaran"""
+    parser = argparse.ArgumentParser(description="Jendela registrasi dan kontrol penerimaan KRS")
+    parser.add_argument('--database', help="Lokasi database: file, 'memory[:nama[=file]]', atau 'tmpfs:file' "
+                                           "(default: variabel KRS_DATABASE atau krs_database.db)")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    subparsers.add_parser('windows', help="Tampilkan waktu buka registrasi per semester")
+
+    simulate_parser = subparsers.add_parser('simulate', help="Simulasi lonjakan permintaan tulis (database sementara)")
+    simulate_parser.add_argument('--clients', type=int, default=200, help="Jumlah thread klien")
+    simulate_parser.add_argument('--rate', type=float, default=ADMISSION_RATE)
+    simulate_parser.add_argument('--burst', type=int, default=ADMISSION_BURST)
+
+    args = parser.parse_args()
+
+    if args.command == 'windows':
+        storage = database.open_storage(args.database)
+        conn = storage.connect()
+        try:
+            database.init_database(conn)
+            conn.commit()
+            cursor = conn.cursor()
+            for semester in range(1, 9):
+                opens_at = registration_opens_at(cursor, semester)
+                print(f"Semester {semester}: {opens_at or 'sudah dibuka'}")
+            end = _config(cursor, 'registration_end')
+            print(f"Registrasi ditutup: {end or '-'}")
+        finally:
+            conn.close()
+            storage.close()
+        return
+
+    # Setiap klien menulis satu baris lewat koneksinya sendiri ke database uji sementara
+    controller = AdmissionController(args.rate, args.burst)
+    handle, probe_path = tempfile.mkstemp(suffix='.db')
+    os.close(handle)
+    setup = sqlite3.connect(probe_path)
+    setup.execute("CREATE TABLE admission_probe (client INTEGER, written_at REAL)")
+    setup.commit()
+    setup.close()
+
+    def client(number):
+        conn = sqlite3.connect(probe_path, timeout=30)
+        try:
+            def write():
+                conn.execute("INSERT INTO admission_probe VALUES (?, ?)", (number, time.time()))
+                conn.commit()
+            controller.run(number, write, timeout=60)
+        finally:
+            conn.close()
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client, args=(number,)) for number in range(args.clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    print(format_stats(controller.stats()))
+    print(f"Selesai dalam {time.perf_counter() - started:.2f} detik")
+    os.remove(probe_path)
+
+
+if __name__ == "__main__":
+    main()
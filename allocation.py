@@ -0,0 +1,465 @@
+"""
+Modul alokasi kursi batch berbasis preferensi
+- Mahasiswa mengirim daftar mata kuliah berperingkat selama jendela preferensi
+- Solver membagi kursi dalam satu kali jalan dengan deferred acceptance
+  (mahasiswa "melamar" sesuai peringkat, mata kuliah menahan pelamar
+  berprioritas tertinggi sampai kuota habis)
+- Batas kapasitas, max_credits mahasiswa, prasyarat, dan bentrok jadwal
+  selalu dipatuhi; mata kuliah berkelas paralel dialokasikan per kelas dengan
+  jadwal dan kapasitas kelasnya
+- Hasil disimpan sekaligus dalam satu transaksi beserta alasan preferensi
+  yang tidak terpenuhi untuk setiap mahasiswa
+"""
+import argparse
+import csv
+import heapq
+import random
+import time
+from collections import deque
+from datetime import datetime
+
+import database
+import events
+from jadwal import bentrok, parse_jadwal
+import models
+import prerequisites
+
+# Lokasi default database utama
+DATABASE_PATH = 'krs_database.db'
+
+# Status hasil alokasi per preferensi
+STATUS_DITERIMA = 'diterima'
+STATUS_DITOLAK = 'tidak terpenuhi'
+
+
+class AllocationError(Exception):
+    """Kesalahan saat mengirim preferensi atau menjalankan alokasi"""
+
+
+def init_schema(cursor):
+    """
+    Membuat tabel preferensi dan hasil alokasi
+    - course_preferences: daftar mata kuliah berperingkat per mahasiswa
+    - allocation_results: hasil alokasi terakhir beserta alasannya
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS course_preferences (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,    -- ID unik preferensi
+            student_id INTEGER NOT NULL,             -- ID mahasiswa
+            course_id INTEGER NOT NULL,              -- ID mata kuliah
+            peringkat INTEGER NOT NULL,              -- Peringkat (1 = paling diinginkan)
+            submitted_at TEXT NOT NULL,              -- Waktu pengiriman
+            FOREIGN KEY (student_id) REFERENCES students (id),
+            FOREIGN KEY (course_id) REFERENCES courses (id),
+            UNIQUE(student_id, course_id)            -- Satu mata kuliah sekali per mahasiswa
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS allocation_results (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,    -- ID unik hasil
+            student_id INTEGER NOT NULL,             -- ID mahasiswa
+            course_id INTEGER NOT NULL,              -- ID mata kuliah
+            peringkat INTEGER NOT NULL,              -- Peringkat preferensi
+            status TEXT NOT NULL,                    -- diterima / tidak terpenuhi
+            alasan TEXT,                             -- Alasan jika tidak terpenuhi
+            run_at TEXT NOT NULL                     -- Waktu alokasi dijalankan
+        )
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_course_preferences_student
+        ON course_preferences (student_id, peringkat)
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_allocation_results_student
+        ON allocation_results (student_id, peringkat)
+    """)
+
+
+def _config(cursor, key):
+    """Membaca satu nilai system_config (string kosong jika tidak ada)"""
+    cursor.execute("SELECT config_value FROM system_config WHERE config_key = ?", (key,))
+    row = cursor.fetchone()
+    return row[0] if row else ''
+
+
+def preference_window(cursor):
+    """Mengambil jendela preferensi (start, end) dari system_config; '' = tanpa batas"""
+    return (_config(cursor, 'preference_window_start'),
+            _config(cursor, 'preference_window_end'))
+
+
+def is_window_open(cursor, now=None):
+    """
+    Mengecek apakah jendela pengiriman preferensi sedang dibuka
+    - Format waktu 'YYYY-MM-DD HH:MM:SS' sehingga bisa dibandingkan sebagai teks
+    """
+    now = now or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    start, end = preference_window(cursor)
+    return (not start or start <= now) and (not end or now <= end)
+
+
+def _replace_preferences(cursor, student_id, course_ids, submitted_at):
+    """Mengganti seluruh preferensi satu mahasiswa (tanpa commit)"""
+    if len(set(course_ids)) != len(course_ids):
+        raise AllocationError("Mata kuliah tidak boleh muncul dua kali dalam preferensi")
+    cursor.execute("DELETE FROM course_preferences WHERE student_id = ?", (student_id,))
+    cursor.executemany("""
+        INSERT INTO course_preferences (student_id, course_id, peringkat, submitted_at)
+        VALUES (?, ?, ?, ?)
+    """, [(student_id, course_id, rank, submitted_at)
+          for rank, course_id in enumerate(course_ids, 1)])
+
+
+def submit_preferences(conn, student_id, course_ids):
+    """
+    Menyimpan daftar preferensi berperingkat milik satu mahasiswa
+    - Daftar lama diganti seluruhnya dalam satu transaksi
+    - Hanya bisa dilakukan saat jendela preferensi dibuka
+    """
+    cursor = conn.cursor()
+    if not is_window_open(cursor):
+        raise AllocationError("Jendela pengisian preferensi sedang ditutup")
+
+    try:
+        _replace_preferences(cursor, student_id, course_ids,
+                             datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def get_preferences(cursor, student_id):
+    """Mengambil ID mata kuliah preferensi mahasiswa sesuai urutan peringkat"""
+    cursor.execute("""
+        SELECT course_id FROM course_preferences
+        WHERE student_id = ? ORDER BY peringkat
+    """, (student_id,))
+    return [row[0] for row in cursor.fetchall()]
+
+
+def solve(students, courses, preferences, seed=None, ineligible=frozenset()):
+    """
+    Menjalankan alokasi deferred acceptance banyak-ke-banyak
+    - students: {id: (semester, max_credits, sks_terpakai, [(course_id, slot)] aktif)}
+    - courses: {id: (kode_mk, sks, slot, semester, sisa_kursi, kelas)}; kelas berisi
+      (section_id, slot, sisa_kursi) untuk mata kuliah berkelas paralel (kosong jika tidak)
+    - preferences: {student_id: [course_id, ...]} urut peringkat
+    - ineligible: pasangan (student_id, course_id) yang prasyaratnya belum terpenuhi
+    - Prioritas mata kuliah: semester mahasiswa lebih tinggi, lalu undian acak
+    - Mata kuliah berkelas paralel: mahasiswa ditempatkan di kelas paling sepi yang
+      tidak bentrok dengan jadwalnya; kuota dan penggeseran berlaku per kelas
+    - Mengembalikan (assignment {student_id: {course_id: section_id atau None}},
+      reasons {(student_id, course_id): alasan})
+    """
+    lottery = random.Random(seed)
+    priority = {student_id: (students[student_id][0], lottery.random())
+                for student_id in preferences if student_id in students}
+
+    held = {student_id: {} for student_id in priority}
+    load = {student_id: students[student_id][2] for student_id in priority}
+    proposed = {student_id: set() for student_id in priority}
+    enrolled = {student_id: {course_id for course_id, _ in students[student_id][3]}
+                for student_id in priority}
+    # Unit kuota per mata kuliah: (section_id, slot, kursi); mata kuliah tanpa kelas paralel satu unit
+    units = {course_id: course[5] or ((None, course[2], course[4]),) for course_id, course in courses.items()}
+    # Heap per unit: pelamar berprioritas terendah ada di puncak heap
+    admitted = {(course_id, unit[0]): [] for course_id, course_units in units.items() for unit in course_units}
+    reasons = {}
+
+    def conflict_with(student_id, slot):
+        """Mencari mata kuliah yang bentrok jadwal dengan slot"""
+        if slot is None:
+            return None
+        for course_id, other_slot in students[student_id][3]:
+            if bentrok(slot, other_slot):
+                return course_id
+        for course_id, (_, other_slot) in held[student_id].items():
+            if bentrok(slot, other_slot):
+                return course_id
+        return None
+
+    queue = deque(priority)
+    while queue:
+        student_id = queue.popleft()
+        semester, max_credits = students[student_id][0], students[student_id][1]
+
+        for course_id in preferences[student_id]:
+            if course_id in proposed[student_id] or course_id in held[student_id]:
+                continue
+            if course_id not in courses:
+                reasons[(student_id, course_id)] = "mata kuliah tidak ditemukan"
+                continue
+            if course_id in enrolled[student_id]:
+                reasons[(student_id, course_id)] = "sudah terdaftar di mata kuliah ini"
+                continue
+
+            kode_mk, sks, _, course_semester, _, _ = courses[course_id]
+            if (student_id, course_id) in ineligible:
+                reasons[(student_id, course_id)] = "prasyarat belum terpenuhi"
+                continue
+            if course_semester % 2 != semester % 2:
+                reasons[(student_id, course_id)] = "tidak ditawarkan untuk semester ganjil/genap mahasiswa"
+                continue
+            if load[student_id] + sks > max_credits:
+                reasons[(student_id, course_id)] = f"melebihi batas SKS ({load[student_id] + sks} > {max_credits})"
+                continue
+            free = [unit for unit in units[course_id] if conflict_with(student_id, unit[1]) is None]
+            if not free:
+                clash = conflict_with(student_id, units[course_id][0][1])
+                reasons[(student_id, course_id)] = f"bentrok jadwal dengan {courses[clash][0]}"
+                continue
+
+            # Melamar ke mata kuliah; setiap pasangan hanya sekali melamar
+            proposed[student_id].add(course_id)
+            free = [unit for unit in free if unit[2] > 0]
+            if not free:
+                reasons[(student_id, course_id)] = "kuota penuh"
+                continue
+            # Kelas yang masih punya kursi (paling sepi), atau kelas yang pemegang terlemahnya paling rendah
+            open_units = [unit for unit in free if len(admitted[(course_id, unit[0])]) < unit[2]]
+            if open_units:
+                unit = min(open_units, key=lambda unit: len(admitted[(course_id, unit[0])]))
+            else:
+                unit = min(free, key=lambda unit: admitted[(course_id, unit[0])][0][0])
+                heap = admitted[(course_id, unit[0])]
+                if heap[0][0] >= priority[student_id]:
+                    reasons[(student_id, course_id)] = "kuota penuh (kalah prioritas)"
+                    continue
+                # Menggeser pelamar berprioritas terendah
+                _, evicted = heapq.heappop(heap)
+                del held[evicted][course_id]
+                load[evicted] -= sks
+                reasons[(evicted, course_id)] = "kuota penuh (tergeser mahasiswa berprioritas lebih tinggi)"
+                queue.append(evicted)
+
+            heapq.heappush(admitted[(course_id, unit[0])], (priority[student_id], student_id))
+            held[student_id][course_id] = (unit[0], unit[1])
+            load[student_id] += sks
+            reasons.pop((student_id, course_id), None)
+
+    return {student_id: {course_id: section_id for course_id, (section_id, _) in chosen.items()}
+            for student_id, chosen in held.items()}, reasons
+
+
+def load_problem(cursor):
+    """
+    Memuat data masalah alokasi dengan beberapa query besar
+    - Mengembalikan (students, courses, preferences, ineligible) untuk solve()
+    """
+    # Mata kuliah yang dipensiunkan dari katalog tidak punya kursi untuk dialokasikan;
+    # kursi yang sedang ditahan di keranjang (belum kedaluwarsa) tidak ikut dibagikan
+    cursor.execute(f"""
+        SELECT id, kode_mk, sks, jadwal, semester,
+               CASE WHEN retired_at IS NULL THEN kapasitas - terisi - {models.LIVE_HELD.format(course='courses')}
+                    ELSE 0 END
+        FROM courses
+    """)
+    rows = cursor.fetchall()
+
+    # Kelas paralel: jadwal dan sisa kursi per kelas (modul sections)
+    sections = {}
+    cursor.execute("""
+        SELECT course_id, id, jadwal, kapasitas - terisi FROM course_sections ORDER BY course_id, kelas
+    """)
+    for course_id, section_id, jadwal, seats in cursor.fetchall():
+        sections.setdefault(course_id, []).append([section_id, parse_jadwal(jadwal), seats])
+    for course_id, _, _, _, _, seats in rows:
+        # Kursi yang ditahan keranjang (tingkat mata kuliah) dikurangkan dari kelas terlonggar
+        units = sections.get(course_id, [])
+        excess = sum(unit[2] for unit in units) - max(seats, 0)
+        while units and excess > 0:
+            max(units, key=lambda unit: unit[2])[2] -= 1
+            excess -= 1
+        sections[course_id] = tuple(tuple(unit) for unit in units)
+    courses = {course_id: (kode_mk, sks, parse_jadwal(jadwal), semester, seats,
+                           sections[course_id] if seats > 0 else ())
+               for course_id, kode_mk, sks, jadwal, semester, seats in rows}
+
+    preferences = {}
+    cursor.execute("SELECT student_id, course_id FROM course_preferences ORDER BY student_id, peringkat")
+    for student_id, course_id in cursor.fetchall():
+        preferences.setdefault(student_id, []).append(course_id)
+
+    students = {}
+    cursor.execute("""
+        SELECT id, semester, max_credits FROM students
+        WHERE id IN (SELECT DISTINCT student_id FROM course_preferences)
+          AND lulus_at IS NULL
+    """)
+    for student_id, semester, max_credits in cursor.fetchall():
+        students[student_id] = [semester, max_credits, 0, []]
+
+    # Jadwal enrollment aktif mengikuti kelas paralelnya jika ada
+    cursor.execute("""
+        SELECT e.student_id, e.course_id, cs.jadwal FROM enrollments e
+        LEFT JOIN course_sections cs ON cs.id = e.section_id
+        WHERE e.status = 'aktif'
+          AND e.student_id IN (SELECT DISTINCT student_id FROM course_preferences)
+    """)
+    for student_id, course_id, section_jadwal in cursor.fetchall():
+        if student_id in students and course_id in courses:
+            slot = parse_jadwal(section_jadwal) if section_jadwal else courses[course_id][2]
+            students[student_id][2] += courses[course_id][1]
+            students[student_id][3].append((course_id, slot))
+
+    students = {student_id: tuple(values) for student_id, values in students.items()}
+
+    cursor.execute(f"""
+        SELECT p.student_id, p.course_id FROM course_preferences p
+        JOIN courses c ON c.id = p.course_id
+        WHERE NOT {prerequisites.eligible_condition('c', 'p.student_id')}
+    """)
+    ineligible = set(cursor.fetchall())
+    return students, courses, preferences, ineligible
+
+
+def run_allocation(conn, seed=None, dry_run=False):
+    """
+    Menjalankan alokasi batch dan menyimpan hasilnya sekaligus
+    - Semua enrollment baru, penambahan terisi, dan hasil alokasi ditulis
+      dalam satu transaksi dengan executemany
+    - Kunci tulis (BEGIN IMMEDIATE) diambil sebelum data dimuat, sehingga kursi
+      yang dihitung solve() tidak bisa diambil klien lain sebelum hasilnya disimpan
+    - dry_run=True hanya menghitung hasil tanpa menyimpan
+    - Mengembalikan ringkasan (jumlah mahasiswa, kursi, preferensi tidak terpenuhi, durasi)
+    """
+    started = time.perf_counter()
+    cursor = conn.cursor()
+    if not dry_run:
+        if conn.in_transaction:
+            conn.commit()
+        cursor.execute("BEGIN IMMEDIATE")
+    try:
+        students, courses, preferences, ineligible = load_problem(cursor)
+        loaded = time.perf_counter()
+        assignment, reasons = solve(students, courses, preferences, seed, ineligible)
+        solved = time.perf_counter()
+    except Exception:
+        if not dry_run:
+            conn.rollback()
+        raise
+
+    run_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    new_enrollments = []
+    results = []
+    filled = {}
+    for student_id, course_ids in preferences.items():
+        for rank, course_id in enumerate(course_ids, 1):
+            if course_id in assignment.get(student_id, ()):
+                new_enrollments.append((student_id, course_id, run_at, assignment[student_id][course_id]))
+                filled[course_id] = filled.get(course_id, 0) + 1
+                results.append((student_id, course_id, rank, STATUS_DITERIMA, None, run_at))
+            else:
+                reason = reasons.get((student_id, course_id), "mahasiswa tidak ditemukan")
+                results.append((student_id, course_id, rank, STATUS_DITOLAK, reason, run_at))
+
+    if not dry_run:
+        try:
+            events.set_context(cursor, 'alokasi')
+            # Kelas paralel pilihan solver ikut disimpan (terisi kelas dijaga trigger)
+            cursor.executemany("""
+                INSERT INTO enrollments (student_id, course_id, tanggal_daftar, status, section_id)
+                VALUES (?, ?, ?, 'aktif', ?)
+            """, new_enrollments)
+            cursor.executemany("UPDATE courses SET terisi = terisi + ? WHERE id = ?",
+                               [(count, course_id) for course_id, count in filled.items()])
+            cursor.execute("DELETE FROM allocation_results")
+            cursor.executemany("""
+                INSERT INTO allocation_results
+                    (student_id, course_id, peringkat, status, alasan, run_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, results)
+            events.clear_context(cursor)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+    return {
+        'students': len(preferences),
+        'preferences': len(results),
+        'assigned': len(new_enrollments),
+        'unmet': len(results) - len(new_enrollments),
+        'load_time': loaded - started,
+        'solve_time': solved - loaded,
+        'total_time': time.perf_counter() - started,
+        'dry_run': dry_run,
+    }
+
+
+def format_summary(summary):
+    """Memformat ringkasan alokasi menjadi teks"""
+    text = "Simulasi alokasi (tidak disimpan)" if summary['dry_run'] else "Alokasi batch selesai"
+    text += (f": {summary['students']} mahasiswa, {summary['preferences']} preferensi, "
+             f"{summary['assigned']} kursi diberikan, {summary['unmet']} tidak terpenuhi "
+             f"(muat {summary['load_time']:.2f}s, solver {summary['solve_time']:.2f}s, "
+             f"total {summary['total_time']:.2f}s)")
+    return text
+
+
+def import_preferences(conn, path):
+    """
+    Mengimpor preferensi dari file CSV berkolom nim, kode_mk, peringkat
+    - Preferensi setiap mahasiswa di file menggantikan preferensi lamanya
+    - Seluruh file diimpor dalam satu transaksi
+    - Mengembalikan jumlah mahasiswa yang diimpor
+    """
+    cursor = conn.cursor()
+    cursor.execute("SELECT nim, id FROM students")
+    student_ids = dict(cursor.fetchall())
+    cursor.execute("SELECT kode_mk, id FROM courses")
+    course_ids = dict(cursor.fetchall())
+
+    ranked = {}
+    with open(path, newline='', encoding='utf-8') as handle:
+        for row in csv.DictReader(handle):
+            student_id = student_ids.get(row['nim'].strip())
+            course_id = course_ids.get(row['kode_mk'].strip())
+            if student_id is None or course_id is None:
+                raise AllocationError(f"NIM atau kode MK tidak dikenal: {row['nim']} / {row['kode_mk']}")
+            ranked.setdefault(student_id, []).append((int(row['peringkat']), course_id))
+
+    submitted_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    try:
+        for student_id, items in ranked.items():
+            _replace_preferences(cursor, student_id,
+                                 [course_id for _, course_id in sorted(items)], submitted_at)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return len(ranked)
+
+
+def main():
+    """Menjalankan alokasi batch dari command line tanpa GUI"""
+    parser = argparse.ArgumentParser(description="Alokasi kursi batch berbasis preferensi")
+    parser.add_argument('--database', help="Lokasi database: file, 'memory[:nama[=file]]', atau 'tmpfs:file' "
+                                           "(default: variabel KRS_DATABASE atau krs_database.db)")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser('run', help="Jalankan alokasi")
+    run_parser.add_argument('--dry-run', action='store_true', help="Hitung tanpa menyimpan")
+    run_parser.add_argument('--seed', type=int, help="Seed undian prioritas")
+
+    import_parser = subparsers.add_parser('import', help="Impor preferensi dari CSV")
+    import_parser.add_argument('csv', help="File CSV berkolom nim,kode_mk,peringkat")
+
+    args = parser.parse_args()
+    storage = database.open_storage(args.database)
+    conn = storage.connect()
+    try:
+        database.init_database(conn)
+        conn.commit()
+        if args.command == 'run':
+            print(format_summary(run_allocation(conn, args.seed, args.dry_run)))
+        elif args.command == 'import':
+            print(f"Preferensi {import_preferences(conn, args.csv)} mahasiswa diimpor")
+    finally:
+        conn.close()
+        storage.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+"""
+Modul analitik kapasitas dan permintaan KRS
+- Tabel ringkasan (summary) yang diperbarui secara inkremental oleh trigger
+  setiap kali ada pendaftaran, pembatalan, atau perubahan mata kuliah
+- Dashboard cukup membaca tabel ringkasan tanpa GROUP BY atas seluruh data
+- Mata kuliah yang dipensiunkan katalog (retired_at) tidak dihitung dalam
+  keterisian per semester maupun per mata kuliah
+"""
+
+# Interval refresh dashboard analitik (milidetik)
+ANALYTICS_REFRESH_MS = 3000
+
+# Trigger yang menjaga tabel ringkasan tetap sinkron
+SUMMARY_TRIGGERS = [
+    # Keterisian per semester mengikuti perubahan pada tabel courses (hanya yang masih ditawarkan)
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_stat_course_insert AFTER INSERT ON courses
+    WHEN NEW.retired_at IS NULL
+    BEGIN
+        INSERT INTO stat_semester (semester, jumlah_mk, kapasitas, terisi)
+        VALUES (NEW.semester, 1, NEW.kapasitas, NEW.terisi)
+        ON CONFLICT(semester) DO UPDATE SET
+            jumlah_mk = jumlah_mk + 1,
+            kapasitas = kapasitas + excluded.kapasitas,
+            terisi = terisi + excluded.terisi;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_stat_course_delete AFTER DELETE ON courses
+    WHEN OLD.retired_at IS NULL
+    BEGIN
+        UPDATE stat_semester SET
+            jumlah_mk = jumlah_mk - 1,
+            kapasitas = kapasitas - OLD.kapasitas,
+            terisi = terisi - OLD.terisi
+        WHERE semester = OLD.semester;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_stat_course_update
+    AFTER UPDATE OF semester, kapasitas, terisi, retired_at ON courses
+    BEGIN
+        UPDATE stat_semester SET
+            jumlah_mk = jumlah_mk - 1,
+            kapasitas = kapasitas - OLD.kapasitas,
+            terisi = terisi - OLD.terisi
+        WHERE semester = OLD.semester AND OLD.retired_at IS NULL;
+        INSERT INTO stat_semester (semester, jumlah_mk, kapasitas, terisi)
+        SELECT NEW.semester, 1, NEW.kapasitas, NEW.terisi WHERE NEW.retired_at IS NULL
+        ON CONFLICT(semester) DO UPDATE SET
+            jumlah_mk = jumlah_mk + 1,
+            kapasitas = kapasitas + excluded.kapasitas,
+            terisi = terisi + excluded.terisi;
+    END
+    """,
+    # Perubahan SKS mata kuliah mengubah beban semua mahasiswa yang mengambilnya
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_stat_course_sks AFTER UPDATE OF sks ON courses
+    WHEN OLD.sks <> NEW.sks
+    BEGIN
+        UPDATE stat_student_load SET total_sks = total_sks + (NEW.sks - OLD.sks)
+        WHERE student_id IN (SELECT student_id FROM enrollments
+                             WHERE course_id = NEW.id AND status = 'aktif');
+    END
+    """,
+    # Beban SKS per mahasiswa mengikuti KRS aktif
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_stat_student_insert AFTER INSERT ON students
+    BEGIN
+        INSERT OR IGNORE INTO stat_student_load (student_id, total_sks, jumlah_mk)
+        VALUES (NEW.id, 0, 0);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_stat_student_delete AFTER DELETE ON students
+    BEGIN
+        DELETE FROM stat_student_load WHERE student_id = OLD.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_stat_enroll_insert AFTER INSERT ON enrollments
+    WHEN NEW.status = 'aktif'
+    BEGIN
+        INSERT INTO stat_student_load (student_id, total_sks, jumlah_mk)
+        VALUES (NEW.student_id, (SELECT sks FROM courses WHERE id = NEW.course_id), 1)
+        ON CONFLICT(student_id) DO UPDATE SET
+            total_sks = total_sks + excluded.total_sks,
+            jumlah_mk = jumlah_mk + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_stat_enroll_delete AFTER DELETE ON enrollments
+    WHEN OLD.status = 'aktif'
+    BEGIN
+        UPDATE stat_student_load SET
+            total_sks = total_sks - (SELECT sks FROM courses WHERE id = OLD.course_id),
+            jumlah_mk = jumlah_mk - 1
+        WHERE student_id = OLD.student_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_stat_enroll_close AFTER UPDATE OF status ON enrollments
+    WHEN OLD.status = 'aktif' AND NEW.status <> 'aktif'
+    BEGIN
+        UPDATE stat_student_load SET
+            total_sks = total_sks - (SELECT sks FROM courses WHERE id = OLD.course_id),
+            jumlah_mk = jumlah_mk - 1
+        WHERE student_id = OLD.student_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_stat_enroll_reopen AFTER UPDATE OF status ON enrollments
+    WHEN OLD.status <> 'aktif' AND NEW.status = 'aktif'
+    BEGIN
+        INSERT INTO stat_student_load (student_id, total_sks, jumlah_mk)
+        VALUES (NEW.student_id, (SELECT sks FROM courses WHERE id = NEW.course_id), 1)
+        ON CONFLICT(student_id) DO UPDATE SET
+            total_sks = total_sks + excluded.total_sks,
+            jumlah_mk = jumlah_mk + 1;
+    END
+    """,
+    # Distribusi beban SKS mengikuti perubahan beban per mahasiswa
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_stat_load_insert AFTER INSERT ON stat_student_load
+    BEGIN
+        INSERT INTO stat_sks_distribution (total_sks, jumlah_mahasiswa)
+        VALUES (NEW.total_sks, 1)
+        ON CONFLICT(total_sks) DO UPDATE SET jumlah_mahasiswa = jumlah_mahasiswa + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_stat_load_update AFTER UPDATE OF total_sks ON stat_student_load
+    WHEN OLD.total_sks <> NEW.total_sks
+    BEGIN
+        UPDATE stat_sks_distribution SET jumlah_mahasiswa = jumlah_mahasiswa - 1
+        WHERE total_sks = OLD.total_sks;
+        DELETE FROM stat_sks_distribution WHERE total_sks = OLD.total_sks AND jumlah_mahasiswa <= 0;
+        INSERT INTO stat_sks_distribution (total_sks, jumlah_mahasiswa)
+        VALUES (NEW.total_sks, 1)
+        ON CONFLICT(total_sks) DO UPDATE SET jumlah_mahasiswa = jumlah_mahasiswa + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_stat_load_delete AFTER DELETE ON stat_student_load
+    BEGIN
+        UPDATE stat_sks_distribution SET jumlah_mahasiswa = jumlah_mahasiswa - 1
+        WHERE total_sks = OLD.total_sks;
+        DELETE FROM stat_sks_distribution WHERE total_sks = OLD.total_sks AND jumlah_mahasiswa <= 0;
+    END
+    """,
+]
+
+
+def init_schema(cursor):
+    """
+    Membuat tabel ringkasan analitik beserta trigger dan indeksnya
+    - stat_semester: jumlah mata kuliah, kapasitas, dan terisi per semester
+    - stat_student_load: total SKS aktif per mahasiswa
+    - stat_sks_distribution: jumlah mahasiswa per total SKS
+    - Jika tabel ringkasan baru dibuat, isinya dihitung sekali dari data yang ada
+    - Database lama: trigger keterisian dan indeks idx_courses_fill yang masih
+      menghitung mata kuliah pensiun dibuat ulang, lalu ringkasan dihitung ulang
+    """
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'stat_semester'")
+    is_new = cursor.fetchone() is None
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS stat_semester (
+            semester INTEGER PRIMARY KEY,            -- Semester mata kuliah
+            jumlah_mk INTEGER NOT NULL DEFAULT 0,    -- Jumlah mata kuliah
+            kapasitas INTEGER NOT NULL DEFAULT 0,    -- Total kapasitas
+            terisi INTEGER NOT NULL DEFAULT 0        -- Total kursi terisi
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS stat_student_load (
+            student_id INTEGER PRIMARY KEY,          -- ID mahasiswa
+            total_sks INTEGER NOT NULL DEFAULT 0,    -- Total SKS aktif
+            jumlah_mk INTEGER NOT NULL DEFAULT 0     -- Jumlah mata kuliah aktif
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS stat_sks_distribution (
+            total_sks INTEGER PRIMARY KEY,           -- Total SKS aktif
+            jumlah_mahasiswa INTEGER NOT NULL        -- Jumlah mahasiswa dengan total tersebut
+        )
+    """)
+
+    # Trigger/indeks versi lama belum menyaring retired_at
+    cursor.execute("""
+        SELECT type, name FROM sqlite_master
+        WHERE name IN ('trg_stat_course_insert', 'trg_stat_course_delete',
+                       'trg_stat_course_update', 'idx_courses_fill')
+          AND sql NOT LIKE '%retired_at%'
+    """)
+    outdated = cursor.fetchall()
+    for kind, name in outdated:
+        cursor.execute(f"DROP {kind.upper()} {name}")
+
+    # Indeks ekspresi parsial untuk mengurutkan mata kuliah aktif berdasarkan tingkat keterisian
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_courses_fill
+        ON courses (CAST(terisi AS REAL) / kapasitas) WHERE retired_at IS NULL
+    """)
+
+    for trigger in SUMMARY_TRIGGERS:
+        cursor.execute(trigger)
+
+    if is_new or outdated:
+        rebuild_summaries(cursor)
+
+
+def rebuild_summaries(cursor):
+    """
+    Menghitung ulang seluruh tabel ringkasan dari data dasar
+    - Hanya diperlukan saat migrasi atau pemeriksaan konsistensi
+    - Operasi normal memperbarui ringkasan secara inkremental lewat trigger
+    """
+    cursor.execute("DELETE FROM stat_semester")
+    cursor.execute("""
+        INSERT INTO stat_semester (semester, jumlah_mk, kapasitas, terisi)
+        SELECT semester, COUNT(*), SUM(kapasitas), SUM(terisi)
+        FROM courses WHERE retired_at IS NULL GROUP BY semester
+    """)
+
+    # Trigger distribusi ikut berjalan saat stat_student_load diisi ulang
+    cursor.execute("DELETE FROM stat_student_load")
+    cursor.execute("DELETE FROM stat_sks_distribution")
+    cursor.execute("""
+        INSERT INTO stat_student_load (student_id, total_sks, jumlah_mk)
+        SELECT s.id, COALESCE(SUM(c.sks), 0), COUNT(c.id)
+        FROM students s
+        LEFT JOIN enrollments e ON e.student_id = s.id AND e.status = 'aktif'
+        LEFT JOIN courses c ON c.id = e.course_id
+        GROUP BY s.id
+    """)
+
+
+def semester_fill(cursor):
+    """Mengambil keterisian per semester: (semester, jumlah_mk, kapasitas, terisi, persen)"""
+    cursor.execute("""
+        SELECT semester, jumlah_mk, kapasitas, terisi,
+               CASE WHEN kapasitas > 0 THEN terisi * 100.0 / kapasitas ELSE 0 END
+        FROM stat_semester WHERE jumlah_mk > 0 ORDER BY semester
+    """)
+    return cursor.fetchall()
+
+
+def course_fill(cursor, limit=-1):
+    """
+    Mengambil keterisian per mata kuliah yang masih ditawarkan, paling penuh lebih dulu
+    - Urutan dibaca dari indeks parsial idx_courses_fill
+    - limit membatasi jumlah baris (-1 = semua)
+    """
+    cursor.execute("""
+        SELECT id, kode_mk, nama_mk, semester, kapasitas, terisi,
+               CAST(terisi AS REAL) / kapasitas AS fill
+        FROM courses
+        WHERE retired_at IS NULL
+        ORDER BY CAST(terisi AS REAL) / kapasitas DESC
+        LIMIT ?
+    """, (limit,))
+    return cursor.fetchall()
+
+
+def oversubscribed_count(cursor):
+    """Menghitung mata kuliah yang masih ditawarkan dan terisi melebihi kapasitas"""
+    cursor.execute("""
+        SELECT COUNT(*) FROM courses
+        WHERE retired_at IS NULL AND CAST(terisi AS REAL) / kapasitas > 1
+    """)
+    return cursor.fetchone()[0]
+
+
+def sks_distribution(cursor):
+    """Mengambil distribusi beban SKS: (total_sks, jumlah_mahasiswa)"""
+    cursor.execute("""
+        SELECT total_sks, jumlah_mahasiswa FROM stat_sks_distribution
+        WHERE jumlah_mahasiswa > 0 ORDER BY total_sks
+    """)
+    return cursor.fetchall()
@@ -0,0 +1,277 @@
+"""
+Modul audit kepatuhan KRS seluruh mahasiswa
+- Mahasiswa aktif (belum lulus) dibagi menjadi potongan rentang ID dan diperiksa
+  paralel di process pool; setiap proses membuka koneksi read-only sendiri
+- Pemeriksaan per mahasiswa: total SKS di bawah min_credits_per_semester atau di
+  atas max_credits, jadwal bentrok, dan mata kuliah yang tidak sesuai jenis
+  semester (ganjil/genap) mahasiswa
+- Pemeriksaan per mata kuliah: peserta aktif melebihi kapasitas
+- Hasil berupa daftar pengecualian terurut (NIM, jenis) yang bisa disimpan ke CSV
+- Audit tidak pernah menulis ke database: struktur tabel yang belum mutakhir
+  dilaporkan (AuditError) dan harus dimigrasi lebih dulu (cli.py migrate)
+"""
+import argparse
+import csv
+import multiprocessing
+import os
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import database
+import enrollment
+from jadwal import parse_jadwal
+
+# Lokasi default database KRS
+DATABASE_PATH = 'krs_database.db'
+
+# Ukuran minimum potongan mahasiswa per tugas dan jumlah tugas per proses
+MIN_CHUNK = 1000
+CHUNKS_PER_WORKER = 4
+
+# Jenis pengecualian (urutan dipakai untuk mengurutkan laporan)
+SKS_KURANG = 'sks_kurang'
+SKS_LEBIH = 'sks_lebih'
+BENTROK = 'bentrok'
+PARITAS = 'paritas'
+KELAS_PENUH = 'kelas_penuh'
+EXCEPTION_LABELS = {
+    SKS_KURANG: "SKS kurang",
+    SKS_LEBIH: "SKS lebih",
+    BENTROK: "Jadwal bentrok",
+    PARITAS: "Semester tidak sesuai",
+    KELAS_PENUH: "Kelas melebihi kapasitas",
+}
+EXCEPTION_ORDER = {kind: index for index, kind in enumerate(EXCEPTION_LABELS)}
+
+# Tabel dan kolom yang dibaca audit (dipakai untuk memeriksa versi struktur database)
+REQUIRED_COLUMNS = {
+    'students': ('nim', 'nama', 'semester', 'max_credits', 'lulus_at'),
+    'courses': ('kode_mk', 'sks', 'semester', 'jadwal', 'kapasitas'),
+    'enrollments': ('student_id', 'course_id', 'status', 'section_id'),
+    'course_sections': ('course_id', 'kelas', 'jadwal', 'kapasitas'),
+    'system_config': ('config_key', 'config_value'),
+}
+
+
+class AuditError(Exception):
+    """Database tidak bisa diaudit (tidak ditemukan atau strukturnya belum mutakhir)"""
+
+
+def connect_readonly(path):
+    """
+    Membuka koneksi hanya-baca
+    - File biasa dibuka dengan mode=ro; URI (mis. database in-memory) dibuka apa adanya
+    """
+    if path.startswith('file:'):
+        conn = database.connect(path)
+    else:
+        conn = database.connect(f"file:{path}?mode=ro")
+    conn.execute("PRAGMA query_only = 1")
+    return conn
+
+
+def check_schema(cursor):
+    """
+    Memastikan struktur database memuat semua tabel dan kolom yang dibaca audit
+    - Melempar AuditError berisi daftar yang hilang; tidak ada migrasi yang dijalankan
+    """
+    missing = []
+    for table, columns in REQUIRED_COLUMNS.items():
+        existing = {row[1] for row in cursor.execute(f"PRAGMA table_info({table})")}
+        if not existing:
+            missing.append(f"tabel {table}")
+        else:
+            missing.extend(f"{table}.{column}" for column in columns if column not in existing)
+    if missing:
+        raise AuditError(f"Struktur database belum mutakhir ({', '.join(missing)}); "
+                         f"jalankan 'python cli.py migrate' terlebih dahulu")
+
+
+def _chunks(ids, workers):
+    """Membagi daftar ID terurut menjadi rentang (id_awal, id_akhir)"""
+    size = max(MIN_CHUNK, -(-len(ids) // (workers * CHUNKS_PER_WORKER)))
+    return [(ids[start], ids[min(start + size, len(ids)) - 1]) for start in range(0, len(ids), size)]
+
+
+def audit_chunk(task):
+    """
+    Memeriksa mahasiswa dengan ID dalam satu rentang (dijalankan di proses pekerja)
+    - task: (path, id_awal, id_akhir, min_credits)
+    - Mengembalikan daftar (nim, nama, jenis, keterangan)
+    """
+    path, first_id, last_id, min_credits = task
+    conn = connect_readonly(path)
+    try:
+        rows = conn.execute("""
+            SELECT s.id, s.nim, s.nama, s.semester, s.max_credits,
+                   c.kode_mk, c.sks, c.semester, COALESCE(cs.jadwal, c.jadwal)
+            FROM students s
+            LEFT JOIN enrollments e ON e.student_id = s.id AND e.status = 'aktif'
+            LEFT JOIN courses c ON c.id = e.course_id
+            LEFT JOIN course_sections cs ON cs.id = e.section_id
+            WHERE s.id BETWEEN ? AND ? AND s.lulus_at IS NULL
+            ORDER BY s.id
+        """, (first_id, last_id)).fetchall()
+    finally:
+        conn.close()
+
+    exceptions = []
+    index = 0
+    while index < len(rows):
+        student_id, nim, nama, semester, max_credits = rows[index][:5]
+        courses = []
+        while index < len(rows) and rows[index][0] == student_id:
+            if rows[index][5] is not None:
+                courses.append(rows[index][5:])
+            index += 1
+
+        total = sum(course[1] for course in courses)
+        if total > max_credits:
+            exceptions.append((nim, nama, SKS_LEBIH, f"{total} SKS melebihi batas {max_credits}"))
+        elif total < min_credits:
+            exceptions.append((nim, nama, SKS_KURANG, f"{total} SKS kurang dari minimal {min_credits}"))
+
+        for kode_mk, _, course_semester, _ in courses:
+            if course_semester % 2 != semester % 2:
+                exceptions.append((nim, nama, PARITAS,
+                                   f"{kode_mk} (semester {course_semester}) untuk mahasiswa semester {semester}"))
+
+        # Sapuan per hari: kelas yang mulai sebelum kelas terakhir selesai berarti bentrok
+        slots = sorted((slot, kode_mk, jadwal) for kode_mk, _, _, jadwal in courses
+                       for slot in [parse_jadwal(jadwal)] if slot)
+        latest = None
+        for slot, kode_mk, jadwal in slots:
+            if latest and latest[0][0] == slot[0] and slot[1] < latest[0][2]:
+                exceptions.append((nim, nama, BENTROK, f"{kode_mk} ({jadwal}) dengan {latest[1]} ({latest[2]})"))
+            if latest is None or latest[0][0] != slot[0] or slot[2] > latest[0][2]:
+                latest = (slot, kode_mk, jadwal)
+    return exceptions
+
+
+def overfilled_courses(cursor):
+    """Mata kuliah yang peserta aktifnya melebihi kapasitas: (kode_mk, keterangan)"""
+    cursor.execute("""
+        SELECT c.kode_mk, c.kapasitas, COUNT(e.id) AS aktif
+        FROM courses c
+        JOIN enrollments e ON e.course_id = c.id AND e.status = 'aktif'
+        GROUP BY c.id
+        HAVING aktif > c.kapasitas
+        ORDER BY c.kode_mk
+    """)
+    return [(kode_mk, f"{aktif} peserta aktif, kapasitas {kapasitas}")
+            for kode_mk, kapasitas, aktif in cursor.fetchall()]
+
+
+def overfilled_sections(cursor):
+    """Kelas paralel yang peserta aktifnya melebihi kapasitas kelas: (kode_mk-kelas, keterangan)"""
+    cursor.execute("""
+        SELECT c.kode_mk, cs.kelas, cs.kapasitas, COUNT(e.id) AS aktif
+        FROM course_sections cs
+        JOIN courses c ON c.id = cs.course_id
+        JOIN enrollments e ON e.section_id = cs.id AND e.status = 'aktif'
+        GROUP BY cs.id
+        HAVING aktif > cs.kapasitas
+        ORDER BY c.kode_mk, cs.kelas
+    """)
+    return [(f"{kode_mk}-{kelas}", f"{aktif} peserta aktif, kapasitas kelas {kapasitas}")
+            for kode_mk, kelas, kapasitas, aktif in cursor.fetchall()]
+
+
+def run_audit(path, workers=None):
+    """
+    Menjalankan audit kepatuhan untuk semua mahasiswa aktif
+    - workers: jumlah proses (default jumlah CPU); database in-memory selalu
+      diperiksa di proses ini karena tidak terlihat oleh proses lain
+    - Mengembalikan dict: students, exceptions [(nim, nama, jenis, keterangan)],
+      courses [(kode_mk, keterangan)], min_credits, workers, elapsed
+    """
+    started = time.perf_counter()
+    conn = connect_readonly(path)
+    try:
+        cursor = conn.cursor()
+        check_schema(cursor)
+        min_credits = enrollment.min_credits(cursor)
+        ids = [row[0] for row in cursor.execute("SELECT id FROM students WHERE lulus_at IS NULL ORDER BY id")]
+        courses = overfilled_courses(cursor) + overfilled_sections(cursor)
+    finally:
+        conn.close()
+
+    workers = max(1, workers or os.cpu_count() or 1)
+    if 'mode=memory' in path:
+        workers = 1
+    tasks = [(path, first_id, last_id, min_credits) for first_id, last_id in _chunks(ids, workers)]
+    if workers == 1 or len(tasks) == 1:
+        workers = 1
+        results = map(audit_chunk, tasks)
+    else:
+        # spawn: proses pekerja tidak mewarisi state GUI/thread dari proses induk
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks)),
+                                 mp_context=multiprocessing.get_context('spawn')) as pool:
+            results = list(pool.map(audit_chunk, tasks))
+
+    exceptions = [exception for result in results for exception in result]
+    exceptions.sort(key=lambda exception: (exception[0], EXCEPTION_ORDER[exception[2]], exception[3]))
+    return {
+        'students': len(ids),
+        'exceptions': exceptions,
+        'courses': courses,
+        'min_credits': min_credits,
+        'workers': workers,
+        'elapsed': time.perf_counter() - started,
+    }
+
+
+def write_csv(result, path):
+    """Menyimpan pengecualian audit ke CSV (nim, nama, jenis, keterangan)"""
+    with open(path, 'w', newline='', encoding='utf-8') as handle:
+        writer = csv.writer(handle)
+        writer.writerow(['nim', 'nama', 'jenis', 'keterangan'])
+        for kode_mk, detail in result['courses']:
+            writer.writerow(['', kode_mk, KELAS_PENUH, detail])
+        writer.writerows(result['exceptions'])
+
+
+def format_result(result, limit=None):
+    """Menyusun laporan audit; limit membatasi jumlah baris pengecualian mahasiswa"""
+    counts = {}
+    for exception in result['exceptions']:
+        counts[exception[2]] = counts.get(exception[2], 0) + 1
+    students = len({exception[0] for exception in result['exceptions']})
+    lines = [f"Audit {result['students']} mahasiswa aktif ({result['workers']} proses, "
+             f"{result['elapsed']:.2f} detik): {students} mahasiswa bermasalah, "
+             f"{len(result['courses'])} kelas melebihi kapasitas",
+             "Ringkasan: " + (", ".join(f"{EXCEPTION_LABELS[kind]} {counts[kind]}"
+                                        for kind in EXCEPTION_LABELS if kind in counts) or "-")]
+    for kode_mk, detail in result['courses']:
+        lines.append(f"{kode_mk:<12} {EXCEPTION_LABELS[KELAS_PENUH]:<22} {detail}")
+    shown = result['exceptions'] if limit is None else result['exceptions'][:limit]
+    for nim, nama, kind, detail in shown:
+        lines.append(f"{nim:<12} {EXCEPTION_LABELS[kind]:<22} {nama[:24]:<24} {detail}")
+    if len(shown) < len(result['exceptions']):
+        lines.append(f"... {len(result['exceptions']) - len(shown)} baris lainnya (simpan ke CSV untuk daftar lengkap)")
+    return '\n'.join(lines)
+
+
+def main():
+    """Menjalankan audit kepatuhan KRS dari command line"""
+    parser = argparse.ArgumentParser(description="Audit kepatuhan KRS seluruh mahasiswa (paralel)")
+    parser.add_argument('--database', default=DATABASE_PATH, help="File database KRS")
+    parser.add_argument('--workers', type=int, help="Jumlah proses (default: jumlah CPU)")
+    parser.add_argument('--output', help="Simpan daftar pengecualian ke CSV")
+    args = parser.parse_args()
+
+    # Database hanya dibaca; struktur lama tidak dimigrasi di sini
+    try:
+        result = run_audit(args.database, args.workers)
+    except AuditError as e:
+        raise SystemExit(f"Audit dibatalkan: {e}")
+    except sqlite3.OperationalError as e:
+        raise SystemExit(f"Database {args.database} tidak bisa dibuka read-only: {e}")
+    if args.output:
+        write_csv(result, args.output)
+    print(format_result(result))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+"""
+Modul backup online (hot backup) database KRS
+- Menyalin database dengan API backup SQLite (Connection.backup) sedikit demi
+  sedikit per langkah halaman dengan jeda, sehingga penulis lain tidak tertahan
+- Membuat snapshot terjadwal dengan batas jumlah simpanan (retensi)
+- Memverifikasi setiap snapshot dengan PRAGMA integrity_check
+- Memulihkan (restore) database dari snapshot
+"""
+import argparse
+import os
+import sqlite3
+import time
+from datetime import datetime
+
+import database
+
+# Lokasi default database utama dan folder snapshot
+DATABASE_PATH = 'krs_database.db'
+BACKUP_DIR = 'backups'
+
+# Jumlah halaman per langkah backup dan jeda (detik) antar langkah
+BACKUP_STEP_PAGES = 64
+BACKUP_STEP_SLEEP = 0.05
+
+# Batas pengulangan backup (mode journal biasa) sebelum jeda antar langkah dihilangkan
+MAX_BACKUP_RESTARTS = 3
+
+# Jumlah snapshot yang disimpan (snapshot tertua dihapus)
+BACKUP_RETENTION = 10
+
+# Awalan nama file snapshot
+SNAPSHOT_PREFIX = 'krs_'
+
+
+class BackupError(Exception):
+    """Kesalahan saat membuat, memverifikasi, atau memulihkan snapshot"""
+
+
+def verify_snapshot(path):
+    """
+    Memeriksa integritas file snapshot
+    - Menjalankan PRAGMA integrity_check pada koneksi read-only
+    - Mengembalikan daftar pesan ('ok' jika snapshot sehat)
+    """
+    snapshot = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        return [row[0] for row in snapshot.execute("PRAGMA integrity_check")]
+    finally:
+        snapshot.close()
+
+
+def hot_backup(source_path, dest_path, pages=BACKUP_STEP_PAGES, sleep=BACKUP_STEP_SLEEP,
+               progress=None):
+    """
+    Menyalin database yang sedang dipakai ke file lain
+    - Menggunakan koneksi sendiri sehingga bisa dijalankan di thread terpisah
+    - Setiap langkah menyalin `pages` halaman lalu jeda `sleep` detik agar
+      transaksi penulis lain bisa masuk di antara langkah
+    - Pada mode WAL, satu transaksi baca dipertahankan selama backup sehingga
+      salinan konsisten dan tidak diulang walaupun ada penulisan
+    - Pada mode journal biasa, penulisan dari koneksi lain membuat SQLite
+      mengulang backup; setelah MAX_BACKUP_RESTARTS kali jeda dihilangkan
+      agar backup tetap selesai
+    - progress(status, remaining, total) dipanggil setelah setiap langkah
+    """
+    source = sqlite3.connect(source_path, uri=source_path.startswith('file:'))
+    dest = sqlite3.connect(dest_path)
+    state = {'remaining': None, 'restarts': 0}
+
+    def step_done(status, remaining, total):
+        # Sisa halaman yang bertambah berarti backup diulang dari awal
+        if state['remaining'] is not None and remaining > state['remaining']:
+            state['restarts'] += 1
+        state['remaining'] = remaining
+        if progress:
+            progress(status, remaining, total)
+        if remaining and state['restarts'] < MAX_BACKUP_RESTARTS:
+            time.sleep(sleep)
+
+    try:
+        if source.execute("PRAGMA journal_mode").fetchone()[0].lower() == 'wal':
+            source.execute("BEGIN")
+            source.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+        source.backup(dest, pages=pages, progress=step_done)
+    finally:
+        dest.close()
+        source.close()
+    return state['restarts']
+
+
+def snapshot_name(moment=None):
+    """
+    Membuat nama file snapshot berdasarkan waktu
+    - Resolusi mikrodetik agar backup manual dan terjadwal pada detik yang sama
+      tidak saling menimpa; urutan nama tetap sama dengan urutan waktu
+    """
+    moment = moment or datetime.now()
+    return f"{SNAPSHOT_PREFIX}{moment.strftime('%Y%m%d_%H%M%S_%f')}.db"
+
+
+def _unique_path(backup_dir):
+    """Path snapshot baru yang belum dipakai (sufiks angka jika nama waktu sudah ada)"""
+    base = snapshot_name()[:-len('.db')]
+    path = os.path.join(backup_dir, base + '.db')
+    counter = 1
+    while os.path.exists(path) or os.path.exists(path + '.tmp'):
+        path = os.path.join(backup_dir, f"{base}_{counter}.db")
+        counter += 1
+    return path
+
+
+def list_snapshots(backup_dir=BACKUP_DIR):
+    """Mengambil daftar path snapshot, terbaru lebih dulu"""
+    if not os.path.isdir(backup_dir):
+        return []
+    names = [name for name in os.listdir(backup_dir)
+             if name.startswith(SNAPSHOT_PREFIX) and name.endswith('.db')]
+    return [os.path.join(backup_dir, name) for name in sorted(names, reverse=True)]
+
+
+def prune_snapshots(backup_dir=BACKUP_DIR, retention=BACKUP_RETENTION):
+    """
+    Menghapus snapshot lama di luar batas retensi
+    - Mengembalikan daftar path yang dihapus
+    """
+    removed = list_snapshots(backup_dir)[max(retention, 1):]
+    for path in removed:
+        os.remove(path)
+    return removed
+
+
+def create_snapshot(source_path=DATABASE_PATH, backup_dir=BACKUP_DIR,
+                    retention=BACKUP_RETENTION, pages=BACKUP_STEP_PAGES,
+                    sleep=BACKUP_STEP_SLEEP):
+    """
+    Membuat snapshot baru yang sudah terverifikasi
+    - Backup ditulis ke file sementara, diverifikasi, lalu diganti nama
+      sehingga folder backup tidak pernah berisi snapshot setengah jadi
+    - Snapshot lama di luar batas retensi dihapus
+    - Mengembalikan informasi snapshot (path, ukuran, durasi, jumlah langkah)
+    """
+    os.makedirs(backup_dir, exist_ok=True)
+    path = _unique_path(backup_dir)
+    temp_path = path + '.tmp'
+
+    steps = []
+    started = time.perf_counter()
+    try:
+        restarts = hot_backup(source_path, temp_path, pages, sleep,
+                              progress=lambda status, remaining, total: steps.append(total))
+        messages = verify_snapshot(temp_path)
+        if messages != ['ok']:
+            raise BackupError("Snapshot rusak: " + "; ".join(messages[:5]))
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+    removed = prune_snapshots(backup_dir, retention)
+    return {
+        'path': path,
+        'size': os.path.getsize(path),
+        'pages': steps[-1] if steps else 0,
+        'steps': len(steps),
+        'restarts': restarts,
+        'elapsed': time.perf_counter() - started,
+        'removed': removed,
+    }
+
+
+def restore_snapshot(snapshot_path, conn):
+    """
+    Memulihkan isi database dari snapshot ke koneksi yang sedang terbuka
+    - Snapshot diverifikasi lebih dulu; snapshot rusak tidak dipulihkan
+    - Seluruh halaman disalin dalam satu langkah sehingga restore bersifat atomik
+    """
+    messages = verify_snapshot(snapshot_path)
+    if messages != ['ok']:
+        raise BackupError("Snapshot rusak: " + "; ".join(messages[:5]))
+
+    if conn.in_transaction:
+        conn.commit()
+    snapshot = sqlite3.connect(f"file:{snapshot_path}?mode=ro", uri=True)
+    try:
+        snapshot.backup(conn)
+    finally:
+        snapshot.close()
+
+
+def format_snapshot(info):
+    """Memformat informasi snapshot menjadi satu baris log"""
+    text = (f"Snapshot {info['path']} ({info['size'] / 1024:.1f} KB, {info['pages']} halaman, "
+            f"{info['steps']} langkah, {info['restarts']} kali diulang, "
+            f"{info['elapsed']:.2f} detik) - integrity_check ok")
+    if info['removed']:
+        text += f"; {len(info['removed'])} snapshot lama dihapus"
+    return text
+
+
+def main():
+    """Menjalankan backup, verifikasi, dan restore dari command line"""
+    parser = argparse.ArgumentParser(description="Backup online database KRS")
+    parser.add_argument('--database', help="Lokasi database: file, 'memory[:nama[=file]]', atau 'tmpfs:file' "
+                                           "(default: variabel KRS_DATABASE atau krs_database.db)")
+    parser.add_argument('--dir', default=BACKUP_DIR, help="Folder snapshot")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    snapshot_parser = subparsers.add_parser('snapshot', help="Buat satu snapshot")
+    snapshot_parser.add_argument('--retention', type=int, default=BACKUP_RETENTION)
+
+    schedule_parser = subparsers.add_parser('schedule', help="Buat snapshot berkala")
+    schedule_parser.add_argument('--interval', type=float, default=60, help="Interval (menit)")
+    schedule_parser.add_argument('--retention', type=int, default=BACKUP_RETENTION)
+
+    subparsers.add_parser('list', help="Tampilkan daftar snapshot")
+
+    verify_parser = subparsers.add_parser('verify', help="Periksa integritas snapshot")
+    verify_parser.add_argument('snapshot')
+
+    restore_parser = subparsers.add_parser('restore', help="Pulihkan database dari snapshot")
+    restore_parser.add_argument('snapshot')
+
+    args = parser.parse_args()
+
+    if args.command == 'list':
+        for path in list_snapshots(args.dir):
+            print(f"{path}  {os.path.getsize(path) / 1024:.1f} KB")
+        return
+    if args.command == 'verify':
+        print("\n".join(verify_snapshot(args.snapshot)))
+        return
+
+    # Snapshot dan restore memakai lokasi penyimpanan yang sama dengan aplikasi
+    storage = database.open_storage(args.database)
+    try:
+        if args.command == 'snapshot':
+            print(format_snapshot(create_snapshot(storage.path, args.dir, args.retention)))
+        elif args.command == 'schedule':
+            while True:
+                print(format_snapshot(create_snapshot(storage.path, args.dir, args.retention)))
+                time.sleep(args.interval * 60)
+        elif args.command == 'restore':
+            conn = storage.connect()
+            try:
+                restore_snapshot(args.snapshot, conn)
+            finally:
+                conn.close()
+            print(f"Database {storage.describe()} dipulihkan dari {args.snapshot}")
+    finally:
+        storage.close()
+
+
+if __name__ == "__main__":
+    main()
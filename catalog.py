@@ -0,0 +1,313 @@
+"""
+Modul sinkronisasi katalog mata kuliah berbasis selisih (diff)
+- Katalog baru (file CSV, editor, atau katalog default) dibandingkan per kode_mk
+  dengan isi tabel courses: ditambah, diubah, atau dipensiunkan
+- Hanya baris yang berbeda yang ditulis, dalam satu transaksi; jumlah terisi
+  dan enrollment yang ada tidak disentuh
+- Mata kuliah yang dipensiunkan tidak dihapus (riwayat KRS tetap utuh), hanya
+  diberi retired_at sehingga tidak lagi ditawarkan
+- Jadwal dan kapasitas mata kuliah berkelas paralel dikelola per kelas (modul
+  sections), sehingga sinkronisasi katalog tidak menimpanya
+"""
+import argparse
+import csv
+import io
+from datetime import datetime
+
+import database
+import lecturers
+
+# Lokasi default database KRS
+DATABASE_PATH = 'krs_database.db'
+
+# Kolom katalog (urutan sama dengan CSV import/export mata kuliah)
+CATALOG_COLUMNS = ('kode_mk', 'nama_mk', 'sks', 'semester', 'jadwal', 'dosen', 'kapasitas')
+REQUIRED_COLUMNS = CATALOG_COLUMNS[:6]
+DEFAULT_KAPASITAS = 40
+
+# Mata kuliah yang punya kelas paralel (jadwal dan kapasitasnya diatur per kelas)
+_HAS_SECTIONS = "SELECT 1 FROM course_sections WHERE course_id = courses.id"
+
+# Katalog mata kuliah default untuk semua semester (1-8)
+DEFAULT_CATALOG = [
+    # SEMESTER 1 (GANJIL)
+    ('IF101', 'Pemrograman Dasar', 3, 1, 'Senin 08:00-10:30', 'Dr. Ahmad Fauzi', 40),
+    ('MTK101', 'Matematika Diskrit', 3, 1, 'Selasa 10:30-13:00', 'Prof. Siti Aminah', 35),
+    ('IF103', 'Algoritma dan Pemrograman', 4, 1, 'Rabu 13:00-16:30', 'Dr. Rudi Hartono', 38),
+    ('IF105', 'Logika Informatika', 3, 1, 'Kamis 08:00-10:30', 'Dr. Budi Santoso', 35),
+    ('ENG101', 'Bahasa Inggris', 2, 1, 'Jumat 10:00-11:30', 'Ms. Lisa Johnson', 45),
+    ('MTK103', 'Kalkulus I', 3, 1, 'Senin 13:00-15:30', 'Prof. Maria Sari', 40),
+    ('CHAR101', 'Pancasila', 2, 1, 'Selasa 08:00-09:30', 'Dr. Agus Setiawan', 50),
+
+    # SEMESTER 2 (GENAP)
+    ('IF102', 'Pemrograman Berorientasi Objek', 4, 2, 'Senin 08:00-11:30', 'Dr. Ahmad Fauzi', 38),
+    ('MTK102', 'Kalkulus II', 3, 2, 'Selasa 13:00-15:30', 'Prof. Maria Sari', 35),
+    ('IF104', 'Sistem Digital', 3, 2, 'Rabu 10:00-12:30', 'Dr. Eko Prasetyo', 32),
+    ('IF106', 'Arsitektur Komputer', 3, 2, 'Kamis 13:00-15:30', 'Prof. Indra Gunawan', 30),
+    ('MTK104', 'Statistika dan Probabilitas', 3, 2, 'Jumat 08:00-10:30', 'Dr. Rina Susanti', 40),
+    ('ENG102', 'Bahasa Inggris Teknik', 2, 2, 'Selasa 10:00-11:30', 'Ms. Lisa Johnson', 45),
+    ('CHAR102', 'Kewarganegaraan', 2, 2, 'Rabu 08:00-09:30', 'Dr. Sari Dewi', 50),
+
+    # SEMESTER 3 (GANJIL)
+    ('IF201', 'Struktur Data', 4, 3, 'Senin 08:00-11:30', 'Dr. Budi Santoso', 35),
+    ('IF203', 'Basis Data', 3, 3, 'Selasa 13:00-15:30', 'Dr. Maya Sari', 32),
+    ('IF205', 'Pemrograman Web', 3, 3, 'Rabu 10:00-12:30', 'Dr. Lisa Putri', 35),
+    ('IF207', 'Sistem Operasi', 3, 3, 'Kamis 08:00-10:30', 'Prof. Rudi Hartanto', 30),
+    ('MTK201', 'Matematika Numerik', 3, 3, 'Jumat 13:00-15:30', 'Dr. Wawan Kurniawan', 35),
+    ('IF209', 'Jaringan Komputer Dasar', 3, 3, 'Senin 13:00-15:30', 'Dr. Fitri Handayani', 32),
+
+    # SEMESTER 4 (GENAP)
+    ('IF202', 'Algoritma dan Kompleksitas', 3, 4, 'Senin 10:00-12:30', 'Dr. Rudi Hartono', 30),
+    ('IF204', 'Pemrograman Mobile', 3, 4, 'Selasa 08:00-10:30', 'Dr. Lisa Putri', 35),
+    ('IF206', 'Manajemen Basis Data', 3, 4, 'Rabu 13:00-15:30', 'Dr. Maya Sari', 32),
+    ('IF208', 'Interaksi Manusia Komputer', 3, 4, 'Kamis 10:00-12:30', 'Dr. Nina Kusuma', 35),
+    ('IF210', 'Teori Bahasa dan Otomata', 3, 4, 'Jumat 08:00-10:30', 'Prof. Siti Aminah', 28),
+    ('MTK202', 'Riset Operasi', 3, 4, 'Senin 13:00-15:30', 'Dr. Wawan Kurniawan', 30),
+
+    # SEMESTER 5 (GANJIL)
+    ('IF301', 'Rekayasa Perangkat Lunak', 4, 5, 'Senin 08:00-11:30', 'Prof. Andi Wijaya', 30),
+    ('IF303', 'Jaringan Komputer', 3, 5, 'Selasa 13:00-15:30', 'Dr. Fitri Handayani', 32),
+    ('IF305', 'Komputer Grafik', 3, 5, 'Rabu 10:00-12:30', 'Dr. Eko Prasetyo', 28),
+    ('IF307', 'Sistem Informasi', 3, 5, 'Kamis 08:00-10:30', 'Dr. Nina Kusuma', 35),
+    ('IF309', 'Pemrograman Game', 3, 5, 'Jumat 13:00-15:30', 'Dr. David Chen', 25),
+    ('IF311', 'Data Mining', 3, 5, 'Senin 13:00-15:30', 'Dr. Sarah Abdullah', 30),
+
+    # SEMESTER 6 (GENAP)
+    ('IF302', 'Manajemen Proyek TI', 3, 6, 'Senin 10:00-12:30', 'Prof. Andi Wijaya', 35),
+    ('IF304', 'Keamanan Jaringan', 3, 6, 'Selasa 08:00-10:30', 'Dr. Fitri Handayani', 28),
+    ('IF306', 'Pengembangan Aplikasi Web', 3, 6, 'Rabu 13:00-15:30', 'Dr. Lisa Putri', 32),
+    ('IF308', 'Business Intelligence', 3, 6, 'Kamis 10:00-12:30', 'Dr. Maya Sari', 30),
+    ('IF310', 'Cloud Computing', 3, 6, 'Jumat 08:00-10:30', 'Dr. Indra Gunawan', 28),
+    ('IF312', 'Internet of Things', 3, 6, 'Senin 13:00-15:30', 'Dr. Eko Prasetyo', 25),
+
+    # SEMESTER 7 (GANJIL)
+    ('IF401', 'Kecerdasan Buatan', 4, 7, 'Senin 08:00-11:30', 'Prof. David Chen', 30),
+    ('IF403', 'Keamanan Sistem', 3, 7, 'Selasa 13:00-15:30', 'Dr. Sarah Abdullah', 28),
+    ('IF405', 'Pembelajaran Mesin', 3, 7, 'Rabu 10:00-12:30', 'Prof. David Chen', 25),
+    ('IF407', 'Sistem Terdistribusi', 3, 7, 'Kamis 08:00-10:30', 'Dr. Indra Gunawan', 30),
+    ('IF409', 'Visi Komputer', 3, 7, 'Jumat 13:00-15:30', 'Dr. Eko Prasetyo', 25),
+    ('IF411', 'Metodologi Penelitian', 2, 7, 'Senin 13:00-14:30', 'Prof. Andi Wijaya', 40),
+
+    # SEMESTER 8 (GENAP)
+    ('IF402', 'Skripsi', 6, 8, 'Konsultasi Individual', 'Tim Dosen Pembimbing', 50),
+    ('IF404', 'Kerja Praktek', 2, 8, 'Industri Partner', 'Tim Dosen Supervisor', 50),
+    ('IF406', 'Etika Profesi', 2, 8, 'Senin 10:00-11:30', 'Dr. Agus Setiawan', 45),
+    ('IF408', 'Technopreneurship', 3, 8, 'Selasa 08:00-10:30', 'Dr. Nina Kusuma', 35),
+    ('IF410', 'Seminar Hasil', 1, 8, 'Rabu 13:00-14:00', 'Tim Dosen Penguji', 40),
+    ('IF412', 'Proyek Akhir', 3, 8, 'Kamis 08:00-11:30', 'Tim Dosen Pembimbing', 30)
+]
+
+
+class CatalogError(Exception):
+    """Isi katalog tidak valid (kolom kurang, angka salah, kode ganda)"""
+
+
+def init_schema(cursor):
+    """Menambahkan kolom retired_at pada courses (NULL = masih ditawarkan)"""
+    cursor.execute("PRAGMA table_info(courses)")
+    if 'retired_at' not in [row[1] for row in cursor.fetchall()]:
+        cursor.execute("ALTER TABLE courses ADD COLUMN retired_at TEXT")
+
+
+def parse_catalog(text):
+    """
+    Membaca katalog dari teks CSV berkolom kode_mk, nama_mk, sks, semester, jadwal, dosen[, kapasitas]
+    - Mengembalikan daftar tuple sesuai CATALOG_COLUMNS
+    - Melempar CatalogError dengan nomor baris jika ada data yang tidak valid
+    """
+    reader = csv.DictReader(io.StringIO(text))
+    missing = [column for column in REQUIRED_COLUMNS if column not in (reader.fieldnames or [])]
+    if missing:
+        raise CatalogError(f"Kolom wajib tidak ada: {', '.join(missing)}")
+
+    catalog = []
+    seen = set()
+    for line, row in enumerate(reader, 2):
+        row = {key: (value or '').strip() for key, value in row.items() if key}
+        if not any(row.values()):
+            continue
+        kode_mk = row['kode_mk']
+        if not kode_mk or not row['nama_mk']:
+            raise CatalogError(f"Baris {line}: kode_mk dan nama_mk wajib diisi")
+        if kode_mk in seen:
+            raise CatalogError(f"Baris {line}: kode {kode_mk} muncul lebih dari sekali")
+        seen.add(kode_mk)
+        try:
+            sks, semester = int(row['sks']), int(row['semester'])
+            kapasitas = int(row.get('kapasitas') or DEFAULT_KAPASITAS)
+        except ValueError:
+            raise CatalogError(f"Baris {line}: sks, semester, dan kapasitas harus berupa angka")
+        catalog.append((kode_mk, row['nama_mk'], sks, semester, row['jadwal'], row['dosen'], kapasitas))
+    return catalog
+
+
+def read_catalog(path):
+    """Membaca katalog dari file CSV (lihat parse_catalog)"""
+    with open(path, newline='', encoding='utf-8') as handle:
+        return parse_catalog(handle.read())
+
+
+def format_catalog(cursor):
+    """Menyusun katalog aktif saat ini sebagai teks CSV (untuk diedit lalu disinkronkan)"""
+    cursor.execute(f"""
+        SELECT {', '.join(CATALOG_COLUMNS)} FROM courses
+        WHERE retired_at IS NULL ORDER BY semester, kode_mk
+    """)
+    output = io.StringIO()
+    writer = csv.writer(output, lineterminator='\n')
+    writer.writerow(CATALOG_COLUMNS)
+    writer.writerows(cursor.fetchall())
+    return output.getvalue()
+
+
+def diff_catalog(cursor, catalog, retire=True):
+    """
+    Membandingkan katalog baru dengan tabel courses berdasarkan kode_mk
+    - Mengembalikan dict berisi:
+      added: tuple katalog untuk kode baru
+      changed: (kode_mk, {kolom: (lama, baru)}, tuple baru) untuk kode yang isinya berbeda
+               atau yang sebelumnya dipensiunkan
+      retired: (kode_mk, terisi) untuk kode aktif yang tidak ada di katalog (jika retire)
+      over_capacity: (kode_mk, terisi, kapasitas baru) untuk kapasitas di bawah terisi
+      sectioned: (kode_mk, {kolom: (lama, baru)}) untuk jadwal/kapasitas mata kuliah
+                 berkelas paralel yang diabaikan (diatur per kelas lewat modul sections)
+    - Nama dosen yang dikenal dibandingkan sebagai nama tampilannya, sehingga beda
+      gelar ('Dr.' vs 'Prof.') tidak dianggap perubahan
+    """
+    names = lecturers.canonical_names(cursor, [course[5] for course in catalog])
+    catalog = [course[:5] + (names.get(course[5], course[5]),) + course[6:] for course in catalog]
+
+    cursor.execute(f"SELECT {', '.join(CATALOG_COLUMNS)}, terisi, retired_at FROM courses")
+    current = {row[0]: row for row in cursor.fetchall()}
+    cursor.execute(f"SELECT kode_mk FROM courses WHERE EXISTS ({_HAS_SECTIONS})")
+    with_sections = {row[0] for row in cursor.fetchall()}
+
+    added, changed, over_capacity, sectioned = [], [], [], []
+    for course in catalog:
+        old = current.get(course[0])
+        if old is None:
+            added.append(course)
+            continue
+        if course[0] in with_sections:
+            # Jadwal dan kapasitas mata kuliah berkelas paralel berasal dari kelasnya
+            skipped = {column: (old[index], course[index]) for index, column in ((4, 'jadwal'), (6, 'kapasitas'))
+                       if old[index] != course[index]}
+            if skipped:
+                sectioned.append((course[0], skipped))
+            course = course[:4] + (old[4],) + course[5:6] + (old[6],)
+        fields = {column: (old[index], course[index])
+                  for index, column in enumerate(CATALOG_COLUMNS) if old[index] != course[index]}
+        if old[-1] is not None:
+            fields['retired_at'] = (old[-1], None)
+        if fields:
+            changed.append((course[0], fields, course))
+        if course[6] < old[7]:
+            over_capacity.append((course[0], old[7], course[6]))
+
+    retired = []
+    if retire:
+        kode_baru = {course[0] for course in catalog}
+        retired = [(kode_mk, row[7]) for kode_mk, row in sorted(current.items())
+                   if kode_mk not in kode_baru and row[-1] is None]
+    return {'added': added, 'changed': changed, 'retired': retired, 'over_capacity': over_capacity,
+            'sectioned': sectioned}
+
+
+def apply_diff(conn, diff):
+    """
+    Menerapkan hasil diff_catalog dalam satu transaksi
+    - Hanya baris yang berubah yang ditulis; kolom terisi tidak ikut diubah
+    - Jadwal dan kapasitas mata kuliah berkelas paralel tidak pernah ditimpa,
+      walaupun diff disusun sebelum kelas paralelnya dibuat
+    - Mengembalikan jumlah baris courses yang tersentuh
+    """
+    cursor = conn.cursor()
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    try:
+        cursor.executemany(f"""
+            INSERT INTO courses ({', '.join(CATALOG_COLUMNS)}, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, [course + (now,) for course in diff['added']])
+        cursor.executemany(f"""
+            UPDATE courses SET nama_mk = ?, sks = ?, semester = ?, dosen = ?, retired_at = NULL,
+                               jadwal = CASE WHEN EXISTS ({_HAS_SECTIONS}) THEN jadwal ELSE ? END,
+                               kapasitas = CASE WHEN EXISTS ({_HAS_SECTIONS}) THEN kapasitas ELSE ? END
+            WHERE kode_mk = ?
+        """, [(course[1], course[2], course[3], course[5], course[4], course[6], kode_mk)
+              for kode_mk, _, course in diff['changed']])
+        cursor.executemany("UPDATE courses SET retired_at = ? WHERE kode_mk = ?",
+                           [(now, kode_mk) for kode_mk, _ in diff['retired']])
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return len(diff['added']) + len(diff['changed']) + len(diff['retired'])
+
+
+def sync_catalog(conn, catalog, retire=True, dry_run=False):
+    """
+    Menyinkronkan tabel courses dengan katalog baru
+    - retire=False: kode yang tidak ada di katalog dibiarkan (katalog parsial)
+    - dry_run=True: hanya menghitung diff tanpa menulis
+    - Mengembalikan hasil diff_catalog
+    """
+    diff = diff_catalog(conn.cursor(), catalog, retire)
+    if not dry_run:
+        apply_diff(conn, diff)
+    return diff
+
+
+def add_missing(conn, catalog):
+    """Menambahkan mata kuliah katalog yang belum ada tanpa mengubah yang sudah ada; mengembalikan jumlahnya"""
+    diff = diff_catalog(conn.cursor(), catalog, retire=False)
+    diff['changed'] = []
+    apply_diff(conn, diff)
+    return len(diff['added'])
+
+
+def format_diff(diff):
+    """Menyusun ringkasan diff katalog yang mudah dibaca"""
+    lines = [f"Ditambah: {len(diff['added'])}, diubah: {len(diff['changed'])}, "
+             f"dipensiunkan: {len(diff['retired'])}"]
+    for course in diff['added']:
+        lines.append(f"+ {course[0]} {course[1]} ({course[2]} SKS, semester {course[3]})")
+    for kode_mk, fields, _ in diff['changed']:
+        detail = ', '.join(f"{column}: {old} -> {new}" for column, (old, new) in fields.items())
+        lines.append(f"~ {kode_mk} {detail}")
+    for kode_mk, terisi in diff['retired']:
+        lines.append(f"- {kode_mk}" + (f" (masih {terisi} peserta aktif)" if terisi else ""))
+    for kode_mk, terisi, kapasitas in diff['over_capacity']:
+        lines.append(f"! {kode_mk}: kapasitas baru {kapasitas} di bawah terisi {terisi}")
+    for kode_mk, fields in diff['sectioned']:
+        detail = ', '.join(f"{column}: {old} -> {new}" for column, (old, new) in fields.items())
+        lines.append(f"? {kode_mk} berkelas paralel, diabaikan ({detail}); ubah lewat kelasnya")
+    return '\n'.join(lines)
+
+
+def main():
+    """Menyinkronkan katalog dari file CSV lewat command line"""
+    parser = argparse.ArgumentParser(description="Sinkronisasi katalog mata kuliah berbasis diff")
+    parser.add_argument('file', help="File CSV katalog")
+    parser.add_argument('--database', help="Lokasi database: file, 'memory[:nama[=file]]', atau 'tmpfs:file' "
+                                           "(default: variabel KRS_DATABASE atau krs_database.db)")
+    parser.add_argument('--dry-run', action='store_true', help="Tampilkan diff tanpa menyimpan")
+    parser.add_argument('--keep-missing', action='store_true',
+                        help="Jangan pensiunkan kode yang tidak ada di file")
+    args = parser.parse_args()
+
+    storage = database.open_storage(args.database)
+    conn = storage.connect()
+    try:
+        database.init_database(conn)
+        conn.commit()
+        diff = sync_catalog(conn, read_catalog(args.file), not args.keep_missing, args.dry_run)
+        print(format_diff(diff))
+        if args.dry_run:
+            print("(dry run: tidak ada perubahan disimpan)")
+    finally:
+        conn.close()
+        storage.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Modul pendeteksi perubahan database dari klien lain
+- PRAGMA data_version hanya berubah jika koneksi lain melakukan commit,
+  sehingga polling saat tidak ada perubahan tidak membaca tabel sama sekali
+- Tabel change_sequence (diisi trigger) mencatat entitas mana yang berubah
+  beserta nomor urut global, sehingga tampilan cukup merefresh bagian yang terdampak
+"""
+
+# Interval polling perubahan (milidetik)
+CHANGE_POLL_MS = 1000
+
+# Entitas yang dicatat dan kunci yang dipakai
+ENTITY_COURSES = 'courses'          # kunci = ID mata kuliah
+ENTITY_STUDENTS = 'students'        # kunci = ID mahasiswa
+ENTITY_ENROLLMENTS = 'enrollments'  # kunci = ID mahasiswa pemilik enrollment
+
+# Pernyataan SQL untuk mencatat satu perubahan di dalam trigger
+_BUMP = """
+        UPDATE change_counter SET seq = seq + 1 WHERE id = 1;
+        INSERT INTO change_sequence (entity, entity_key, seq)
+        VALUES ('{entity}', {key}, (SELECT seq FROM change_counter WHERE id = 1))
+        ON CONFLICT(entity, entity_key) DO UPDATE SET seq = excluded.seq;
+"""
+
+CHANGE_TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_change_{table}_{event} AFTER {event.upper()} ON {table}
+    BEGIN{_BUMP.format(entity=entity, key=f"{row}.{column}")}
+    END
+    """
+    for table, entity, column in [
+        ('courses', ENTITY_COURSES, 'id'),
+        ('students', ENTITY_STUDENTS, 'id'),
+        ('enrollments', ENTITY_ENROLLMENTS, 'student_id'),
+    ]
+    for event, row in [('insert', 'NEW'), ('update', 'NEW'), ('delete', 'OLD')]
+]
+
+
+def init_schema(cursor):
+    """
+    Membuat tabel nomor urut perubahan beserta triggernya
+    - change_counter: satu baris berisi nomor urut global
+    - change_sequence: nomor urut terakhir per (entitas, kunci); ukurannya
+      terbatas jumlah baris data, tidak tumbuh per perubahan
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS change_counter (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            seq INTEGER NOT NULL                     -- Nomor urut perubahan terakhir
+        )
+    """)
+    cursor.execute("INSERT OR IGNORE INTO change_counter (id, seq) VALUES (1, 0)")
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS change_sequence (
+            entity TEXT NOT NULL,                    -- Nama entitas (courses/students/enrollments)
+            entity_key INTEGER NOT NULL,             -- ID baris yang berubah
+            seq INTEGER NOT NULL,                    -- Nomor urut perubahan terakhir
+            PRIMARY KEY (entity, entity_key)
+        ) WITHOUT ROWID
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_change_sequence_seq ON change_sequence (seq)")
+
+    for trigger in CHANGE_TRIGGERS:
+        cursor.execute(trigger)
+
+
+def current_sequence(cursor):
+    """Mengambil nomor urut perubahan global saat ini"""
+    cursor.execute("SELECT seq FROM change_counter WHERE id = 1")
+    row = cursor.fetchone()
+    return row[0] if row else 0
+
+
+def changes_since(cursor, seq):
+    """
+    Mengambil perubahan setelah nomor urut seq
+    - Mengembalikan ({entitas: set(kunci)}, nomor urut terbaru)
+    """
+    cursor.execute("""
+        SELECT entity, entity_key, seq FROM change_sequence
+        WHERE seq > ? ORDER BY seq
+    """, (seq,))
+    changed = {}
+    for entity, key, row_seq in cursor.fetchall():
+        changed.setdefault(entity, set()).add(key)
+        seq = row_seq
+    return changed, seq
+
+
+class ChangeWatcher:
+    """
+    Pengamat perubahan untuk satu koneksi
+    - poll() murah: satu PRAGMA data_version jika tidak ada commit dari koneksi lain
+    - Perubahan yang dibuat koneksi ini sendiri tidak mengubah data_version,
+      tetapi ikut terbaca pada poll berikutnya setelah ada commit dari luar
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.cursor = conn.cursor()
+        self.data_version = self._data_version()
+        self.seq = current_sequence(self.cursor)
+
+    def _data_version(self):
+        return self.cursor.execute("PRAGMA data_version").fetchone()[0]
+
+    def poll(self):
+        """Mengembalikan {entitas: set(kunci)} yang berubah sejak poll sebelumnya ({} jika tidak ada)"""
+        version = self._data_version()
+        if version == self.data_version:
+            return {}
+        self.data_version = version
+        changed, self.seq = changes_since(self.cursor, self.seq)
+        return changed
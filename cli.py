@@ -0,0 +1,518 @@
+"""
+Command line untuk operasi administrasi KRS tanpa GUI
+- Tidak mengimpor tkinter sama sekali, sehingga bisa dijalankan dari cron
+  atau server tanpa display
+- Memakai aturan pendaftaran yang sama dengan tab KRS (modul enrollment)
+
+Contoh:
+    python cli.py init
+    python cli.py seed --students 40000
+    python cli.py import students mahasiswa.csv
+    python cli.py import grades nilai.csv --term "2024/2025 Ganjil"
+    python cli.py import rooms ruang.csv
+    python cli.py assign-rooms --dry-run
+    python cli.py catalog katalog.csv --dry-run
+    python cli.py export enrollments peserta.csv.gz --dosen "Dr. Maya Sari"
+    python cli.py enroll 2024001 IF201
+    python cli.py drop 2024001 IF201 IF203
+    python cli.py hold 2024001 IF201 IF203
+    python cli.py confirm 2024001
+    python cli.py cancel IF201
+    python cli.py section add IF101 B "Selasa 08:00-10:30" "Dr. Maya Sari" 40
+    python cli.py section list IF101
+    python cli.py report 2024001
+    python cli.py workload "Dr. David Chen"
+    python cli.py transcript 2024001
+    python cli.py brackets "3.00=24; 2.50=21; 2.00=18; 0=15"
+    python cli.py history 2024001
+    python cli.py undo --nim 2024001 --steps 2
+    python cli.py rollover --dry-run
+    python cli.py audit --workers 4 --output audit.csv
+    python cli.py check --fix
+"""
+import argparse
+import sqlite3
+import sys
+
+import allocation
+import audit
+import catalog
+import database
+import enrollment
+import events
+import export
+import grades
+import holds
+import lecturers
+import models
+import rollover
+import rooms
+import sections
+
+
+def find_student(conn, nim):
+    """Mengambil record mahasiswa berdasarkan NIM atau menghentikan CLI"""
+    student = models.fetch_student_by_nim(conn, nim)
+    if student is None:
+        raise SystemExit(f"Mahasiswa dengan NIM {nim} tidak ditemukan")
+    return student
+
+
+def find_course(conn, kode_mk):
+    """Mengambil record mata kuliah berdasarkan kode atau menghentikan CLI"""
+    course = models.fetch_course_by_kode(conn, kode_mk)
+    if course is None:
+        raise SystemExit(f"Mata kuliah {kode_mk} tidak ditemukan")
+    return course
+
+
+def cmd_init(conn, args):
+    """Membuat/memigrasi struktur tabel"""
+    database.init_database(conn)
+    tables = conn.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'table'").fetchone()[0]
+    print(f"Struktur database {args.database} siap ({tables} tabel)")
+
+
+def cmd_seed(conn, args):
+    """Mengisi konfigurasi, mata kuliah default, dan mahasiswa contoh"""
+    database.init_database(conn)
+    database.load_default_data(conn)
+    if args.students:
+        added = database.seed_students(conn, args.students, args.prefix)
+        print(f"Mahasiswa contoh ditambahkan: {added}")
+
+
+def cmd_import(conn, args):
+    """Mengimpor mahasiswa, mata kuliah, preferensi, nilai, atau ruang dari CSV"""
+    if args.kind == 'students':
+        count = database.import_students(conn, args.file)
+        print(f"Mahasiswa diimpor: {count}")
+    elif args.kind == 'courses':
+        count = database.import_courses(conn, args.file)
+        print(f"Mata kuliah diimpor: {count}")
+    elif args.kind == 'grades':
+        posted, unknown = grades.import_grades(conn, args.file, args.term)
+        for nim, kode_mk in unknown:
+            print(f"{nim} tidak punya enrollment di {kode_mk}", file=sys.stderr)
+        print(f"Nilai diposting: {posted}, tanpa enrollment: {len(unknown)}")
+    elif args.kind == 'rooms':
+        count = rooms.import_rooms(conn, args.file)
+        print(f"Ruang diimpor: {count}")
+    else:
+        count = allocation.import_preferences(conn, args.file)
+        print(f"Preferensi diimpor untuk {count} mahasiswa")
+
+
+def cmd_catalog(conn, args):
+    """Menyinkronkan katalog mata kuliah dari CSV berbasis diff (lihat modul catalog)"""
+    diff = catalog.sync_catalog(conn, catalog.read_catalog(args.file), not args.keep_missing, args.dry_run)
+    print(catalog.format_diff(diff))
+    if args.dry_run:
+        print("(dry run: tidak ada perubahan disimpan)")
+
+
+def cmd_export(conn, args):
+    """Mengexport data secara streaming (lihat modul export)"""
+    info = export.export_dataset(conn, args.dataset, args.output, args.format, args.chunk,
+                                 kode_mk=args.kode, dosen=args.dosen, semester=args.semester,
+                                 status=args.status or None)
+    print(export.format_export(info))
+
+
+def cmd_enroll(conn, args):
+    """Mendaftarkan mahasiswa ke mata kuliah dengan aturan yang sama seperti GUI"""
+    student = find_student(conn, args.nim)
+    course = find_course(conn, args.kode)
+    enrollment.enroll(conn, student, course, allow_full=args.force, source='cli')
+    print(f"{student.label} terdaftar di {course.kode_mk} - {course.nama_mk}")
+
+
+def cmd_hold(conn, args):
+    """Menahan kursi mata kuliah di keranjang mahasiswa (atau melepasnya dengan --release)"""
+    student = find_student(conn, args.nim)
+    for kode in args.kode:
+        course = find_course(conn, kode)
+        if args.release:
+            released = holds.release(conn, student, course)
+            print(f"{course.kode_mk}: {'tahanan dilepas' if released else 'tidak sedang ditahan'}")
+        else:
+            print(f"{course.kode_mk} ditahan untuk {student.label} sampai {holds.hold(conn, student, course)}")
+
+
+def cmd_confirm(conn, args):
+    """Mengubah semua tahanan kursi mahasiswa menjadi enrollment (satu transaksi)"""
+    student = find_student(conn, args.nim)
+    enrolled = holds.confirm(conn, student, source='cli')
+    print(f"{student.label} terdaftar di {', '.join(enrolled)}")
+
+
+def cmd_sweep_holds(conn, args):
+    """Melepas tahanan kursi yang sudah kedaluwarsa"""
+    print(f"Tahanan kedaluwarsa dilepas: {holds.sweep_expired(conn)}")
+
+
+def cmd_section(conn, args):
+    """Menampilkan, menambah, mengubah, atau menghapus kelas paralel mata kuliah"""
+    course = find_course(conn, args.kode)
+    if args.action in ('add', 'update') and None in (args.kelas, args.jadwal, args.dosen, args.kapasitas):
+        raise SystemExit(f"section {args.action} membutuhkan kelas, jadwal, dosen, dan kapasitas")
+    if args.action == 'remove' and args.kelas is None:
+        raise SystemExit("section remove membutuhkan nama kelas")
+    if args.action == 'add':
+        sections.add_section(conn, course, args.kelas, args.jadwal, args.dosen, args.kapasitas)
+    elif args.action in ('update', 'remove'):
+        section_id = {kelas: section_id
+                      for section_id, kelas, *_ in sections.list_sections(conn.cursor(), course.id)}.get(args.kelas.upper())
+        if section_id is None:
+            raise SystemExit(f"Kelas {args.kelas} tidak ada di {course.kode_mk}")
+        if args.action == 'update':
+            sections.update_section(conn, section_id, args.jadwal, args.dosen, args.kapasitas)
+        else:
+            sections.remove_section(conn, section_id)
+    print(sections.format_sections(conn.cursor(), find_course(conn, args.kode)))
+
+
+def cmd_drop(conn, args):
+    """Membatalkan satu atau beberapa mata kuliah mahasiswa dalam satu transaksi"""
+    student = find_student(conn, args.nim)
+    courses = [find_course(conn, kode) for kode in args.kode]
+    dropped, missing = enrollment.drop_courses(conn, student, courses, source='cli')
+    by_id = {course.id: course for course in courses}
+    for course_id in dropped:
+        print(f"{student.label} dibatalkan dari {by_id[course_id].kode_mk} - {by_id[course_id].nama_mk}")
+    for course_id in missing:
+        print(f"{student.label} tidak terdaftar di {by_id[course_id].kode_mk}", file=sys.stderr)
+    print(f"Dibatalkan: {len(dropped)}, tidak terdaftar: {len(missing)}")
+    return 2 if missing and not dropped else 0
+
+
+def cmd_drop_students(conn, args):
+    """Membatalkan satu mata kuliah untuk beberapa mahasiswa dalam satu transaksi"""
+    course = find_course(conn, args.kode)
+    students = [find_student(conn, nim) for nim in args.nim]
+    dropped, missing = enrollment.drop_students(conn, course, students, source='cli')
+    by_id = {student.id: student for student in students}
+    for student_id in missing:
+        print(f"{by_id[student_id].label} tidak terdaftar di {course.kode_mk}", file=sys.stderr)
+    print(f"{course.kode_mk}: dibatalkan {len(dropped)} mahasiswa, tidak terdaftar {len(missing)}")
+    return 2 if missing and not dropped else 0
+
+
+def cmd_cancel(conn, args):
+    """Membatalkan kelas: semua peserta aktif dihapus dan terisi dinolkan"""
+    course = find_course(conn, args.kode)
+    dropped = enrollment.cancel_course(conn, course, source='cli')
+    print(f"Kelas {course.kode_mk} - {course.nama_mk} dibatalkan: {dropped} enrollment dihapus")
+
+
+def cmd_report(conn, args):
+    """Mencetak laporan KRS mahasiswa"""
+    print(enrollment.krs_report(conn, find_student(conn, args.nim)), end='')
+
+
+def cmd_transcript(conn, args):
+    """Mencetak nilai, IPS per semester, dan IPK mahasiswa"""
+    student = find_student(conn, args.nim)
+    cursor = conn.cursor()
+    for term, kode_mk, nama_mk, sks, nilai, bobot in grades.transcript(cursor, student.id):
+        print(f"{term:<18} {kode_mk:<8} {nama_mk[:30]:<30} {sks:>2} SKS  {nilai:<2} ({bobot:.1f})")
+    for term, sks, ips in grades.term_summary(cursor, student.id):
+        print(f"IPS {term}: {ips:.2f} ({sks} SKS)")
+    graded_sks, ipk = grades.cumulative(cursor, student.id)
+    print(f"IPK: {f'{ipk:.2f} ({graded_sks} SKS)' if ipk is not None else '-'}, "
+          f"batas SKS: {student.max_credits}")
+
+
+def cmd_brackets(conn, args):
+    """Menampilkan atau mengganti rentang IPK penentu batas SKS"""
+    if args.spec:
+        updated = grades.set_brackets(conn, grades.parse_brackets(args.spec))
+        print(f"max_credits diperbarui: {updated} mahasiswa")
+    print(grades.format_brackets(grades.get_brackets(conn.cursor())))
+
+
+def cmd_workload(conn, args):
+    """Mencetak beban mengajar semua dosen, atau jadwal satu dosen (gelar diabaikan)"""
+    cursor = conn.cursor()
+    if args.nama:
+        lecturer = lecturers.find_lecturer(cursor, args.nama)
+        if lecturer is None:
+            raise SystemExit(f"Dosen {args.nama} tidak ditemukan")
+        print(lecturers.format_schedule(cursor, *lecturer))
+        return
+    for _, nama, jumlah_mk, total_sks, total_peserta in lecturers.workload(cursor):
+        print(f"{nama:<28} {jumlah_mk:>3} MK {total_sks:>4} SKS {total_peserta:>6} peserta")
+
+
+def cmd_history(conn, args):
+    """Mencetak riwayat event pendaftaran mahasiswa, terbaru lebih dulu"""
+    student = find_student(conn, args.nim)
+    for event_id, created_at, event_type, kode_mk, nama_mk, actor, source, reverts, undone in \
+            events.history(conn.cursor(), student.id, args.limit):
+        note = f" (undo #{reverts})" if reverts else (" [dibatalkan]" if undone else "")
+        print(f"#{event_id} {created_at} {events.EVENT_LABELS.get(event_type, event_type):<15} "
+              f"{kode_mk:<8} {nama_mk} oleh {actor or '-'} via {source or '-'}{note}")
+
+
+def cmd_undo(conn, args):
+    """Membatalkan event pendaftaran terakhir (opsional hanya milik satu mahasiswa)"""
+    student_id = find_student(conn, args.nim).id if args.nim else None
+    try:
+        reverted = events.undo(conn, args.steps, student_id)
+    except events.EventError as e:
+        print(f"Undo gagal: {e}", file=sys.stderr)
+        return 2
+    for event_id, _, _, event_type, _, _, _ in reverted:
+        print(f"Dibatalkan: event #{event_id} ({events.EVENT_LABELS.get(event_type, event_type)})")
+    print(f"Jumlah event dibatalkan: {len(reverted)}")
+
+
+def cmd_rollover(conn, args):
+    """Pergantian semester: pratinjau, jalankan, atau batalkan rollover terakhir"""
+    def report(*step):
+        print(rollover.format_progress(*step))
+
+    try:
+        if args.rollback:
+            result = rollover.rollback(conn, report)
+            print(f"Rollover #{result['run_id']} dibatalkan: {result['advanced']} mahasiswa turun semester, "
+                  f"{result['graduated']} tanda lulus dihapus, {result['reopened']} enrollment dibuka kembali "
+                  f"({result['elapsed']:.2f} detik)")
+            return
+        if args.dry_run:
+            print(rollover.format_preview(rollover.preview(conn.cursor())))
+            print("(dry run: tidak ada perubahan disimpan)")
+            return
+        result = rollover.rollover(conn, report)
+    except rollover.RolloverError as e:
+        print(f"Rollover gagal: {e}", file=sys.stderr)
+        return 2
+    print(rollover.format_preview(result))
+    print(f"Rollover #{result['run_id']} selesai dalam {result['elapsed']:.2f} detik")
+
+
+def cmd_assign_rooms(conn, args):
+    """Mengalokasikan ruang untuk semua mata kuliah; kode keluar 1 jika ada kelas tanpa ruang"""
+    result = rooms.assign_rooms(conn, args.dry_run)
+    print(rooms.format_result(result))
+    if args.dry_run:
+        print("(dry run: tidak ada perubahan disimpan)")
+    return 1 if result['infeasible'] else 0
+
+
+def cmd_audit(conn, args):
+    """
+    Audit kepatuhan KRS seluruh mahasiswa (paralel, koneksi read-only per proses)
+    - Mengembalikan kode keluar 1 jika ada pengecualian
+    """
+    conn.commit()
+    result = audit.run_audit(args.storage.path, args.workers)
+    if args.output:
+        audit.write_csv(result, args.output)
+    print(audit.format_result(result, args.limit))
+    return 1 if result['exceptions'] or result['courses'] else 0
+
+
+def cmd_check(conn, args):
+    """
+    Memeriksa konsistensi database
+    - integrity_check dan foreign_key_check
+    - Kolom terisi (mata kuliah dan kelas paralel) dibanding jumlah enrollment aktif (--fix untuk memperbaiki)
+    - Mahasiswa yang melebihi batas SKS
+    - Mengembalikan kode keluar 1 jika masih ada masalah
+    """
+    cursor = conn.cursor()
+    problems = database.integrity_problems(conn)
+
+    mismatches = enrollment.count_mismatches(cursor)
+    if mismatches and args.fix:
+        print(f"Jumlah terisi diperbaiki: {enrollment.fix_counts(conn)} mata kuliah")
+        mismatches = enrollment.count_mismatches(cursor)
+    problems += [f"{kode_mk}: terisi {terisi}, enrollment aktif {aktif}"
+                 for kode_mk, terisi, aktif in mismatches]
+    section_mismatches = sections.count_mismatches(cursor)
+    if section_mismatches and args.fix:
+        print(f"Jumlah terisi kelas paralel diperbaiki: {sections.fix_counts(conn)} kelas")
+        section_mismatches = sections.count_mismatches(cursor)
+    problems += [f"{kode_mk}-{kelas}: terisi {terisi}, enrollment aktif {aktif}"
+                 for kode_mk, kelas, terisi, aktif in section_mismatches]
+    problems += [f"{nim} - {nama}: {total} SKS melebihi batas {max_credits}"
+                 for nim, nama, total, max_credits in enrollment.overloaded_students(cursor)]
+
+    for problem in problems:
+        print(problem)
+    print(f"Pemeriksaan selesai: {len(problems)} masalah")
+    return 1 if problems else 0
+
+
+COMMANDS = {
+    'init': cmd_init,
+    'migrate': cmd_init,
+    'seed': cmd_seed,
+    'import': cmd_import,
+    'catalog': cmd_catalog,
+    'export': cmd_export,
+    'enroll': cmd_enroll,
+    'hold': cmd_hold,
+    'confirm': cmd_confirm,
+    'sweep-holds': cmd_sweep_holds,
+    'section': cmd_section,
+    'drop': cmd_drop,
+    'drop-students': cmd_drop_students,
+    'cancel': cmd_cancel,
+    'report': cmd_report,
+    'transcript': cmd_transcript,
+    'brackets': cmd_brackets,
+    'workload': cmd_workload,
+    'history': cmd_history,
+    'undo': cmd_undo,
+    'rollover': cmd_rollover,
+    'assign-rooms': cmd_assign_rooms,
+    'audit': cmd_audit,
+    'check': cmd_check,
+}
+
+
+def build_parser():
+    """Menyusun parser argumen command line"""
+    parser = argparse.ArgumentParser(description="Administrasi KRS dari command line (tanpa GUI)")
+    parser.add_argument('--database', help="Lokasi database: file, 'memory[:nama[=file]]', atau 'tmpfs:file' "
+                                           "(default: variabel KRS_DATABASE atau krs_database.db)")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    subparsers.add_parser('init', help="Buat struktur tabel")
+    subparsers.add_parser('migrate', help="Migrasi struktur tabel (sama dengan init)")
+
+    seed_parser = subparsers.add_parser('seed', help="Isi data default dan mahasiswa contoh")
+    seed_parser.add_argument('--students', type=int, default=0, help="Jumlah mahasiswa contoh")
+    seed_parser.add_argument('--prefix', default='SEED', help="Awalan NIM mahasiswa contoh")
+
+    import_parser = subparsers.add_parser('import', help="Impor data dari CSV")
+    import_parser.add_argument('kind', choices=['students', 'courses', 'preferences', 'grades', 'rooms'])
+    import_parser.add_argument('file')
+    import_parser.add_argument('--term', help="Semester akademik nilai, mis. '2024/2025 Ganjil' "
+                                              "(default: semester asal enrollment)")
+
+    catalog_parser = subparsers.add_parser('catalog', help="Sinkronkan katalog mata kuliah dari CSV (diff)")
+    catalog_parser.add_argument('file')
+    catalog_parser.add_argument('--dry-run', action='store_true', help="Tampilkan diff tanpa menyimpan")
+    catalog_parser.add_argument('--keep-missing', action='store_true',
+                                help="Jangan pensiunkan kode yang tidak ada di file")
+
+    export_parser = subparsers.add_parser('export', help="Export data (CSV/JSON Lines, opsional gzip)")
+    export_parser.add_argument('dataset', choices=sorted(export.DATASETS))
+    export_parser.add_argument('output')
+    export_parser.add_argument('--format', choices=export.FORMATS)
+    export_parser.add_argument('--kode', help="Saring per kode mata kuliah")
+    export_parser.add_argument('--dosen', help="Saring per dosen")
+    export_parser.add_argument('--semester', type=int, help="Saring per semester")
+    export_parser.add_argument('--status', default='aktif', help="Status enrollment ('' = semua)")
+    export_parser.add_argument('--chunk', type=int, default=export.EXPORT_CHUNK_SIZE)
+
+    enroll_parser = subparsers.add_parser('enroll', help="Daftarkan mahasiswa ke mata kuliah")
+    enroll_parser.add_argument('nim')
+    enroll_parser.add_argument('kode')
+    enroll_parser.add_argument('--force', action='store_true', help="Tetap daftar meski kapasitas penuh")
+
+    hold_parser = subparsers.add_parser('hold', help="Tahan kursi mata kuliah di keranjang (TTL hold_ttl_minutes)")
+    hold_parser.add_argument('nim')
+    hold_parser.add_argument('kode', nargs='+')
+    hold_parser.add_argument('--release', action='store_true', help="Lepas tahanan alih-alih menahan")
+
+    confirm_parser = subparsers.add_parser('confirm', help="Daftarkan semua kursi yang ditahan mahasiswa")
+    confirm_parser.add_argument('nim')
+
+    subparsers.add_parser('sweep-holds', help="Lepas tahanan kursi yang kedaluwarsa")
+
+    section_parser = subparsers.add_parser('section', help="Kelola kelas paralel mata kuliah")
+    section_parser.add_argument('action', choices=['list', 'add', 'update', 'remove'])
+    section_parser.add_argument('kode')
+    section_parser.add_argument('kelas', nargs='?', help="Nama kelas (A, B, ...)")
+    section_parser.add_argument('jadwal', nargs='?', help="Jadwal kelas, mis. 'Selasa 08:00-10:30'")
+    section_parser.add_argument('dosen', nargs='?', help="Nama dosen pengampu")
+    section_parser.add_argument('kapasitas', nargs='?', type=int, help="Kapasitas kelas")
+
+    drop_parser = subparsers.add_parser('drop', help="Batalkan mata kuliah mahasiswa")
+    drop_parser.add_argument('nim')
+    drop_parser.add_argument('kode', nargs='+')
+
+    drop_students_parser = subparsers.add_parser('drop-students', help="Batalkan satu mata kuliah untuk beberapa mahasiswa")
+    drop_students_parser.add_argument('kode')
+    drop_students_parser.add_argument('nim', nargs='+')
+
+    cancel_parser = subparsers.add_parser('cancel', help="Batalkan kelas (hapus semua peserta aktif)")
+    cancel_parser.add_argument('kode')
+
+    report_parser = subparsers.add_parser('report', help="Cetak laporan KRS mahasiswa")
+    report_parser.add_argument('nim')
+
+    transcript_parser = subparsers.add_parser('transcript', help="Nilai, IPS, dan IPK mahasiswa")
+    transcript_parser.add_argument('nim')
+
+    brackets_parser = subparsers.add_parser('brackets', help="Tampilkan atau ganti rentang IPK -> batas SKS")
+    brackets_parser.add_argument('spec', nargs='?', help="Mis. '3.00=24; 2.50=21; 0=15'")
+
+    workload_parser = subparsers.add_parser('workload', help="Beban mengajar dosen")
+    workload_parser.add_argument('nama', nargs='?', help="Nama dosen untuk melihat jadwalnya")
+
+    history_parser = subparsers.add_parser('history', help="Riwayat event pendaftaran mahasiswa")
+    history_parser.add_argument('nim')
+    history_parser.add_argument('--limit', type=int, default=-1, help="Jumlah event terakhir")
+
+    undo_parser = subparsers.add_parser('undo', help="Batalkan event pendaftaran terakhir")
+    undo_parser.add_argument('--nim', help="Hanya event milik mahasiswa ini")
+    undo_parser.add_argument('--steps', type=int, default=1, help="Jumlah event yang dibatalkan")
+
+    rollover_parser = subparsers.add_parser('rollover', help="Pergantian semester (naik semester, lulus, tutup KRS)")
+    rollover_parser.add_argument('--dry-run', action='store_true', help="Tampilkan dampak tanpa menyimpan")
+    rollover_parser.add_argument('--rollback', action='store_true', help="Batalkan rollover terakhir")
+
+    assign_rooms_parser = subparsers.add_parser('assign-rooms', help="Alokasikan ruang kuliah (pewarnaan graf interval)")
+    assign_rooms_parser.add_argument('--dry-run', action='store_true', help="Hitung tanpa menyimpan")
+
+    audit_parser = subparsers.add_parser('audit', help="Audit kepatuhan KRS seluruh mahasiswa (paralel)")
+    audit_parser.add_argument('--workers', type=int, help="Jumlah proses (default: jumlah CPU)")
+    audit_parser.add_argument('--output', help="Simpan daftar pengecualian lengkap ke CSV")
+    audit_parser.add_argument('--limit', type=int, help="Batasi jumlah baris yang dicetak")
+
+    check_parser = subparsers.add_parser('check', help="Periksa konsistensi database")
+    check_parser.add_argument('--fix', action='store_true', help="Perbaiki jumlah terisi yang tidak sesuai")
+    return parser
+
+
+def main(argv=None):
+    """Menjalankan subcommand CLI; mengembalikan kode keluar"""
+    args = build_parser().parse_args(argv)
+    storage = database.open_storage(args.database)
+    args.database = storage.describe()
+    args.storage = storage
+    conn = storage.connect()
+    try:
+        if args.command not in ('init', 'migrate', 'seed'):
+            database.init_database(conn)
+        return COMMANDS[args.command](conn, args) or 0
+    except enrollment.EnrollmentError as e:
+        print(f"{e.title}: {e}", file=sys.stderr)
+        return 2
+    except catalog.CatalogError as e:
+        print(f"Katalog tidak valid: {e}", file=sys.stderr)
+        return 2
+    except grades.GradeError as e:
+        print(f"Nilai tidak valid: {e}", file=sys.stderr)
+        return 2
+    except sqlite3.IntegrityError as e:
+        print(f"Data ditolak database: {e}", file=sys.stderr)
+        return 2
+    except rooms.RoomError as e:
+        print(f"Data ruang tidak valid: {e}", file=sys.stderr)
+        return 2
+    except sections.SectionError as e:
+        print(f"Kelas paralel: {e}", file=sys.stderr)
+        return 2
+    finally:
+        conn.close()
+        storage.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,499 @@
+"""
+Modul database KRS tanpa ketergantungan GUI
+- Membuat dan memigrasi struktur tabel (init_database)
+- Mengisi konfigurasi dan mata kuliah default (load_default_data)
+- Menentukan lokasi penyimpanan: file, in-memory shared cache, atau salinan
+  tmpfs yang disimpan kembali lewat API backup (open_storage)
+- Dipakai bersama oleh aplikasi Tkinter dan command line (cli.py)
+"""
+import csv
+import os
+import re
+import shutil
+import sqlite3
+import tempfile
+from datetime import datetime
+
+import allocation
+import analytics
+import catalog
+import changes
+import events
+import grades
+import holds
+import lecturers
+import maintenance
+import prerequisites
+import rollover
+import rooms
+import sections
+
+# Lokasi default database KRS
+DATABASE_PATH = 'krs_database.db'
+
+# Variabel lingkungan untuk lokasi penyimpanan dan interval penyimpanan ulang (detik)
+STORAGE_ENV = 'KRS_DATABASE'
+PERSIST_ENV = 'KRS_PERSIST_SECONDS'
+
+# Folder tmpfs untuk mode salinan cepat (jatuh ke folder sementara jika tidak ada)
+TMPFS_DIR = '/dev/shm'
+
+
+def connect(path=DATABASE_PATH):
+    """Membuka koneksi database KRS (path biasa atau URI 'file:...')"""
+    return sqlite3.connect(path, uri=path.startswith('file:'))
+
+
+class Storage:
+    """
+    Lokasi penyimpanan database KRS
+    - mode 'file': langsung ke file (perilaku lama)
+    - mode 'memory': database in-memory shared cache; satu koneksi penjaga
+      dipertahankan agar isinya tetap ada selama proses berjalan
+    - mode 'tmpfs': salinan kerja di tmpfs/folder sementara
+    - persist_path: file tujuan penyimpanan ulang lewat API backup (saat persist()
+      dan close()); None berarti data dibuang saat selesai (uji coba, pelatihan)
+    - path: nama yang dipakai connect() oleh semua koneksi (termasuk thread lain)
+    """
+
+    def __init__(self, mode, path, persist_path=None, persist_seconds=0, workdir=None):
+        self.mode = mode
+        self.path = path
+        self.persist_path = persist_path
+        self.persist_seconds = persist_seconds
+        self.workdir = workdir
+        self.keeper = connect(path) if mode == 'memory' else None
+
+    def connect(self):
+        """Membuka koneksi baru ke database ini"""
+        return connect(self.path)
+
+    def persist(self):
+        """
+        Menyalin isi database kerja ke persist_path secara atomik (file sementara lalu ganti nama)
+        - Tidak melakukan apa pun pada mode file atau tanpa persist_path
+        """
+        if self.mode == 'file' or not self.persist_path:
+            return False
+        temp_path = self.persist_path + '.tmp'
+        source = self.connect()
+        dest = sqlite3.connect(temp_path)
+        try:
+            source.backup(dest)
+        finally:
+            dest.close()
+            source.close()
+        os.replace(temp_path, self.persist_path)
+        return True
+
+    def close(self):
+        """Menyimpan ulang (jika ada persist_path) lalu membuang database kerja"""
+        try:
+            self.persist()
+        finally:
+            if self.keeper is not None:
+                self.keeper.close()
+                self.keeper = None
+            if self.workdir:
+                shutil.rmtree(self.workdir, ignore_errors=True)
+                self.workdir = None
+
+    def describe(self):
+        """Teks singkat lokasi penyimpanan (untuk judul jendela/log)"""
+        if self.mode == 'file':
+            return self.path
+        target = f" -> {self.persist_path}" if self.persist_path else " (tidak disimpan)"
+        return f"{self.mode}{target}"
+
+
+def open_storage(spec=None, persist_seconds=None):
+    """
+    Menentukan lokasi penyimpanan dari argumen, variabel lingkungan KRS_DATABASE, atau default
+    - 'krs.db': file biasa
+    - 'memory' / ':memory:' / 'memory:nama': in-memory shared cache, tidak disimpan
+    - 'memory:nama=krs.db': in-memory, diisi dari krs.db (jika ada) dan disimpan kembali ke sana
+    - 'tmpfs:krs.db': salinan krs.db di tmpfs, disimpan kembali ke krs.db
+    - persist_seconds (atau KRS_PERSIST_SECONDS): interval penyimpanan ulang berkala; 0 = hanya saat selesai
+    """
+    spec = spec or os.environ.get(STORAGE_ENV) or DATABASE_PATH
+    if persist_seconds is None:
+        try:
+            persist_seconds = float(os.environ.get(PERSIST_ENV, '0'))
+        except ValueError:
+            persist_seconds = 0
+
+    if spec in ('memory', ':memory:') or spec.startswith('memory:'):
+        rest = '' if spec in ('memory', ':memory:') else spec[len('memory:'):]
+        name, _, persist_path = rest.partition('=')
+        path = f"file:krs_{name or 'memory'}?mode=memory&cache=shared"
+        storage = Storage('memory', path, persist_path or None, persist_seconds)
+        if persist_path and os.path.exists(persist_path):
+            source = sqlite3.connect(persist_path)
+            try:
+                source.backup(storage.keeper)
+            finally:
+                source.close()
+        return storage
+
+    if spec.startswith('tmpfs:'):
+        persist_path = spec[len('tmpfs:'):] or DATABASE_PATH
+        workdir = tempfile.mkdtemp(prefix='krs_', dir=TMPFS_DIR if os.path.isdir(TMPFS_DIR) else None)
+        path = os.path.join(workdir, os.path.basename(persist_path))
+        if os.path.exists(persist_path):
+            source = sqlite3.connect(persist_path)
+            dest = sqlite3.connect(path)
+            try:
+                source.backup(dest)
+            finally:
+                dest.close()
+                source.close()
+        return Storage('tmpfs', path, persist_path, persist_seconds, workdir)
+
+    return Storage('file', spec)
+
+
+def open_database(path=DATABASE_PATH):
+    """
+    Membuka database KRS yang siap dipakai
+    - Struktur tabel dibuat/dimigrasi dan data default dimuat jika belum ada
+    """
+    conn = connect(path)
+    init_database(conn)
+    load_default_data(conn)
+    return conn
+
+
+def migrate_enrollment_unique(cursor):
+    """
+    Mengganti UNIQUE(student_id, course_id) lama dengan indeks unik parsial enrollment aktif
+    - Enrollment 'selesai' dari semester lalu tetap tersimpan, sehingga mahasiswa bisa
+      mengulang mata kuliah tanpa melanggar constraint
+    - SQLite tidak bisa menghapus constraint tabel: enrollments dibangun ulang sekali
+      dalam satu savepoint (trigger dan indeksnya dibuat ulang oleh init_schema modul lain)
+    """
+    cursor.execute("PRAGMA index_list(enrollments)")
+    if any(row[3] == 'u' for row in cursor.fetchall()):
+        cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'enrollments'")
+        original_sql = cursor.fetchone()[0]
+        # Koma sebelum UNIQUE bisa diikuti komentar SQL di baris sebelumnya
+        table_sql = re.sub(r",([ \t]*--[^\n]*)?\s*UNIQUE\s*\(\s*student_id\s*,\s*course_id\s*\)[^\n]*", "",
+                           original_sql)
+        if table_sql == original_sql:
+            raise sqlite3.DatabaseError("Constraint UNIQUE enrollments tidak dikenali, migrasi dibatalkan")
+        cursor.execute("SAVEPOINT migrasi_enrollments")
+        try:
+            cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = 'enrollments'")
+            row = cursor.fetchone()
+            cursor.execute("CREATE TEMP TABLE enrollments_migrasi AS SELECT * FROM enrollments")
+            cursor.execute("DROP TABLE enrollments")
+            cursor.execute(table_sql)
+            cursor.execute("INSERT INTO enrollments SELECT * FROM enrollments_migrasi")
+            cursor.execute("DROP TABLE temp.enrollments_migrasi")
+            # ID yang pernah dipakai (mis. enrollment terhapus) tidak boleh dipakai ulang
+            if row:
+                cursor.execute("DELETE FROM sqlite_sequence WHERE name = 'enrollments'")
+                cursor.execute("INSERT INTO sqlite_sequence (name, seq) VALUES ('enrollments', ?)", row)
+            cursor.execute("RELEASE migrasi_enrollments")
+        except Exception:
+            cursor.execute("ROLLBACK TO migrasi_enrollments")
+            cursor.execute("RELEASE migrasi_enrollments")
+            raise
+    cursor.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_enrollments_active
+        ON enrollments (student_id, course_id) WHERE status = 'aktif'
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_enrollments_student ON enrollments (student_id, course_id)")
+
+
+def init_database(conn):
+    """
+    Menginisialisasi struktur database
+    - Membuat tabel-tabel yang diperlukan
+    - Menambahkan kolom yang hilang pada tabel existing
+    - Memastikan integritas referensial antar tabel
+    - Aman dijalankan berulang kali (sekaligus berfungsi sebagai migrasi)
+    """
+    cursor = conn.cursor()
+
+    # Mengaktifkan auto_vacuum=INCREMENTAL pada database baru agar file bisa menyusut
+    # (database lama dikonversi lewat perintah pemeliharaan, bukan saat dibuka)
+    maintenance.init_auto_vacuum(conn)
+
+    # Membuat tabel mahasiswa (students)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS students (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,    -- ID unik mahasiswa
+            nim TEXT UNIQUE NOT NULL,                -- NIM mahasiswa (harus unik)
+            nama TEXT NOT NULL,                      -- Nama lengkap mahasiswa
+            semester INTEGER NOT NULL,               -- Semester saat ini
+            max_credits INTEGER DEFAULT 24,          -- Batas maksimal SKS per semester
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP -- Waktu pendaftaran
+        )
+    """)
+
+    # Mengecek dan menambahkan kolom created_at jika belum ada
+    try:
+        cursor.execute("SELECT created_at FROM students LIMIT 1")
+    except sqlite3.OperationalError:
+        # Menambahkan kolom tanpa default value, lalu update data existing
+        cursor.execute("ALTER TABLE students ADD COLUMN created_at TEXT")
+        current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        cursor.execute("UPDATE students SET created_at = ? WHERE created_at IS NULL", (current_time,))
+
+    # Membuat tabel mata kuliah (courses)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS courses (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,    -- ID unik mata kuliah
+            kode_mk TEXT UNIQUE NOT NULL,            -- Kode mata kuliah (harus unik)
+            nama_mk TEXT NOT NULL,                   -- Nama mata kuliah
+            sks INTEGER NOT NULL,                    -- Jumlah SKS
+            semester INTEGER NOT NULL,               -- Semester mata kuliah ditawarkan
+            jadwal TEXT NOT NULL,                    -- Jadwal kuliah
+            dosen TEXT NOT NULL,                     -- Nama dosen pengampu
+            kapasitas INTEGER DEFAULT 40,            -- Kapasitas maksimal mahasiswa
+            terisi INTEGER DEFAULT 0,               -- Jumlah mahasiswa terdaftar
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP -- Waktu pembuatan data
+        )
+    """)
+
+    # Mengecek dan menambahkan kolom created_at untuk tabel courses
+    try:
+        cursor.execute("SELECT created_at FROM courses LIMIT 1")
+    except sqlite3.OperationalError:
+        cursor.execute("ALTER TABLE courses ADD COLUMN created_at TEXT")
+        current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        cursor.execute("UPDATE courses SET created_at = ? WHERE created_at IS NULL", (current_time,))
+
+    # Membuat tabel pendaftaran KRS (enrollments)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS enrollments (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,    -- ID unik pendaftaran
+            student_id INTEGER,                      -- ID mahasiswa (foreign key)
+            course_id INTEGER,                       -- ID mata kuliah (foreign key)
+            tanggal_daftar TEXT NOT NULL,            -- Tanggal pendaftaran
+            status TEXT DEFAULT 'aktif',             -- Status pendaftaran (aktif/nonaktif)
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP, -- Waktu pembuatan data
+            FOREIGN KEY (student_id) REFERENCES students (id),  -- Relasi ke tabel students
+            FOREIGN KEY (course_id) REFERENCES courses (id)     -- Relasi ke tabel courses
+        )
+    """)
+
+    # Mengecek dan menambahkan kolom created_at untuk tabel enrollments
+    try:
+        cursor.execute("SELECT created_at FROM enrollments LIMIT 1")
+    except sqlite3.OperationalError:
+        cursor.execute("ALTER TABLE enrollments ADD COLUMN created_at TEXT")
+        current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        cursor.execute("UPDATE enrollments SET created_at = ? WHERE created_at IS NULL", (current_time,))
+
+    # Satu enrollment aktif per mahasiswa per mata kuliah (riwayat 'selesai' boleh berulang)
+    migrate_enrollment_unique(cursor)
+
+    # Membuat tabel konfigurasi sistem
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS system_config (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,    -- ID unik konfigurasi
+            config_key TEXT UNIQUE NOT NULL,         -- Kunci konfigurasi (harus unik)
+            config_value TEXT NOT NULL,              -- Nilai konfigurasi
+            updated_at TEXT DEFAULT CURRENT_TIMESTAMP -- Waktu update terakhir
+        )
+    """)
+
+    # Mengecek dan menambahkan kolom updated_at untuk tabel system_config
+    try:
+        cursor.execute("SELECT updated_at FROM system_config LIMIT 1")
+    except sqlite3.OperationalError:
+        cursor.execute("ALTER TABLE system_config ADD COLUMN updated_at TEXT")
+        current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        cursor.execute("UPDATE system_config SET updated_at = ? WHERE created_at IS NULL", (current_time,))
+
+    # Menambahkan penanda mata kuliah yang dipensiunkan dari katalog
+    catalog.init_schema(cursor)
+
+    # Membuat tabel dosen dan menautkan mata kuliah ke dosennya (migrasi nama ganda)
+    lecturers.init_schema(cursor)
+
+    # Membuat tabel penampung data mahasiswa yang dihapus (untuk diarsipkan)
+    maintenance.init_schema(cursor)
+
+    # Membuat tabel ringkasan analitik yang diperbarui otomatis oleh trigger
+    analytics.init_schema(cursor)
+
+    # Membuat tabel preferensi dan hasil alokasi batch
+    allocation.init_schema(cursor)
+
+    # Membuat tabel prasyarat, closure, dan kelayakan mahasiswa
+    prerequisites.init_schema(cursor)
+
+    # Membuat tabel nomor urut perubahan untuk refresh otomatis antar klien
+    changes.init_schema(cursor)
+
+    # Membuat log event pendaftaran (append-only) beserta snapshot KRS
+    events.init_schema(cursor)
+
+    # Menambahkan penanda kelulusan dan tabel pencatat pergantian semester
+    rollover.init_schema(cursor)
+
+    # Membuat tabel nilai, ringkasan IPK/IPS, dan rentang batas SKS
+    grades.init_schema(cursor)
+
+    # Membuat tabel ruang kuliah dan hasil alokasi ruang
+    rooms.init_schema(cursor)
+
+    # Membuat tabel tahanan kursi (keranjang KRS) dan penghitung kursi ditahan
+    holds.init_schema(cursor)
+
+    # Membuat tabel kelas paralel dan kolom enrollments.section_id
+    sections.init_schema(cursor)
+
+    # Menyimpan perubahan ke database
+    conn.commit()
+
+
+def load_default_data(conn):
+    """
+    Memuat data default ke dalam database jika masih kosong
+    - Mengisi konfigurasi sistem default
+    - Mengisi mata kuliah default untuk demo
+    """
+    cursor = conn.cursor()
+
+    # Data konfigurasi sistem default
+    default_configs = [
+        ('max_credits_per_semester', '24'),    # Maksimal SKS per semester
+        ('min_credits_per_semester', '12'),    # Minimal SKS per semester
+        ('academic_year', '2024/2025'),        # Tahun akademik
+        ('current_semester', 'Ganjil'),        # Semester saat ini
+        ('graduation_semester', '8'),          # Semester akhir (ditandai lulus saat pergantian semester)
+        ('backup_interval_minutes', '60'),     # Interval snapshot backup otomatis (0 = nonaktif)
+        ('backup_retention', '10'),            # Jumlah snapshot backup yang disimpan
+        ('replica_interval_minutes', '0'),     # Interval penerbitan replika baca (0 = nonaktif)
+        ('replica_path', 'krs_replica.db'),    # File replika baca untuk laporan dan export
+        ('registration_windows', ''),          # Jendela registrasi per angkatan (kosong = semua dibuka)
+        ('registration_end', ''),              # Akhir registrasi (kosong = tanpa batas)
+        ('admission_rate', '50'),              # Laju penerimaan permintaan tulis (per detik)
+        ('admission_burst', '20'),             # Ledakan permintaan yang langsung diterima
+        ('hold_ttl_minutes', '10'),            # Lama penahanan kursi di keranjang KRS
+        ('preference_window_start', ''),       # Awal jendela preferensi (kosong = tanpa batas)
+        ('preference_window_end', '')          # Akhir jendela preferensi (kosong = tanpa batas)
+    ]
+
+    # Memasukkan konfigurasi default (jika belum ada)
+    for key, value in default_configs:
+        cursor.execute("""
+            INSERT OR IGNORE INTO system_config (config_key, config_value)
+            VALUES (?, ?)
+        """, (key, value))
+
+    # Menambahkan mata kuliah katalog default yang belum ada (tanpa menghapus data lama)
+    added = catalog.add_missing(conn, catalog.DEFAULT_CATALOG)
+    if added:
+        print(f"Data mata kuliah default ditambahkan: {added} mata kuliah")
+
+    # Verifikasi data mata kuliah setelah load
+    cursor.execute("SELECT COUNT(*) FROM courses")
+    final_count = cursor.fetchone()[0]
+    print(f"Verifikasi: Total mata kuliah setelah load_default_data: {final_count}")
+
+    # Menyimpan perubahan ke database
+    conn.commit()
+
+
+def get_config_value(cursor, key, default=''):
+    """
+    Mengambil nilai konfigurasi dari database
+    - key: kunci konfigurasi yang dicari
+    - default: nilai default jika kunci tidak ditemukan
+    """
+    cursor.execute("SELECT config_value FROM system_config WHERE config_key = ?", (key,))
+    result = cursor.fetchone()
+    return result[0] if result else default
+
+
+def seed_students(conn, count, prefix='SEED'):
+    """
+    Menambahkan mahasiswa contoh (untuk uji coba dan demo skala besar)
+    - NIM dibentuk dari prefix + nomor urut; NIM yang sudah ada dilewati
+    - Mengembalikan jumlah mahasiswa yang benar-benar ditambahkan
+    """
+    cursor = conn.cursor()
+    cursor.execute("SELECT COUNT(*) FROM students")
+    before = cursor.fetchone()[0]
+    cursor.executemany("""
+        INSERT OR IGNORE INTO students (nim, nama, semester, max_credits)
+        VALUES (?, ?, ?, 24)
+    """, ((f"{prefix}{i:06d}", f"Mahasiswa {prefix} {i}", i % 8 + 1) for i in range(1, count + 1)))
+    conn.commit()
+    cursor.execute("SELECT COUNT(*) FROM students")
+    return cursor.fetchone()[0] - before
+
+
+def _read_csv(path, required):
+    """Membaca file CSV sebagai dict per baris dan memastikan kolom wajib tersedia"""
+    with open(path, newline='', encoding='utf-8') as handle:
+        reader = csv.DictReader(handle)
+        missing = [column for column in required if column not in (reader.fieldnames or [])]
+        if missing:
+            raise ValueError(f"Kolom wajib tidak ada di {path}: {', '.join(missing)}")
+        return [{key: (value or '').strip() for key, value in row.items()} for row in reader]
+
+
+def import_students(conn, path):
+    """
+    Mengimpor mahasiswa dari CSV berkolom nim, nama, semester[, max_credits]
+    - NIM yang sudah ada diperbarui (upsert); seluruh file dalam satu transaksi
+    - Mengembalikan jumlah baris yang diimpor
+    """
+    rows = _read_csv(path, ('nim', 'nama', 'semester'))
+    cursor = conn.cursor()
+    try:
+        cursor.executemany("""
+            INSERT INTO students (nim, nama, semester, max_credits) VALUES (?, ?, ?, ?)
+            ON CONFLICT(nim) DO UPDATE SET
+                nama = excluded.nama,
+                semester = excluded.semester,
+                max_credits = excluded.max_credits
+        """, [(row['nim'], row['nama'], int(row['semester']), int(row.get('max_credits') or 24))
+              for row in rows])
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return len(rows)
+
+
+def import_courses(conn, path):
+    """
+    Mengimpor mata kuliah dari CSV berkolom kode_mk, nama_mk, sks, semester, jadwal, dosen[, kapasitas]
+    - Kode yang sudah ada diperbarui tanpa mengubah jumlah terisi
+    - Seluruh file diimpor dalam satu transaksi; mengembalikan jumlah baris
+    """
+    rows = _read_csv(path, ('kode_mk', 'nama_mk', 'sks', 'semester', 'jadwal', 'dosen'))
+    cursor = conn.cursor()
+    try:
+        cursor.executemany("""
+            INSERT INTO courses (kode_mk, nama_mk, sks, semester, jadwal, dosen, kapasitas)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(kode_mk) DO UPDATE SET
+                nama_mk = excluded.nama_mk,
+                sks = excluded.sks,
+                semester = excluded.semester,
+                jadwal = excluded.jadwal,
+                dosen = excluded.dosen,
+                kapasitas = excluded.kapasitas
+        """, [(row['kode_mk'], row['nama_mk'], int(row['sks']), int(row['semester']),
+               row['jadwal'], row['dosen'], int(row.get('kapasitas') or 40))
+              for row in rows])
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return len(rows)
+
+
+def integrity_problems(conn):
+    """Menjalankan integrity_check dan foreign_key_check; mengembalikan daftar masalah"""
+    problems = [row[0] for row in conn.execute("PRAGMA integrity_check") if row[0] != 'ok']
+    for table, rowid, parent, _ in conn.execute("PRAGMA foreign_key_check"):
+        problems.append(f"Foreign key {table} rowid {rowid} merujuk {parent} yang tidak ada")
+    return problems
@@ -0,0 +1,390 @@
+"""
+Modul aturan pendaftaran (enroll) dan pembatalan (drop) mata kuliah
+- Aturan yang sama dipakai oleh GUI (tab KRS) dan command line (cli.py)
+- Urutan pemeriksaan: jendela registrasi, prasyarat, kapasitas, batas SKS, duplikasi
+- Mata kuliah berkelas paralel: mahasiswa ditempatkan di kelas paling sepi yang tidak bentrok
+- Kapasitas penuh hanya peringatan: bisa dilewati dengan allow_full=True
+"""
+import json
+from datetime import datetime
+
+import admission
+import database
+import events
+import grades
+import models
+import prerequisites
+import sections
+
+# Batas minimal SKS default (system_config min_credits_per_semester)
+MIN_CREDITS = 12
+
+
+class EnrollmentError(Exception):
+    """
+    Pendaftaran/pembatalan ditolak oleh aturan KRS
+    - title: judul singkat (dipakai sebagai judul messagebox di GUI)
+    """
+
+    def __init__(self, title, message):
+        super().__init__(message)
+        self.title = title
+
+
+class CourseFullError(EnrollmentError):
+    """Mata kuliah sudah penuh; pendaftaran tetap bisa dipaksa dengan allow_full"""
+
+
+def current_credits(cursor, student_id):
+    """Menghitung total SKS aktif mahasiswa"""
+    cursor.execute("""
+        SELECT SUM(c.sks) FROM enrollments e
+        JOIN courses c ON e.course_id = c.id
+        WHERE e.student_id = ? AND e.status = 'aktif'
+    """, (student_id,))
+    return cursor.fetchone()[0] or 0
+
+
+def held_by(cursor, student_id, course_id):
+    """
+    Tahanan kursi mahasiswa yang belum kedaluwarsa (modul holds)
+    - Mengembalikan (1 jika mata kuliah ini sedang ditahan mahasiswa, SKS mata kuliah lain yang ditahan)
+    """
+    cursor.execute("""
+        SELECT COALESCE(MAX(h.course_id = ?), 0), COALESCE(SUM(CASE WHEN h.course_id <> ? THEN c.sks END), 0)
+        FROM seat_holds h
+        JOIN courses c ON c.id = h.course_id
+        WHERE h.student_id = ? AND h.expires_at > ?
+    """, (course_id, course_id, student_id, datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+    return cursor.fetchone()
+
+
+def held_by_others(cursor, student_id, course_id):
+    """
+    Jumlah kursi mata kuliah yang sedang ditahan mahasiswa lain (modul holds)
+    - Dihitung dari tahanan yang belum kedaluwarsa lewat indeks (course_id, expires_at),
+      bukan dari courses.ditahan yang baru turun setelah tahanan kedaluwarsa disapu
+    """
+    cursor.execute("""
+        SELECT COUNT(*) FROM seat_holds
+        WHERE course_id = ? AND expires_at > ? AND student_id <> ?
+    """, (course_id, datetime.now().strftime("%Y-%m-%d %H:%M:%S"), student_id))
+    return cursor.fetchone()[0]
+
+
+def min_credits(cursor):
+    """Batas minimal SKS per semester dari system_config (min_credits_per_semester)"""
+    try:
+        return int(database.get_config_value(cursor, 'min_credits_per_semester', MIN_CREDITS))
+    except ValueError:
+        return MIN_CREDITS
+
+
+def check_enrollment(cursor, student, course, allow_full=False):
+    """
+    Memeriksa semua aturan pendaftaran tanpa mengubah database
+    - student dan course berupa record dari modul models
+    - Kapasitas dibaca ulang dari database agar tidak memakai nilai usang
+    - Aturan ganjil/genap berlaku di sini agar GUI, CLI, keranjang, dan shard sama
+    - Melempar EnrollmentError (atau CourseFullError) jika ditolak
+    """
+    # Mahasiswa yang sudah ditandai lulus tidak bisa mengisi KRS lagi
+    cursor.execute("SELECT lulus_at FROM students WHERE id = ?", (student.id,))
+    row = cursor.fetchone()
+    if row and row[0] is not None:
+        raise EnrollmentError("Sudah Lulus", f"Mahasiswa {student.label} sudah lulus pada {row[0]}")
+
+    # Mengecek jendela registrasi angkatan mahasiswa
+    is_open, message = admission.registration_status(cursor, student.semester)
+    if not is_open:
+        raise EnrollmentError("Jendela Registrasi", message)
+
+    # Mengecek prasyarat lewat lookup kelayakan yang sudah dihitung di muka
+    missing = prerequisites.missing_prerequisites(cursor, student.id, course.kode_mk)
+    if missing:
+        raise EnrollmentError("Prasyarat",
+            f"Mata kuliah {course.kode_mk} membutuhkan prasyarat: {', '.join(missing)}")
+
+    # Peringatan jika kapasitas mata kuliah penuh (tapi tetap bisa daftar)
+    # Kursi yang ditahan mahasiswa lain (modul holds) ikut mengurangi sisa kapasitas
+    cursor.execute("SELECT kapasitas, terisi, retired_at, semester FROM courses WHERE id = ?", (course.id,))
+    row = cursor.fetchone()
+    if row is None:
+        raise EnrollmentError("Error", "Data mata kuliah tidak ditemukan")
+    kapasitas, terisi, retired_at, course_semester = row
+    if retired_at is not None:
+        raise EnrollmentError("Tidak Ditawarkan",
+            f"Mata kuliah {course.kode_mk} sudah dipensiunkan dari katalog")
+
+    # Mata kuliah hanya ditawarkan untuk jenis semester (ganjil/genap) yang sama
+    if course_semester % 2 != student.semester % 2:
+        jenis = "ganjil" if student.semester % 2 else "genap"
+        raise EnrollmentError("Semester Tidak Sesuai",
+            f"Mata kuliah {course.kode_mk} (semester {course_semester}) tidak ditawarkan "
+            f"untuk mahasiswa semester {jenis} ({student.semester})")
+
+    _, other_credits = held_by(cursor, student.id, course.id)
+    held = held_by_others(cursor, student.id, course.id)
+    if terisi + held >= kapasitas and not allow_full:
+        raise CourseFullError("Kapasitas Penuh",
+            f"Mata kuliah {course.kode_mk} sudah penuh ({terisi}/{kapasitas}"
+            + (f", {held} kursi ditahan" if held else "") + ").")
+
+    # Mengecek apakah total SKS (termasuk mata kuliah lain yang sedang ditahan) melebihi batas maksimal
+    credits = current_credits(cursor, student.id) + other_credits
+    if credits + course.sks > student.max_credits:
+        raise EnrollmentError("Batas SKS",
+            f"Total SKS akan melebihi batas maksimal ({credits + course.sks} > {student.max_credits})")
+
+    # Mengecek apakah mahasiswa sudah terdaftar di mata kuliah ini
+    cursor.execute("""
+        SELECT id FROM enrollments
+        WHERE student_id=? AND course_id=? AND status='aktif'
+    """, (student.id, course.id))
+    if cursor.fetchone():
+        raise EnrollmentError("Sudah Terdaftar", "Mahasiswa sudah terdaftar di mata kuliah ini")
+
+
+def assign_section(cursor, student, course, allow_full=False):
+    """
+    Memilih kelas paralel untuk pendaftaran (modul sections)
+    - Mengembalikan ID kelas, atau None jika mata kuliah tidak punya kelas paralel
+    - Melempar EnrollmentError jika semua kelas penuh atau bentrok dengan jadwal mahasiswa
+    """
+    try:
+        section = sections.pick_section(cursor, student.id, course.id, allow_full)
+    except sections.SectionError as e:
+        raise EnrollmentError("Kelas Paralel", f"{course.kode_mk}: {e}")
+    return section[0] if section else None
+
+
+def enroll(conn, student, course, allow_full=False, source='gui'):
+    """
+    Mendaftarkan mahasiswa ke mata kuliah setelah lolos check_enrollment
+    - Menyimpan enrollment dan menambah jumlah terisi dalam satu transaksi
+    - source dicatat pada log event (modul events)
+    - Mengembalikan ID enrollment baru
+    """
+    cursor = conn.cursor()
+    check_enrollment(cursor, student, course, allow_full)
+    section_id = assign_section(cursor, student, course, allow_full)
+    try:
+        # Mendapatkan tanggal dan waktu saat ini
+        tanggal_daftar = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        events.set_context(cursor, source)
+
+        # Memasukkan data enrollment ke database (terisi kelas paralel dijaga trigger)
+        cursor.execute("""
+            INSERT INTO enrollments (student_id, course_id, tanggal_daftar, status, section_id)
+            VALUES (?, ?, ?, 'aktif', ?)
+        """, (student.id, course.id, tanggal_daftar, section_id))
+        enrollment_id = cursor.lastrowid
+
+        # Menambah jumlah mahasiswa terisi di mata kuliah
+        cursor.execute("UPDATE courses SET terisi = terisi + 1 WHERE id = ?", (course.id,))
+        events.clear_context(cursor)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return enrollment_id
+
+
+def drop(conn, student, course, source='gui'):
+    """
+    Membatalkan pendaftaran aktif mahasiswa pada mata kuliah
+    - Jumlah terisi hanya dikurangi jika memang ada enrollment yang terhapus
+    """
+    cursor = conn.cursor()
+    try:
+        events.set_context(cursor, source)
+        # Menghapus data enrollment
+        cursor.execute("""
+            DELETE FROM enrollments
+            WHERE student_id=? AND course_id=? AND status='aktif'
+        """, (student.id, course.id))
+        if cursor.rowcount == 0:
+            raise EnrollmentError("Tidak Terdaftar",
+                f"Mahasiswa tidak terdaftar di mata kuliah {course.kode_mk}")
+
+        # Mengurangi jumlah mahasiswa terisi di mata kuliah
+        cursor.execute("UPDATE courses SET terisi = terisi - 1 WHERE id = ?", (course.id,))
+        events.clear_context(cursor)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def _bulk_drop(conn, where, params, source, reset_course=None):
+    """
+    Menghapus enrollment aktif yang memenuhi kondisi dalam satu transaksi
+    - DELETE ... RETURNING memberi pasangan (student_id, course_id) yang benar-benar terhapus
+    - Jumlah terisi dikurangi per mata kuliah sesuai baris yang terhapus;
+      reset_course (ID) langsung dinolkan karena tidak ada lagi peserta aktif
+    - Mengembalikan daftar pasangan tersebut
+    """
+    cursor = conn.cursor()
+    try:
+        events.set_context(cursor, source)
+        cursor.execute(f"""
+            DELETE FROM enrollments
+            WHERE status = 'aktif' AND {where}
+            RETURNING student_id, course_id
+        """, params)
+        dropped = cursor.fetchall()
+
+        counts = {}
+        for _, course_id in dropped:
+            counts[course_id] = counts.get(course_id, 0) + 1
+        if reset_course is not None:
+            cursor.execute("UPDATE courses SET terisi = 0 WHERE id = ?", (reset_course,))
+        else:
+            cursor.executemany("UPDATE courses SET terisi = MAX(terisi - ?, 0) WHERE id = ?",
+                               [(count, course_id) for course_id, count in counts.items()])
+        events.clear_context(cursor)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return dropped
+
+
+def cancel_course(conn, course, source='gui'):
+    """
+    Membatalkan kelas: semua enrollment aktif mata kuliah dihapus dan terisi menjadi 0
+    - Mengembalikan jumlah mahasiswa yang terhapus dari kelas
+    """
+    return len(_bulk_drop(conn, "course_id = ?", (course.id,), source, reset_course=course.id))
+
+
+def drop_courses(conn, student, courses, source='gui'):
+    """
+    Membatalkan beberapa mata kuliah sekaligus untuk satu mahasiswa
+    - Mengembalikan (ID mata kuliah yang dibatalkan, ID yang ternyata tidak terdaftar)
+    """
+    course_ids = [course.id for course in courses]
+    dropped = _bulk_drop(conn, "student_id = ? AND course_id IN (SELECT value FROM json_each(?))",
+                         (student.id, json.dumps(course_ids)), source)
+    dropped_ids = {course_id for _, course_id in dropped}
+    return sorted(dropped_ids), [course_id for course_id in course_ids if course_id not in dropped_ids]
+
+
+def drop_students(conn, course, students, source='gui'):
+    """
+    Membatalkan satu mata kuliah sekaligus untuk beberapa mahasiswa
+    - Mengembalikan (ID mahasiswa yang dibatalkan, ID yang ternyata tidak terdaftar)
+    """
+    student_ids = [student.id for student in students]
+    dropped = _bulk_drop(conn, "course_id = ? AND student_id IN (SELECT value FROM json_each(?))",
+                         (course.id, json.dumps(student_ids)), source)
+    dropped_ids = {student_id for student_id, _ in dropped}
+    return sorted(dropped_ids), [student_id for student_id in student_ids if student_id not in dropped_ids]
+
+
+def krs_report(conn, student):
+    """
+    Membuat teks laporan KRS mahasiswa
+    - Berisi daftar mata kuliah aktif, total SKS, dan peringatan batas SKS
+    """
+    cursor = conn.cursor()
+
+    # Mengambil mata kuliah yang diambil mahasiswa
+    enrolled_courses = models.fetch_enrolled_courses(conn, student.id)
+    student_sections = sections.student_sections(cursor, student.id)
+
+    # Mengambil konfigurasi sistem
+    academic_year = database.get_config_value(cursor, 'academic_year', '2024/2025')
+    current_semester = database.get_config_value(cursor, 'current_semester', 'Ganjil')
+
+    # Membuat format laporan KRS
+    report = "=" * 70 + "\n"
+    report += "              KARTU RENCANA STUDI (KRS)\n"
+    report += "=" * 70 + "\n\n"
+    report += f"NIM           : {student.nim}\n"
+    report += f"Nama          : {student.nama}\n"
+    report += f"Semester      : {student.semester}\n"
+    report += f"Tahun Akademik: {academic_year}\n"
+    report += f"Semester      : {current_semester}\n"
+    graded_sks, ipk = grades.cumulative(cursor, student.id)
+    report += f"IPK           : {f'{ipk:.2f} ({graded_sks} SKS)' if ipk is not None else '-'}\n\n"
+
+    report += "=" * 70 + "\n"
+    report += f"{'No':<3} {'Kode MK':<8} {'Nama Mata Kuliah':<25} {'SKS':<4} {'Jadwal':<20}\n"
+    report += "=" * 70 + "\n"
+
+    # Menambahkan daftar mata kuliah ke laporan
+    total_sks = 0
+    for i, course in enumerate(enrolled_courses, 1):
+        total_sks += course.sks
+        # Memotong nama mata kuliah jika terlalu panjang
+        nama_mk_truncated = course.nama_mk[:24]
+        # Mata kuliah berkelas paralel ditampilkan dengan nama dan jadwal kelasnya
+        kode_mk, jadwal = course.kode_mk, course.jadwal
+        if course.id in student_sections:
+            kelas, jadwal, _ = student_sections[course.id]
+            kode_mk = f"{kode_mk}-{kelas}"
+        report += f"{i:<3} {kode_mk:<8} {nama_mk_truncated:<25} {course.sks:<4} {jadwal:<20}\n"
+
+    report += "=" * 70 + "\n"
+    report += f"Total SKS yang diambil: {total_sks}\n"
+    report += f"Batas Maksimal SKS    : {student.max_credits}\n"
+
+    # Menambahkan peringatan jika ada masalah dengan total SKS
+    minimum = min_credits(cursor)
+    if total_sks > student.max_credits:
+        report += "\n⚠️  PERINGATAN: Total SKS melebihi batas maksimal!\n"
+    elif total_sks < minimum:
+        report += f"\n⚠️  PERINGATAN: Total SKS kurang dari batas minimal ({minimum} SKS)!\n"
+
+    report += "\n" + "=" * 70 + "\n"
+    report += f"Tanggal Cetak: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}\n"
+    report += "=" * 70 + "\n"
+    return report
+
+
+def count_mismatches(cursor):
+    """
+    Mencari mata kuliah yang kolom terisi-nya tidak sama dengan jumlah enrollment aktif
+    - Mengembalikan daftar (kode_mk, terisi, jumlah_aktif)
+    """
+    cursor.execute("""
+        SELECT c.kode_mk, c.terisi, COUNT(e.id)
+        FROM courses c
+        LEFT JOIN enrollments e ON e.course_id = c.id AND e.status = 'aktif'
+        GROUP BY c.id
+        HAVING c.terisi <> COUNT(e.id)
+        ORDER BY c.kode_mk
+    """)
+    return cursor.fetchall()
+
+
+def fix_counts(conn):
+    """Menyamakan kolom terisi dengan jumlah enrollment aktif; mengembalikan jumlah baris diubah"""
+    cursor = conn.cursor()
+    cursor.execute("""
+        UPDATE courses SET terisi = (
+            SELECT COUNT(*) FROM enrollments e
+            WHERE e.course_id = courses.id AND e.status = 'aktif'
+        )
+        WHERE terisi <> (
+            SELECT COUNT(*) FROM enrollments e
+            WHERE e.course_id = courses.id AND e.status = 'aktif'
+        )
+    """)
+    conn.commit()
+    return cursor.rowcount
+
+
+def overloaded_students(cursor):
+    """Mencari mahasiswa yang total SKS aktifnya melebihi max_credits: (nim, nama, total, max)"""
+    cursor.execute("""
+        SELECT s.nim, s.nama, SUM(c.sks) AS total, s.max_credits
+        FROM students s
+        JOIN enrollments e ON e.student_id = s.id AND e.status = 'aktif'
+        JOIN courses c ON c.id = e.course_id
+        GROUP BY s.id
+        HAVING total > s.max_credits
+        ORDER BY s.nim
+    """)
+    return cursor.fetchall()
@@ -0,0 +1,372 @@
+"""
+Modul log event pendaftaran (append-only) beserta snapshot dan undo
+- Setiap perubahan enrollment aktif (daftar, batal, tutup, buka kembali)
+  dicatat trigger ke tabel enrollment_events yang hanya boleh ditambah
+- Snapshot KRS per mahasiswa dibuat otomatis setiap SNAPSHOT_INTERVAL event,
+  sehingga rekonstruksi KRS pada titik waktu mana pun cukup memutar ulang
+  event setelah snapshot terdekat
+- Undo bertahap dilakukan dengan menambahkan event kebalikan (tidak menghapus log)
+"""
+import argparse
+import getpass
+import json
+import sqlite3
+
+# Lokasi default database KRS
+DATABASE_PATH = 'krs_database.db'
+
+# Jumlah event per mahasiswa sebelum snapshot KRS berikutnya dibuat
+SNAPSHOT_INTERVAL = 20
+
+# Jenis event dan pengaruhnya terhadap daftar mata kuliah aktif
+EVENT_ENROLL = 'enroll'    # enrollment aktif baru
+EVENT_DROP = 'drop'        # enrollment aktif dihapus
+EVENT_CLOSE = 'close'      # status aktif berubah (mis. selesai)
+EVENT_REOPEN = 'reopen'    # status kembali aktif
+ADDS_COURSE = (EVENT_ENROLL, EVENT_REOPEN)
+
+EVENT_LABELS = {
+    EVENT_ENROLL: 'Daftar',
+    EVENT_DROP: 'Batal',
+    EVENT_CLOSE: 'Ditutup',
+    EVENT_REOPEN: 'Dibuka kembali',
+}
+
+# Kolom event yang diisi dari konteks penulis (event_context)
+_EVENT_INSERT = """
+        INSERT INTO enrollment_events
+            (student_id, course_id, event_type, prev_status, new_status, actor, source, reverts, created_at)
+        SELECT {student}, {course}, '{event}', {prev}, {new}, actor, source, reverts,
+               strftime('%Y-%m-%d %H:%M:%f', 'now', 'localtime')
+        FROM event_context WHERE id = 1;
+"""
+
+EVENT_TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_event_enroll AFTER INSERT ON enrollments
+    WHEN NEW.status = 'aktif'
+    BEGIN{_EVENT_INSERT.format(student='NEW.student_id', course='NEW.course_id', event=EVENT_ENROLL,
+                               prev='NULL', new='NEW.status')}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_event_drop AFTER DELETE ON enrollments
+    WHEN OLD.status = 'aktif'
+    BEGIN{_EVENT_INSERT.format(student='OLD.student_id', course='OLD.course_id', event=EVENT_DROP,
+                               prev='OLD.status', new='NULL')}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_event_close AFTER UPDATE OF status ON enrollments
+    WHEN OLD.status = 'aktif' AND NEW.status <> 'aktif'
+    BEGIN{_EVENT_INSERT.format(student='NEW.student_id', course='NEW.course_id', event=EVENT_CLOSE,
+                               prev='OLD.status', new='NEW.status')}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_event_reopen AFTER UPDATE OF status ON enrollments
+    WHEN OLD.status <> 'aktif' AND NEW.status = 'aktif'
+    BEGIN{_EVENT_INSERT.format(student='NEW.student_id', course='NEW.course_id', event=EVENT_REOPEN,
+                               prev='OLD.status', new='NEW.status')}
+    END
+    """,
+    # Log hanya boleh ditambah
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_event_no_update BEFORE UPDATE ON enrollment_events
+    BEGIN
+        SELECT RAISE(ABORT, 'enrollment_events bersifat append-only');
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_event_no_delete BEFORE DELETE ON enrollment_events
+    BEGIN
+        SELECT RAISE(ABORT, 'enrollment_events bersifat append-only');
+    END
+    """,
+    # Snapshot KRS setiap SNAPSHOT_INTERVAL event milik mahasiswa yang sama
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_event_snapshot AFTER INSERT ON enrollment_events
+    WHEN (SELECT COUNT(*) FROM enrollment_events
+          WHERE student_id = NEW.student_id
+            AND id > COALESCE((SELECT MAX(event_id) FROM enrollment_snapshots
+                               WHERE student_id = NEW.student_id), 0)) >= {SNAPSHOT_INTERVAL}
+    BEGIN
+        INSERT INTO enrollment_snapshots (student_id, event_id, course_ids, created_at)
+        VALUES (NEW.student_id, NEW.id,
+                (SELECT json_group_array(course_id) FROM
+                    (SELECT course_id FROM enrollments
+                     WHERE student_id = NEW.student_id AND status = 'aktif' ORDER BY course_id)),
+                NEW.created_at);
+    END
+    """,
+]
+
+
+class EventError(Exception):
+    """Kesalahan saat membaca atau membatalkan event pendaftaran"""
+
+
+def init_schema(cursor):
+    """
+    Membuat tabel log event, snapshot, dan konteks penulis beserta triggernya
+    - enrollment_events: log append-only dengan ID berurutan
+    - enrollment_snapshots: daftar mata kuliah aktif (JSON) per mahasiswa pada event tertentu
+    - event_context: satu baris berisi pelaku dan sumber perubahan yang sedang ditulis
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS enrollment_events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,    -- Nomor urut event
+            student_id INTEGER NOT NULL,             -- ID mahasiswa
+            course_id INTEGER NOT NULL,              -- ID mata kuliah
+            event_type TEXT NOT NULL,                -- enroll/drop/close/reopen
+            prev_status TEXT,                        -- Status sebelum perubahan
+            new_status TEXT,                         -- Status setelah perubahan
+            actor TEXT,                              -- Pengguna yang melakukan perubahan
+            source TEXT,                             -- Asal perubahan (gui, cli, alokasi, undo, ...)
+            reverts INTEGER,                         -- ID event yang dibatalkan (khusus undo)
+            created_at TEXT NOT NULL                 -- Waktu event
+        )
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_events_student ON enrollment_events (student_id, id)
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_events_reverts ON enrollment_events (reverts)
+        WHERE reverts IS NOT NULL
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS enrollment_snapshots (
+            student_id INTEGER NOT NULL,             -- ID mahasiswa
+            event_id INTEGER NOT NULL,               -- Event terakhir yang tercakup snapshot
+            course_ids TEXT NOT NULL,                -- Daftar ID mata kuliah aktif (JSON)
+            created_at TEXT NOT NULL,                -- Waktu snapshot
+            PRIMARY KEY (student_id, event_id)
+        ) WITHOUT ROWID
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS event_context (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            actor TEXT,                              -- Pengguna yang sedang menulis
+            source TEXT,                             -- Asal perubahan
+            reverts INTEGER                          -- Diisi hanya selama proses undo
+        )
+    """)
+    cursor.execute("INSERT OR IGNORE INTO event_context (id, actor, source) VALUES (1, NULL, NULL)")
+
+    for trigger in EVENT_TRIGGERS:
+        cursor.execute(trigger)
+
+
+def default_actor():
+    """Nama pengguna sistem operasi yang menjalankan aplikasi"""
+    try:
+        return getpass.getuser()
+    except Exception:
+        return None
+
+
+def set_context(cursor, source, actor=None, reverts=None):
+    """
+    Mengisi pelaku dan sumber untuk event yang ditulis pada transaksi ini
+    - Dipanggil di dalam transaksi yang sama dengan perubahan enrollment;
+      kunci tulis SQLite menjamin konteks tidak tertukar antar klien
+    """
+    cursor.execute("UPDATE event_context SET actor = ?, source = ?, reverts = ? WHERE id = 1",
+                   (actor or default_actor(), source, reverts))
+
+
+def clear_context(cursor):
+    """Mengosongkan konteks sebelum commit agar tidak terbawa ke penulis berikutnya"""
+    cursor.execute("UPDATE event_context SET actor = NULL, source = NULL, reverts = NULL WHERE id = 1")
+
+
+def history(cursor, student_id, limit=-1):
+    """
+    Mengambil riwayat event mahasiswa, terbaru lebih dulu
+    - Setiap baris: (id, created_at, event_type, kode_mk, nama_mk, actor, source,
+      reverts, undone) dengan undone = 1 jika event sudah dibatalkan
+    """
+    cursor.execute("""
+        SELECT e.id, e.created_at, e.event_type, COALESCE(c.kode_mk, '#' || e.course_id),
+               COALESCE(c.nama_mk, '-'), e.actor, e.source, e.reverts,
+               EXISTS (SELECT 1 FROM enrollment_events u WHERE u.reverts = e.id)
+        FROM enrollment_events e
+        LEFT JOIN courses c ON c.id = e.course_id
+        WHERE e.student_id = ?
+        ORDER BY e.id DESC
+        LIMIT ?
+    """, (student_id, limit))
+    return cursor.fetchall()
+
+
+def krs_at(cursor, student_id, event_id=None, at=None):
+    """
+    Merekonstruksi daftar ID mata kuliah aktif mahasiswa pada titik waktu tertentu
+    - event_id: keadaan setelah event tersebut; at: keadaan pada waktu 'YYYY-MM-DD HH:MM[:SS]'
+    - Tanpa keduanya, keadaan setelah event terakhir
+    - Dimulai dari snapshot terdekat sebelum titik tersebut lalu memutar ulang event sesudahnya
+    """
+    if event_id is None:
+        if at is None:
+            cursor.execute("SELECT MAX(id) FROM enrollment_events WHERE student_id = ?", (student_id,))
+        else:
+            cursor.execute("""
+                SELECT MAX(id) FROM enrollment_events WHERE student_id = ? AND created_at <= ?
+            """, (student_id, at if len(at) > 16 else at + ':59.999'))
+        event_id = cursor.fetchone()[0] or 0
+
+    cursor.execute("""
+        SELECT event_id, course_ids FROM enrollment_snapshots
+        WHERE student_id = ? AND event_id <= ?
+        ORDER BY event_id DESC LIMIT 1
+    """, (student_id, event_id))
+    snapshot = cursor.fetchone()
+    start, courses = (snapshot[0], set(json.loads(snapshot[1]))) if snapshot else (0, set())
+
+    cursor.execute("""
+        SELECT course_id, event_type FROM enrollment_events
+        WHERE student_id = ? AND id > ? AND id <= ?
+        ORDER BY id
+    """, (student_id, start, event_id))
+    for course_id, event_type in cursor.fetchall():
+        if event_type in ADDS_COURSE:
+            courses.add(course_id)
+        else:
+            courses.discard(course_id)
+    return sorted(courses)
+
+
+def undoable_events(cursor, steps=1, student_id=None):
+    """Mengambil event terakhir yang belum dibatalkan (bukan event undo), terbaru lebih dulu"""
+    query = """
+        SELECT e.id, e.student_id, e.course_id, e.event_type, e.prev_status, e.new_status, e.created_at
+        FROM enrollment_events e
+        WHERE e.reverts IS NULL
+          AND NOT EXISTS (SELECT 1 FROM enrollment_events u WHERE u.reverts = e.id)
+    """
+    params = []
+    if student_id is not None:
+        query += " AND e.student_id = ?"
+        params.append(student_id)
+    query += " ORDER BY e.id DESC LIMIT ?"
+    params.append(steps)
+    cursor.execute(query, params)
+    return cursor.fetchall()
+
+
+def _revert(cursor, event):
+    """Menjalankan kebalikan satu event; jumlah terisi ikut disesuaikan"""
+    event_id, student_id, course_id, event_type, prev_status, new_status, created_at = event
+
+    if event_type == EVENT_ENROLL:
+        cursor.execute("""
+            DELETE FROM enrollments WHERE student_id = ? AND course_id = ? AND status = 'aktif'
+        """, (student_id, course_id))
+        delta = -1
+    elif event_type == EVENT_DROP:
+        cursor.execute("SELECT 1 FROM students WHERE id = ?", (student_id,))
+        if cursor.fetchone() is None:
+            raise EventError(f"Event #{event_id} tidak bisa dibatalkan: mahasiswa sudah dihapus")
+        cursor.execute("""
+            INSERT OR IGNORE INTO enrollments (student_id, course_id, tanggal_daftar, status)
+            VALUES (?, ?, ?, 'aktif')
+        """, (student_id, course_id, created_at[:19]))
+        delta = 1
+    elif event_type == EVENT_CLOSE:
+        # Hanya enrollment tertutup terakhir yang dibuka, dan tidak jika mata kuliah sudah diambil ulang
+        cursor.execute("""
+            UPDATE enrollments SET status = 'aktif'
+            WHERE id = (SELECT MAX(id) FROM enrollments WHERE student_id = ?1 AND course_id = ?2 AND status = ?3)
+              AND NOT EXISTS (SELECT 1 FROM enrollments
+                              WHERE student_id = ?1 AND course_id = ?2 AND status = 'aktif')
+        """, (student_id, course_id, new_status))
+        delta = 1
+    else:
+        cursor.execute("""
+            UPDATE enrollments SET status = ? WHERE student_id = ? AND course_id = ? AND status = 'aktif'
+        """, (prev_status, student_id, course_id))
+        delta = -1
+
+    if cursor.rowcount != 1:
+        raise EventError(f"Event #{event_id} tidak bisa dibatalkan: data enrollment sudah berubah")
+    cursor.execute("UPDATE courses SET terisi = terisi + ? WHERE id = ?", (delta, course_id))
+
+
+def undo(conn, steps=1, student_id=None, actor=None):
+    """
+    Membatalkan beberapa event terakhir (opsional hanya milik satu mahasiswa)
+    - Event dibatalkan dari yang terbaru; setiap pembatalan menambah event baru
+      dengan kolom reverts menunjuk event aslinya
+    - Semua langkah dalam satu transaksi: gagal satu, batal semua
+    - Mengembalikan daftar event yang dibatalkan
+    """
+    cursor = conn.cursor()
+    reverted = undoable_events(cursor, steps, student_id)
+    try:
+        for event in reverted:
+            set_context(cursor, 'undo', actor, reverts=event[0])
+            _revert(cursor, event)
+        clear_context(cursor)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return reverted
+
+
+def main():
+    """Menampilkan riwayat, rekonstruksi KRS, dan undo dari command line"""
+    parser = argparse.ArgumentParser(description="Log event pendaftaran KRS")
+    parser.add_argument('--database', default=DATABASE_PATH, help="File database KRS")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    history_parser = subparsers.add_parser('history', help="Riwayat event mahasiswa")
+    history_parser.add_argument('nim')
+
+    at_parser = subparsers.add_parser('at', help="KRS mahasiswa pada titik waktu tertentu")
+    at_parser.add_argument('nim')
+    at_parser.add_argument('--event', type=int, help="Keadaan setelah event ini")
+    at_parser.add_argument('--time', help="Keadaan pada waktu 'YYYY-MM-DD HH:MM[:SS]'")
+
+    undo_parser = subparsers.add_parser('undo', help="Batalkan event terakhir")
+    undo_parser.add_argument('--nim', help="Hanya event milik mahasiswa ini")
+    undo_parser.add_argument('--steps', type=int, default=1)
+
+    args = parser.parse_args()
+    conn = sqlite3.connect(args.database)
+    cursor = conn.cursor()
+    try:
+        student_id = None
+        if getattr(args, 'nim', None):
+            cursor.execute("SELECT id FROM students WHERE nim = ?", (args.nim,))
+            row = cursor.fetchone()
+            if row is None:
+                raise SystemExit(f"Mahasiswa dengan NIM {args.nim} tidak ditemukan")
+            student_id = row[0]
+
+        if args.command == 'history':
+            for event_id, created_at, event_type, kode_mk, nama_mk, actor, source, reverts, undone in \
+                    history(cursor, student_id):
+                note = f" (undo #{reverts})" if reverts else (" [dibatalkan]" if undone else "")
+                print(f"#{event_id} {created_at} {EVENT_LABELS.get(event_type, event_type):<15} "
+                      f"{kode_mk:<8} {nama_mk} oleh {actor or '-'} via {source or '-'}{note}")
+        elif args.command == 'at':
+            course_ids = krs_at(cursor, student_id, args.event, args.time)
+            if course_ids:
+                cursor.execute(f"""
+                    SELECT kode_mk, nama_mk, sks FROM courses
+                    WHERE id IN ({','.join('?' * len(course_ids))}) ORDER BY kode_mk
+                """, course_ids)
+                for kode_mk, nama_mk, sks in cursor.fetchall():
+                    print(f"{kode_mk:<8} {nama_mk:<35} {sks} SKS")
+            print(f"Jumlah mata kuliah: {len(course_ids)}")
+        else:
+            for event in undo(conn, args.steps, student_id):
+                print(f"Dibatalkan: #{event[0]} {EVENT_LABELS.get(event[3], event[3])} "
+                      f"mahasiswa {event[1]} mata kuliah {event[2]}")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+"""
+Modul export data KRS secara streaming
+- Hasil query dibaca per potongan (fetchmany) dan langsung ditulis ke file,
+  sehingga pemakaian memori tetap kecil berapa pun jumlah barisnya
+- Format CSV dan JSON Lines, opsional dikompres gzip
+- Daftar peserta bisa disaring per mata kuliah, per dosen, dan per semester
+"""
+import argparse
+import csv
+import gzip
+import json
+import os
+import time
+
+import database
+import lecturers
+
+# Lokasi default database KRS
+DATABASE_PATH = 'krs_database.db'
+
+# Jumlah baris yang dibaca per fetchmany
+EXPORT_CHUNK_SIZE = 1000
+
+# Tingkat kompresi gzip (6 = seimbang antara ukuran dan kecepatan)
+EXPORT_GZIP_LEVEL = 6
+
+FORMATS = ('csv', 'jsonl')
+
+# Data yang bisa diexport beserta query dasarnya
+DATASETS = {
+    'students': """
+        SELECT s.id, s.nim, s.nama, s.semester, s.max_credits, s.created_at
+        FROM students s
+    """,
+    'courses': """
+        SELECT c.id, c.kode_mk, c.nama_mk, c.sks, c.semester, c.jadwal, c.dosen,
+               c.kapasitas, c.terisi, (c.kapasitas - c.terisi) AS sisa
+        FROM courses c
+    """,
+    # Join yang sama dengan laporan KRS (generate_report), ditambah data mahasiswa
+    'enrollments': """
+        SELECT c.kode_mk, c.nama_mk, c.sks, c.jadwal, c.dosen, c.semester AS semester_mk,
+               s.nim, s.nama, s.semester, e.tanggal_daftar, e.status
+        FROM enrollments e
+        JOIN courses c ON e.course_id = c.id
+        JOIN students s ON e.student_id = s.id
+    """,
+}
+
+# Label dataset yang ditampilkan di GUI
+DATASET_LABELS = {
+    "Peserta MK": 'enrollments',
+    "Mata Kuliah": 'courses',
+    "Mahasiswa": 'students',
+}
+
+# Urutan hasil export per dataset
+DATASET_ORDER = {
+    'students': "s.nim",
+    'courses': "c.semester, c.kode_mk",
+    'enrollments': "c.kode_mk, s.nim",
+}
+
+
+class ExportError(Exception):
+    """Kesalahan saat export data"""
+
+
+def build_query(dataset, kode_mk=None, dosen=None, semester=None, status='aktif'):
+    """
+    Menyusun query export beserta parameternya
+    - kode_mk dan dosen berlaku untuk courses dan enrollments
+    - semester: semester mahasiswa (students) atau semester mata kuliah (lainnya)
+    - status hanya berlaku untuk enrollments (None = semua status)
+    """
+    if dataset not in DATASETS:
+        raise ExportError(f"Dataset tidak dikenal: {dataset}")
+
+    conditions, params = [], []
+    if kode_mk and dataset != 'students':
+        conditions.append("c.kode_mk = ?")
+        params.append(kode_mk)
+    if dosen and dataset != 'students':
+        # Gelar diabaikan: 'Dr. David Chen' juga menemukan mata kuliah 'Prof. David Chen'
+        conditions.append(lecturers.lecturer_id_condition('c.lecturer_id'))
+        params.append(dosen)
+    if semester is not None:
+        conditions.append("s.semester = ?" if dataset == 'students' else "c.semester = ?")
+        params.append(int(semester))
+    if status and dataset == 'enrollments':
+        conditions.append("e.status = ?")
+        params.append(status)
+
+    query = DATASETS[dataset]
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    query += " ORDER BY " + DATASET_ORDER[dataset]
+    return query, params
+
+
+def detect_format(path, fmt=None):
+    """Menentukan format dan kompresi dari argumen atau ekstensi file"""
+    compress = path.endswith('.gz')
+    if fmt is None:
+        name = path[:-3] if compress else path
+        fmt = 'jsonl' if name.endswith(('.jsonl', '.json')) else 'csv'
+    if fmt not in FORMATS:
+        raise ExportError(f"Format tidak dikenal: {fmt}")
+    return fmt, compress
+
+
+def open_output(path, compress=False):
+    """Membuka file tujuan dalam mode teks (gzip jika compress)"""
+    if compress:
+        return gzip.open(path, 'wt', compresslevel=EXPORT_GZIP_LEVEL, encoding='utf-8', newline='')
+    return open(path, 'w', encoding='utf-8', newline='')
+
+
+def iter_chunks(cursor, chunk_size=EXPORT_CHUNK_SIZE):
+    """Membaca hasil query per potongan dengan fetchmany"""
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            return
+        yield rows
+
+
+def export_query(conn, query, params, path, fmt='csv', compress=False,
+                 chunk_size=EXPORT_CHUNK_SIZE, progress=None):
+    """
+    Mengexport hasil query ke file secara streaming
+    - Ditulis ke file sementara lalu dipindah, sehingga file tujuan tidak
+      pernah berisi export setengah jadi
+    - progress(rows) dipanggil setiap selesai menulis satu potongan
+    - Mengembalikan info: path, rows, elapsed, rows_per_sec, size
+    """
+    started = time.perf_counter()
+    cursor = conn.cursor()
+    cursor.execute(query, params)
+    columns = [column[0] for column in cursor.description]
+
+    temp_path = path + '.tmp'
+    total = 0
+    try:
+        with open_output(temp_path, compress) as output:
+            if fmt == 'csv':
+                writer = csv.writer(output)
+                writer.writerow(columns)
+                for rows in iter_chunks(cursor, chunk_size):
+                    writer.writerows(rows)
+                    total += len(rows)
+                    if progress:
+                        progress(total)
+            else:
+                for rows in iter_chunks(cursor, chunk_size):
+                    output.writelines(json.dumps(dict(zip(columns, row)), ensure_ascii=False) + "\n"
+                                      for row in rows)
+                    total += len(rows)
+                    if progress:
+                        progress(total)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    finally:
+        cursor.close()
+
+    elapsed = time.perf_counter() - started
+    return {
+        'path': path,
+        'rows': total,
+        'elapsed': elapsed,
+        'rows_per_sec': total / elapsed if elapsed > 0 else 0,
+        'size': os.path.getsize(path),
+    }
+
+
+def export_dataset(conn, dataset, path, fmt=None, chunk_size=EXPORT_CHUNK_SIZE,
+                   progress=None, **filters):
+    """
+    Mengexport satu dataset (students, courses, enrollments) ke file
+    - Format dan gzip ditentukan dari ekstensi (.csv, .jsonl, .gz) jika fmt kosong
+    - filters: kode_mk, dosen, semester, status (lihat build_query)
+    """
+    fmt, compress = detect_format(path, fmt)
+    query, params = build_query(dataset, **filters)
+    info = export_query(conn, query, params, path, fmt, compress, chunk_size, progress)
+    info['dataset'] = dataset
+    return info
+
+
+def format_export(info):
+    """Membuat ringkasan hasil export"""
+    return (f"Export {info.get('dataset', 'data')}: {info['rows']} baris ke {info['path']} "
+            f"({info['size'] / 1024:.1f} KB, {info['elapsed']:.2f} detik, "
+            f"{info['rows_per_sec']:.0f} baris/detik)")
+
+
+def main():
+    """Mengexport data KRS dari command line"""
+    parser = argparse.ArgumentParser(description="Export data KRS (CSV/JSON Lines, opsional gzip)")
+    parser.add_argument('dataset', choices=sorted(DATASETS))
+    parser.add_argument('output', help="File tujuan (.csv, .jsonl, tambahkan .gz untuk kompresi)")
+    parser.add_argument('--database', help="Lokasi database: file, 'memory[:nama[=file]]', atau 'tmpfs:file' "
+                                           "(default: variabel KRS_DATABASE atau krs_database.db)")
+    parser.add_argument('--format', choices=FORMATS, help="Paksa format output")
+    parser.add_argument('--kode', help="Saring per kode mata kuliah")
+    parser.add_argument('--dosen', help="Saring per dosen")
+    parser.add_argument('--semester', type=int, help="Saring per semester")
+    parser.add_argument('--status', default='aktif', help="Status enrollment ('' = semua)")
+    parser.add_argument('--chunk', type=int, default=EXPORT_CHUNK_SIZE, help="Baris per fetchmany")
+    args = parser.parse_args()
+
+    storage = database.open_storage(args.database)
+    conn = storage.connect()
+    try:
+        database.init_database(conn)
+        conn.commit()
+        info = export_dataset(conn, args.dataset, args.output, args.format, args.chunk,
+                              kode_mk=args.kode, dosen=args.dosen, semester=args.semester,
+                              status=args.status or None)
+    finally:
+        conn.close()
+        storage.close()
+    print(format_export(info))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,471 @@
+"""
+Modul nilai, IPK/IPS, dan batas SKS berbasis IPK
+- Nilai huruf disimpan per enrollment di tabel grades (satu nilai per mahasiswa
+  per mata kuliah; mengulang mata kuliah menimpa nilai lama)
+- IPK kumulatif dan IPS per semester disimpan sebagai total SKS dan total mutu
+  yang diperbarui trigger setiap kali nilai diposting, diubah, atau dihapus,
+  sehingga tidak pernah dihitung ulang dari seluruh riwayat
+- max_credits mahasiswa mengikuti tabel rentang IPK (credit_brackets) yang bisa
+  diatur admin; diperbarui otomatis saat IPK berubah
+- Nilai tetap tersimpan walaupun enrollment-nya sudah diarsipkan
+- Nilai menentukan kelulusan prasyarat: bobot di bawah MIN_PASSING_BOBOT (E)
+  membatalkan kelulusan dari rollover, nilai lulus (termasuk hasil mengulang)
+  mencatatnya di completed_courses
+
+Format rentang IPK (dipisah titik koma):
+    3.00=24; 2.50=21; 2.00=18; 1.50=15; 0=12
+"""
+import argparse
+import csv
+import json
+from datetime import datetime
+
+import database
+
+# Lokasi default database KRS
+DATABASE_PATH = 'krs_database.db'
+
+# Bobot nilai huruf
+GRADE_POINTS = {
+    'A': 4.0, 'A-': 3.7, 'B+': 3.3, 'B': 3.0, 'B-': 2.7,
+    'C+': 2.3, 'C': 2.0, 'D': 1.0, 'E': 0.0,
+}
+
+# Bobot minimal agar mata kuliah dihitung lulus untuk prasyarat (E tidak lulus)
+MIN_PASSING_BOBOT = 1.0
+
+# Rentang IPK default: (IPK minimal, batas SKS)
+DEFAULT_BRACKETS = [(3.0, 24), (2.5, 21), (2.0, 18), (1.5, 15), (0.0, 12)]
+
+# Batas SKS dari rentang IPK tertinggi yang dicapai (IPK dibulatkan 2 desimal)
+_BRACKET_CREDITS = """
+    SELECT b.max_credits FROM credit_brackets b
+    WHERE b.min_ipk <= ROUND({mutu} / {sks}, 2)
+    ORDER BY b.min_ipk DESC LIMIT 1
+"""
+
+# Mencatat/menghapus kelulusan mata kuliah NEW sesuai bobot nilainya (modul prerequisites)
+# ON CONFLICT DO NOTHING (bukan INSERT OR IGNORE): di dalam trigger, OR IGNORE ditimpa
+# algoritma konflik pernyataan luar, termasuk upsert nilai di post_grades
+_SYNC_COMPLETED = f"""
+        DELETE FROM completed_courses
+        WHERE NEW.bobot < {MIN_PASSING_BOBOT} AND student_id = NEW.student_id
+          AND kode_mk = (SELECT kode_mk FROM courses WHERE id = NEW.course_id);
+        INSERT INTO completed_courses (student_id, kode_mk, completed_at)
+        SELECT NEW.student_id, kode_mk, NEW.posted_at FROM courses
+        WHERE NEW.bobot >= {MIN_PASSING_BOBOT} AND id = NEW.course_id
+        ON CONFLICT DO NOTHING;
+"""
+
+# Trigger yang menjaga total IPK/IPS dan batas SKS tetap sinkron
+GRADE_TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_grade_insert AFTER INSERT ON grades
+    BEGIN
+        INSERT INTO student_ipk (student_id, sks, mutu)
+        VALUES (NEW.student_id, NEW.sks, NEW.bobot * NEW.sks)
+        ON CONFLICT(student_id) DO UPDATE SET
+            sks = sks + excluded.sks,
+            mutu = mutu + excluded.mutu;
+        INSERT INTO student_ips (student_id, term, sks, mutu)
+        VALUES (NEW.student_id, NEW.term, NEW.sks, NEW.bobot * NEW.sks)
+        ON CONFLICT(student_id, term) DO UPDATE SET
+            sks = sks + excluded.sks,
+            mutu = mutu + excluded.mutu;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_grade_delete AFTER DELETE ON grades
+    BEGIN
+        UPDATE student_ipk SET sks = sks - OLD.sks, mutu = mutu - OLD.bobot * OLD.sks
+        WHERE student_id = OLD.student_id;
+        UPDATE student_ips SET sks = sks - OLD.sks, mutu = mutu - OLD.bobot * OLD.sks
+        WHERE student_id = OLD.student_id AND term = OLD.term;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_grade_update AFTER UPDATE OF term, bobot, sks ON grades
+    BEGIN
+        UPDATE student_ipk SET
+            sks = sks - OLD.sks + NEW.sks,
+            mutu = mutu - OLD.bobot * OLD.sks + NEW.bobot * NEW.sks
+        WHERE student_id = NEW.student_id;
+        UPDATE student_ips SET sks = sks - OLD.sks, mutu = mutu - OLD.bobot * OLD.sks
+        WHERE student_id = OLD.student_id AND term = OLD.term;
+        INSERT INTO student_ips (student_id, term, sks, mutu)
+        VALUES (NEW.student_id, NEW.term, NEW.sks, NEW.bobot * NEW.sks)
+        ON CONFLICT(student_id, term) DO UPDATE SET
+            sks = sks + excluded.sks,
+            mutu = mutu + excluded.mutu;
+    END
+    """,
+    # Batas SKS mengikuti IPK terbaru
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_grade_credits_insert AFTER INSERT ON student_ipk
+    WHEN NEW.sks > 0
+    BEGIN
+        UPDATE students SET max_credits = COALESCE(({_BRACKET_CREDITS.format(mutu='NEW.mutu', sks='NEW.sks')}),
+                                                   max_credits)
+        WHERE id = NEW.student_id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_grade_credits_update AFTER UPDATE ON student_ipk
+    WHEN NEW.sks > 0
+    BEGIN
+        UPDATE students SET max_credits = COALESCE(({_BRACKET_CREDITS.format(mutu='NEW.mutu', sks='NEW.sks')}),
+                                                   max_credits)
+        WHERE id = NEW.student_id;
+    END
+    """,
+    # Kelulusan prasyarat mengikuti nilai: nilai gagal menghapus mata kuliah dari
+    # completed_courses dan menolak pencatatan lulus dari rollover, nilai lulus mencatatnya
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_grade_completed_guard BEFORE INSERT ON completed_courses
+    WHEN EXISTS (SELECT 1 FROM grades g JOIN courses c ON c.id = g.course_id
+                 WHERE g.student_id = NEW.student_id AND c.kode_mk = NEW.kode_mk
+                   AND g.bobot < {MIN_PASSING_BOBOT})
+    BEGIN
+        SELECT RAISE(IGNORE);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_grade_completed_insert AFTER INSERT ON grades
+    BEGIN{_SYNC_COMPLETED}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_grade_completed_update AFTER UPDATE OF bobot ON grades
+    BEGIN{_SYNC_COMPLETED}
+    END
+    """,
+    # Tanpa nilai, kelulusan kembali mengikuti status enrollment 'selesai'
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_grade_completed_delete AFTER DELETE ON grades
+    BEGIN
+        DELETE FROM completed_courses
+        WHERE student_id = OLD.student_id
+          AND kode_mk = (SELECT kode_mk FROM courses WHERE id = OLD.course_id)
+          AND NOT EXISTS (SELECT 1 FROM enrollments
+                          WHERE student_id = OLD.student_id AND course_id = OLD.course_id
+                            AND status = 'selesai');
+        INSERT OR IGNORE INTO completed_courses (student_id, kode_mk, completed_at)
+        SELECT OLD.student_id, c.kode_mk, CURRENT_TIMESTAMP FROM courses c
+        WHERE c.id = OLD.course_id
+          AND EXISTS (SELECT 1 FROM enrollments
+                      WHERE student_id = OLD.student_id AND course_id = OLD.course_id
+                        AND status = 'selesai');
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_grade_student_delete AFTER DELETE ON students
+    BEGIN
+        DELETE FROM grades WHERE student_id = OLD.id;
+        DELETE FROM student_ipk WHERE student_id = OLD.id;
+        DELETE FROM student_ips WHERE student_id = OLD.id;
+    END
+    """,
+]
+
+
+class GradeError(Exception):
+    """Nilai atau rentang IPK tidak valid"""
+
+
+def init_schema(cursor):
+    """
+    Membuat tabel nilai, ringkasan IPK/IPS, dan rentang batas SKS beserta triggernya
+    - grades: nilai huruf per mahasiswa per mata kuliah (enrollment_id = enrollment asal)
+    - student_ipk: total SKS dan mutu kumulatif per mahasiswa
+    - student_ips: total SKS dan mutu per mahasiswa per semester akademik
+    - credit_brackets: IPK minimal -> batas SKS (diisi default jika masih kosong)
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS grades (
+            student_id INTEGER NOT NULL,             -- ID mahasiswa
+            course_id INTEGER NOT NULL,              -- ID mata kuliah
+            enrollment_id INTEGER,                   -- ID enrollment asal (tetap walau diarsipkan)
+            term TEXT NOT NULL,                      -- Semester akademik, mis. '2024/2025 Ganjil'
+            nilai TEXT NOT NULL,                     -- Nilai huruf
+            bobot REAL NOT NULL,                     -- Bobot nilai (0-4)
+            sks INTEGER NOT NULL,                    -- SKS saat nilai diposting
+            posted_at TEXT NOT NULL,                 -- Waktu posting nilai
+            PRIMARY KEY (student_id, course_id)
+        ) WITHOUT ROWID
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS student_ipk (
+            student_id INTEGER PRIMARY KEY,          -- ID mahasiswa
+            sks INTEGER NOT NULL DEFAULT 0,          -- Total SKS bernilai
+            mutu REAL NOT NULL DEFAULT 0             -- Total bobot x SKS
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS student_ips (
+            student_id INTEGER NOT NULL,             -- ID mahasiswa
+            term TEXT NOT NULL,                      -- Semester akademik
+            sks INTEGER NOT NULL DEFAULT 0,          -- Total SKS bernilai pada semester tersebut
+            mutu REAL NOT NULL DEFAULT 0,            -- Total bobot x SKS pada semester tersebut
+            PRIMARY KEY (student_id, term)
+        ) WITHOUT ROWID
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS credit_brackets (
+            min_ipk REAL PRIMARY KEY,                -- IPK minimal
+            max_credits INTEGER NOT NULL             -- Batas SKS untuk IPK tersebut
+        )
+    """)
+    cursor.execute("SELECT COUNT(*) FROM credit_brackets")
+    if cursor.fetchone()[0] == 0:
+        cursor.executemany("INSERT INTO credit_brackets (min_ipk, max_credits) VALUES (?, ?)",
+                           DEFAULT_BRACKETS)
+
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = 'trg_grade_completed_guard'")
+    sync_completed = cursor.fetchone() is None
+    # Versi lama trigger sinkron kelulusan memakai OR IGNORE yang gagal saat nilai diposting ulang
+    for name in ('trg_grade_completed_insert', 'trg_grade_completed_update'):
+        cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = ?", (name,))
+        row = cursor.fetchone()
+        if row and 'OR IGNORE' in row[0]:
+            cursor.execute(f"DROP TRIGGER {name}")
+    for trigger in GRADE_TRIGGERS:
+        cursor.execute(trigger)
+    if sync_completed:
+        # Database lama: kelulusan yang tercatat dari rollover disesuaikan dengan nilai yang sudah ada
+        cursor.execute(f"""
+            DELETE FROM completed_courses
+            WHERE (student_id, kode_mk) IN (SELECT g.student_id, c.kode_mk FROM grades g
+                                            JOIN courses c ON c.id = g.course_id
+                                            WHERE g.bobot < {MIN_PASSING_BOBOT})
+        """)
+        cursor.execute(f"""
+            INSERT OR IGNORE INTO completed_courses (student_id, kode_mk, completed_at)
+            SELECT g.student_id, c.kode_mk, g.posted_at FROM grades g
+            JOIN courses c ON c.id = g.course_id
+            WHERE g.bobot >= {MIN_PASSING_BOBOT}
+        """)
+
+
+def current_term(cursor):
+    """Label semester akademik saat ini dari system_config, mis. '2024/2025 Ganjil'"""
+    cursor.execute("""
+        SELECT config_key, config_value FROM system_config
+        WHERE config_key IN ('academic_year', 'current_semester')
+    """)
+    config = dict(cursor.fetchall())
+    return f"{config.get('academic_year', '')} {config.get('current_semester', '')}".strip()
+
+
+def post_grades(conn, grades, term=None):
+    """
+    Memposting banyak nilai sekaligus dengan executemany dalam satu transaksi
+    - grades: daftar (enrollment_id, nilai huruf)
+    - term: semester akademik nilai; jika None dipakai semester asal enrollment
+      yang ditutup oleh rollover, atau semester saat ini
+    - Nilai yang sudah ada untuk mahasiswa dan mata kuliah yang sama ditimpa
+    - Mengembalikan (jumlah diposting, daftar enrollment_id yang tidak ditemukan)
+    - Melempar GradeError jika ada nilai huruf yang tidak dikenal
+    """
+    invalid = sorted({nilai for _, nilai in grades if nilai not in GRADE_POINTS})
+    if invalid:
+        raise GradeError(f"Nilai tidak dikenal: {', '.join(invalid)} "
+                         f"(gunakan {', '.join(GRADE_POINTS)})")
+
+    cursor = conn.cursor()
+    ids = json.dumps([enrollment_id for enrollment_id, _ in grades])
+    cursor.execute("""
+        SELECT value FROM json_each(?)
+        WHERE value NOT IN (SELECT id FROM enrollments)
+    """, (ids,))
+    missing = [row[0] for row in cursor.fetchall()]
+
+    posted_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    fallback = current_term(cursor)
+    try:
+        cursor.executemany("""
+            INSERT INTO grades (student_id, course_id, enrollment_id, term, nilai, bobot, sks, posted_at)
+            SELECT e.student_id, e.course_id, e.id,
+                   COALESCE(?, (SELECT r.from_year || ' ' || r.from_term
+                                FROM rollover_enrollments re
+                                JOIN rollover_runs r ON r.id = re.run_id
+                                WHERE re.enrollment_id = e.id AND r.rolled_back_at IS NULL
+                                ORDER BY r.id DESC LIMIT 1), ?),
+                   ?, ?, c.sks, ?
+            FROM enrollments e JOIN courses c ON c.id = e.course_id
+            WHERE e.id = ?
+            ON CONFLICT(student_id, course_id) DO UPDATE SET
+                enrollment_id = excluded.enrollment_id,
+                term = excluded.term,
+                nilai = excluded.nilai,
+                bobot = excluded.bobot,
+                sks = excluded.sks,
+                posted_at = excluded.posted_at
+        """, [(term, fallback, nilai, GRADE_POINTS[nilai], posted_at, enrollment_id)
+              for enrollment_id, nilai in grades])
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return len(grades) - len(missing), missing
+
+
+def import_grades(conn, path, term=None):
+    """
+    Mengimpor nilai dari CSV berkolom nim, kode_mk, nilai
+    - Enrollment dicari berdasarkan NIM dan kode mata kuliah (status apa pun); untuk
+      mata kuliah yang diulang dipakai enrollment terakhir
+    - Mengembalikan (jumlah diposting, daftar (nim, kode_mk) yang tidak punya enrollment)
+    """
+    with open(path, newline='', encoding='utf-8') as handle:
+        reader = csv.DictReader(handle)
+        missing_columns = [column for column in ('nim', 'kode_mk', 'nilai')
+                           if column not in (reader.fieldnames or [])]
+        if missing_columns:
+            raise GradeError(f"Kolom wajib tidak ada: {', '.join(missing_columns)}")
+        rows = [(row['nim'].strip(), row['kode_mk'].strip(), row['nilai'].strip().upper())
+                for row in reader if row.get('nim')]
+
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT s.nim, c.kode_mk, e.id FROM enrollments e
+        JOIN students s ON s.id = e.student_id
+        JOIN courses c ON c.id = e.course_id
+        WHERE s.nim IN (SELECT value FROM json_each(?))
+        ORDER BY e.id
+    """, (json.dumps(sorted({nim for nim, _, _ in rows})),))
+    enrollment_ids = {(nim, kode_mk): enrollment_id for nim, kode_mk, enrollment_id in cursor.fetchall()}
+
+    grades = [(enrollment_ids[(nim, kode_mk)], nilai) for nim, kode_mk, nilai in rows
+              if (nim, kode_mk) in enrollment_ids]
+    unknown = [(nim, kode_mk) for nim, kode_mk, _ in rows if (nim, kode_mk) not in enrollment_ids]
+    posted, _ = post_grades(conn, grades, term)
+    return posted, unknown
+
+
+def delete_grade(conn, student_id, course_id):
+    """Menghapus satu nilai (IPK/IPS dan batas SKS ikut diperbarui trigger); True jika ada yang dihapus"""
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM grades WHERE student_id = ? AND course_id = ?", (student_id, course_id))
+    conn.commit()
+    return cursor.rowcount > 0
+
+
+def cumulative(cursor, student_id):
+    """IPK kumulatif mahasiswa: (total SKS bernilai, IPK) dengan IPK None jika belum ada nilai"""
+    cursor.execute("""
+        SELECT sks, CASE WHEN sks > 0 THEN ROUND(mutu / sks, 2) END
+        FROM student_ipk WHERE student_id = ?
+    """, (student_id,))
+    return cursor.fetchone() or (0, None)
+
+
+def term_summary(cursor, student_id):
+    """IPS per semester akademik: daftar (term, SKS, IPS) urut semester"""
+    cursor.execute("""
+        SELECT term, sks, CASE WHEN sks > 0 THEN ROUND(mutu / sks, 2) END
+        FROM student_ips WHERE student_id = ? AND sks > 0
+        ORDER BY term
+    """, (student_id,))
+    return cursor.fetchall()
+
+
+def transcript(cursor, student_id):
+    """Daftar nilai mahasiswa: (term, kode_mk, nama_mk, sks, nilai, bobot)"""
+    cursor.execute("""
+        SELECT g.term, COALESCE(c.kode_mk, '#' || g.course_id), COALESCE(c.nama_mk, '-'),
+               g.sks, g.nilai, g.bobot
+        FROM grades g LEFT JOIN courses c ON c.id = g.course_id
+        WHERE g.student_id = ?
+        ORDER BY g.term, c.kode_mk
+    """, (student_id,))
+    return cursor.fetchall()
+
+
+def parse_brackets(text):
+    """
+    Membaca rentang IPK 'ipk=sks; ...' menjadi daftar (IPK minimal, batas SKS)
+    - Melempar GradeError jika format salah
+    """
+    brackets = []
+    try:
+        for part in text.split(';'):
+            if part.strip():
+                min_ipk, max_credits = part.split('=', 1)
+                brackets.append((float(min_ipk), int(max_credits)))
+    except ValueError:
+        raise GradeError(f"Format rentang IPK tidak valid: {text!r} (contoh: 3.00=24; 2.50=21; 0=15)")
+    if not brackets:
+        raise GradeError("Rentang IPK tidak boleh kosong")
+    return sorted(brackets, reverse=True)
+
+
+def get_brackets(cursor):
+    """Rentang IPK yang berlaku: daftar (IPK minimal, batas SKS) dari IPK tertinggi"""
+    cursor.execute("SELECT min_ipk, max_credits FROM credit_brackets ORDER BY min_ipk DESC")
+    return cursor.fetchall()
+
+
+def format_brackets(brackets):
+    """Memformat rentang IPK kembali ke bentuk teks"""
+    return '; '.join(f"{min_ipk:.2f}={max_credits}" for min_ipk, max_credits in brackets)
+
+
+def set_brackets(conn, brackets):
+    """
+    Mengganti rentang IPK dan menghitung ulang max_credits semua mahasiswa yang sudah bernilai
+    - Perhitungan ulang berupa satu UPDATE dari ringkasan IPK (bukan dari riwayat nilai)
+    - Mengembalikan jumlah mahasiswa yang diperbarui
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute("DELETE FROM credit_brackets")
+        cursor.executemany("INSERT INTO credit_brackets (min_ipk, max_credits) VALUES (?, ?)", brackets)
+        cursor.execute(f"""
+            UPDATE students SET max_credits = COALESCE((
+                SELECT ({_BRACKET_CREDITS.format(mutu='i.mutu', sks='i.sks')})
+                FROM student_ipk i WHERE i.student_id = students.id), max_credits)
+            WHERE id IN (SELECT student_id FROM student_ipk WHERE sks > 0)
+        """)
+        updated = cursor.rowcount
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return updated
+
+
+def main():
+    """Mengimpor nilai dan mengatur rentang IPK dari command line"""
+    parser = argparse.ArgumentParser(description="Nilai, IPK/IPS, dan batas SKS berbasis IPK")
+    parser.add_argument('--database', help="Lokasi database: file, 'memory[:nama[=file]]', atau 'tmpfs:file' "
+                                           "(default: variabel KRS_DATABASE atau krs_database.db)")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    import_parser = subparsers.add_parser('import', help="Posting nilai dari CSV (nim, kode_mk, nilai)")
+    import_parser.add_argument('file')
+    import_parser.add_argument('--term', help="Semester akademik, mis. '2024/2025 Ganjil'")
+
+    brackets_parser = subparsers.add_parser('brackets', help="Tampilkan atau ganti rentang IPK")
+    brackets_parser.add_argument('spec', nargs='?', help="Mis. '3.00=24; 2.50=21; 0=15'")
+
+    args = parser.parse_args()
+
+    storage = database.open_storage(args.database)
+    conn = storage.connect()
+    try:
+        database.init_database(conn)
+        conn.commit()
+        if args.command == 'import':
+            posted, unknown = import_grades(conn, args.file, args.term)
+            print(f"Nilai diposting: {posted}, tanpa enrollment: {len(unknown)}")
+        elif args.spec:
+            print(f"max_credits diperbarui: {set_brackets(conn, parse_brackets(args.spec))} mahasiswa")
+        else:
+            print(format_brackets(get_brackets(conn.cursor())))
+    finally:
+        conn.close()
+        storage.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,295 @@
+"""
+Modul penahanan kursi sementara (keranjang KRS)
+- Memilih mata kuliah di mode keranjang menahan satu kursi selama TTL
+  (system_config hold_ttl_minutes); kursi yang ditahan ikut mengurangi sisa
+  kapasitas (kolom courses.ditahan, dijaga trigger)
+- Konfirmasi mengubah semua tahanan mahasiswa menjadi enrollment dalam satu
+  transaksi: semua berhasil atau tidak ada yang disimpan
+- Tahanan kedaluwarsa dilepas oleh HoldSweeper: heap (expires_at, id) menentukan
+  kapan sapuan berikutnya perlu dijalankan, dan penghapusan dilakukan per
+  batch lewat indeks expires_at tanpa memindai seluruh tabel
+- Sisa kapasitas dihitung dari tahanan yang belum kedaluwarsa, bukan dari
+  penghitung courses.ditahan yang bisa tertinggal sampai sapuan berikutnya
+"""
+import argparse
+import heapq
+from datetime import datetime, timedelta
+
+import database
+import enrollment
+import events
+import models
+
+# Lokasi default database KRS
+DATABASE_PATH = 'krs_database.db'
+
+# Lama tahanan kursi default (menit) dan jumlah tahanan yang dilepas per sapuan
+HOLD_TTL_MINUTES = 10
+HOLD_SWEEP_BATCH = 500
+
+# Jeda maksimum antar sapuan di GUI (detik), untuk menangkap tahanan dari klien lain
+HOLD_SWEEP_MAX_SECONDS = 30
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+HOLD_TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_hold_insert AFTER INSERT ON seat_holds
+    BEGIN
+        UPDATE courses SET ditahan = ditahan + 1 WHERE id = NEW.course_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_hold_delete AFTER DELETE ON seat_holds
+    BEGIN
+        UPDATE courses SET ditahan = MAX(ditahan - 1, 0) WHERE id = OLD.course_id;
+    END
+    """,
+    # Pendaftaran langsung (tanpa keranjang) menggantikan tahanan yang sama
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_hold_enrolled AFTER INSERT ON enrollments
+    WHEN NEW.status = 'aktif'
+    BEGIN
+        DELETE FROM seat_holds WHERE student_id = NEW.student_id AND course_id = NEW.course_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_hold_student_delete AFTER DELETE ON students
+    BEGIN
+        DELETE FROM seat_holds WHERE student_id = OLD.id;
+    END
+    """,
+]
+
+
+def init_schema(cursor):
+    """
+    Membuat tabel tahanan kursi beserta penghitung courses.ditahan
+    - Indeks expires_at dipakai sapuan kedaluwarsa; indeks (course_id, expires_at)
+      dipakai saat menghitung tahanan aktif per mata kuliah
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS seat_holds (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,    -- ID tahanan
+            student_id INTEGER NOT NULL,             -- ID mahasiswa
+            course_id INTEGER NOT NULL,              -- ID mata kuliah
+            held_at TEXT NOT NULL,                   -- Waktu kursi ditahan
+            expires_at TEXT NOT NULL,                -- Waktu tahanan kedaluwarsa
+            UNIQUE (student_id, course_id),
+            FOREIGN KEY (student_id) REFERENCES students (id),
+            FOREIGN KEY (course_id) REFERENCES courses (id)
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_seat_holds_expires ON seat_holds (expires_at)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_seat_holds_course ON seat_holds (course_id, expires_at)")
+    cursor.execute("PRAGMA table_info(courses)")
+    if 'ditahan' not in [row[1] for row in cursor.fetchall()]:
+        cursor.execute("ALTER TABLE courses ADD COLUMN ditahan INTEGER NOT NULL DEFAULT 0")
+    for trigger in HOLD_TRIGGERS:
+        cursor.execute(trigger)
+
+
+def _config(cursor, key, default=''):
+    cursor.execute("SELECT config_value FROM system_config WHERE config_key = ?", (key,))
+    row = cursor.fetchone()
+    return row[0] if row else default
+
+
+def hold_ttl(cursor):
+    """Lama tahanan kursi dari system_config (hold_ttl_minutes)"""
+    try:
+        minutes = float(_config(cursor, 'hold_ttl_minutes', HOLD_TTL_MINUTES))
+    except ValueError:
+        minutes = HOLD_TTL_MINUTES
+    return timedelta(minutes=minutes)
+
+
+def _now():
+    return datetime.now().strftime(TIME_FORMAT)
+
+
+def holds_for(cursor, student_id):
+    """Tahanan aktif mahasiswa: daftar (course_id, kode_mk, sks, expires_at)"""
+    cursor.execute("""
+        SELECT h.course_id, c.kode_mk, c.sks, h.expires_at FROM seat_holds h
+        JOIN courses c ON c.id = h.course_id
+        WHERE h.student_id = ? AND h.expires_at > ?
+        ORDER BY c.kode_mk
+    """, (student_id, _now()))
+    return cursor.fetchall()
+
+
+def hold(conn, student, course, sweeper=None):
+    """
+    Menahan satu kursi mata kuliah untuk mahasiswa selama TTL
+    - Aturan pendaftaran tetap berlaku (kapasitas dihitung termasuk tahanan lain)
+    - Menahan ulang mata kuliah yang sama memperpanjang tahanan
+    - Mengembalikan waktu kedaluwarsa tahanan
+    """
+    cursor = conn.cursor()
+    enrollment.check_enrollment(cursor, student, course)
+    now = datetime.now()
+    expires_at = (now + hold_ttl(cursor)).strftime(TIME_FORMAT)
+    try:
+        cursor.execute("""
+            INSERT INTO seat_holds (student_id, course_id, held_at, expires_at) VALUES (?, ?, ?, ?)
+            ON CONFLICT(student_id, course_id) DO UPDATE SET expires_at = excluded.expires_at
+            RETURNING id
+        """, (student.id, course.id, now.strftime(TIME_FORMAT), expires_at))
+        hold_id = cursor.fetchone()[0]
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    if sweeper is not None:
+        sweeper.push(expires_at, hold_id)
+    return expires_at
+
+
+def release(conn, student, course):
+    """Melepas tahanan kursi mahasiswa pada mata kuliah; mengembalikan True jika ada yang dilepas"""
+    cursor = conn.cursor()
+    try:
+        cursor.execute("DELETE FROM seat_holds WHERE student_id = ? AND course_id = ?", (student.id, course.id))
+        released = cursor.rowcount > 0
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return released
+
+
+def confirm(conn, student, source='gui'):
+    """
+    Mengubah semua tahanan aktif mahasiswa menjadi enrollment dalam satu transaksi
+    - Setiap mata kuliah diperiksa ulang dengan aturan pendaftaran; satu saja
+      ditolak maka seluruh konfirmasi dibatalkan (EnrollmentError)
+    - Tahanan terhapus otomatis oleh trigger saat enrollment dibuat
+    - Mengembalikan daftar kode_mk yang didaftarkan
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute("BEGIN IMMEDIATE")
+        cursor.execute("""
+            SELECT c.id, c.kode_mk, c.sks FROM seat_holds h
+            JOIN courses c ON c.id = h.course_id
+            WHERE h.student_id = ? AND h.expires_at > ?
+            ORDER BY c.kode_mk
+        """, (student.id, _now()))
+        held = cursor.fetchall()
+        if not held:
+            raise enrollment.EnrollmentError("Keranjang Kosong", "Tidak ada kursi yang sedang ditahan")
+
+        tanggal_daftar = _now()
+        events.set_context(cursor, source)
+        for course_id, kode_mk, sks in held:
+            course = models.Course(id=course_id, kode_mk=kode_mk, sks=sks)
+            try:
+                enrollment.check_enrollment(cursor, student, course)
+                section_id = enrollment.assign_section(cursor, student, course)
+            except enrollment.EnrollmentError as e:
+                raise enrollment.EnrollmentError(e.title, f"{kode_mk}: {e}\nTidak ada mata kuliah yang didaftarkan.")
+            cursor.execute("""
+                INSERT INTO enrollments (student_id, course_id, tanggal_daftar, status, section_id)
+                VALUES (?, ?, ?, 'aktif', ?)
+            """, (student.id, course_id, tanggal_daftar, section_id))
+            cursor.execute("UPDATE courses SET terisi = terisi + 1 WHERE id = ?", (course_id,))
+        events.clear_context(cursor)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return [kode_mk for _, kode_mk, _ in held]
+
+
+class HoldSweeper:
+    """
+    Pelepas tahanan kedaluwarsa berbasis heap
+    - Heap berisi (expires_at, id); next_due() memberi jeda sampai tahanan
+      terdekat kedaluwarsa sehingga GUI tidak perlu polling
+    - Setiap sapuan menghapus tahanan kedaluwarsa langsung lewat indeks
+      expires_at (paling banyak `batch` per panggilan), sehingga tahanan milik
+      klien lain ikut terlepas walaupun heap lokal masih berisi tahanan sendiri
+    - Kepala heap dimuat ulang dari indeks setelah setiap sapuan; tahanan yang
+      sudah diperpanjang tidak ikut terhapus karena expires_at diperiksa di database
+    """
+
+    def __init__(self, conn, batch=HOLD_SWEEP_BATCH):
+        self.conn = conn
+        self.batch = batch
+        self.heap = []
+        self.load()
+
+    def load(self):
+        """Mengisi ulang heap dengan tahanan yang paling cepat kedaluwarsa (lewat indeks)"""
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT expires_at, id FROM seat_holds ORDER BY expires_at LIMIT ?", (self.batch,))
+        self.heap = cursor.fetchall()
+        heapq.heapify(self.heap)
+
+    def push(self, expires_at, hold_id):
+        heapq.heappush(self.heap, (expires_at, hold_id))
+
+    def next_due(self):
+        """Detik sampai tahanan terdekat kedaluwarsa (None jika tidak ada tahanan)"""
+        if not self.heap:
+            self.load()
+        if not self.heap:
+            return None
+        expires_at = datetime.strptime(self.heap[0][0], TIME_FORMAT)
+        return max((expires_at - datetime.now()).total_seconds(), 0)
+
+    def sweep(self, now=None):
+        """
+        Melepas tahanan yang sudah kedaluwarsa (paling banyak satu batch)
+        - Mengembalikan jumlah tahanan yang dilepas
+        """
+        now = now or _now()
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute("""
+                DELETE FROM seat_holds WHERE id IN (
+                    SELECT id FROM seat_holds WHERE expires_at <= ? ORDER BY expires_at LIMIT ?
+                )
+            """, (now, self.batch))
+            released = cursor.rowcount
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        self.load()
+        return released
+
+
+def sweep_expired(conn, batch=HOLD_SWEEP_BATCH):
+    """Melepas semua tahanan kedaluwarsa per batch; mengembalikan jumlahnya"""
+    sweeper = HoldSweeper(conn, batch)
+    total = 0
+    while True:
+        released = sweeper.sweep()
+        total += released
+        if released < batch:
+            return total
+
+
+def main():
+    """Melepas tahanan kursi yang kedaluwarsa dari command line (mis. lewat cron)"""
+    parser = argparse.ArgumentParser(description="Pelepasan tahanan kursi KRS yang kedaluwarsa")
+    parser.add_argument('--database', help="Lokasi database: file, 'memory[:nama[=file]]', atau 'tmpfs:file' "
+                                           "(default: variabel KRS_DATABASE atau krs_database.db)")
+    parser.add_argument('--batch', type=int, default=HOLD_SWEEP_BATCH, help="Jumlah tahanan per batch")
+    args = parser.parse_args()
+
+    storage = database.open_storage(args.database)
+    conn = storage.connect()
+    try:
+        database.init_database(conn)
+        conn.commit()
+        print(f"Tahanan kedaluwarsa dilepas: {sweep_expired(conn, args.batch)}")
+    finally:
+        conn.close()
+        storage.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Modul pengolahan teks jadwal mata kuliah
+- Mengubah teks seperti 'Senin 08:00-10:30' menjadi (hari, mulai, selesai)
+- Mengecek bentrok jadwal antar mata kuliah
+- Jadwal tanpa slot waktu ('Konsultasi Individual', 'Industri Partner')
+  dianggap tidak pernah bentrok
+"""
+import re
+from functools import lru_cache
+
+# Urutan hari kuliah (indeks dipakai sebagai kunci urut)
+HARI = ['Senin', 'Selasa', 'Rabu', 'Kamis', 'Jumat', 'Sabtu', 'Minggu']
+
+JADWAL_PATTERN = re.compile(r'^\s*(\w+)\s+(\d{1,2})[:.](\d{2})\s*-\s*(\d{1,2})[:.](\d{2})\s*$')
+
+
+@lru_cache(maxsize=4096)
+def parse_jadwal(text):
+    """
+    Mengurai teks jadwal menjadi tuple (indeks_hari, menit_mulai, menit_selesai)
+    - Mengembalikan None jika teks tidak berisi hari dan jam yang valid
+    """
+    match = JADWAL_PATTERN.match(text or '')
+    if not match:
+        return None
+    hari, jam_mulai, menit_mulai, jam_selesai, menit_selesai = match.groups()
+    hari = hari.capitalize()
+    if hari not in HARI:
+        return None
+    mulai = int(jam_mulai) * 60 + int(menit_mulai)
+    selesai = int(jam_selesai) * 60 + int(menit_selesai)
+    if selesai <= mulai:
+        return None
+    return (HARI.index(hari), mulai, selesai)
+
+
+def nama_hari(text):
+    """Mengambil nama hari dari teks jadwal ('-' jika tidak terjadwal)"""
+    slot = parse_jadwal(text)
+    return HARI[slot[0]] if slot else '-'
+
+
+def bentrok(slot_a, slot_b):
+    """Mengecek apakah dua slot hasil parse_jadwal saling tumpang tindih"""
+    if slot_a is None or slot_b is None:
+        return False
+    return slot_a[0] == slot_b[0] and slot_a[1] < slot_b[2] and slot_b[1] < slot_a[2]
+
+
+def jadwal_bentrok(text_a, text_b):
+    """Mengecek bentrok langsung dari dua teks jadwal"""
+    return bentrok(parse_jadwal(text_a), parse_jadwal(text_b))
@@ -0,0 +1,248 @@
+"""
+Modul data dosen ternormalisasi dan beban mengajar
+- Tabel lecturers menyimpan satu baris per dosen; courses.lecturer_id merujuk
+  ke sana (foreign key + indeks), sedangkan courses.dosen tetap berisi nama
+  tampilan yang selalu sama dengan lecturers.nama
+- Nama dikenali lewat kunci tanpa gelar ('Prof. David Chen' dan 'Dr. David Chen'
+  -> 'david chen'); gelar tertinggi dipakai sebagai nama tampilan
+- Trigger menautkan mata kuliah baru/berubah ke dosennya, jadi import, katalog,
+  dan form tidak perlu tahu tentang tabel ini
+- Beban mengajar (total SKS, peserta, jadwal) dibaca lewat join berindeks
+"""
+import argparse
+import json
+import sqlite3
+
+# Lokasi default database KRS
+DATABASE_PATH = 'krs_database.db'
+
+# Gelar yang diabaikan saat mengenali nama dosen (huruf kecil)
+TITLES = ('prof.', 'prof', 'dr.', 'dr', 'drs.', 'dra.', 'ir.', 'ms.', 'mr.', 'mrs.', 'h.', 'hj.')
+
+
+def key_sql(expr):
+    """
+    Ekspresi SQL kunci nama dosen: huruf kecil, tanpa gelar depan dan tanpa
+    gelar belakang setelah koma ('Dr. Maya Sari, M.Kom.' -> 'maya sari')
+    """
+    text = f"' ' || lower(trim(substr({expr}, 1, instr({expr} || ',', ',') - 1))) || ' '"
+    for title in TITLES:
+        text = f"replace({text}, ' {title} ', ' ')"
+    return f"trim(replace({text}, '  ', ' '))"
+
+
+def param_key_sql():
+    """Kunci nama dosen untuk satu parameter '?' (ekspresi key_sql memakai nilainya berulang kali)"""
+    return f"(SELECT {key_sql('nama')} FROM (SELECT ? AS nama))"
+
+
+def rank_sql(expr):
+    """Ekspresi SQL peringkat gelar untuk memilih nama tampilan (Prof. > Dr. > lainnya)"""
+    return (f"(CASE WHEN ' ' || lower({expr}) LIKE '% prof%' THEN 2 "
+            f"WHEN ' ' || lower({expr}) LIKE '% dr.%' THEN 1 ELSE 0 END)")
+
+
+# Menambah dosen baru atau menaikkan nama tampilannya jika gelar baru lebih tinggi,
+# lalu menautkan mata kuliah NEW ke dosen tersebut
+_LINK_COURSE = f"""
+        INSERT INTO lecturers (nama, kunci, created_at)
+        VALUES (NEW.dosen, {key_sql('NEW.dosen')}, CURRENT_TIMESTAMP)
+        ON CONFLICT(kunci) DO UPDATE SET nama = excluded.nama
+        WHERE {rank_sql('excluded.nama')} > {rank_sql('lecturers.nama')};
+        UPDATE courses SET
+            lecturer_id = (SELECT id FROM lecturers WHERE kunci = {key_sql('NEW.dosen')}),
+            dosen = (SELECT nama FROM lecturers WHERE kunci = {key_sql('NEW.dosen')})
+        WHERE id = NEW.id;
+"""
+
+LECTURER_TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_lecturer_course_insert AFTER INSERT ON courses
+    BEGIN{_LINK_COURSE}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_lecturer_course_update AFTER UPDATE OF dosen ON courses
+    WHEN NEW.dosen IS NOT (SELECT nama FROM lecturers WHERE id = NEW.lecturer_id)
+    BEGIN{_LINK_COURSE}
+    END
+    """,
+    # Nama tampilan dosen yang berubah ikut tertulis di semua mata kuliahnya
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_lecturer_rename AFTER UPDATE OF nama ON lecturers
+    BEGIN
+        UPDATE courses SET dosen = NEW.nama WHERE lecturer_id = NEW.id AND dosen <> NEW.nama;
+    END
+    """,
+]
+
+
+class LecturerError(Exception):
+    """Dosen tidak ditemukan atau nama dosen tidak valid"""
+
+
+def init_schema(cursor):
+    """
+    Membuat tabel lecturers, kolom courses.lecturer_id, indeks, view beban, dan trigger
+    - Mata kuliah yang belum tertaut (data lama) dimigrasikan sekaligus: nama yang
+      sama tanpa gelar digabung menjadi satu dosen
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS lecturers (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,    -- ID unik dosen
+            nama TEXT NOT NULL,                      -- Nama tampilan (dengan gelar tertinggi)
+            kunci TEXT UNIQUE NOT NULL,              -- Nama tanpa gelar, huruf kecil
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP -- Waktu pembuatan data
+        )
+    """)
+    cursor.execute("PRAGMA table_info(courses)")
+    if 'lecturer_id' not in [row[1] for row in cursor.fetchall()]:
+        cursor.execute("ALTER TABLE courses ADD COLUMN lecturer_id INTEGER REFERENCES lecturers (id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_courses_lecturer ON courses (lecturer_id)")
+    # Peserta aktif per mata kuliah (beban dosen, daftar peserta)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_enrollments_course ON enrollments (course_id, status)")
+    cursor.execute("""
+        CREATE VIEW IF NOT EXISTS lecturer_workload AS
+        SELECT l.id, l.nama,
+               COUNT(c.id) AS jumlah_mk,
+               COALESCE(SUM(c.sks), 0) AS total_sks,
+               COALESCE(SUM(c.terisi), 0) AS total_peserta
+        FROM lecturers l
+        LEFT JOIN courses c ON c.lecturer_id = l.id AND c.retired_at IS NULL
+        GROUP BY l.id
+    """)
+    for trigger in LECTURER_TRIGGERS:
+        cursor.execute(trigger)
+    migrate_names(cursor)
+
+
+def migrate_names(cursor):
+    """
+    Menautkan mata kuliah yang belum punya lecturer_id ke dosennya
+    - Nama dengan gelar tertinggi (lalu yang paling sering dipakai) menjadi nama tampilan
+    - courses.dosen diseragamkan dengan nama tampilan dosen
+    - Mengembalikan jumlah mata kuliah yang ditautkan
+    """
+    cursor.execute(f"""
+        INSERT INTO lecturers (nama, kunci, created_at)
+        SELECT dosen, {key_sql('dosen')}, CURRENT_TIMESTAMP FROM courses
+        WHERE lecturer_id IS NULL
+        GROUP BY dosen
+        ORDER BY {rank_sql('dosen')} DESC, COUNT(*) DESC, dosen
+        ON CONFLICT(kunci) DO UPDATE SET nama = excluded.nama
+        WHERE {rank_sql('excluded.nama')} > {rank_sql('lecturers.nama')}
+    """)
+    cursor.execute(f"""
+        UPDATE courses SET
+            lecturer_id = (SELECT id FROM lecturers WHERE kunci = {key_sql('courses.dosen')}),
+            dosen = (SELECT nama FROM lecturers WHERE kunci = {key_sql('courses.dosen')})
+        WHERE lecturer_id IS NULL
+    """)
+    return cursor.rowcount
+
+
+def canonical_names(cursor, names):
+    """Memetakan nama dosen (dengan gelar apa pun) ke nama tampilan dosen yang sudah ada"""
+    cursor.execute(f"""
+        SELECT n.value, l.nama FROM json_each(?) n
+        JOIN lecturers l ON l.kunci = {key_sql('n.value')}
+    """, (json.dumps(sorted(set(names))),))
+    return dict(cursor.fetchall())
+
+
+def find_lecturer(cursor, name):
+    """Mencari dosen berdasarkan nama (gelar diabaikan): (id, nama) atau None"""
+    cursor.execute(f"SELECT id, nama FROM lecturers WHERE kunci = {param_key_sql()}", (name,))
+    return cursor.fetchone()
+
+
+def lecturer_id_condition(column='c.lecturer_id'):
+    """Kondisi SQL 'mata kuliah milik dosen bernama ?' untuk filter (memakai indeks lecturer_id)"""
+    return f"{column} = (SELECT id FROM lecturers WHERE kunci = {param_key_sql()})"
+
+
+def rename_lecturer(conn, lecturer_id, nama):
+    """
+    Mengganti nama tampilan dosen (mis. setelah kenaikan gelar)
+    - Nama baru harus tetap dikenali sebagai orang yang sama (kunci sama)
+    - courses.dosen ikut diperbarui oleh trigger; mengembalikan jumlah mata kuliahnya
+    """
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT kunci, {param_key_sql()} FROM lecturers WHERE id = ?", (nama, lecturer_id))
+    row = cursor.fetchone()
+    if row is None:
+        raise LecturerError(f"Dosen #{lecturer_id} tidak ditemukan")
+    if row[0] != row[1]:
+        raise LecturerError(f"'{nama}' tidak cocok dengan dosen #{lecturer_id} ({row[0]})")
+    cursor.execute("UPDATE lecturers SET nama = ? WHERE id = ?", (nama, lecturer_id))
+    cursor.execute("SELECT COUNT(*) FROM courses WHERE lecturer_id = ?", (lecturer_id,))
+    count = cursor.fetchone()[0]
+    conn.commit()
+    return count
+
+
+def workload(cursor):
+    """Beban mengajar semua dosen: (id, nama, jumlah_mk, total_sks, total_peserta), beban terbesar dulu"""
+    cursor.execute("""
+        SELECT id, nama, jumlah_mk, total_sks, total_peserta FROM lecturer_workload
+        ORDER BY total_sks DESC, nama
+    """)
+    return cursor.fetchall()
+
+
+def schedule(cursor, lecturer_id):
+    """Jadwal mengajar dosen: (kode_mk, nama_mk, sks, semester, jadwal, terisi, kapasitas)"""
+    cursor.execute("""
+        SELECT kode_mk, nama_mk, sks, semester, jadwal, terisi, kapasitas FROM courses
+        WHERE lecturer_id = ? AND retired_at IS NULL
+        ORDER BY jadwal, kode_mk
+    """, (lecturer_id,))
+    return cursor.fetchall()
+
+
+def student_count(cursor, lecturer_id):
+    """Jumlah mahasiswa berbeda yang sedang diajar dosen (lewat idx_courses_lecturer dan idx_enrollments_course)"""
+    cursor.execute("""
+        SELECT COUNT(DISTINCT e.student_id) FROM courses c
+        JOIN enrollments e ON e.course_id = c.id AND e.status = 'aktif'
+        WHERE c.lecturer_id = ? AND c.retired_at IS NULL
+    """, (lecturer_id,))
+    return cursor.fetchone()[0]
+
+
+def format_schedule(cursor, lecturer_id, nama):
+    """Menyusun laporan beban dan jadwal satu dosen"""
+    rows = schedule(cursor, lecturer_id)
+    lines = [f"{nama}: {len(rows)} mata kuliah, {sum(row[2] for row in rows)} SKS, "
+             f"{student_count(cursor, lecturer_id)} mahasiswa"]
+    for kode_mk, nama_mk, sks, semester, jadwal, terisi, kapasitas in rows:
+        lines.append(f"  {jadwal:<22} {kode_mk:<8} {nama_mk[:30]:<30} {sks} SKS  {terisi}/{kapasitas}")
+    return '\n'.join(lines)
+
+
+def main():
+    """Menampilkan beban mengajar dosen dari command line"""
+    parser = argparse.ArgumentParser(description="Data dosen dan beban mengajar")
+    parser.add_argument('--database', default=DATABASE_PATH, help="File database KRS")
+    parser.add_argument('nama', nargs='?', help="Nama dosen (gelar boleh berbeda)")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.database)
+    try:
+        cursor = conn.cursor()
+        init_schema(cursor)
+        conn.commit()
+        if args.nama:
+            lecturer = find_lecturer(cursor, args.nama)
+            if lecturer is None:
+                raise SystemExit(f"Dosen {args.nama} tidak ditemukan")
+            print(format_schedule(cursor, *lecturer))
+        else:
+            for _, nama, jumlah_mk, total_sks, total_peserta in workload(cursor):
+                print(f"{nama:<28} {jumlah_mk:>3} MK {total_sks:>4} SKS {total_peserta:>6} peserta")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,42 @@
+import argparse
+import os
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
+import queue
 import sqlite3
+import threading
 from datetime import datetime
 
+import admission
+import allocation
+import analytics
+import audit
+import catalog
+import backup
+import changes
+import database
+import enrollment
+import events
+import export
+import grades
+import holds
+import lecturers
+import maintenance
+import models
+import profiling
+import replica
+import rollover
+import rooms
+import sections
+import tree_view
+from jadwal import HARI, nama_hari
+
 class KRSApplication:
-    def __init__(self, root):
+    def __init__(self, root, storage=None):
         """
         Konstruktor untuk menginisialisasi aplikasi KRS
         - Mengatur jendela utama
-        - Membuat koneksi database
+        - Membuat koneksi database (lokasi dari storage, lihat database.open_storage)
         - Menginisialisasi database dan data default
         - Membuat tampilan GUI
         """
@@ -17,9 +45,13 @@ class KRSApplication:
         self.root.geometry("1000x700")  # Ukuran jendela aplikasi
         self.root.configure(bg='#f0f0f0')  # Warna latar belakang jendela
 
-        # Membuat koneksi ke database SQLite
-        self.conn = sqlite3.connect('krs_database.db')
+        # Membuat koneksi ke database SQLite (file, in-memory, atau salinan tmpfs)
+        self.storage = storage or database.open_storage()
+        self.db_path = self.storage.path
+        self.conn = self.storage.connect()
         self.cursor = self.conn.cursor()
+        if self.storage.mode != 'file':
+            self.root.title(f"Sistem KRS (Kartu Rencana Studi) - {self.storage.describe()}")
 
         # Inisialisasi tabel-tabel database
         self.init_database()
@@ -27,6 +59,17 @@ class KRSApplication:
         # Memuat data default jika database kosong
         self.load_default_data()
 
+        # Kontrol penerimaan permintaan tulis KRS (token bucket + antrian adil)
+        self.admission = admission.AdmissionController.from_config(self.cursor)
+
+        # Profiler aksi (diisi main() pada mode --profile) untuk callback yang tidak lewat Misc._register
+        self.profiler = None
+
+        # Identity map record mahasiswa dan mata kuliah (kunci = ID, dipakai sebagai iid Treeview)
+        self.students = models.IdentityMap()
+        self.courses = models.IdentityMap()
+        self.student_labels = {}  # Label combobox -> ID mahasiswa
+
         # Mengatur gaya tampilan (styling)
         self.configure_styles()
 
@@ -36,6 +79,29 @@ class KRSApplication:
         # Memuat data awal ke dalam tampilan
         self.refresh_all_data()
 
+        # Menjadwalkan snapshot backup berkala
+        self.schedule_backup()
+
+        # Menjadwalkan penerbitan replika baca dan pembaruan umur replika di tab laporan
+        self.schedule_replica()
+        self.update_replica_status()
+
+        # Memantau antrian registrasi di tab pemeliharaan
+        self.update_admission_status()
+
+        # Menyimpan ulang database kerja (mode memory/tmpfs) secara berkala dan saat ditutup
+        self.schedule_persist()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+
+        # Melepas tahanan kursi keranjang yang kedaluwarsa (dijadwalkan sesuai tahanan terdekat)
+        self.hold_sweeper = holds.HoldSweeper(self.conn)
+        self.hold_sweep_job = None
+        self.schedule_hold_sweep()
+
+        # Memantau perubahan dari klien lain (refresh otomatis bagian yang terdampak)
+        self.change_watcher = changes.ChangeWatcher(self.conn)
+        self.root.after(changes.CHANGE_POLL_MS, self.poll_changes)
+
     def configure_styles(self):
         """
         Mengkonfigurasi gaya visual untuk komponen GUI
@@ -96,220 +162,18 @@ class KRSApplication:
     def init_database(self):
         """
         Menginisialisasi struktur database
-        - Membuat tabel-tabel yang diperlukan
-        - Menambahkan kolom yang hilang pada tabel existing
-        - Memastikan integritas referensial antar tabel
+        - Pembuatan dan migrasi tabel ada di modul database (tanpa GUI)
         """
+        database.init_database(self.conn)
 
-        # Membuat tabel mahasiswa (students)
-        self.cursor.execute("""
-            CREATE TABLE IF NOT EXISTS students (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,    -- ID unik mahasiswa
-                nim TEXT UNIQUE NOT NULL,                -- NIM mahasiswa (harus unik)
-                nama TEXT NOT NULL,                      -- Nama lengkap mahasiswa
-                semester INTEGER NOT NULL,               -- Semester saat ini
-                max_credits INTEGER DEFAULT 24,          -- Batas maksimal SKS per semester
-                created_at TEXT DEFAULT CURRENT_TIMESTAMP -- Waktu pendaftaran
-            )
-        """)
-
-        # Mengecek dan menambahkan kolom created_at jika belum ada
-        try:
-            self.cursor.execute("SELECT created_at FROM students LIMIT 1")
-        except sqlite3.OperationalError:
-            # Menambahkan kolom tanpa default value, lalu update data existing
-            self.cursor.execute("ALTER TABLE students ADD COLUMN created_at TEXT")
-            current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            self.cursor.execute("UPDATE students SET created_at = ? WHERE created_at IS NULL", (current_time,))
-
-        # Membuat tabel mata kuliah (courses)
-        self.cursor.execute("""
-            CREATE TABLE IF NOT EXISTS courses (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,    -- ID unik mata kuliah
-                kode_mk TEXT UNIQUE NOT NULL,            -- Kode mata kuliah (harus unik)
-                nama_mk TEXT NOT NULL,                   -- Nama mata kuliah
-                sks INTEGER NOT NULL,                    -- Jumlah SKS
-                semester INTEGER NOT NULL,               -- Semester mata kuliah ditawarkan
-                jadwal TEXT NOT NULL,                    -- Jadwal kuliah
-                dosen TEXT NOT NULL,                     -- Nama dosen pengampu
-                kapasitas INTEGER DEFAULT 40,            -- Kapasitas maksimal mahasiswa
-                terisi INTEGER DEFAULT 0,               -- Jumlah mahasiswa terdaftar
-                created_at TEXT DEFAULT CURRENT_TIMESTAMP -- Waktu pembuatan data
-            )
-        """)
-
-        # Mengecek dan menambahkan kolom created_at untuk tabel courses
-        try:
-            self.cursor.execute("SELECT created_at FROM courses LIMIT 1")
-        except sqlite3.OperationalError:
-            self.cursor.execute("ALTER TABLE courses ADD COLUMN created_at TEXT")
-            current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            self.cursor.execute("UPDATE courses SET created_at = ? WHERE created_at IS NULL", (current_time,))
-
-        # Membuat tabel pendaftaran KRS (enrollments)
-        self.cursor.execute("""
-            CREATE TABLE IF NOT EXISTS enrollments (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,    -- ID unik pendaftaran
-                student_id INTEGER,                      -- ID mahasiswa (foreign key)
-                course_id INTEGER,                       -- ID mata kuliah (foreign key)
-                tanggal_daftar TEXT NOT NULL,            -- Tanggal pendaftaran
-                status TEXT DEFAULT 'aktif',             -- Status pendaftaran (aktif/nonaktif)
-                created_at TEXT DEFAULT CURRENT_TIMESTAMP, -- Waktu pembuatan data
-                FOREIGN KEY (student_id) REFERENCES students (id),  -- Relasi ke tabel students
-                FOREIGN KEY (course_id) REFERENCES courses (id),    -- Relasi ke tabel courses
-                UNIQUE(student_id, course_id)            -- Satu mahasiswa tidak bisa daftar mata kuliah yang sama 2x
-            )
-        """)
-
-        # Mengecek dan menambahkan kolom created_at untuk tabel enrollments
-        try:
-            self.cursor.execute("SELECT created_at FROM enrollments LIMIT 1")
-        except sqlite3.OperationalError:
-            self.cursor.execute("ALTER TABLE enrollments ADD COLUMN created_at TEXT")
-            current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            self.cursor.execute("UPDATE enrollments SET created_at = ? WHERE created_at IS NULL", (current_time,))
-
-        # Membuat tabel konfigurasi sistem
-        self.cursor.execute("""
-            CREATE TABLE IF NOT EXISTS system_config (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,    -- ID unik konfigurasi
-                config_key TEXT UNIQUE NOT NULL,         -- Kunci konfigurasi (harus unik)
-                config_value TEXT NOT NULL,              -- Nilai konfigurasi
-                updated_at TEXT DEFAULT CURRENT_TIMESTAMP -- Waktu update terakhir
-            )
-        """)
-
-        # Mengecek dan menambahkan kolom updated_at untuk tabel system_config
-        try:
-            self.cursor.execute("SELECT updated_at FROM system_config LIMIT 1")
-        except sqlite3.OperationalError:
-            self.cursor.execute("ALTER TABLE system_config ADD COLUMN updated_at TEXT")
-            current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            self.cursor.execute("UPDATE system_config SET updated_at = ? WHERE created_at IS NULL", (current_time,))
-
-        # Menyimpan perubahan ke database
-        self.conn.commit()
 
     def load_default_data(self):
         """
         Memuat data default ke dalam database jika masih kosong
-        - Mengisi konfigurasi sistem default
-        - Mengisi mata kuliah default untuk demo
+        - Konfigurasi dan mata kuliah default ada di modul database
         """
+        database.load_default_data(self.conn)
 
-        # Data konfigurasi sistem default
-        default_configs = [
-            ('max_credits_per_semester', '24'),    # Maksimal SKS per semester
-            ('min_credits_per_semester', '12'),    # Minimal SKS per semester
-            ('academic_year', '2024/2025'),        # Tahun akademik
-            ('current_semester', 'Ganjil')         # Semester saat ini
-        ]
-
-        # Memasukkan konfigurasi default (jika belum ada)
-        for key, value in default_configs:
-            self.cursor.execute("""
-                INSERT OR IGNORE INTO system_config (config_key, config_value)
-                VALUES (?, ?)
-            """, (key, value))
-
-        # Mengecek apakah perlu memuat ulang data mata kuliah
-        self.cursor.execute("SELECT COUNT(*) FROM courses")
-        current_count = self.cursor.fetchone()[0]
-        
-        # Jika kurang dari 46 mata kuliah, hapus dan muat ulang semua data
-        if current_count < 46:
-            print(f"Mendeteksi data mata kuliah tidak lengkap ({current_count}/46). Memuat ulang...")
-            
-            # Hapus semua data mata kuliah yang ada
-            self.cursor.execute("DELETE FROM courses")
-            
-            # Data mata kuliah lengkap untuk semua semester (1-8)
-            default_courses = [
-                # SEMESTER 1 (GANJIL)
-                ('IF101', 'Pemrograman Dasar', 3, 1, 'Senin 08:00-10:30', 'Dr. Ahmad Fauzi', 40),
-                ('MTK101', 'Matematika Diskrit', 3, 1, 'Selasa 10:30-13:00', 'Prof. Siti Aminah', 35),
-                ('IF103', 'Algoritma dan Pemrograman', 4, 1, 'Rabu 13:00-16:30', 'Dr. Rudi Hartono', 38),
-                ('IF105', 'Logika Informatika', 3, 1, 'Kamis 08:00-10:30', 'Dr. Budi Santoso', 35),
-                ('ENG101', 'Bahasa Inggris', 2, 1, 'Jumat 10:00-11:30', 'Ms. Lisa Johnson', 45),
-                ('MTK103', 'Kalkulus I', 3, 1, 'Senin 13:00-15:30', 'Prof. Maria Sari', 40),
-                ('CHAR101', 'Pancasila', 2, 1, 'Selasa 08:00-09:30', 'Dr. Agus Setiawan', 50),
-
-                # SEMESTER 2 (GENAP)
-                ('IF102', 'Pemrograman Berorientasi Objek', 4, 2, 'Senin 08:00-11:30', 'Dr. Ahmad Fauzi', 38),
-                ('MTK102', 'Kalkulus II', 3, 2, 'Selasa 13:00-15:30', 'Prof. Maria Sari', 35),
-                ('IF104', 'Sistem Digital', 3, 2, 'Rabu 10:00-12:30', 'Dr. Eko Prasetyo', 32),
-                ('IF106', 'Arsitektur Komputer', 3, 2, 'Kamis 13:00-15:30', 'Prof. Indra Gunawan', 30),
-                ('MTK104', 'Statistika dan Probabilitas', 3, 2, 'Jumat 08:00-10:30', 'Dr. Rina Susanti', 40),
-                ('ENG102', 'Bahasa Inggris Teknik', 2, 2, 'Selasa 10:00-11:30', 'Ms. Lisa Johnson', 45),
-                ('CHAR102', 'Kewarganegaraan', 2, 2, 'Rabu 08:00-09:30', 'Dr. Sari Dewi', 50),
-
-                # SEMESTER 3 (GANJIL)
-                ('IF201', 'Struktur Data', 4, 3, 'Senin 08:00-11:30', 'Dr. Budi Santoso', 35),
-                ('IF203', 'Basis Data', 3, 3, 'Selasa 13:00-15:30', 'Dr. Maya Sari', 32),
-                ('IF205', 'Pemrograman Web', 3, 3, 'Rabu 10:00-12:30', 'Dr. Lisa Putri', 35),
-                ('IF207', 'Sistem Operasi', 3, 3, 'Kamis 08:00-10:30', 'Prof. Rudi Hartanto', 30),
-                ('MTK201', 'Matematika Numerik', 3, 3, 'Jumat 13:00-15:30', 'Dr. Wawan Kurniawan', 35),
-                ('IF209', 'Jaringan Komputer Dasar', 3, 3, 'Senin 13:00-15:30', 'Dr. Fitri Handayani', 32),
-
-                # SEMESTER 4 (GENAP)
-                ('IF202', 'Algoritma dan Kompleksitas', 3, 4, 'Senin 10:00-12:30', 'Dr. Rudi Hartono', 30),
-                ('IF204', 'Pemrograman Mobile', 3, 4, 'Selasa 08:00-10:30', 'Dr. Lisa Putri', 35),
-                ('IF206', 'Manajemen Basis Data', 3, 4, 'Rabu 13:00-15:30', 'Dr. Maya Sari', 32),
-                ('IF208', 'Interaksi Manusia Komputer', 3, 4, 'Kamis 10:00-12:30', 'Dr. Nina Kusuma', 35),
-                ('IF210', 'Teori Bahasa dan Otomata', 3, 4, 'Jumat 08:00-10:30', 'Prof. Siti Aminah', 28),
-                ('MTK202', 'Riset Operasi', 3, 4, 'Senin 13:00-15:30', 'Dr. Wawan Kurniawan', 30),
-
-                # SEMESTER 5 (GANJIL)
-                ('IF301', 'Rekayasa Perangkat Lunak', 4, 5, 'Senin 08:00-11:30', 'Prof. Andi Wijaya', 30),
-                ('IF303', 'Jaringan Komputer', 3, 5, 'Selasa 13:00-15:30', 'Dr. Fitri Handayani', 32),
-                ('IF305', 'Komputer Grafik', 3, 5, 'Rabu 10:00-12:30', 'Dr. Eko Prasetyo', 28),
-                ('IF307', 'Sistem Informasi', 3, 5, 'Kamis 08:00-10:30', 'Dr. Nina Kusuma', 35),
-                ('IF309', 'Pemrograman Game', 3, 5, 'Jumat 13:00-15:30', 'Dr. David Chen', 25),
-                ('IF311', 'Data Mining', 3, 5, 'Senin 13:00-15:30', 'Dr. Sarah Abdullah', 30),
-
-                # SEMESTER 6 (GENAP)
-                ('IF302', 'Manajemen Proyek TI', 3, 6, 'Senin 10:00-12:30', 'Prof. Andi Wijaya', 35),
-                ('IF304', 'Keamanan Jaringan', 3, 6, 'Selasa 08:00-10:30', 'Dr. Fitri Handayani', 28),
-                ('IF306', 'Pengembangan Aplikasi Web', 3, 6, 'Rabu 13:00-15:30', 'Dr. Lisa Putri', 32),
-                ('IF308', 'Business Intelligence', 3, 6, 'Kamis 10:00-12:30', 'Dr. Maya Sari', 30),
-                ('IF310', 'Cloud Computing', 3, 6, 'Jumat 08:00-10:30', 'Dr. Indra Gunawan', 28),
-                ('IF312', 'Internet of Things', 3, 6, 'Senin 13:00-15:30', 'Dr. Eko Prasetyo', 25),
-
-                # SEMESTER 7 (GANJIL)
-                ('IF401', 'Kecerdasan Buatan', 4, 7, 'Senin 08:00-11:30', 'Prof. David Chen', 30),
-                ('IF403', 'Keamanan Sistem', 3, 7, 'Selasa 13:00-15:30', 'Dr. Sarah Abdullah', 28),
-                ('IF405', 'Pembelajaran Mesin', 3, 7, 'Rabu 10:00-12:30', 'Prof. David Chen', 25),
-                ('IF407', 'Sistem Terdistribusi', 3, 7, 'Kamis 08:00-10:30', 'Dr. Indra Gunawan', 30),
-                ('IF409', 'Visi Komputer', 3, 7, 'Jumat 13:00-15:30', 'Dr. Eko Prasetyo', 25),
-                ('IF411', 'Metodologi Penelitian', 2, 7, 'Senin 13:00-14:30', 'Prof. Andi Wijaya', 40),
-
-                # SEMESTER 8 (GENAP)
-                ('IF402', 'Skripsi', 6, 8, 'Konsultasi Individual', 'Tim Dosen Pembimbing', 50),
-                ('IF404', 'Kerja Praktek', 2, 8, 'Industri Partner', 'Tim Dosen Supervisor', 50),
-                ('IF406', 'Etika Profesi', 2, 8, 'Senin 10:00-11:30', 'Dr. Agus Setiawan', 45),
-                ('IF408', 'Technopreneurship', 3, 8, 'Selasa 08:00-10:30', 'Dr. Nina Kusuma', 35),
-                ('IF410', 'Seminar Hasil', 1, 8, 'Rabu 13:00-14:00', 'Tim Dosen Penguji', 40),
-                ('IF412', 'Proyek Akhir', 3, 8, 'Kamis 08:00-11:30', 'Tim Dosen Pembimbing', 30)
-            ]
-
-            # Memasukkan data mata kuliah lengkap ke database
-            for course in default_courses:
-                self.cursor.execute("""
-                    INSERT INTO courses (kode_mk, nama_mk, sks, semester, jadwal, dosen, kapasitas)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                """, course)
-
-            # Menyimpan perubahan ke database
-            self.conn.commit()
-            print(f"Data mata kuliah berhasil dimuat: {len(default_courses)} mata kuliah")
-
-        # Verifikasi data mata kuliah setelah load
-        self.cursor.execute("SELECT COUNT(*) FROM courses")
-        final_count = self.cursor.fetchone()[0]
-        print(f"Verifikasi: Total mata kuliah setelah load_default_data: {final_count}")
-
-        # Menyimpan perubahan ke database
-        self.conn.commit()
 
     def get_config_value(self, key, default=''):
         """
@@ -317,9 +181,8 @@ class KRSApplication:
         - key: kunci konfigurasi yang dicari
         - default: nilai default jika kunci tidak ditemukan
         """
-        self.cursor.execute("SELECT config_value FROM system_config WHERE config_key = ?", (key,))
-        result = self.cursor.fetchone()
-        return result[0] if result else default
+        return database.get_config_value(self.cursor, key, default)
+
 
     def create_widgets(self):
         """
@@ -349,6 +212,9 @@ class KRSApplication:
         self.create_course_tab()     # Tab data mata kuliah
         self.create_krs_tab()        # Tab pengisian KRS
         self.create_report_tab()     # Tab laporan KRS
+        self.create_allocation_tab() # Tab alokasi batch berbasis preferensi
+        self.create_analytics_tab()  # Tab analitik kapasitas
+        self.create_maintenance_tab()  # Tab pemeliharaan database
 
     def create_student_tab(self):
         """
@@ -420,6 +286,26 @@ class KRSApplication:
                              bg='#3498db', fg='white', pady=10)
         data_title.pack(fill="x")
 
+        # Frame untuk pencarian dan filter mahasiswa (disaring di memori tanpa query)
+        filter_frame = tk.Frame(data_frame, bg='#f8f9fa', pady=5)
+        filter_frame.pack(fill="x", padx=10, pady=(10, 0))
+
+        tk.Label(filter_frame, text="Cari NIM/Nama:", font=('Arial', 10, 'bold'), 
+                bg='#f8f9fa').pack(side="left", padx=5)
+        self.student_search = tk.Entry(filter_frame, width=25, font=('Arial', 10), relief='solid', bd=1)
+        self.student_search.pack(side="left", padx=5)
+        self.student_search.bind("<KeyRelease>", self.filter_students)
+
+        tk.Label(filter_frame, text="Semester:", font=('Arial', 10, 'bold'), 
+                bg='#f8f9fa').pack(side="left", padx=5)
+        self.student_filter_semester = ttk.Combobox(filter_frame, values=["Semua", 1,2,3,4,5,6,7,8], width=8, state="readonly")
+        self.student_filter_semester.set("Semua")
+        self.student_filter_semester.pack(side="left", padx=5)
+        self.student_filter_semester.bind("<<ComboboxSelected>>", self.filter_students)
+
+        self.student_count_label = tk.Label(filter_frame, text="", font=('Arial', 9), bg='#f8f9fa', fg='#7f8c8d')
+        self.student_count_label.pack(side="right", padx=5)
+
         # Frame untuk tabel mahasiswa
         tree_frame = tk.Frame(data_frame, bg='white')
         tree_frame.pack(fill="both", expand=True, padx=10, pady=10)
@@ -438,6 +324,12 @@ class KRSApplication:
         self.student_tree.tag_configure('oddrow', background='#f8f9fa')   # Baris ganjil
         self.student_tree.tag_configure('evenrow', background='white')     # Baris genap
 
+        # Klik header untuk mengurutkan (kunci urut di-cache di memori)
+        self.student_view = tree_view.SortableTree(self.student_tree, sort_keys={
+            "ID": tree_view.number_key, "Semester": tree_view.number_key,
+            "Max SKS": tree_view.number_key, "Tanggal Daftar": tree_view.date_key,
+        }, stripe_tags=('evenrow', 'oddrow'), keep_selection=False)
+
         # Scrollbar untuk tabel mahasiswa
         scrollbar_student = ttk.Scrollbar(tree_frame, orient="vertical", command=self.student_tree.yview)
         self.student_tree.configure(yscrollcommand=scrollbar_student.set)
@@ -484,6 +376,37 @@ class KRSApplication:
         # Menghubungkan event perubahan filter dengan fungsi filter_courses
         self.filter_semester.bind("<<ComboboxSelected>>", self.filter_courses)
 
+        # Filter tambahan: dosen, SKS, hari, dan sisa kursi
+        tk.Label(filter_frame, text="Dosen:", font=('Arial', 10, 'bold'), 
+                bg='#f8f9fa').pack(side="left", padx=5)
+        self.filter_dosen = ttk.Combobox(filter_frame, values=["Semua"], width=22, state="readonly")
+        self.filter_dosen.set("Semua")
+        self.filter_dosen.pack(side="left", padx=5)
+
+        tk.Label(filter_frame, text="SKS:", font=('Arial', 10, 'bold'), 
+                bg='#f8f9fa').pack(side="left", padx=5)
+        self.filter_sks = ttk.Combobox(filter_frame, values=["Semua"], width=6, state="readonly")
+        self.filter_sks.set("Semua")
+        self.filter_sks.pack(side="left", padx=5)
+
+        tk.Label(filter_frame, text="Hari:", font=('Arial', 10, 'bold'), 
+                bg='#f8f9fa').pack(side="left", padx=5)
+        self.filter_hari = ttk.Combobox(filter_frame, values=["Semua"] + HARI, width=8, state="readonly")
+        self.filter_hari.set("Semua")
+        self.filter_hari.pack(side="left", padx=5)
+
+        tk.Label(filter_frame, text="Sisa:", font=('Arial', 10, 'bold'), 
+                bg='#f8f9fa').pack(side="left", padx=5)
+        self.filter_sisa = ttk.Combobox(filter_frame, values=["Semua", "Tersedia", "Penuh"], width=9, state="readonly")
+        self.filter_sisa.set("Semua")
+        self.filter_sisa.pack(side="left", padx=5)
+
+        for combo in (self.filter_dosen, self.filter_sks, self.filter_hari, self.filter_sisa):
+            combo.bind("<<ComboboxSelected>>", self.filter_courses)
+
+        self.course_count_label = tk.Label(filter_frame, text="", font=('Arial', 9), bg='#f8f9fa', fg='#7f8c8d')
+        self.course_count_label.pack(side="right", padx=5)
+
         # Frame untuk tabel mata kuliah
         tree_frame = tk.Frame(data_frame, bg='white')
         tree_frame.pack(fill="both", expand=True, padx=10, pady=10)
@@ -505,6 +428,13 @@ class KRSApplication:
         self.course_tree.tag_configure('evenrow', background='white')                     # Baris genap
         self.course_tree.tag_configure('full', background='#ffebee', foreground='#c62828') # Mata kuliah penuh (merah)
 
+        # Klik header untuk mengurutkan (kunci urut di-cache di memori)
+        self.course_view = tree_view.SortableTree(self.course_tree, sort_keys={
+            "SKS": tree_view.number_key, "Semester": tree_view.number_key,
+            "Jadwal": tree_view.jadwal_key, "Kapasitas": tree_view.number_key,
+            "Terisi": tree_view.number_key, "Sisa": tree_view.number_key,
+        }, stripe_tags=('evenrow', 'oddrow'))
+
         # Scrollbar untuk tabel mata kuliah
         scrollbar_course = ttk.Scrollbar(tree_frame, orient="vertical", command=self.course_tree.yview)
         self.course_tree.configure(yscrollcommand=scrollbar_course.set)
@@ -513,8 +443,16 @@ class KRSApplication:
         self.course_tree.pack(side="left", fill="both", expand=True)
         scrollbar_course.pack(side="right", fill="y")
 
-        # Tombol untuk refresh data mata kuliah
-        ttk.Button(self.course_frame, text="🔄 Refresh Data", style='Action.TButton', command=self.refresh_courses).pack(pady=10)
+        # Tombol refresh dan operasi massal untuk mata kuliah yang dipilih
+        course_button_frame = tk.Frame(self.course_frame)
+        course_button_frame.pack(pady=10)
+        ttk.Button(course_button_frame, text="🔄 Refresh Data", style='Action.TButton', command=self.refresh_courses).pack(side="left", padx=5)
+        ttk.Button(course_button_frame, text="👥 Peserta", style='Action.TButton', command=self.show_participants).pack(side="left", padx=5)
+        ttk.Button(course_button_frame, text="🚫 Batalkan Kelas", style='Danger.TButton', command=self.cancel_course).pack(side="left", padx=5)
+        ttk.Button(course_button_frame, text="📝 Katalog", style='Action.TButton', command=self.manage_catalog).pack(side="left", padx=5)
+        ttk.Button(course_button_frame, text="👨‍🏫 Beban Dosen", style='Action.TButton', command=self.show_workload).pack(side="left", padx=5)
+        ttk.Button(course_button_frame, text="🏫 Ruang", style='Action.TButton', command=self.show_rooms).pack(side="left", padx=5)
+        ttk.Button(course_button_frame, text="🏷️ Kelas Paralel", style='Action.TButton', command=self.show_sections).pack(side="left", padx=5)
 
     def create_krs_tab(self):
         """
@@ -547,6 +485,23 @@ class KRSApplication:
                                    bg='#e8f5e8', fg='#27ae60')
         self.credits_info.grid(row=0, column=2, padx=20, pady=10)
 
+        # Filter mata kuliah di kedua tabel KRS (disaring di memori tanpa query)
+        krs_filter_frame = tk.Frame(select_frame, bg='#e8f5e8')
+        krs_filter_frame.grid(row=1, column=0, columnspan=3, padx=10, pady=(0, 10), sticky="w")
+
+        tk.Label(krs_filter_frame, text="Cari Kode/Nama/Dosen:", font=('Arial', 10, 'bold'), 
+                bg='#e8f5e8', fg='#27ae60').pack(side="left", padx=(0, 5))
+        self.krs_search = tk.Entry(krs_filter_frame, width=25, font=('Arial', 10), relief='solid', bd=1)
+        self.krs_search.pack(side="left", padx=5)
+        self.krs_search.bind("<KeyRelease>", self.filter_krs)
+
+        tk.Label(krs_filter_frame, text="Hari:", font=('Arial', 10, 'bold'), 
+                bg='#e8f5e8', fg='#27ae60').pack(side="left", padx=5)
+        self.krs_filter_hari = ttk.Combobox(krs_filter_frame, values=["Semua"] + HARI, width=8, state="readonly")
+        self.krs_filter_hari.set("Semua")
+        self.krs_filter_hari.pack(side="left", padx=5)
+        self.krs_filter_hari.bind("<<ComboboxSelected>>", self.filter_krs)
+
         # Frame utama untuk konten KRS
         main_content_frame = tk.Frame(self.krs_frame)
         main_content_frame.pack(fill="both", expand=True, padx=10, pady=10)
@@ -594,8 +549,17 @@ class KRSApplication:
 
         # Tombol untuk mengambil mata kuliah
         ttk.Button(center_frame, text="➡️ Ambil", style='Success.TButton', command=self.enroll_course).pack(pady=10)
+        # Mode keranjang: Ambil hanya menahan kursi, lalu semua dikonfirmasi sekaligus
+        self.cart_mode = tk.BooleanVar(value=False)
+        tk.Checkbutton(center_frame, text="🛒 Keranjang", variable=self.cart_mode,
+                       bg='#f8f9fa').pack(pady=(0, 5))
+        ttk.Button(center_frame, text="✔️ Konfirmasi", style='Success.TButton', command=self.confirm_cart).pack(pady=10)
         # Tombol untuk membatalkan mata kuliah
         ttk.Button(center_frame, text="⬅️ Batal", style='Danger.TButton', command=self.drop_course).pack(pady=10)
+        # Tombol untuk menambahkan mata kuliah ke daftar preferensi alokasi batch
+        ttk.Button(center_frame, text="⭐ Preferensi", style='Action.TButton', command=self.add_preference).pack(pady=10)
+        # Tombol untuk melihat riwayat pendaftaran dan membatalkan kesalahan operator
+        ttk.Button(center_frame, text="📜 Riwayat", style='Action.TButton', command=self.show_history).pack(pady=10)
 
         # Frame untuk mata kuliah yang sudah diambil (kanan)
         enrolled_frame = tk.Frame(main_content_frame, bg='white', relief='solid', bd=2)
@@ -618,6 +582,8 @@ class KRSApplication:
         for col in columns:
             self.enrolled_tree.heading(col, text=col)
             self.enrolled_tree.column(col, width=column_widths.get(col, 80))
+        self.enrolled_tree.tag_configure('held', background='#fff8e1', foreground='#8d6e00')  # Kursi ditahan (keranjang)
+        self.held_iids = set()
 
         # Scrollbar untuk tabel mata kuliah yang sudah diambil
         scrollbar_enrolled = ttk.Scrollbar(enrolled_tree_frame, orient="vertical", command=self.enrolled_tree.yview)
@@ -626,6 +592,12 @@ class KRSApplication:
         self.enrolled_tree.pack(side="left", fill="both", expand=True)
         scrollbar_enrolled.pack(side="right", fill="y")
 
+        # Klik header untuk mengurutkan kedua tabel KRS
+        krs_sort_keys = {"SKS": tree_view.number_key, "Jadwal": tree_view.jadwal_key,
+                         "Sisa": tree_view.number_key}
+        self.available_view = tree_view.SortableTree(self.available_tree, sort_keys=krs_sort_keys)
+        self.enrolled_view = tree_view.SortableTree(self.enrolled_tree, sort_keys=krs_sort_keys)
+
     def create_report_tab(self):
         """
         Membuat tab untuk laporan dan cetak KRS
@@ -649,6 +621,64 @@ class KRSApplication:
         self.report_student_combo.grid(row=0, column=1, padx=10, pady=10)
         # Menghubungkan event pemilihan mahasiswa dengan fungsi generate_report
         self.report_student_combo.bind("<<ComboboxSelected>>", self.generate_report)
+        # Audit kepatuhan KRS seluruh mahasiswa (paralel, di luar thread GUI)
+        ttk.Button(select_frame, text="🔍 Audit KRS", style='Action.TButton',
+                   command=self.run_audit).grid(row=0, column=2, padx=10, pady=10)
+
+        # Frame untuk export data (daftar peserta per mata kuliah, dosen, semester)
+        export_frame = tk.Frame(self.report_frame, bg='#f3e5f5', relief='raised', bd=2)
+        export_frame.pack(fill="x", padx=10, pady=(0, 10))
+
+        tk.Label(export_frame, text="Export:", font=('Arial', 10, 'bold'), 
+                bg='#f3e5f5', fg='#8e24aa').grid(row=0, column=0, padx=10, pady=8, sticky="w")
+        self.export_dataset = ttk.Combobox(export_frame, values=list(export.DATASET_LABELS), width=14, state="readonly")
+        self.export_dataset.set("Peserta MK")
+        self.export_dataset.grid(row=0, column=1, padx=5, pady=8)
+
+        tk.Label(export_frame, text="Kode MK:", bg='#f3e5f5').grid(row=0, column=2, padx=5, pady=8)
+        self.export_kode = ttk.Combobox(export_frame, values=["Semua"], width=10, state="readonly")
+        self.export_kode.set("Semua")
+        self.export_kode.grid(row=0, column=3, padx=5, pady=8)
+
+        tk.Label(export_frame, text="Dosen:", bg='#f3e5f5').grid(row=0, column=4, padx=5, pady=8)
+        self.export_dosen = ttk.Combobox(export_frame, values=["Semua"], width=22, state="readonly")
+        self.export_dosen.set("Semua")
+        self.export_dosen.grid(row=0, column=5, padx=5, pady=8)
+
+        tk.Label(export_frame, text="Semester:", bg='#f3e5f5').grid(row=0, column=6, padx=5, pady=8)
+        self.export_semester = ttk.Combobox(export_frame, values=["Semua", 1,2,3,4,5,6,7,8], width=6, state="readonly")
+        self.export_semester.set("Semua")
+        self.export_semester.grid(row=0, column=7, padx=5, pady=8)
+
+        self.export_gzip = tk.BooleanVar(value=False)
+        tk.Checkbutton(export_frame, text="gzip", variable=self.export_gzip, 
+                      bg='#f3e5f5').grid(row=0, column=8, padx=5, pady=8)
+        ttk.Button(export_frame, text="💾 Export", style='Action.TButton', 
+                  command=self.run_export).grid(row=0, column=9, padx=10, pady=8)
+
+        self.export_status = tk.Label(export_frame, text="", font=('Arial', 9), bg='#f3e5f5', fg='#7f8c8d')
+        self.export_status.grid(row=1, column=0, columnspan=10, padx=10, pady=(0, 8), sticky="w")
+
+        # Thread export yang sedang berjalan dan antrian progres/hasilnya
+        self.export_thread = None
+        self.export_queue = queue.Queue()
+
+        # Thread audit kepatuhan dan antrian hasilnya
+        self.audit_thread = None
+        self.audit_queue = queue.Queue()
+
+        # Mode replika: laporan dan export dibaca dari salinan read-only
+        replica_frame = tk.Frame(self.report_frame, bg='#f3e5f5', relief='raised', bd=2)
+        replica_frame.pack(fill="x", padx=10, pady=(0, 10))
+        self.report_use_replica = tk.BooleanVar(value=False)
+        tk.Checkbutton(replica_frame, text="Baca dari replika (read-only)", variable=self.report_use_replica,
+                       bg='#f3e5f5', command=self.toggle_report_replica).pack(side="left", padx=10, pady=5)
+        self.replica_status = tk.Label(replica_frame, text="", font=('Arial', 9), bg='#f3e5f5', fg='#7f8c8d')
+        self.replica_status.pack(side="left", padx=10)
+        self.replica_reader = replica.ReplicaReader(
+            self.get_config_value('replica_path', replica.REPLICA_PATH) or replica.REPLICA_PATH)
+        self.replica_thread = None
+        self.replica_queue = queue.Queue()
 
         # Frame untuk menampilkan laporan
         report_display_frame = tk.Frame(self.report_frame, bg='white', relief='solid', bd=2)
@@ -677,6 +707,222 @@ class KRSApplication:
         # Tombol untuk mencetak KRS
         ttk.Button(self.report_frame, text="🖨️ Cetak KRS", style='Action.TButton', command=self.print_krs).pack(pady=10)
 
+    def create_allocation_tab(self):
+        """
+        Membuat tab untuk alokasi kursi batch berbasis preferensi
+        - Informasi jendela pengisian preferensi
+        - Tombol simulasi dan eksekusi alokasi
+        - Daftar preferensi mahasiswa beserta hasil dan alasan tidak terpenuhi
+        """
+
+        # Membuat frame untuk tab alokasi
+        self.allocation_frame = ttk.Frame(self.notebook)
+        self.notebook.add(self.allocation_frame, text="🎯 Alokasi Batch")
+
+        # Frame untuk kontrol alokasi
+        control_frame = tk.Frame(self.allocation_frame, bg='#e3f2fd', relief='raised', bd=2)
+        control_frame.pack(fill="x", padx=10, pady=10)
+
+        self.allocation_window_label = tk.Label(control_frame, text="Jendela preferensi: -",
+                                                font=('Arial', 10, 'bold'), bg='#e3f2fd', fg='#1565c0')
+        self.allocation_window_label.grid(row=0, column=0, columnspan=2, padx=10, pady=5, sticky="w")
+
+        # Tombol simulasi (dry run) dan eksekusi alokasi
+        ttk.Button(control_frame, text="🔍 Simulasi", style='Action.TButton',
+                   command=lambda: self.run_batch_allocation(dry_run=True)).grid(row=0, column=2, padx=5, pady=5)
+        ttk.Button(control_frame, text="▶️ Jalankan Alokasi", style='Success.TButton',
+                   command=self.run_batch_allocation).grid(row=0, column=3, padx=5, pady=5)
+
+        # Label dan dropdown untuk memilih mahasiswa
+        tk.Label(control_frame, text="Pilih Mahasiswa:", font=('Arial', 10, 'bold'),
+                 bg='#e3f2fd', fg='#1565c0').grid(row=1, column=0, padx=10, pady=5, sticky="w")
+        self.allocation_student_combo = ttk.Combobox(control_frame, width=50, state="readonly", font=('Arial', 10))
+        self.allocation_student_combo.grid(row=1, column=1, columnspan=3, padx=10, pady=5, sticky="w")
+        self.allocation_student_combo.bind("<<ComboboxSelected>>", self.refresh_allocation_results)
+
+        # Label ringkasan hasil alokasi terakhir
+        self.allocation_summary = tk.Label(self.allocation_frame, text="", font=('Arial', 9),
+                                           fg='#34495e', wraplength=900, justify="left")
+        self.allocation_summary.pack(fill="x", padx=10)
+
+        # Frame untuk tabel preferensi dan hasil
+        result_frame = tk.Frame(self.allocation_frame, bg='white', relief='solid', bd=2)
+        result_frame.pack(fill="both", expand=True, padx=10, pady=10)
+
+        tk.Label(result_frame, text="⭐ Preferensi dan Hasil Alokasi", font=('Arial', 11, 'bold'),
+                 bg='#1565c0', fg='white', pady=8).pack(fill="x")
+
+        tree_frame = tk.Frame(result_frame, bg='white')
+        tree_frame.pack(fill="both", expand=True, padx=10, pady=10)
+
+        columns = ("Peringkat", "Kode MK", "Nama Mata Kuliah", "SKS", "Jadwal", "Status", "Keterangan")
+        self.allocation_tree = ttk.Treeview(tree_frame, columns=columns, show="headings",
+                                            style='Custom.Treeview')
+        column_widths = {"Peringkat": 70, "Kode MK": 80, "Nama Mata Kuliah": 180, "SKS": 40,
+                         "Jadwal": 130, "Status": 100, "Keterangan": 280}
+        for col in columns:
+            self.allocation_tree.heading(col, text=col)
+            self.allocation_tree.column(col, width=column_widths[col])
+        self.allocation_tree.tag_configure('accepted', background='#e8f5e9', foreground='#2e7d32')
+        self.allocation_tree.tag_configure('rejected', background='#ffebee', foreground='#c62828')
+
+        scrollbar_allocation = ttk.Scrollbar(tree_frame, orient="vertical", command=self.allocation_tree.yview)
+        self.allocation_tree.configure(yscrollcommand=scrollbar_allocation.set)
+        self.allocation_tree.pack(side="left", fill="both", expand=True)
+        scrollbar_allocation.pack(side="right", fill="y")
+
+    def create_analytics_tab(self):
+        """
+        Membuat tab dashboard analitik kapasitas dan permintaan
+        - Keterisian per semester dan per mata kuliah
+        - Distribusi beban SKS mahasiswa
+        - Data dibaca dari tabel ringkasan dan diperbarui otomatis setiap beberapa detik
+        """
+
+        # Membuat frame untuk tab analitik
+        self.analytics_frame = ttk.Frame(self.notebook)
+        self.notebook.add(self.analytics_frame, text="📈 Analitik")
+
+        # Label status refresh terakhir
+        self.analytics_status = tk.Label(self.analytics_frame, text="Belum dimuat",
+                                         font=('Arial', 9), fg='#7f8c8d')
+        self.analytics_status.pack(anchor="e", padx=10, pady=(5, 0))
+
+        # Frame atas: keterisian per semester dan distribusi SKS
+        top_frame = tk.Frame(self.analytics_frame)
+        top_frame.pack(fill="both", expand=True, padx=10, pady=5)
+
+        semester_frame = tk.Frame(top_frame, bg='white', relief='solid', bd=2)
+        semester_frame.pack(side="left", fill="both", expand=True, padx=(0, 5))
+        tk.Label(semester_frame, text="🎓 Keterisian per Semester", font=('Arial', 11, 'bold'),
+                 bg='#16a085', fg='white', pady=8).pack(fill="x")
+
+        columns = ("Semester", "Jumlah MK", "Kapasitas", "Terisi", "Keterisian")
+        self.semester_fill_tree = ttk.Treeview(semester_frame, columns=columns, show="headings",
+                                               height=8, style='Custom.Treeview')
+        for col in columns:
+            self.semester_fill_tree.heading(col, text=col)
+            self.semester_fill_tree.column(col, width=80)
+        self.semester_fill_tree.pack(fill="both", expand=True, padx=10, pady=10)
+
+        distribution_frame = tk.Frame(top_frame, bg='white', relief='solid', bd=2)
+        distribution_frame.pack(side="right", fill="both", expand=True, padx=(5, 0))
+        tk.Label(distribution_frame, text="⚖️ Distribusi Beban SKS", font=('Arial', 11, 'bold'),
+                 bg='#16a085', fg='white', pady=8).pack(fill="x")
+
+        columns = ("Total SKS", "Mahasiswa", "Grafik")
+        self.sks_distribution_tree = ttk.Treeview(distribution_frame, columns=columns, show="headings",
+                                                  height=8, style='Custom.Treeview')
+        column_widths = {"Total SKS": 70, "Mahasiswa": 80, "Grafik": 220}
+        for col in columns:
+            self.sks_distribution_tree.heading(col, text=col)
+            self.sks_distribution_tree.column(col, width=column_widths[col])
+        self.sks_distribution_tree.pack(fill="both", expand=True, padx=10, pady=10)
+
+        # Frame bawah: keterisian per mata kuliah (paling penuh lebih dulu)
+        course_frame = tk.Frame(self.analytics_frame, bg='white', relief='solid', bd=2)
+        course_frame.pack(fill="both", expand=True, padx=10, pady=(5, 10))
+        self.course_fill_title = tk.Label(course_frame, text="🔥 Keterisian per Mata Kuliah",
+                                          font=('Arial', 11, 'bold'),
+                                          bg='#c0392b', fg='white', pady=8)
+        self.course_fill_title.pack(fill="x")
+
+        tree_frame = tk.Frame(course_frame, bg='white')
+        tree_frame.pack(fill="both", expand=True, padx=10, pady=10)
+
+        columns = ("Kode MK", "Nama Mata Kuliah", "Semester", "Kapasitas", "Terisi", "Keterisian")
+        self.course_fill_tree = ttk.Treeview(tree_frame, columns=columns, show="headings",
+                                             style='Custom.Treeview')
+        column_widths = {"Kode MK": 80, "Nama Mata Kuliah": 220, "Semester": 70,
+                         "Kapasitas": 70, "Terisi": 60, "Keterisian": 80}
+        for col in columns:
+            self.course_fill_tree.heading(col, text=col)
+            self.course_fill_tree.column(col, width=column_widths[col])
+        self.course_fill_tree.tag_configure('full', background='#ffebee', foreground='#c62828')
+
+        scrollbar_fill = ttk.Scrollbar(tree_frame, orient="vertical", command=self.course_fill_tree.yview)
+        self.course_fill_tree.configure(yscrollcommand=scrollbar_fill.set)
+        self.course_fill_tree.pack(side="left", fill="both", expand=True)
+        scrollbar_fill.pack(side="right", fill="y")
+
+        # Memuat dashboard segera saat tab dibuka, lalu refresh berkala
+        self.notebook.bind("<<NotebookTabChanged>>", self.on_tab_changed)
+        self.root.after(analytics.ANALYTICS_REFRESH_MS, self.auto_refresh_analytics)
+
+    def create_maintenance_tab(self):
+        """
+        Membuat tab untuk pemeliharaan database
+        - Tombol arsip data lama, vacuum bertahap, dan statistik penyimpanan
+        - Log hasil pemeliharaan (ukuran file dan fragmentasi sebelum/sesudah)
+        """
+
+        # Membuat frame untuk tab pemeliharaan
+        self.maintenance_frame = ttk.Frame(self.notebook)
+        self.notebook.add(self.maintenance_frame, text="🛠️ Pemeliharaan")
+
+        # Frame untuk tombol-tombol pemeliharaan
+        action_frame = tk.Frame(self.maintenance_frame, bg='#fdf2e9', relief='raised', bd=2)
+        action_frame.pack(fill="x", padx=10, pady=10)
+
+        tk.Label(action_frame, text="Pemeliharaan Database", font=('Arial', 11, 'bold'),
+                bg='#fdf2e9', fg='#d35400').pack(side="left", padx=10, pady=10)
+        # Tombol untuk menampilkan statistik penyimpanan
+        ttk.Button(action_frame, text="📏 Statistik", style='Action.TButton',
+                   command=self.show_storage_stats).pack(side="left", padx=5)
+        # Tombol untuk mengarsipkan data semester lama dan mahasiswa terhapus
+        ttk.Button(action_frame, text="📦 Arsipkan Data", style='Success.TButton',
+                   command=self.archive_old_data).pack(side="left", padx=5)
+        # Tombol untuk menjalankan incremental vacuum saat aplikasi idle
+        ttk.Button(action_frame, text="🧹 Vacuum Bertahap", style='Action.TButton',
+                   command=self.start_idle_vacuum).pack(side="left", padx=5)
+        # Tombol untuk membuat snapshot backup online
+        ttk.Button(action_frame, text="💾 Backup Sekarang", style='Success.TButton',
+                   command=self.run_backup).pack(side="left", padx=5)
+        # Tombol untuk memulihkan database dari snapshot
+        ttk.Button(action_frame, text="♻️ Pulihkan Backup", style='Danger.TButton',
+                   command=self.restore_backup).pack(side="left", padx=5)
+        # Tombol pergantian semester (naik semester, tandai lulus, tutup KRS aktif)
+        ttk.Button(action_frame, text="🎓 Ganti Semester", style='Danger.TButton',
+                   command=self.run_rollover).pack(side="left", padx=5)
+        # Tombol untuk membatalkan pergantian semester terakhir
+        ttk.Button(action_frame, text="↩️ Batalkan Rollover", style='Action.TButton',
+                   command=self.rollback_rollover).pack(side="left", padx=5)
+
+        # Status antrian registrasi (kontrol penerimaan) untuk admin
+        admission_frame = tk.Frame(self.maintenance_frame, bg='#fdf2e9', relief='raised', bd=2)
+        admission_frame.pack(fill="x", padx=10, pady=(0, 10))
+        self.admission_status = tk.Label(admission_frame, text="", font=('Arial', 9),
+                                         bg='#fdf2e9', fg='#7f8c8d', anchor='w')
+        self.admission_status.pack(fill="x", padx=10, pady=5)
+
+        # Frame untuk log pemeliharaan
+        log_frame = tk.Frame(self.maintenance_frame, bg='white', relief='solid', bd=2)
+        log_frame.pack(fill="both", expand=True, padx=10, pady=10)
+
+        log_title = tk.Label(log_frame, text="📜 Log Pemeliharaan",
+                             font=('Arial', 12, 'bold'),
+                             bg='#d35400', fg='white', pady=10)
+        log_title.pack(fill="x")
+
+        text_frame = tk.Frame(log_frame, bg='white')
+        text_frame.pack(fill="both", expand=True, padx=10, pady=10)
+
+        # Widget teks untuk log pemeliharaan
+        self.maintenance_log = tk.Text(text_frame, wrap="word", font=("Courier New", 10),
+                                       bg='#fafafa', relief='solid', bd=1)
+        scrollbar_log = ttk.Scrollbar(text_frame, orient="vertical", command=self.maintenance_log.yview)
+        self.maintenance_log.configure(yscrollcommand=scrollbar_log.set)
+
+        self.maintenance_log.pack(side="left", fill="both", expand=True)
+        scrollbar_log.pack(side="right", fill="y")
+
+        # Status vacuum bertahap (None jika tidak sedang berjalan)
+        self.vacuum_before = None
+
+        # Thread backup yang sedang berjalan dan antrian hasilnya
+        self.backup_thread = None
+        self.backup_queue = queue.Queue()
+
     # Fungsi-fungsi untuk manajemen mahasiswa
     def tambah_mahasiswa(self):
         """
@@ -739,9 +985,8 @@ class KRSApplication:
             messagebox.showwarning("Pilih Data", "Pilih mahasiswa yang akan diupdate")
             return
 
-        # Mengambil ID mahasiswa dari baris yang dipilih
-        item = self.student_tree.item(selected[0])
-        student_id = item['values'][0]
+        # Mengambil record mahasiswa dari iid baris yang dipilih
+        student = self.students.from_iid(selected[0])
 
         # Mengambil data dari form input
         nim = self.entry_nim.get().strip()
@@ -763,7 +1008,7 @@ class KRSApplication:
             self.cursor.execute("""
                 UPDATE students SET nim=?, nama=?, semester=?, max_credits=?
                 WHERE id=?
-            """, (nim, nama, semester, max_sks, student_id))
+            """, (nim, nama, semester, max_sks, student.id))
             self.conn.commit()
 
             # Menampilkan pesan sukses
@@ -778,6 +1023,7 @@ class KRSApplication:
         except Exception as e:
             messagebox.showerror("Error", f"Gagal update data: {str(e)}")
 
+
     def hapus_mahasiswa(self):
         """
         Menghapus mahasiswa yang dipilih dari database
@@ -793,19 +1039,21 @@ class KRSApplication:
             messagebox.showwarning("Pilih Data", "Pilih mahasiswa yang akan dihapus")
             return
 
-        # Mengambil data mahasiswa dari baris yang dipilih
-        item = self.student_tree.item(selected[0])
-        student_id = item['values'][0]
-        nama = item['values'][2]
+        # Mengambil record mahasiswa dari iid baris yang dipilih
+        student = self.students.from_iid(selected[0])
 
         # Menampilkan dialog konfirmasi
-        result = messagebox.askyesno("Konfirmasi", f"Hapus data mahasiswa {nama}?")
+        result = messagebox.askyesno("Konfirmasi", f"Hapus data mahasiswa {student.nama}?")
         if result:
             try:
+                # Menyalin data mahasiswa ke tabel penampung agar bisa diarsipkan
+                maintenance.stash_deleted_student(self.cursor, student.id)
                 # Menghapus data enrollment mahasiswa terlebih dahulu (foreign key constraint)
-                self.cursor.execute("DELETE FROM enrollments WHERE student_id=?", (student_id,))
+                events.set_context(self.cursor, 'hapus mahasiswa')
+                self.cursor.execute("DELETE FROM enrollments WHERE student_id=?", (student.id,))
                 # Menghapus data mahasiswa
-                self.cursor.execute("DELETE FROM students WHERE id=?", (student_id,))
+                self.cursor.execute("DELETE FROM students WHERE id=?", (student.id,))
+                events.clear_context(self.cursor)
                 self.conn.commit()
 
                 # Menampilkan pesan sukses
@@ -816,6 +1064,7 @@ class KRSApplication:
             except Exception as e:
                 messagebox.showerror("Error", f"Gagal hapus data: {str(e)}")
 
+
     def select_student(self, event):
         """
         Menangani event pemilihan mahasiswa di tabel
@@ -826,9 +1075,8 @@ class KRSApplication:
         # Mengecek apakah ada baris yang dipilih
         selected = self.student_tree.selection()
         if selected:
-            # Mengambil data dari baris yang dipilih
-            item = self.student_tree.item(selected[0])
-            values = item['values']
+            # Mengambil record mahasiswa dari iid baris yang dipilih
+            student = self.students.from_iid(selected[0])
 
             # Membersihkan form input
             self.entry_nim.delete(0, tk.END)
@@ -837,10 +1085,11 @@ class KRSApplication:
             self.entry_max_sks.delete(0, tk.END)
 
             # Mengisi form dengan data mahasiswa yang dipilih
-            self.entry_nim.insert(0, values[1])        # NIM
-            self.entry_nama_mhs.insert(0, values[2])   # Nama
-            self.entry_semester.set(values[3])         # Semester
-            self.entry_max_sks.insert(0, values[4])    # Max SKS
+            self.entry_nim.insert(0, student.nim)
+            self.entry_nama_mhs.insert(0, student.nama)
+            self.entry_semester.set(student.semester)
+            self.entry_max_sks.insert(0, student.max_credits)
+
 
     def clear_student_form(self):
         """
@@ -854,12 +1103,51 @@ class KRSApplication:
         self.entry_max_sks.delete(0, tk.END)
         self.entry_max_sks.insert(0, "24")  # Nilai default Max SKS
 
-    def filter_courses(self, event):
+    def filter_students(self, event=None):
         """
-        Menangani event perubahan filter semester
-        - Memanggil fungsi refresh_courses untuk memfilter data
+        Menangani perubahan pencarian/filter mahasiswa
+        - Penyaringan dilakukan di memori tanpa query ulang ke database
         """
-        self.refresh_courses()
+        visible = self.student_view.set_filters(
+            cari=tree_view.text_filter(("NIM", "Nama"), self.student_search.get()),
+            semester=tree_view.choice_filter("Semester", self.student_filter_semester.get()),
+        )
+        self.student_count_label.config(text=f"{visible} dari {len(self.student_view.store)} mahasiswa")
+
+    def filter_courses(self, event=None):
+        """
+        Menangani event perubahan filter mata kuliah
+        - Filter semester, dosen, SKS, hari, dan sisa kursi diterapkan di memori
+        """
+        # Filter sisa kursi: masih tersedia atau sudah penuh
+        sisa = self.filter_sisa.get()
+        if sisa == "Tersedia":
+            sisa_filter = ("Sisa", lambda value: value > 0)
+        elif sisa == "Penuh":
+            sisa_filter = ("Sisa", lambda value: value <= 0)
+        else:
+            sisa_filter = None
+
+        visible = self.course_view.set_filters(
+            semester=tree_view.choice_filter("Semester", self.filter_semester.get()),
+            dosen=tree_view.choice_filter("Dosen", self.filter_dosen.get()),
+            sks=tree_view.choice_filter("SKS", self.filter_sks.get()),
+            hari=tree_view.choice_filter("Jadwal", self.filter_hari.get(), value_of=nama_hari),
+            sisa=sisa_filter,
+        )
+        self.course_count_label.config(text=f"{visible} dari {len(self.course_view.store)} mata kuliah")
+
+    def filter_krs(self, event=None):
+        """
+        Menangani perubahan pencarian/filter di tab KRS
+        - Filter yang sama diterapkan ke tabel tersedia dan tabel diambil
+        """
+        filters = dict(
+            cari=tree_view.text_filter(("Kode", "Nama MK", "Dosen"), self.krs_search.get()),
+            hari=tree_view.choice_filter("Jadwal", self.krs_filter_hari.get(), value_of=nama_hari),
+        )
+        self.available_view.set_filters(**filters)
+        self.enrolled_view.set_filters(**filters)
 
     # Fungsi-fungsi untuk KRS
     def on_student_selected(self, event):
@@ -869,18 +1157,28 @@ class KRSApplication:
         """
         self.refresh_krs_data()
 
+    def combo_student(self, combo):
+        """
+        Mengambil record mahasiswa yang dipilih pada combobox
+        - Label combobox dipetakan ke ID saat refresh_students
+        - Mengembalikan None jika belum ada mahasiswa yang dipilih
+        """
+        student_id = self.student_labels.get(combo.get())
+        return self.students.get(student_id)
+
+
     def enroll_course(self):
         """
         Mendaftarkan mahasiswa ke mata kuliah yang dipilih
         - Validasi pemilihan mahasiswa dan mata kuliah
-        - Mengecek kapasitas mata kuliah (warning saja)
-        - Mengecek batas SKS mahasiswa
-        - Mengecek duplikasi pendaftaran
-        - Menyimpan data enrollment ke database
+        - Aturan prasyarat, batas SKS, dan duplikasi ada di modul enrollment
+        - Kapasitas penuh hanya peringatan (bisa tetap daftar setelah konfirmasi)
+        - Giliran kontrol penerimaan ditunggu tanpa membekukan GUI (run_admitted)
         """
 
         # Validasi: harus memilih mahasiswa terlebih dahulu
-        if not self.student_combo.get():
+        student = self.combo_student(self.student_combo)
+        if student is None:
             messagebox.showwarning("Pilih Mahasiswa", "Pilih mahasiswa terlebih dahulu")
             return
 
@@ -890,100 +1188,75 @@ class KRSApplication:
             messagebox.showwarning("Pilih Mata Kuliah", "Pilih mata kuliah yang akan diambil")
             return
 
-        # Mengambil data mahasiswa dari combobox
-        student_data = self.student_combo.get().split(" - ")
-        student_nim = student_data[0]
-
-        # Mengambil informasi mahasiswa dari database
-        self.cursor.execute("SELECT id, max_credits FROM students WHERE nim=?", (student_nim,))
-        student_info = self.cursor.fetchone()
-        if not student_info:
-            messagebox.showerror("Error", "Data mahasiswa tidak ditemukan")
-            return
-
-        student_id, max_credits = student_info
-
-        # Mengambil data mata kuliah dari tabel yang dipilih
-        item = self.available_tree.item(selected[0])
-        course_code = item['values'][0]  # Kode mata kuliah
-        course_sks = int(item['values'][2])  # Jumlah SKS
-
-        # Mengambil informasi mata kuliah dari database
-        self.cursor.execute("SELECT id, kapasitas, terisi FROM courses WHERE kode_mk=?", (course_code,))
-        course_info = self.cursor.fetchone()
-        if not course_info:
+        # Mengambil record mata kuliah dari iid baris yang dipilih
+        course = self.courses.from_iid(selected[0])
+        if course is None:
             messagebox.showerror("Error", "Data mata kuliah tidak ditemukan")
             return
 
-        course_id, kapasitas, terisi = course_info
-
-        # Peringatan jika kapasitas mata kuliah penuh (tapi tetap bisa daftar)
-        if terisi >= kapasitas:
-            result = messagebox.askyesno("Kapasitas Penuh", 
-                f"Mata kuliah {course_code} sudah penuh ({terisi}/{kapasitas}).\nTetap ingin mendaftar?")
-            if not result:
-                return
-
-        # Mengecek total SKS saat ini
-        self.cursor.execute("""
-            SELECT SUM(c.sks) FROM enrollments e
-            JOIN courses c ON e.course_id = c.id
-            WHERE e.student_id = ? AND e.status = 'aktif'
-        """, (student_id,))
-        current_credits = self.cursor.fetchone()[0] or 0
-
-        # Mengecek apakah total SKS akan melebihi batas maksimal
-        if current_credits + course_sks > max_credits:
-            messagebox.showwarning("Batas SKS", 
-                f"Total SKS akan melebihi batas maksimal ({current_credits + course_sks} > {max_credits})")
-            return
-
-        # Mengecek apakah mahasiswa sudah terdaftar di mata kuliah ini
-        self.cursor.execute("""
-            SELECT id FROM enrollments 
-            WHERE student_id=? AND course_id=? AND status='aktif'
-        """, (student_id, course_id))
-        if self.cursor.fetchone():
-            messagebox.showwarning("Sudah Terdaftar", "Mahasiswa sudah terdaftar di mata kuliah ini")
+        # Mode keranjang: kursi hanya ditahan sampai dikonfirmasi atau kedaluwarsa
+        if self.cart_mode.get():
+            def held(outcome):
+                try:
+                    outcome()
+                except enrollment.EnrollmentError as e:
+                    messagebox.showwarning(e.title, str(e))
+                    return
+                except admission.AdmissionTimeout as e:
+                    messagebox.showwarning("Antrian Registrasi", str(e))
+                    return
+                except Exception as e:
+                    messagebox.showerror("Error", f"Gagal menahan kursi: {str(e)}")
+                    return
+                self.schedule_hold_sweep()
+                self.refresh_krs_data()
+                self.refresh_courses()
+
+            self.run_admitted(student.id, lambda: holds.hold(self.conn, student, course, self.hold_sweeper), held)
             return
 
         # Proses pendaftaran mata kuliah
-        try:
-            # Mendapatkan tanggal dan waktu saat ini
-            tanggal_daftar = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-            # Memasukkan data enrollment ke database
-            self.cursor.execute("""
-                INSERT INTO enrollments (student_id, course_id, tanggal_daftar, status)
-                VALUES (?, ?, ?, 'aktif')
-            """, (student_id, course_id, tanggal_daftar))
-
-            # Menambah jumlah mahasiswa terisi di mata kuliah
-            self.cursor.execute("""
-                UPDATE courses SET terisi = terisi + 1 WHERE id = ?
-            """, (course_id,))
-
-            self.conn.commit()  # Menyimpan perubahan
+        # Penulisan melewati kontrol penerimaan (giliran adil per mahasiswa)
+        def enrolled(outcome):
+            try:
+                outcome()
+            except enrollment.CourseFullError as e:
+                # Peringatan jika kapasitas mata kuliah penuh (tapi tetap bisa daftar)
+                if messagebox.askyesno(e.title, f"{e}\nTetap ingin mendaftar?"):
+                    self.run_admitted(student.id,
+                                      lambda: enrollment.enroll(self.conn, student, course, allow_full=True),
+                                      enrolled)
+                return
+            except enrollment.EnrollmentError as e:
+                messagebox.showwarning(e.title, str(e))
+                return
+            except admission.AdmissionTimeout as e:
+                messagebox.showwarning("Antrian Registrasi", str(e))
+                return
+            except Exception as e:
+                messagebox.showerror("Error", f"Gagal mendaftar mata kuliah: {str(e)}")
+                return
 
-            # Menampilkan pesan sukses
+            # Menampilkan pesan sukses (refresh di luar try: enrollment sudah tersimpan)
             messagebox.showinfo("Sukses", "Berhasil mendaftar mata kuliah")
             self.refresh_krs_data()  # Refresh data KRS
             self.refresh_courses()   # Refresh data mata kuliah
 
-        except Exception as e:
-            messagebox.showerror("Error", f"Gagal mendaftar mata kuliah: {str(e)}")
+        self.run_admitted(student.id, lambda: enrollment.enroll(self.conn, student, course), enrolled)
+
+
 
     def drop_course(self):
         """
-        Membatalkan pendaftaran mata kuliah yang dipilih
+        Membatalkan pendaftaran mata kuliah yang dipilih (bisa lebih dari satu)
         - Validasi pemilihan mahasiswa dan mata kuliah
-        - Menampilkan konfirmasi pembatalan
-        - Menghapus data enrollment dari database
-        - Mengurangi jumlah mahasiswa terisi di mata kuliah
+        - Menampilkan satu konfirmasi untuk semua mata kuliah terpilih
+        - Menghapus enrollment dan mengurangi jumlah terisi dalam satu transaksi (modul enrollment)
         """
 
         # Validasi: harus memilih mahasiswa terlebih dahulu
-        if not self.student_combo.get():
+        student = self.combo_student(self.student_combo)
+        if student is None:
             messagebox.showwarning("Pilih Mahasiswa", "Pilih mahasiswa terlebih dahulu")
             return
 
@@ -993,140 +1266,646 @@ class KRSApplication:
             messagebox.showwarning("Pilih Mata Kuliah", "Pilih mata kuliah yang akan dibatalkan")
             return
 
-        # Mengambil data mahasiswa
-        student_data = self.student_combo.get().split(" - ")
-        student_nim = student_data[0]
+        # Baris keranjang (kursi ditahan) cukup dilepas tanpa konfirmasi
+        held = [course for course in map(self.courses.from_iid, selected)
+                if course is not None and str(course.id) in self.held_iids]
+        if held:
+            try:
+                for course in held:
+                    holds.release(self.conn, student, course)
+            except Exception as e:
+                messagebox.showerror("Error", f"Gagal melepas tahanan kursi: {str(e)}")
+            selected = [iid for iid in selected if iid not in self.held_iids]
+            self.refresh_krs_data()
+            self.refresh_courses()
+            if not selected:
+                return
 
-        # Mengambil ID mahasiswa dari database
-        self.cursor.execute("SELECT id FROM students WHERE nim=?", (student_nim,))
-        student_info = self.cursor.fetchone()
-        if not student_info:
-            messagebox.showerror("Error", "Data mahasiswa tidak ditemukan")
+        # Mengambil record mata kuliah dari iid baris yang dipilih
+        courses = [course for course in map(self.courses.from_iid, selected) if course is not None]
+        if not courses:
+            messagebox.showerror("Error", "Data mata kuliah tidak ditemukan")
             return
 
-        student_id = student_info[0]
+        # Menampilkan dialog konfirmasi pembatalan
+        kode = ', '.join(course.kode_mk for course in courses)
+        result = messagebox.askyesno("Konfirmasi", f"Batalkan mata kuliah {kode}?")
+        if result:
+            try:
+                dropped, missing = enrollment.drop_courses(self.conn, student, courses)
+
+                # Menampilkan ringkasan hasil pembatalan
+                message = f"{len(dropped)} mata kuliah berhasil dibatalkan"
+                if missing:
+                    message += f"\n{len(missing)} mata kuliah sudah tidak terdaftar"
+                messagebox.showinfo("Sukses", message)
+                self.refresh_krs_data()  # Refresh data KRS
+                self.refresh_courses()   # Refresh data mata kuliah
 
-        # Mengambil kode mata kuliah dari tabel yang dipilih
-        item = self.enrolled_tree.item(selected[0])
-        course_code = item['values'][0]
+            except Exception as e:
+                messagebox.showerror("Error", f"Gagal membatalkan mata kuliah: {str(e)}")
 
-        # Mengambil ID mata kuliah dari database
-        self.cursor.execute("SELECT id FROM courses WHERE kode_mk=?", (course_code,))
-        course_info = self.cursor.fetchone()
-        if not course_info:
-            messagebox.showerror("Error", "Data mata kuliah tidak ditemukan")
+    def confirm_cart(self):
+        """
+        Mendaftarkan semua kursi yang ditahan mahasiswa dalam satu transaksi
+        - Jika satu mata kuliah ditolak, tidak ada yang didaftarkan (tahanan tetap ada)
+        """
+        student = self.combo_student(self.student_combo)
+        if student is None:
+            messagebox.showwarning("Pilih Mahasiswa", "Pilih mahasiswa terlebih dahulu")
             return
 
-        course_id = course_info[0]
+        def confirmed(outcome):
+            try:
+                enrolled = outcome()
+            except enrollment.EnrollmentError as e:
+                messagebox.showwarning(e.title, str(e))
+                return
+            except admission.AdmissionTimeout as e:
+                messagebox.showwarning("Antrian Registrasi", str(e))
+                return
+            except Exception as e:
+                messagebox.showerror("Error", f"Gagal mengkonfirmasi keranjang: {str(e)}")
+                return
+            messagebox.showinfo("Sukses", f"Berhasil mendaftar {len(enrolled)} mata kuliah: {', '.join(enrolled)}")
+            self.refresh_krs_data()
+            self.refresh_courses()
 
-        # Menampilkan dialog konfirmasi pembatalan
-        result = messagebox.askyesno("Konfirmasi", f"Batalkan mata kuliah {course_code}?")
-        if result:
+        self.run_admitted(student.id, lambda: holds.confirm(self.conn, student), confirmed)
+
+    def run_admitted(self, key, action, callback):
+        """
+        Menjalankan action() setelah mendapat giliran dari kontrol penerimaan tanpa membekukan GUI
+        - Penantian giliran berjalan di thread pekerja; hasilnya dipantau lewat after()
+        - action() tetap dijalankan di thread Tk karena koneksi SQLite milik thread ini
+        - callback(outcome) dipanggil di thread Tk; outcome() mengembalikan hasil action()
+          atau melempar ulang errornya (termasuk AdmissionTimeout)
+        - Pada mode profiling action dan callback diprofil sendiri, karena after() tidak
+          dibungkus install_profiler
+        """
+        if self.profiler:
+            action = self.profiler.wrap(action)
+            callback = self.profiler.wrap(callback)
+        results = queue.Queue()
+
+        def wait_turn():
+            try:
+                self.admission.admit(key)
+                results.put(None)
+            except admission.AdmissionTimeout as e:
+                results.put(e)
+
+        def check_turn():
             try:
-                # Menghapus data enrollment
-                self.cursor.execute("""
-                    DELETE FROM enrollments 
-                    WHERE student_id=? AND course_id=? AND status='aktif'
-                """, (student_id, course_id))
+                error = results.get_nowait()
+            except queue.Empty:
+                self.root.after(50, check_turn)
+                return
+            if error is None:
+                try:
+                    value = action()
+                except Exception as e:
+                    error = e
+                finally:
+                    self.admission.release()
+
+            def outcome():
+                if error is not None:
+                    raise error
+                return value
+            callback(outcome)
+
+        threading.Thread(target=wait_turn, daemon=True).start()
+        self.root.after(50, check_turn)
+
+    def schedule_hold_sweep(self):
+        """
+        Menjadwalkan sapuan tahanan kursi berikutnya
+        - Jeda mengikuti tahanan terdekat di heap, dibatasi HOLD_SWEEP_MAX_SECONDS
+          agar tahanan dari klien lain juga terlepas tepat waktu
+        """
+        if self.hold_sweep_job is not None:
+            self.root.after_cancel(self.hold_sweep_job)
+        due = self.hold_sweeper.next_due()
+        delay = holds.HOLD_SWEEP_MAX_SECONDS if due is None else min(due + 1, holds.HOLD_SWEEP_MAX_SECONDS)
+        self.hold_sweep_job = self.root.after(int(delay * 1000), self.sweep_holds)
+
+    def sweep_holds(self):
+        """Melepas tahanan kursi yang kedaluwarsa lalu merefresh tampilan jika ada yang terlepas"""
+        self.hold_sweep_job = None
+        try:
+            released = self.hold_sweeper.sweep()
+        except sqlite3.Error:
+            released = 0  # Database sedang sibuk; dicoba lagi pada sapuan berikutnya
+        if released:
+            self.refresh_krs_data()
+            self.refresh_courses()
+        self.schedule_hold_sweep()
+
+    def selected_course(self):
+        """Mengambil record mata kuliah yang dipilih di tab mata kuliah (None jika belum ada)"""
+        selected = self.course_tree.selection()
+        if not selected:
+            messagebox.showwarning("Pilih Mata Kuliah", "Pilih mata kuliah terlebih dahulu")
+            return None
+        return self.courses.from_iid(selected[0])
+
+    def cancel_course(self):
+        """
+        Membatalkan kelas yang dipilih di tab mata kuliah
+        - Semua enrollment aktif dihapus dan terisi dinolkan dalam satu transaksi
+        """
+        course = self.selected_course()
+        if course is None:
+            return
+
+        participants = len(models.fetch_course_students(self.conn, course.id))
+        if not messagebox.askyesno("Batalkan Kelas",
+                                   f"Batalkan kelas {course.kode_mk} - {course.nama_mk}?\n"
+                                   f"{participants} mahasiswa akan dihapus dari kelas ini."):
+            return
+        try:
+            dropped = enrollment.cancel_course(self.conn, course)
+        except Exception as e:
+            messagebox.showerror("Error", f"Gagal membatalkan kelas: {str(e)}")
+            return
+        messagebox.showinfo("Sukses", f"Kelas {course.kode_mk} dibatalkan: {dropped} enrollment dihapus")
+        self.refresh_courses()
+        self.refresh_krs_data()
 
-                # Mengurangi jumlah mahasiswa terisi di mata kuliah
-                self.cursor.execute("""
-                    UPDATE courses SET terisi = terisi - 1 WHERE id = ?
-                """, (course_id,))
+    def manage_catalog(self):
+        """
+        Membuka editor katalog mata kuliah (CSV)
+        - Katalog bisa diedit langsung atau dibaca dari file
+        - Pratinjau menampilkan diff per kode_mk; Terapkan hanya menulis baris yang berubah
+        """
+        window = tk.Toplevel(self.root)
+        window.title("Katalog Mata Kuliah")
+        window.geometry("900x600")
+        window.configure(bg='#f8f9fa')
 
-                self.conn.commit()  # Menyimpan perubahan
+        tk.Label(window, text="Kolom: " + ", ".join(catalog.CATALOG_COLUMNS), bg='#f8f9fa',
+                 anchor='w').pack(fill="x", padx=10, pady=(10, 0))
+        editor = tk.Text(window, height=18, font=('Courier', 9), wrap='none')
+        editor.pack(fill="both", expand=True, padx=10, pady=5)
+        editor.insert(1.0, catalog.format_catalog(self.cursor))
 
-                # Menampilkan pesan sukses
-                messagebox.showinfo("Sukses", "Mata kuliah berhasil dibatalkan")
-                self.refresh_krs_data()  # Refresh data KRS
-                self.refresh_courses()   # Refresh data mata kuliah
+        diff_text = tk.Text(window, height=8, font=('Courier', 9), bg='#f8f9fa')
+        diff_text.pack(fill="x", padx=10)
 
+        retire = tk.BooleanVar(value=True)
+        diff_state = {}
+
+        def read_editor():
+            try:
+                return catalog.parse_catalog(editor.get(1.0, tk.END))
+            except catalog.CatalogError as e:
+                messagebox.showwarning("Katalog Tidak Valid", str(e), parent=window)
+                return None
+
+        def preview():
+            entries = read_editor()
+            if entries is None:
+                return None
+            diff_state['diff'] = catalog.diff_catalog(self.cursor, entries, retire.get())
+            diff_text.delete(1.0, tk.END)
+            diff_text.insert(1.0, catalog.format_diff(diff_state['diff']))
+            return diff_state['diff']
+
+        def open_file():
+            path = filedialog.askopenfilename(parent=window, filetypes=[("CSV", "*.csv"), ("Semua file", "*.*")])
+            if not path:
+                return
+            try:
+                with open(path, encoding='utf-8') as handle:
+                    text = handle.read()
+            except OSError as e:
+                messagebox.showerror("Error", f"Gagal membaca file: {str(e)}", parent=window)
+                return
+            editor.delete(1.0, tk.END)
+            editor.insert(1.0, text)
+            preview()
+
+        def apply():
+            diff = preview()
+            if diff is None:
+                return
+            total = len(diff['added']) + len(diff['changed']) + len(diff['retired'])
+            if not total:
+                messagebox.showinfo("Katalog", "Tidak ada perubahan", parent=window)
+                return
+            if not messagebox.askyesno("Konfirmasi", f"Terapkan {total} perubahan katalog?", parent=window):
+                return
+            try:
+                catalog.apply_diff(self.conn, diff)
             except Exception as e:
-                messagebox.showerror("Error", f"Gagal membatalkan mata kuliah: {str(e)}")
+                messagebox.showerror("Error", f"Gagal menyimpan katalog: {str(e)}", parent=window)
+                return
+            messagebox.showinfo("Sukses", f"{total} mata kuliah diperbarui", parent=window)
+            self.refresh_courses()
+            self.refresh_krs_data()
+            preview()
+
+        button_frame = tk.Frame(window, bg='#f8f9fa')
+        button_frame.pack(fill="x", padx=10, pady=10)
+        ttk.Button(button_frame, text="📂 Buka File...", command=open_file).pack(side="left", padx=5)
+        ttk.Button(button_frame, text="🔍 Pratinjau", style='Action.TButton', command=preview).pack(side="left", padx=5)
+        tk.Checkbutton(button_frame, text="Pensiunkan kode yang tidak ada", variable=retire,
+                       bg='#f8f9fa').pack(side="left", padx=5)
+        ttk.Button(button_frame, text="✅ Terapkan", style='Success.TButton', command=apply).pack(side="left", padx=5)
+        ttk.Button(button_frame, text="Tutup", command=window.destroy).pack(side="right")
+
+    def show_participants(self):
+        """
+        Menampilkan peserta aktif mata kuliah yang dipilih
+        - Beberapa peserta bisa dipilih lalu dibatalkan sekaligus dalam satu transaksi
+        """
+        course = self.selected_course()
+        if course is None:
+            return
 
-    def generate_report(self, event):
+        window = tk.Toplevel(self.root)
+        window.title(f"Peserta {course.kode_mk} - {course.nama_mk}")
+        window.geometry("460x420")
+        window.configure(bg='#f8f9fa')
+
+        count_label = tk.Label(window, text="", bg='#f8f9fa', anchor='w')
+        count_label.pack(fill="x", padx=10, pady=(10, 0))
+
+        list_frame = tk.Frame(window, bg='white')
+        list_frame.pack(fill="both", expand=True, padx=10, pady=5)
+        listbox = tk.Listbox(list_frame, selectmode=tk.EXTENDED)
+        scrollbar = ttk.Scrollbar(list_frame, orient="vertical", command=listbox.yview)
+        listbox.configure(yscrollcommand=scrollbar.set)
+        listbox.pack(side="left", fill="both", expand=True)
+        scrollbar.pack(side="right", fill="y")
+
+        participants = []
+
+        def load_participants():
+            participants[:] = models.fetch_course_students(self.conn, course.id)
+            listbox.delete(0, tk.END)
+            for student in participants:
+                listbox.insert(tk.END, student.label)
+            count_label.config(text=f"Peserta aktif: {len(participants)}")
+
+        def drop_selected():
+            students = [participants[index] for index in listbox.curselection()]
+            if not students:
+                messagebox.showwarning("Pilih Mahasiswa", "Pilih mahasiswa yang akan dibatalkan", parent=window)
+                return
+            if not messagebox.askyesno("Konfirmasi",
+                                       f"Batalkan {course.kode_mk} untuk {len(students)} mahasiswa?",
+                                       parent=window):
+                return
+            try:
+                dropped, missing = enrollment.drop_students(self.conn, course, students)
+            except Exception as e:
+                messagebox.showerror("Error", f"Gagal membatalkan mata kuliah: {str(e)}", parent=window)
+                return
+            message = f"{len(dropped)} mahasiswa dibatalkan dari {course.kode_mk}"
+            if missing:
+                message += f"\n{len(missing)} mahasiswa sudah tidak terdaftar"
+            messagebox.showinfo("Sukses", message, parent=window)
+            load_participants()
+            self.refresh_courses()
+            self.refresh_krs_data()
+
+        button_frame = tk.Frame(window, bg='#f8f9fa')
+        button_frame.pack(fill="x", padx=10, pady=10)
+        ttk.Button(button_frame, text="⬅️ Batalkan Terpilih", style='Danger.TButton',
+                   command=drop_selected).pack(side="left")
+        ttk.Button(button_frame, text="Tutup", command=window.destroy).pack(side="right")
+        load_participants()
+
+    def show_workload(self):
         """
-        Menggenerate laporan KRS untuk mahasiswa yang dipilih
-        - Mengambil data mahasiswa dan mata kuliah yang diambil
-        - Membuat format laporan KRS yang rapi
-        - Menampilkan informasi total SKS dan validasi
+        Menampilkan beban mengajar semua dosen (jumlah MK, total SKS, peserta)
+        - Memilih satu dosen menampilkan jadwal mengajar dan jumlah mahasiswanya
         """
+        window = tk.Toplevel(self.root)
+        window.title("Beban Mengajar Dosen")
+        window.geometry("760x520")
+        window.configure(bg='#f8f9fa')
+
+        columns = ("Dosen", "Mata Kuliah", "Total SKS", "Peserta")
+        column_widths = {"Dosen": 300, "Mata Kuliah": 100, "Total SKS": 100, "Peserta": 100}
+        tree_frame = tk.Frame(window, bg='white')
+        tree_frame.pack(fill="both", expand=True, padx=10, pady=(10, 5))
+        workload_tree = ttk.Treeview(tree_frame, columns=columns, show="headings", height=12,
+                                     style='Custom.Treeview')
+        for col in columns:
+            workload_tree.heading(col, text=col)
+            workload_tree.column(col, width=column_widths[col])
+        scrollbar = ttk.Scrollbar(tree_frame, orient="vertical", command=workload_tree.yview)
+        workload_tree.configure(yscrollcommand=scrollbar.set)
+        workload_tree.pack(side="left", fill="both", expand=True)
+        scrollbar.pack(side="right", fill="y")
+
+        names = {}
+        for lecturer_id, nama, jumlah_mk, total_sks, total_peserta in lecturers.workload(self.cursor):
+            names[str(lecturer_id)] = nama
+            workload_tree.insert("", tk.END, iid=str(lecturer_id),
+                                 values=(nama, jumlah_mk, total_sks, total_peserta))
+
+        schedule_text = tk.Text(window, height=9, wrap="none", font=("Courier New", 10))
+        schedule_text.pack(fill="x", padx=10, pady=(0, 5))
+
+        def show_schedule(event=None):
+            selected = workload_tree.selection()
+            if not selected:
+                return
+            schedule_text.delete(1.0, tk.END)
+            schedule_text.insert(1.0, lecturers.format_schedule(self.cursor, int(selected[0]),
+                                                                names[selected[0]]))
 
-        # Mengecek apakah ada mahasiswa yang dipilih
-        if not self.report_student_combo.get():
+        workload_tree.bind("<<TreeviewSelect>>", show_schedule)
+        ttk.Button(window, text="Tutup", command=window.destroy).pack(side="right", padx=10, pady=(0, 10))
+
+    def show_rooms(self):
+        """
+        Menampilkan alokasi ruang kuliah tersimpan
+        - Alokasikan Ulang menjalankan pewarnaan graf interval untuk semua mata kuliah
+        - Kelas yang tidak mendapat ruang ditampilkan beserta alasannya
+        """
+        window = tk.Toplevel(self.root)
+        window.title("Alokasi Ruang Kuliah")
+        window.geometry("860x560")
+        window.configure(bg='#f8f9fa')
+
+        columns = ("Ruang", "Kapasitas", "Kode MK", "Nama MK", "Jadwal", "Kuota MK")
+        column_widths = {"Ruang": 180, "Kapasitas": 80, "Kode MK": 80, "Nama MK": 220,
+                         "Jadwal": 160, "Kuota MK": 80}
+        tree_frame = tk.Frame(window, bg='white')
+        tree_frame.pack(fill="both", expand=True, padx=10, pady=(10, 5))
+        room_tree = ttk.Treeview(tree_frame, columns=columns, show="headings", height=14,
+                                 style='Custom.Treeview')
+        for col in columns:
+            room_tree.heading(col, text=col)
+            room_tree.column(col, width=column_widths[col])
+        scrollbar = ttk.Scrollbar(tree_frame, orient="vertical", command=room_tree.yview)
+        room_tree.configure(yscrollcommand=scrollbar.set)
+        room_tree.pack(side="left", fill="both", expand=True)
+        scrollbar.pack(side="right", fill="y")
+
+        result_text = tk.Text(window, height=8, wrap="word", font=("Courier New", 10))
+        result_text.pack(fill="x", padx=10, pady=(0, 5))
+
+        def load_schedule():
+            room_tree.delete(*room_tree.get_children())
+            for kode_ruang, nama, kapasitas, kode_mk, nama_mk, jadwal, kuota in rooms.room_schedule(self.cursor):
+                room_tree.insert("", tk.END, values=(f"{kode_ruang} - {nama}", kapasitas, kode_mk,
+                                                     nama_mk, jadwal, kuota))
+
+        def reassign():
+            try:
+                result = rooms.assign_rooms(self.conn)
+            except Exception as e:
+                messagebox.showerror("Error", f"Gagal mengalokasikan ruang: {str(e)}", parent=window)
+                return
+            result_text.delete(1.0, tk.END)
+            result_text.insert(1.0, rooms.format_result(result))
+            load_schedule()
+
+        load_schedule()
+        ttk.Button(window, text="Tutup", command=window.destroy).pack(side="right", padx=10, pady=(0, 10))
+        ttk.Button(window, text="🏫 Alokasikan Ulang", style='Action.TButton',
+                   command=reassign).pack(side="right", padx=5, pady=(0, 10))
+
+    def show_sections(self):
+        """
+        Menampilkan dan mengelola kelas paralel mata kuliah yang dipilih
+        - Kelas pertama yang ditambahkan memecah mata kuliah: jadwal lama menjadi kelas A
+        - Kelas hanya bisa dihapus jika tidak punya peserta aktif
+        """
+        course = self.selected_course()
+        if course is None:
             return
 
-        # Mengambil NIM mahasiswa dari combobox
-        student_data = self.report_student_combo.get().split(" - ")
-        student_nim = student_data[0]
+        window = tk.Toplevel(self.root)
+        window.title(f"Kelas Paralel - {course.kode_mk} {course.nama_mk}")
+        window.geometry("720x460")
+        window.configure(bg='#f8f9fa')
+
+        columns = ("Kelas", "Jadwal", "Dosen", "Kapasitas", "Terisi")
+        column_widths = {"Kelas": 60, "Jadwal": 170, "Dosen": 220, "Kapasitas": 80, "Terisi": 80}
+        tree_frame = tk.Frame(window, bg='white')
+        tree_frame.pack(fill="both", expand=True, padx=10, pady=(10, 5))
+        section_tree = ttk.Treeview(tree_frame, columns=columns, show="headings", height=10,
+                                    style='Custom.Treeview')
+        for col in columns:
+            section_tree.heading(col, text=col)
+            section_tree.column(col, width=column_widths[col])
+        section_tree.pack(fill="both", expand=True)
+
+        # Form kelas baru (atau ubah kelas yang dipilih)
+        form = tk.Frame(window, bg='#f8f9fa')
+        form.pack(fill="x", padx=10, pady=5)
+        fields = {}
+        for col, (label, width) in enumerate([("Kelas", 5), ("Jadwal", 20), ("Dosen", 24), ("Kapasitas", 6)]):
+            tk.Label(form, text=label, bg='#f8f9fa').grid(row=0, column=col, sticky='w', padx=3)
+            fields[label] = ttk.Entry(form, width=width)
+            fields[label].grid(row=1, column=col, padx=3)
+
+        def load_sections():
+            section_tree.delete(*section_tree.get_children())
+            for section_id, kelas, jadwal, dosen, kapasitas, terisi in sections.list_sections(self.cursor, course.id):
+                section_tree.insert("", tk.END, iid=str(section_id), values=(kelas, jadwal, dosen, kapasitas, terisi))
+
+        def fill_form(event=None):
+            selected = section_tree.selection()
+            if not selected:
+                return
+            for label, value in zip(columns, section_tree.item(selected[0], 'values')):
+                if label in fields:
+                    fields[label].delete(0, tk.END)
+                    fields[label].insert(0, value)
 
-        # Mengambil informasi mahasiswa dari database
-        self.cursor.execute("""
-            SELECT s.nim, s.nama, s.semester, s.max_credits
-            FROM students s WHERE s.nim = ?
-        """, (student_nim,))
-        student_info = self.cursor.fetchone()
+        def form_values():
+            try:
+                kapasitas = int(fields["Kapasitas"].get())
+            except ValueError:
+                raise sections.SectionError("Kapasitas harus berupa angka")
+            return fields["Jadwal"].get().strip(), fields["Dosen"].get().strip(), kapasitas
 
-        if not student_info:
+        def run(action):
+            try:
+                action()
+            except sections.SectionError as e:
+                messagebox.showwarning("Kelas Paralel", str(e), parent=window)
+                return
+            except Exception as e:
+                messagebox.showerror("Error", f"Gagal menyimpan kelas paralel: {str(e)}", parent=window)
+                return
+            load_sections()
+            self.refresh_courses()
+            self.refresh_krs_data()
+
+        def add():
+            kelas = fields["Kelas"].get().strip()
+            if not kelas:
+                raise sections.SectionError("Nama kelas wajib diisi")
+            sections.add_section(self.conn, course, kelas, *form_values())
+
+        def update():
+            selected = section_tree.selection()
+            if not selected:
+                raise sections.SectionError("Pilih kelas yang akan diubah")
+            sections.update_section(self.conn, int(selected[0]), *form_values())
+
+        def remove():
+            selected = section_tree.selection()
+            if not selected:
+                raise sections.SectionError("Pilih kelas yang akan dihapus")
+            sections.remove_section(self.conn, int(selected[0]))
+
+        section_tree.bind("<<TreeviewSelect>>", fill_form)
+        load_sections()
+        ttk.Button(window, text="Tutup", command=window.destroy).pack(side="right", padx=10, pady=(0, 10))
+        ttk.Button(window, text="🗑️ Hapus", style='Danger.TButton',
+                   command=lambda: run(remove)).pack(side="right", padx=5, pady=(0, 10))
+        ttk.Button(window, text="✏️ Ubah", style='Action.TButton',
+                   command=lambda: run(update)).pack(side="right", padx=5, pady=(0, 10))
+        ttk.Button(window, text="➕ Tambah Kelas", style='Action.TButton',
+                   command=lambda: run(add)).pack(side="right", padx=5, pady=(0, 10))
+
+    def show_history(self):
+        """
+        Menampilkan riwayat event pendaftaran mahasiswa yang dipilih
+        - Memilih satu event menampilkan KRS pada titik tersebut (rekonstruksi dari snapshot)
+        - Undo membatalkan beberapa event terakhir milik mahasiswa ini
+        """
+        student = self.combo_student(self.student_combo)
+        if student is None:
+            messagebox.showwarning("Pilih Mahasiswa", "Pilih mahasiswa terlebih dahulu")
             return
 
-        nim, nama, semester, max_credits = student_info
+        window = tk.Toplevel(self.root)
+        window.title(f"Riwayat KRS - {student.label}")
+        window.geometry("900x480")
+        window.configure(bg='#f8f9fa')
+
+        columns = ("No", "Waktu", "Aksi", "Kode MK", "Nama MK", "Oleh", "Sumber", "Keterangan")
+        column_widths = {"No": 60, "Waktu": 170, "Aksi": 110, "Kode MK": 80, "Nama MK": 200,
+                         "Oleh": 90, "Sumber": 100, "Keterangan": 110}
+        tree_frame = tk.Frame(window, bg='white')
+        tree_frame.pack(fill="both", expand=True, padx=10, pady=(10, 5))
+        history_tree = ttk.Treeview(tree_frame, columns=columns, show="headings", height=14,
+                                    style='Custom.Treeview')
+        for col in columns:
+            history_tree.heading(col, text=col)
+            history_tree.column(col, width=column_widths[col])
+        scrollbar = ttk.Scrollbar(tree_frame, orient="vertical", command=history_tree.yview)
+        history_tree.configure(yscrollcommand=scrollbar.set)
+        history_tree.pack(side="left", fill="both", expand=True)
+        scrollbar.pack(side="right", fill="y")
+
+        # Label isi KRS pada event yang dipilih
+        krs_label = tk.Label(window, text="Pilih event untuk melihat KRS pada titik tersebut",
+                             bg='#f8f9fa', anchor='w', justify='left', wraplength=860)
+        krs_label.pack(fill="x", padx=10)
+
+        action_frame = tk.Frame(window, bg='#f8f9fa')
+        action_frame.pack(fill="x", padx=10, pady=10)
+        tk.Label(action_frame, text="Langkah:", bg='#f8f9fa').pack(side="left")
+        steps = tk.Spinbox(action_frame, from_=1, to=50, width=5)
+        steps.pack(side="left", padx=5)
+
+        def load_history():
+            history_tree.delete(*history_tree.get_children())
+            for event_id, created_at, event_type, kode_mk, nama_mk, actor, source, reverts, undone in \
+                    events.history(self.cursor, student.id):
+                note = f"undo #{reverts}" if reverts else ("dibatalkan" if undone else "")
+                history_tree.insert("", "end", iid=str(event_id), values=(
+                    event_id, created_at[:19], events.EVENT_LABELS.get(event_type, event_type),
+                    kode_mk, nama_mk, actor or '-', source or '-', note))
+
+        def show_krs_at(event=None):
+            selected = history_tree.selection()
+            if not selected:
+                return
+            course_ids = set(events.krs_at(self.cursor, student.id, int(selected[0])))
+            courses = [course for course in models.fetch_courses(self.conn, include_retired=True)
+                       if course.id in course_ids]
+            total_sks = sum(course.sks for course in courses)
+            krs_label.config(text=f"KRS setelah event #{selected[0]} ({total_sks} SKS): "
+                                  f"{', '.join(sorted(course.kode_mk for course in courses)) or '-'}")
+
+        def undo_events():
+            count = int(steps.get())
+            if not messagebox.askyesno("Konfirmasi",
+                                       f"Batalkan {count} event terakhir milik {student.nama}?",
+                                       parent=window):
+                return
+            try:
+                reverted = events.undo(self.conn, count, student.id)
+            except events.EventError as e:
+                messagebox.showwarning("Undo Gagal", str(e), parent=window)
+                return
+            except Exception as e:
+                messagebox.showerror("Error", f"Gagal membatalkan event: {str(e)}", parent=window)
+                return
+            messagebox.showinfo("Sukses", f"{len(reverted)} event dibatalkan", parent=window)
+            load_history()
+            self.refresh_krs_data()
+            self.refresh_courses()
+
+        ttk.Button(action_frame, text="↩️ Undo", style='Danger.TButton', command=undo_events).pack(side="left", padx=5)
+        ttk.Button(action_frame, text="Tutup", command=window.destroy).pack(side="right")
+        history_tree.bind('<<TreeviewSelect>>', show_krs_at)
+        load_history()
 
-        # Mengambil mata kuliah yang diambil mahasiswa
-        self.cursor.execute("""
-            SELECT c.kode_mk, c.nama_mk, c.sks, c.jadwal, c.dosen
-            FROM enrollments e
-            JOIN courses c ON e.course_id = c.id
-            JOIN students s ON e.student_id = s.id
-            WHERE s.nim = ? AND e.status = 'aktif'
-            ORDER BY c.kode_mk
-        """, (student_nim,))
-        enrolled_courses = self.cursor.fetchall()
-
-        # Mengambil konfigurasi sistem
-        academic_year = self.get_config_value('academic_year', '2024/2025')
-        current_semester = self.get_config_value('current_semester', 'Ganjil')
-
-        # Membuat format laporan KRS
-        report = "=" * 70 + "\n"
-        report += "              KARTU RENCANA STUDI (KRS)\n"
-        report += "=" * 70 + "\n\n"
-        report += f"NIM           : {nim}\n"
-        report += f"Nama          : {nama}\n"
-        report += f"Semester      : {semester}\n"
-        report += f"Tahun Akademik: {academic_year}\n"
-        report += f"Semester      : {current_semester}\n\n"
-
-        report += "=" * 70 + "\n"
-        report += f"{'No':<3} {'Kode MK':<8} {'Nama Mata Kuliah':<25} {'SKS':<4} {'Jadwal':<20}\n"
-        report += "=" * 70 + "\n"
-
-        # Menambahkan daftar mata kuliah ke laporan
-        total_sks = 0
-        for i, course in enumerate(enrolled_courses, 1):
-            kode_mk, nama_mk, sks, jadwal, dosen = course
-            total_sks += sks
-            # Memotong nama mata kuliah jika terlalu panjang
-            nama_mk_truncated = nama_mk[:24] if len(nama_mk) > 24 else nama_mk
-            report += f"{i:<3} {kode_mk:<8} {nama_mk_truncated:<25} {sks:<4} {jadwal:<20}\n"
-
-        report += "=" * 70 + "\n"
-        report += f"Total SKS yang diambil: {total_sks}\n"
-        report += f"Batas Maksimal SKS    : {max_credits}\n"
-
-        # Menambahkan peringatan jika ada masalah dengan total SKS
-        if total_sks > max_credits:
-            report += "\n⚠️  PERINGATAN: Total SKS melebihi batas maksimal!\n"
-        elif total_sks < 12:
-            report += "\n⚠️  PERINGATAN: Total SKS kurang dari batas minimal (12 SKS)!\n"
-
-        report += "\n" + "=" * 70 + "\n"
-        report += f"Tanggal Cetak: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}\n"
-        report += "=" * 70 + "\n"
-
-        # Menampilkan laporan di widget teks
+    def generate_report(self, event):
+        """
+        Menggenerate laporan KRS untuk mahasiswa yang dipilih
+        - Format laporan dibuat oleh modul enrollment (sama dengan CLI)
+        - Menampilkan informasi total SKS dan validasi
+        """
+
+        # Mengecek apakah ada mahasiswa yang dipilih
+        student = self.combo_student(self.report_student_combo)
+        if student is None:
+            return
+
+        # Menampilkan laporan di widget teks (dari replika jika mode replika aktif)
         self.report_text.delete(1.0, tk.END)
-        self.report_text.insert(1.0, report)
+        self.report_text.insert(1.0, enrollment.krs_report(self.report_connection(), student))
+        self.update_replica_status(reschedule=False)
+
+    def report_connection(self):
+        """
+        Mengambil koneksi untuk laporan
+        - Mode replika: koneksi read-only ke replika terbaru (dibuka ulang jika ada yang baru)
+        - Jika replika belum tersedia, mode replika dimatikan dan koneksi utama dipakai
+        """
+        if not self.report_use_replica.get():
+            return self.conn
+        try:
+            return self.replica_reader.connection()
+        except (replica.ReplicaError, sqlite3.Error) as e:
+            self.report_use_replica.set(False)
+            messagebox.showwarning("Replika", f"{str(e)}\nLaporan dibaca dari database utama.")
+            return self.conn
+
+    def toggle_report_replica(self):
+        """Menerapkan pilihan mode replika ke laporan yang sedang ditampilkan"""
+        if self.report_use_replica.get():
+            self.report_connection()
+        self.update_replica_status(reschedule=False)
+        self.generate_report(None)
+
+    def update_replica_status(self, reschedule=True):
+        """Menampilkan umur replika yang dipakai laporan (diperbarui berkala)"""
+        if self.report_use_replica.get():
+            moment = self.replica_reader.published_at
+            text = (f"Replika diterbitkan {moment.strftime('%d/%m/%Y %H:%M:%S')} "
+                    f"({replica.format_age(self.replica_reader.age())})" if moment else "Replika belum dibuka")
+        else:
+            text = "Laporan dibaca dari database utama"
+        self.replica_status.config(text=text)
+        if reschedule:
+            self.root.after(30000, self.update_replica_status)
+
 
     def print_krs(self):
         """
@@ -1141,200 +1920,705 @@ class KRSApplication:
         # Placeholder untuk fungsi cetak - bisa diintegrasikan dengan printer sistem
         messagebox.showinfo("Cetak KRS", "Fungsi cetak akan diintegrasikan dengan printer sistem")
 
+    # Fungsi-fungsi untuk export data
+    def run_export(self):
+        """
+        Mengexport dataset yang dipilih ke file CSV/JSON Lines
+        - Query dibaca per potongan (fetchmany) di thread terpisah dengan koneksi sendiri
+        - Progres dan hasil dikirim lewat antrian ke event loop Tk
+        """
+        if self.export_thread is not None and self.export_thread.is_alive():
+            messagebox.showwarning("Export", "Export sebelumnya masih berjalan")
+            return
+
+        label = self.export_dataset.get()
+        dataset = export.DATASET_LABELS[label]
+        extension = ".csv.gz" if self.export_gzip.get() else ".csv"
+        path = filedialog.asksaveasfilename(
+            title="Simpan Export", defaultextension=extension,
+            initialfile=f"{dataset}{extension}",
+            filetypes=[("CSV", "*.csv"), ("JSON Lines", "*.jsonl"),
+                       ("CSV gzip", "*.csv.gz"), ("JSON Lines gzip", "*.jsonl.gz")])
+        if not path:
+            return
+        if self.export_gzip.get() and not path.endswith('.gz'):
+            path += '.gz'
+
+        filters = {
+            'kode_mk': None if self.export_kode.get() == "Semua" else self.export_kode.get(),
+            'dosen': None if self.export_dosen.get() == "Semua" else self.export_dosen.get(),
+            'semester': None if self.export_semester.get() == "Semua" else int(self.export_semester.get()),
+        }
+
+        self.export_status.config(text=f"Mengexport {label}...")
+        self.export_thread = threading.Thread(target=self.export_worker,
+                                              args=(dataset, path, filters, self.report_use_replica.get()),
+                                              daemon=True)
+        self.export_thread.start()
+        self.root.after(200, self.check_export_result)
+
+    def export_worker(self, dataset, path, filters, use_replica=False):
+        """Dijalankan di thread export; progres dan hasil dikirim lewat antrian"""
+        try:
+            if use_replica:
+                conn = replica.open_replica(self.replica_reader.replica_path)
+            else:
+                conn = database.connect(self.db_path)
+        except (replica.ReplicaError, sqlite3.Error) as e:
+            self.export_queue.put(('error', f"Export gagal: {str(e)}"))
+            return
+        try:
+            info = export.export_dataset(conn, dataset, path,
+                                         progress=lambda rows: self.export_queue.put(('progress', rows)),
+                                         **filters)
+            self.export_queue.put(('done', export.format_export(info)))
+        except Exception as e:
+            self.export_queue.put(('error', f"Export gagal: {str(e)}"))
+        finally:
+            conn.close()
+
+    def check_export_result(self):
+        """Memeriksa progres dan hasil thread export dari event loop Tk"""
+        finished = False
+        try:
+            while True:
+                kind, value = self.export_queue.get_nowait()
+                if kind == 'progress':
+                    self.export_status.config(text=f"Mengexport... {value} baris")
+                else:
+                    self.export_status.config(text=value)
+                    finished = True
+                    if kind == 'error':
+                        messagebox.showerror("Error", value)
+        except queue.Empty:
+            pass
+        if not finished:
+            self.root.after(200, self.check_export_result)
+
+    def run_audit(self):
+        """
+        Menjalankan audit kepatuhan KRS seluruh mahasiswa di thread terpisah
+        - Pemeriksaan dibagi ke process pool (lihat modul audit)
+        - Hasil ditampilkan di area laporan; daftar lengkap bisa disimpan ke CSV
+        """
+        if self.audit_thread and self.audit_thread.is_alive():
+            messagebox.showinfo("Audit", "Audit masih berjalan")
+            return
+        self.conn.commit()
+        self.report_text.delete(1.0, tk.END)
+        self.report_text.insert(1.0, "Audit kepatuhan KRS sedang berjalan...\n")
+        self.audit_thread = threading.Thread(target=self.audit_worker, daemon=True)
+        self.audit_thread.start()
+        self.root.after(200, self.check_audit_result)
+
+    def audit_worker(self):
+        """Dijalankan di thread audit; hasil dikirim lewat antrian"""
+        try:
+            self.audit_queue.put(('done', audit.run_audit(self.db_path)))
+        except Exception as e:
+            self.audit_queue.put(('error', f"Audit gagal: {str(e)}"))
+
+    def check_audit_result(self):
+        """Menampilkan hasil audit dari event loop Tk"""
+        try:
+            kind, value = self.audit_queue.get_nowait()
+        except queue.Empty:
+            self.root.after(200, self.check_audit_result)
+            return
+        if kind == 'error':
+            self.report_text.delete(1.0, tk.END)
+            messagebox.showerror("Error", value)
+            return
+        self.report_text.delete(1.0, tk.END)
+        self.report_text.insert(1.0, audit.format_result(value, limit=500))
+        if (value['exceptions'] or value['courses']) and \
+                messagebox.askyesno("Audit KRS", "Simpan daftar lengkap pengecualian ke CSV?"):
+            path = filedialog.asksaveasfilename(defaultextension=".csv", initialfile="audit_krs.csv",
+                                                filetypes=[("CSV", "*.csv")])
+            if path:
+                try:
+                    audit.write_csv(value, path)
+                except OSError as e:
+                    messagebox.showerror("Error", f"Gagal menyimpan CSV: {str(e)}")
+
+    # Fungsi-fungsi untuk alokasi batch
+    def add_preference(self):
+        """
+        Menambahkan mata kuliah yang dipilih ke daftar preferensi mahasiswa
+        - Mata kuliah ditambahkan di peringkat paling bawah
+        - Hanya bisa dilakukan saat jendela preferensi dibuka
+        """
+        student = self.combo_student(self.student_combo)
+        if student is None:
+            messagebox.showwarning("Pilih Mahasiswa", "Pilih mahasiswa terlebih dahulu")
+            return
+
+        selected = self.available_tree.selection()
+        if not selected:
+            messagebox.showwarning("Pilih Mata Kuliah", "Pilih mata kuliah yang akan dijadikan preferensi")
+            return
+
+        course = self.courses.from_iid(selected[0])
+        if course is None:
+            messagebox.showerror("Error", "Data mata kuliah tidak ditemukan")
+            return
+
+        preferences = allocation.get_preferences(self.cursor, student.id)
+        if course.id in preferences:
+            messagebox.showwarning("Sudah Ada", f"{course.kode_mk} sudah ada di daftar preferensi")
+            return
+
+        try:
+            allocation.submit_preferences(self.conn, student.id, preferences + [course.id])
+            messagebox.showinfo("Sukses", f"{course.kode_mk} ditambahkan sebagai preferensi ke-{len(preferences) + 1}")
+            self.refresh_allocation_results()
+        except allocation.AllocationError as e:
+            messagebox.showwarning("Preferensi", str(e))
+        except Exception as e:
+            messagebox.showerror("Error", f"Gagal menyimpan preferensi: {str(e)}")
+
+    def run_batch_allocation(self, dry_run=False):
+        """
+        Menjalankan alokasi kursi batch untuk semua preferensi
+        - dry_run=True hanya menampilkan simulasi tanpa menyimpan
+        - Hasil disimpan sekaligus dalam satu transaksi
+        """
+        if not dry_run:
+            result = messagebox.askyesno("Konfirmasi",
+                "Jalankan alokasi batch dan daftarkan semua mahasiswa sesuai hasilnya?")
+            if not result:
+                return
+
+        try:
+            summary = allocation.run_allocation(self.conn, dry_run=dry_run)
+        except Exception as e:
+            messagebox.showerror("Error", f"Gagal menjalankan alokasi: {str(e)}")
+            return
+
+        self.allocation_summary.config(text=allocation.format_summary(summary))
+        if not dry_run:
+            self.refresh_allocation_results()
+            self.refresh_krs_data()
+            self.refresh_courses()
+
+    def refresh_allocation_results(self, event=None):
+        """
+        Menampilkan preferensi mahasiswa yang dipilih beserta hasil alokasinya
+        - Preferensi yang belum dialokasikan ditampilkan dengan status 'menunggu'
+        """
+        start, end = allocation.preference_window(self.cursor)
+        state = "dibuka" if allocation.is_window_open(self.cursor) else "ditutup"
+        self.allocation_window_label.config(
+            text=f"Jendela preferensi: {start or 'tanpa batas'} s/d {end or 'tanpa batas'} ({state})")
+
+        for item in self.allocation_tree.get_children():
+            self.allocation_tree.delete(item)
+
+        student = self.combo_student(self.allocation_student_combo)
+        if student is None:
+            return
+
+        self.cursor.execute("""
+            SELECT p.peringkat, c.kode_mk, c.nama_mk, c.sks, c.jadwal,
+                   COALESCE(r.status, 'menunggu'), COALESCE(r.alasan, '')
+            FROM course_preferences p
+            JOIN courses c ON c.id = p.course_id
+            LEFT JOIN allocation_results r
+                   ON r.student_id = p.student_id AND r.course_id = p.course_id
+            WHERE p.student_id = ?
+            ORDER BY p.peringkat
+        """, (student.id,))
+
+        for row in self.cursor.fetchall():
+            tag = {allocation.STATUS_DITERIMA: 'accepted',
+                   allocation.STATUS_DITOLAK: 'rejected'}.get(row[5], '')
+            self.allocation_tree.insert("", "end", values=row, tags=(tag,))
+
+    # Fungsi-fungsi untuk dashboard analitik
+    def sync_tree_rows(self, tree, rows):
+        """
+        Memperbarui isi Treeview tanpa menghapus seluruh baris
+        - rows: daftar (iid, values, tags) sesuai urutan tampilan
+        - Baris yang sudah ada hanya diubah nilainya sehingga tampilan tidak berkedip
+        """
+        wanted = set()
+        for index, (iid, values, tags) in enumerate(rows):
+            wanted.add(iid)
+            if tree.exists(iid):
+                tree.item(iid, values=values, tags=tags)
+                tree.move(iid, "", index)
+            else:
+                tree.insert("", index, iid=iid, values=values, tags=tags)
+        stale = [iid for iid in tree.get_children() if iid not in wanted]
+        if stale:
+            tree.delete(*stale)
+
+    def refresh_analytics(self):
+        """
+        Memuat ulang dashboard analitik dari tabel ringkasan
+        - Tidak ada GROUP BY atas tabel enrollments; cukup membaca ringkasan
+        """
+        started = datetime.now()
+
+        rows = []
+        for semester, jumlah_mk, kapasitas, terisi, persen in analytics.semester_fill(self.cursor):
+            rows.append((f"sem{semester}", (semester, jumlah_mk, kapasitas, terisi, f"{persen:.1f}%"), ()))
+        self.sync_tree_rows(self.semester_fill_tree, rows)
+
+        distribution = analytics.sks_distribution(self.cursor)
+        largest = max((jumlah for _, jumlah in distribution), default=0)
+        rows = []
+        for total_sks, jumlah in distribution:
+            bar = "█" * max(1, round(jumlah * 30 / largest)) if largest else ""
+            rows.append((f"sks{total_sks}", (total_sks, jumlah, bar), ()))
+        self.sync_tree_rows(self.sks_distribution_tree, rows)
+
+        rows = []
+        for course_id, kode_mk, nama_mk, semester, kapasitas, terisi, fill in analytics.course_fill(self.cursor):
+            tags = ('full',) if terisi >= kapasitas else ()
+            persen = f"{fill * 100:.1f}%" if fill is not None else "-"
+            rows.append((f"mk{course_id}", (kode_mk, nama_mk, semester, kapasitas, terisi, persen), tags))
+        self.sync_tree_rows(self.course_fill_tree, rows)
+
+        oversubscribed = analytics.oversubscribed_count(self.cursor)
+        self.course_fill_title.config(
+            text=f"🔥 Keterisian per Mata Kuliah ({oversubscribed} mata kuliah melebihi kapasitas)")
+
+        elapsed_ms = (datetime.now() - started).total_seconds() * 1000
+        self.analytics_status.config(
+            text=f"Diperbarui {datetime.now().strftime('%H:%M:%S')} ({elapsed_ms:.1f} ms)")
+
+    def on_tab_changed(self, event):
+        """Menangani perpindahan tab; dashboard analitik dimuat saat dibuka"""
+        if self.notebook.select() == str(self.analytics_frame):
+            self.refresh_analytics()
+
+    def auto_refresh_analytics(self):
+        """Refresh dashboard berkala, hanya saat tab analitik sedang dibuka"""
+        try:
+            if self.notebook.select() == str(self.analytics_frame):
+                self.refresh_analytics()
+        except sqlite3.Error as e:
+            self.analytics_status.config(text=f"Gagal memuat analitik: {str(e)}")
+        self.root.after(analytics.ANALYTICS_REFRESH_MS, self.auto_refresh_analytics)
+
+    # Fungsi-fungsi untuk pemeliharaan database
+    def log_maintenance(self, text):
+        """Menambahkan teks ke log pemeliharaan dan menggulir ke bawah"""
+        self.maintenance_log.insert(tk.END, text + "\n")
+        self.maintenance_log.see(tk.END)
+
+    def show_storage_stats(self):
+        """Menampilkan statistik ukuran file dan fragmentasi halaman"""
+        stats = maintenance.storage_stats(self.conn)
+        self.log_maintenance(maintenance.format_stats(stats, "Statistik penyimpanan:"))
+
+    def archive_old_data(self):
+        """
+        Mengarsipkan KRS semester yang sudah ditutup dan mahasiswa yang dihapus
+        - Data dipindahkan ke file arsip terkompresi
+        - Dilanjutkan dengan vacuum bertahap untuk mengecilkan file
+        """
+        result = messagebox.askyesno("Konfirmasi",
+            f"Pindahkan data lama ke arsip {maintenance.ARCHIVE_PATH}?")
+        if not result:
+            return
+
+        try:
+            before = maintenance.storage_stats(self.conn)
+            counts = maintenance.archive_data(self.conn)
+            self.log_maintenance(f"Diarsipkan ke {maintenance.ARCHIVE_PATH}: " +
+                                 ", ".join(f"{table}={count}" for table, count in counts.items()))
+            self.start_idle_vacuum(before)
+        except Exception as e:
+            messagebox.showerror("Error", f"Gagal mengarsipkan data: {str(e)}")
+
+    def start_idle_vacuum(self, before=None):
+        """
+        Memulai incremental vacuum bertahap
+        - Setiap langkah hanya mengembalikan sedikit halaman
+        - Langkah berikutnya dijadwalkan saat event loop Tk sedang idle
+        - Database lama baru dikonversi ke INCREMENTAL setelah dikonfirmasi pengguna
+        """
+        if self.vacuum_before is not None:
+            return  # Vacuum sedang berjalan
+
+        # Database lama perlu VACUUM penuh sekali (kunci eksklusif) sebelum bisa menyusut bertahap
+        if self.conn.execute("PRAGMA auto_vacuum").fetchone()[0] != maintenance.AUTO_VACUUM_INCREMENTAL:
+            if not messagebox.askyesno(
+                    "Konversi Vacuum",
+                    "Database belum memakai auto_vacuum=INCREMENTAL.\n"
+                    "Konversi menjalankan VACUUM penuh dan mengunci database sampai selesai. Lanjutkan?"):
+                return
+            if maintenance.ensure_incremental_vacuum(self.conn):
+                self.log_maintenance("Mode auto_vacuum diubah ke INCREMENTAL (VACUUM penuh satu kali)")
+
+        self.vacuum_before = before or maintenance.storage_stats(self.conn)
+        self.vacuum_steps = 0
+        self.root.after_idle(self.idle_vacuum_step)
+
+    def idle_vacuum_step(self):
+        """Menjalankan satu langkah vacuum lalu menjadwalkan langkah berikutnya"""
+        try:
+            remaining = maintenance.incremental_vacuum_step(self.conn)
+        except sqlite3.Error as e:
+            self.vacuum_before = None
+            messagebox.showerror("Error", f"Gagal menjalankan vacuum: {str(e)}")
+            return
+
+        self.vacuum_steps += 1
+        if remaining:
+            # Memberi jeda agar interaksi pengguna tetap diproses lebih dulu
+            self.root.after(100, lambda: self.root.after_idle(self.idle_vacuum_step))
+            return
+
+        # Vacuum selesai: tampilkan statistik sebelum dan sesudah
+        after = maintenance.storage_stats(self.conn)
+        self.log_maintenance(maintenance.format_stats(self.vacuum_before, "Sebelum vacuum:"))
+        self.log_maintenance(f"Incremental vacuum selesai dalam {self.vacuum_steps} langkah")
+        self.log_maintenance(maintenance.format_stats(after, "Sesudah vacuum:"))
+        self.vacuum_before = None
+
+    def schedule_backup(self):
+        """
+        Menjadwalkan snapshot backup berikutnya
+        - Interval diambil dari konfigurasi backup_interval_minutes
+        - Interval 0 menonaktifkan backup otomatis
+        """
+        try:
+            interval = float(self.get_config_value('backup_interval_minutes', '60'))
+        except ValueError:
+            interval = 0
+        if interval > 0:
+            self.root.after(int(interval * 60 * 1000), self.scheduled_backup)
+
+    def scheduled_backup(self):
+        """Menjalankan backup terjadwal lalu menjadwalkan backup berikutnya"""
+        self.run_backup()
+        self.schedule_backup()
+
+    def run_backup(self):
+        """
+        Membuat snapshot backup online di thread terpisah
+        - Backup disalin bertahap per halaman dengan jeda (lihat modul backup)
+        - Pengisian KRS tetap berjalan selama backup berlangsung
+        """
+        if self.backup_thread is not None and self.backup_thread.is_alive():
+            self.log_maintenance("Backup sebelumnya masih berjalan")
+            return
+
+        try:
+            retention = int(self.get_config_value('backup_retention', '10'))
+        except ValueError:
+            retention = backup.BACKUP_RETENTION
+
+        self.log_maintenance("Memulai backup online...")
+        self.backup_thread = threading.Thread(target=self.backup_worker, args=(retention,), daemon=True)
+        self.backup_thread.start()
+        self.root.after(200, self.check_backup_result)
+
+    def backup_worker(self, retention):
+        """Dijalankan di thread backup; hasilnya dikirim lewat antrian"""
+        try:
+            info = backup.create_snapshot(self.db_path, backup.BACKUP_DIR, retention)
+            self.backup_queue.put(backup.format_snapshot(info))
+        except Exception as e:
+            self.backup_queue.put(f"Backup gagal: {str(e)}")
+
+    def check_backup_result(self):
+        """Memeriksa hasil thread backup dari event loop Tk"""
+        try:
+            message = self.backup_queue.get_nowait()
+        except queue.Empty:
+            self.root.after(200, self.check_backup_result)
+            return
+        self.log_maintenance(message)
+
+    def schedule_replica(self):
+        """
+        Menjadwalkan penerbitan replika baca berikutnya
+        - Interval diambil dari konfigurasi replika_interval_minutes (0 = nonaktif)
+        - Replika yang masih segar (diterbitkan node lain) tidak diterbitkan ulang
+        """
+        try:
+            interval = float(self.get_config_value('replica_interval_minutes', '0'))
+        except ValueError:
+            interval = 0
+        if interval > 0:
+            self.root.after(int(interval * 60 * 1000), lambda: self.publish_replica(interval))
+
+    def publish_replica(self, interval):
+        """Menerbitkan replika di thread terpisah lalu menjadwalkan penerbitan berikutnya"""
+        if self.replica_thread is None or not self.replica_thread.is_alive():
+            self.replica_thread = threading.Thread(target=self.replica_worker, args=(interval * 60 * 0.9,),
+                                                   daemon=True)
+            self.replica_thread.start()
+            self.root.after(200, self.check_replica_result)
+        self.schedule_replica()
+
+    def replica_worker(self, max_age):
+        """Dijalankan di thread replika; hasilnya dikirim lewat antrian"""
+        try:
+            info = replica.publish_if_stale(self.db_path, self.replica_reader.replica_path, max_age)
+            self.replica_queue.put(replica.format_publish(info) if info else None)
+        except Exception as e:
+            self.replica_queue.put(f"Penerbitan replika gagal: {str(e)}")
+
+    def check_replica_result(self):
+        """Memeriksa hasil thread replika dari event loop Tk"""
+        try:
+            message = self.replica_queue.get_nowait()
+        except queue.Empty:
+            self.root.after(200, self.check_replica_result)
+            return
+        if message:
+            self.log_maintenance(message)
+
+    def update_admission_status(self):
+        """Menampilkan kedalaman antrian dan laju penerimaan registrasi (diperbarui berkala)"""
+        windows = self.get_config_value('registration_windows', '') or 'semua angkatan dibuka'
+        self.admission_status.config(
+            text=f"{admission.format_stats(self.admission.stats())} | Jendela registrasi: {windows}")
+        self.root.after(2000, self.update_admission_status)
+
+    def restore_backup(self):
+        """
+        Memulihkan database dari snapshot yang dipilih
+        - Snapshot diverifikasi dengan integrity_check sebelum dipulihkan
+        - Semua tampilan dimuat ulang setelah restore
+        """
+        snapshot_path = filedialog.askopenfilename(title="Pilih Snapshot Backup",
+                                                   initialdir=backup.BACKUP_DIR,
+                                                   filetypes=[("Snapshot KRS", "*.db")])
+        if not snapshot_path:
+            return
+
+        result = messagebox.askyesno("Konfirmasi",
+            f"Pulihkan database dari {snapshot_path}?\nSemua perubahan setelah snapshot akan hilang.")
+        if not result:
+            return
+
+        try:
+            backup.restore_snapshot(snapshot_path, self.conn)
+            self.log_maintenance(f"Database dipulihkan dari {snapshot_path}")
+            messagebox.showinfo("Sukses", "Database berhasil dipulihkan")
+            self.refresh_all_data()
+        except Exception as e:
+            messagebox.showerror("Error", f"Gagal memulihkan database: {str(e)}")
+
+    def log_rollover_step(self, number, total, message, rows):
+        """Menulis satu langkah rollover ke log dan langsung menggambar ulang tampilan"""
+        self.log_maintenance(rollover.format_progress(number, total, message, rows))
+        self.root.update_idletasks()
+
+    def run_rollover(self):
+        """
+        Menjalankan pergantian semester untuk semua mahasiswa
+        - Dampaknya (pratinjau) ditampilkan dulu untuk dikonfirmasi
+        - Kemajuan per langkah ditulis ke log pemeliharaan
+        """
+        summary = rollover.preview(self.cursor)
+        result = messagebox.askyesno("Konfirmasi Pergantian Semester",
+            rollover.format_preview(summary) + "\n\nLanjutkan pergantian semester?")
+        if not result:
+            return
+
+        try:
+            result = rollover.rollover(self.conn, self.log_rollover_step)
+            self.log_maintenance(f"Rollover #{result['run_id']} selesai dalam {result['elapsed']:.2f} detik "
+                                 f"({result['to_term']} {result['to_year']})")
+            self.refresh_all_data()
+        except Exception as e:
+            messagebox.showerror("Error", f"Gagal menjalankan pergantian semester: {str(e)}")
+
+    def rollback_rollover(self):
+        """Membatalkan pergantian semester terakhir yang masih berlaku"""
+        run = rollover.last_run(self.cursor)
+        if run is None:
+            messagebox.showinfo("Info", "Belum ada pergantian semester yang bisa dibatalkan")
+            return
+        run_id, started_at, from_year, from_term, to_year, to_term = run[:6]
+        result = messagebox.askyesno("Konfirmasi",
+            f"Batalkan rollover #{run_id} ({started_at})?\n"
+            f"{to_term} {to_year} akan dikembalikan ke {from_term} {from_year}.")
+        if not result:
+            return
+
+        try:
+            result = rollover.rollback(self.conn, self.log_rollover_step)
+            self.log_maintenance(f"Rollover #{result['run_id']} dibatalkan: {result['reopened']} enrollment "
+                                 f"dibuka kembali ({result['elapsed']:.2f} detik)")
+            self.refresh_all_data()
+        except Exception as e:
+            messagebox.showerror("Error", f"Gagal membatalkan rollover: {str(e)}")
+
     # Fungsi-fungsi untuk refresh data
     def refresh_students(self):
         """
         Merefresh data mahasiswa di tabel dan combobox
-        - Menghapus data lama dari tabel
-        - Mengambil data terbaru dari database
-        - Mengisi tabel dengan data terbaru
+        - Mengambil data terbaru dari database ke identity map
+        - Mengisi tabel dengan data terbaru (iid = ID mahasiswa)
+        - Urutan dan filter yang sedang aktif diterapkan kembali di memori
         - Memperbarui combobox di tab lain
         """
 
-        # Menghapus semua item dari tabel mahasiswa
-        for item in self.student_tree.get_children():
-            self.student_tree.delete(item)
-
-        # Mengambil data mahasiswa dari database
-        self.cursor.execute("""
-            SELECT id, nim, nama, semester, max_credits, 
-                   COALESCE(created_at, 'N/A') as created_at
-            FROM students ORDER BY nim
-        """)
-
-        # Mengisi tabel dengan data mahasiswa
-        for i, row in enumerate(self.cursor.fetchall()):
-            # Menentukan tag untuk warna baris bergantian
-            tag = 'evenrow' if i % 2 == 0 else 'oddrow'
+        # Mengambil data mahasiswa dari database sebagai record
+        students = self.students.load(models.fetch_students(self.conn), replace=True)
 
+        # Menyusun baris tabel mahasiswa
+        rows = []
+        for student in students:
             # Memformat tanggal created_at untuk tampilan yang lebih baik
-            row_data = list(row)
-            if row_data[5] != 'N/A':
+            created_at = student.created_at
+            if created_at != 'N/A':
                 try:
-                    date_obj = datetime.fromisoformat(row_data[5].replace('Z', '+00:00'))
-                    row_data[5] = date_obj.strftime('%d/%m/%Y')
+                    date_obj = datetime.fromisoformat(created_at.replace('Z', '+00:00'))
+                    created_at = date_obj.strftime('%d/%m/%Y')
                 except:
-                    row_data[5] = 'N/A'
+                    created_at = 'N/A'
+
+            rows.append((str(student.id), (student.id, student.nim, student.nama, student.semester,
+                                           student.max_credits, created_at), ()))
 
-            # Menambahkan baris ke tabel
-            self.student_tree.insert("", "end", values=row_data, tags=(tag,))
+        # Mengisi tabel (warna baris bergantian diatur oleh student_view)
+        self.student_view.load(rows)
+        self.filter_students()
 
         # Memperbarui combobox mahasiswa di tab KRS dan laporan
-        self.cursor.execute("SELECT nim, nama FROM students ORDER BY nim")
-        students = [f"{nim} - {nama}" for nim, nama in self.cursor.fetchall()]
+        self.student_labels = {student.label: student.id for student in students}
+        labels = [student.label for student in students]
+
+        self.student_combo['values'] = labels
+        self.report_student_combo['values'] = labels
+        self.allocation_student_combo['values'] = labels
+
 
-        self.student_combo['values'] = students
-        self.report_student_combo['values'] = students
 
     def refresh_courses(self):
         """
         Merefresh data mata kuliah di tabel
-        - Menghapus data lama dari tabel
-        - Menerapkan filter semester jika ada
-        - Mengambil data mata kuliah dari database
-        - Mengisi tabel dengan data terbaru
+        - Mengambil seluruh mata kuliah dari database (iid = ID mata kuliah)
+        - Filter semester, dosen, SKS, hari, dan sisa diterapkan di memori
         - Menandai mata kuliah yang penuh dengan warna berbeda
         """
 
-        # Menghapus semua item dari tabel mata kuliah
-        for item in self.course_tree.get_children():
-            self.course_tree.delete(item)
+        # Mengambil data mata kuliah dari database sebagai record
+        courses = self.courses.load(models.fetch_courses(self.conn))
 
-        # Membuat query berdasarkan filter semester
-        filter_semester = self.filter_semester.get()
+        # Menyusun baris tabel; mata kuliah penuh diberi tag khusus (warna merah)
+        rows = [(str(course.id),
+                 (course.kode_mk, course.nama_mk, course.sks, course.semester, course.jadwal,
+                  course.dosen, course.kapasitas, course.terisi, course.sisa),
+                 ('full',) if course.is_full else ())
+                for course in courses]
+        self.course_view.load(rows)
 
-        if filter_semester == "Semua" or filter_semester == "":
-            # Query untuk menampilkan semua mata kuliah
-            query = """
-                SELECT kode_mk, nama_mk, sks, semester, jadwal, dosen, kapasitas, terisi,
-                       (kapasitas - terisi) as sisa
-                FROM courses ORDER BY semester, kode_mk
-            """
-            params = ()
-        else:
-            # Query untuk menampilkan mata kuliah berdasarkan semester tertentu
-            query = """
-                SELECT kode_mk, nama_mk, sks, semester, jadwal, dosen, kapasitas, terisi,
-                       (kapasitas - terisi) as sisa
-                FROM courses WHERE semester = ? ORDER BY semester, kode_mk
-            """
-            params = (int(filter_semester),)
-
-        # Mengeksekusi query dan mengisi tabel
-        self.cursor.execute(query, params)
-        courses = self.cursor.fetchall()
+        # Memperbarui pilihan filter sesuai data terbaru
+        self.filter_dosen['values'] = ["Semua"] + sorted({course.dosen for course in courses if course.dosen})
+        self.filter_sks['values'] = ["Semua"] + sorted({course.sks for course in courses})
+        self.export_kode['values'] = ["Semua"] + sorted(course.kode_mk for course in courses)
+        self.export_dosen['values'] = self.filter_dosen['values']
 
-        # Debug: Print jumlah mata kuliah yang ditemukan
-        print(f"Filter: {filter_semester}, Mata kuliah ditemukan: {len(courses)}")
+        visible = self.filter_courses()
 
-        for i, row in enumerate(courses):
-            # Menentukan tag untuk warna baris bergantian
-            tag = 'evenrow' if i % 2 == 0 else 'oddrow'
+        # Debug: Print jumlah mata kuliah yang ditemukan
+        print(f"Filter: {self.filter_semester.get()}, Mata kuliah ditemukan: {visible}")
 
-            # Mengecek apakah mata kuliah penuh (warna merah)
-            if row[7] >= row[6]:  # terisi >= kapasitas
-                tag = 'full'
 
-            # Menambahkan baris ke tabel
-            self.course_tree.insert("", "end", values=row, tags=(tag,))
 
     def refresh_krs_data(self):
         """
         Merefresh data KRS untuk mahasiswa yang dipilih
-        - Mengambil data mahasiswa yang dipilih
-        - Menampilkan mata kuliah tersedia (belum diambil dan tidak penuh)
+        - Mengambil record mahasiswa yang dipilih
+        - Menampilkan mata kuliah tersedia (belum diambil dan prasyarat terpenuhi)
         - Menampilkan mata kuliah yang sudah diambil
         - Menghitung dan menampilkan total SKS
         """
 
         # Mengecek apakah ada mahasiswa yang dipilih
-        if not self.student_combo.get():
+        student = self.combo_student(self.student_combo)
+        if student is None:
             return
 
-        # Mengambil NIM mahasiswa dari combobox
-        student_data = self.student_combo.get().split(" - ")
-        student_nim = student_data[0]
+        # Mengambil mata kuliah yang tersedia (belum diambil, sesuai semester
+        # ganjil/genap, dan prasyarat terpenuhi)
+        available = self.courses.load(models.fetch_available_courses(self.conn, student))
+        self.available_view.load((str(course.id), (
+            course.kode_mk, course.nama_mk, course.sks, course.jadwal, course.dosen, course.sisa), ())
+            for course in available)
 
-        # Mengambil informasi mahasiswa dari database
-        self.cursor.execute("SELECT id, max_credits FROM students WHERE nim=?", (student_nim,))
-        student_info = self.cursor.fetchone()
-        if not student_info:
-            return
+        # Memperbarui judul dengan informasi filter semester
+        semester_type = "Ganjil" if student.semester % 2 == 1 else "Genap"
+        semester_list = "1,3,5,7" if student.semester % 2 == 1 else "2,4,6,8"
+        self.available_title.config(text=f"📚 Mata Kuliah Tersedia (Semester {semester_type}: {semester_list})")
 
-        student_id, max_credits = student_info
+        # Mengisi tabel mata kuliah yang sudah diambil dan menghitung total SKS
+        # Kursi yang ditahan di keranjang ikut ditampilkan dengan waktu kedaluwarsanya
+        enrolled = self.courses.load(models.fetch_enrolled_courses(self.conn, student.id))
+        held = self.courses.load(models.fetch_held_courses(self.conn, student.id))
+        expires = {course_id: expires_at for course_id, _, _, expires_at in holds.holds_for(self.cursor, student.id)}
+        self.held_iids = {str(course.id) for course in held}
+        # Mata kuliah berkelas paralel ditampilkan dengan kelas, jadwal, dan dosen kelasnya
+        student_sections = sections.student_sections(self.cursor, student.id)
+        rows = [(str(course.id), (
+            f"{course.kode_mk}-{student_sections[course.id][0]}", course.nama_mk, course.sks,
+            *student_sections[course.id][1:], '-') if course.id in student_sections else (
+            course.kode_mk, course.nama_mk, course.sks, course.jadwal, course.dosen, '-'), ())
+            for course in enrolled]
+        rows += [(str(course.id), (
+            course.kode_mk, course.nama_mk, course.sks, course.jadwal, course.dosen,
+            f"⏳ {expires.get(course.id, '')[11:16]}"), ('held',))
+            for course in held]
+        self.enrolled_view.load(rows)
+        total_sks = sum(course.sks for course in enrolled)
+        held_sks = sum(course.sks for course in held)
 
-        # Menghapus data lama dari kedua tabel
-        for item in self.available_tree.get_children():
-            self.available_tree.delete(item)
-        for item in self.enrolled_tree.get_children():
-            self.enrolled_tree.delete(item)
+        # Memperbarui informasi total SKS dengan warna yang sesuai
+        color = '#27ae60' if total_sks + held_sks <= student.max_credits else '#e74c3c'  # Hijau jika OK, merah jika over
+        _, ipk = grades.cumulative(self.cursor, student.id)
+        self.credits_info.config(text=f"Total SKS: {total_sks}" +
+                                      (f" (+{held_sks} ditahan)" if held_sks else "") +
+                                      f" / {student.max_credits}" +
+                                      (f"  (IPK {ipk:.2f})" if ipk is not None else ""), fg=color)
 
-        # Mengambil ID mata kuliah yang sudah diambil mahasiswa
-        self.cursor.execute("""
-            SELECT course_id FROM enrollments 
-            WHERE student_id=? AND status='aktif'
-        """, (student_id,))
-        enrolled_course_ids = [row[0] for row in self.cursor.fetchall()]
-
-        # Mengambil semester mahasiswa untuk filter mata kuliah
-        self.cursor.execute("SELECT semester FROM students WHERE id=?", (student_id,))
-        student_semester = self.cursor.fetchone()[0]
-
-        # Menentukan filter semester berdasarkan ganjil/genap
-        if student_semester % 2 == 1:  # Semester ganjil (1, 3, 5, 7)
-            # Tampilkan mata kuliah semester ganjil
-            semester_condition = "semester IN (1, 3, 5, 7)"
-        else:  # Semester genap (2, 4, 6, 8)
-            # Tampilkan mata kuliah semester genap
-            semester_condition = "semester IN (2, 4, 6, 8)"
-
-        # Mengambil mata kuliah yang tersedia (belum diambil dan sesuai semester)
-        # Tampilkan semua mata kuliah yang sesuai dengan semester ganjil/genap
-        if enrolled_course_ids:
-            # Jika ada mata kuliah yang sudah diambil, exclude dari daftar tersedia
-            placeholders = ','.join(['?'] * len(enrolled_course_ids))
-            self.cursor.execute(f"""
-                SELECT kode_mk, nama_mk, sks, jadwal, dosen, (kapasitas - terisi) as sisa
-                FROM courses 
-                WHERE id NOT IN ({placeholders}) AND {semester_condition}
-                ORDER BY semester, kode_mk
-            """, enrolled_course_ids)
-        else:
-            # Jika belum ada mata kuliah yang diambil, tampilkan semua yang sesuai semester
-            self.cursor.execute(f"""
-                SELECT kode_mk, nama_mk, sks, jadwal, dosen, (kapasitas - terisi) as sisa
-                FROM courses 
-                WHERE {semester_condition}
-                ORDER BY semester, kode_mk
-            """)
-
-        # Mengisi tabel mata kuliah tersedia
-        for course in self.cursor.fetchall():
-            self.available_tree.insert("", "end", values=course)
 
-        # Memperbarui judul dengan informasi filter semester
-        semester_type = "Ganjil" if student_semester % 2 == 1 else "Genap"
-        semester_list = "1,3,5,7" if student_semester % 2 == 1 else "2,4,6,8"
-        self.available_title.config(text=f"📚 Mata Kuliah Tersedia (Semester {semester_type}: {semester_list})")
+    def poll_changes(self):
+        """
+        Memeriksa perubahan dari klien lain secara berkala
+        - Tanpa commit dari koneksi lain, pemeriksaan hanya berupa PRAGMA data_version
+        """
+        try:
+            changed = self.change_watcher.poll()
+        except sqlite3.Error:
+            changed = {}
+        if changed:
+            self.refresh_changed(changed)
+        self.root.after(changes.CHANGE_POLL_MS, self.poll_changes)
+
+    def refresh_changed(self, changed):
+        """
+        Merefresh hanya tampilan yang terdampak perubahan
+        - changed: {entitas: set(ID)} dari ChangeWatcher
+        - Tabel KRS ikut direfresh saat kapasitas mata kuliah berubah
+        """
+        students_changed = changed.get(changes.ENTITY_STUDENTS, set())
+        enrollments_changed = changed.get(changes.ENTITY_ENROLLMENTS, set())
 
-        # Mengambil mata kuliah yang sudah diambil mahasiswa
-        self.cursor.execute("""
-            SELECT c.kode_mk, c.nama_mk, c.sks, c.jadwal, c.dosen, '-' as sisa
-            FROM enrollments e
-            JOIN courses c ON e.course_id = c.id
-            WHERE e.student_id=? AND e.status='aktif'
-            ORDER BY c.kode_mk
-        """, (student_id,))
+        if students_changed:
+            self.refresh_students()
+        if changes.ENTITY_COURSES in changed:
+            self.refresh_courses()
 
-        # Mengisi tabel mata kuliah yang sudah diambil dan menghitung total SKS
-        total_sks = 0
-        for course in self.cursor.fetchall():
-            self.enrolled_tree.insert("", "end", values=course)
-            total_sks += course[2]  # course[2] adalah jumlah SKS
+        krs_student = self.combo_student(self.student_combo)
+        if krs_student is not None and (changes.ENTITY_COURSES in changed
+                                        or krs_student.id in students_changed
+                                        or krs_student.id in enrollments_changed):
+            self.refresh_krs_data()
 
-        # Memperbarui informasi total SKS dengan warna yang sesuai
-        color = '#27ae60' if total_sks <= max_credits else '#e74c3c'  # Hijau jika OK, merah jika over
-        self.credits_info.config(text=f"Total SKS: {total_sks} / {max_credits}", fg=color)
+        report_student = self.combo_student(self.report_student_combo)
+        if report_student is not None and (report_student.id in students_changed
+                                           or report_student.id in enrollments_changed):
+            self.generate_report(None)
 
     def refresh_all_data(self):
         """
@@ -1347,6 +2631,41 @@ class KRSApplication:
         if hasattr(self, 'filter_semester'):
             self.filter_semester.set("Semua")
         self.refresh_courses()
+        self.refresh_allocation_results()
+
+    def schedule_persist(self):
+        """Menjadwalkan penyimpanan ulang database kerja setiap storage.persist_seconds (0 = nonaktif)"""
+        if self.storage.persist_seconds > 0 and self.storage.persist_path:
+            self.root.after(int(self.storage.persist_seconds * 1000), self.persist_storage)
+
+    def persist_storage(self):
+        """Menyalin database kerja ke file tujuan lewat API backup"""
+        try:
+            if self.storage.persist():
+                self.log_maintenance(f"Database kerja disimpan ke {self.storage.persist_path}")
+        except Exception as e:
+            self.log_maintenance(f"Penyimpanan database kerja gagal: {str(e)}")
+        self.schedule_persist()
+
+    def on_close(self):
+        """Menutup aplikasi: database kerja disimpan ulang lalu dibuang (mode memory/tmpfs)"""
+        try:
+            self.conn.commit()
+            self.storage.close()
+        except Exception as e:
+            messagebox.showerror("Error", f"Gagal menyimpan database kerja: {str(e)}")
+        self.root.destroy()
+
+    def tree_item_counts(self):
+        """Jumlah baris yang tampil di setiap Treeview utama (dipakai profiler aksi)"""
+        counts = {}
+        for name, widget in vars(self).items():
+            if isinstance(widget, ttk.Treeview):
+                try:
+                    counts[name] = len(widget.get_children())
+                except tk.TclError:
+                    pass  # Jendela sudah ditutup
+        return counts
 
     def __del__(self):
         """
@@ -1356,6 +2675,24 @@ class KRSApplication:
         if hasattr(self, 'conn'):
             self.conn.close()
 
+def install_profiler(profiler):
+    """
+    Membungkus semua callback Tk dengan profiler aksi
+    - Semua command tombol dan handler event (bind, protocol) didaftarkan lewat Misc._register
+    - Callback milik tkinter sendiri (after, scrollbar/yview) tidak dibungkus
+    """
+    register = tk.Misc._register
+
+    def profiled_register(self, func, subst=None, needcleanup=1):
+        internal = (getattr(func, '__module__', '') or '').startswith('tkinter') or \
+            isinstance(getattr(func, '__self__', None), tk.Misc)
+        if not internal:
+            func = profiler.wrap(func)
+        return register(self, func, subst, needcleanup)
+
+    tk.Misc._register = profiled_register
+
+
 def main():
     """
     Fungsi utama untuk menjalankan aplikasi
@@ -1363,10 +2700,37 @@ def main():
     - Menginisialisasi aplikasi KRS
     - Memulai event loop GUI
     """
+    parser = argparse.ArgumentParser(description="Sistem KRS (Kartu Rencana Studi)")
+    parser.add_argument('--database', help="Lokasi database: file, 'memory[:nama[=file]]', atau "
+                                           "'tmpfs:file' (default: variabel KRS_DATABASE atau krs_database.db)")
+    parser.add_argument('--persist-seconds', type=float,
+                        help="Interval penyimpanan ulang mode memory/tmpfs (default: KRS_PERSIST_SECONDS)")
+    parser.add_argument('--profile', metavar='DIR', default=os.environ.get(profiling.PROFILE_ENV),
+                        help="Profil setiap aksi (cProfile + tracemalloc) ke direktori ini "
+                             f"(default: variabel {profiling.PROFILE_ENV})")
+    args = parser.parse_args()
+
+    # Mode profiling: callback dibungkus sebelum widget pertama dibuat
+    profiler = None
+    if args.profile:
+        profiler = profiling.ActionProfiler(args.profile)
+        install_profiler(profiler)
+
     root = tk.Tk()           # Membuat jendela utama
-    app = KRSApplication(root)  # Menginisialisasi aplikasi KRS
+    storage = database.open_storage(args.database, args.persist_seconds)
+    if profiler:
+        app = profiler.measure('KRSApplication.__init__', KRSApplication, root, storage)
+        profiler.item_counter = app.tree_item_counts
+        app.profiler = profiler
+    else:
+        app = KRSApplication(root, storage)  # Menginisialisasi aplikasi KRS
     root.mainloop()          # Memulai event loop GUI
 
+    if profiler:
+        paths = profiler.close()
+        print(f"Profil aksi disimpan di {args.profile} ({len(paths)} file); "
+              f"ringkasan: python profiling.py {args.profile}")
+
 # Menjalankan aplikasi jika file ini dieksekusi langsung
 if __name__ == "__main__":
     main()
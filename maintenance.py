@@ -0,0 +1,396 @@
+"""
+Modul pemeliharaan database KRS
+- Mengarsipkan data semester yang sudah ditutup dan data mahasiswa yang dihapus
+  ke file database arsip terkompresi
+- Mengaktifkan auto_vacuum=INCREMENTAL dan mengembalikan halaman kosong
+  secara bertahap (sedikit demi sedikit saat aplikasi idle); database lama
+  hanya dikonversi lewat perintah eksplisit karena butuh VACUUM penuh
+- KRS yang ditutup hanya diarsipkan jika nilainya sudah diposting dan tidak
+  lagi bisa dibuka kembali oleh rollback
+- Melaporkan ukuran file dan statistik fragmentasi halaman
+"""
+import argparse
+import json
+import os
+import sqlite3
+import zlib
+from datetime import datetime
+
+# Lokasi default database utama dan database arsip
+DATABASE_PATH = 'krs_database.db'
+ARCHIVE_PATH = 'krs_archive.db'
+
+# Jumlah halaman yang dikembalikan setiap langkah incremental vacuum
+VACUUM_STEP_PAGES = 64
+
+# Nilai PRAGMA auto_vacuum: 0 = NONE, 1 = FULL, 2 = INCREMENTAL
+AUTO_VACUUM_INCREMENTAL = 2
+
+
+def init_schema(cursor):
+    """
+    Membuat tabel penampung data mahasiswa yang dihapus
+    - deleted_students: salinan baris mahasiswa sebelum dihapus
+    - deleted_enrollments: salinan KRS mahasiswa tersebut
+    - Isi kedua tabel dipindahkan ke file arsip oleh archive_data()
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS deleted_students (
+            id INTEGER PRIMARY KEY,                  -- ID mahasiswa asal
+            nim TEXT NOT NULL,                       -- NIM mahasiswa
+            nama TEXT NOT NULL,                      -- Nama lengkap mahasiswa
+            semester INTEGER NOT NULL,               -- Semester saat dihapus
+            max_credits INTEGER,                     -- Batas maksimal SKS
+            created_at TEXT,                         -- Waktu pendaftaran
+            deleted_at TEXT NOT NULL                 -- Waktu penghapusan
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS deleted_enrollments (
+            id INTEGER PRIMARY KEY,                  -- ID pendaftaran asal
+            student_id INTEGER,                      -- ID mahasiswa asal
+            course_id INTEGER,                       -- ID mata kuliah
+            tanggal_daftar TEXT NOT NULL,            -- Tanggal pendaftaran
+            status TEXT,                             -- Status saat dihapus
+            created_at TEXT,                         -- Waktu pembuatan data
+            deleted_at TEXT NOT NULL                 -- Waktu penghapusan
+        )
+    """)
+
+
+def init_auto_vacuum(conn):
+    """
+    Mengaktifkan auto_vacuum=INCREMENTAL hanya pada database yang masih kosong
+    - Pada database baru PRAGMA ini berlaku tanpa VACUUM, jadi aman dipanggil
+      setiap kali aplikasi dibuka
+    - Database lama dibiarkan; konversinya lewat ensure_incremental_vacuum
+      (perintah pemeliharaan eksplisit)
+    """
+    if conn.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()[0] == 0:
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+
+
+def ensure_incremental_vacuum(conn):
+    """
+    Mengaktifkan mode auto_vacuum=INCREMENTAL
+    - Pada database baru cukup dengan PRAGMA sebelum tabel dibuat
+    - Pada database lama perlu satu kali VACUUM agar mode baru berlaku; VACUUM
+      menulis ulang seluruh file di bawah kunci eksklusif, jadi hanya dipanggil
+      dari perintah pemeliharaan, bukan saat aplikasi dibuka
+    - Mengembalikan True jika mode diubah
+    """
+    mode = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+    if mode == AUTO_VACUUM_INCREMENTAL:
+        return False
+
+    # VACUUM tidak boleh dijalankan di dalam transaksi
+    if conn.in_transaction:
+        conn.commit()
+    conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    conn.execute("VACUUM")
+    return True
+
+
+def stash_deleted_student(cursor, student_id):
+    """
+    Menyalin data mahasiswa dan KRS-nya ke tabel penampung sebelum dihapus
+    - Dipanggil dalam transaksi yang sama dengan DELETE
+    """
+    deleted_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    cursor.execute("""
+        INSERT OR REPLACE INTO deleted_enrollments
+            (id, student_id, course_id, tanggal_daftar, status, created_at, deleted_at)
+        SELECT id, student_id, course_id, tanggal_daftar, status, created_at, ?
+        FROM enrollments WHERE student_id = ?
+    """, (deleted_at, student_id))
+    cursor.execute("""
+        INSERT OR REPLACE INTO deleted_students
+            (id, nim, nama, semester, max_credits, created_at, deleted_at)
+        SELECT id, nim, nama, semester, max_credits, created_at, ?
+        FROM students WHERE id = ?
+    """, (deleted_at, student_id))
+
+
+def _database_file(conn):
+    """Mengambil path file database utama (string kosong untuk :memory:)"""
+    for _, name, path in conn.execute("PRAGMA database_list"):
+        if name == 'main':
+            return path
+    return ''
+
+
+def storage_stats(conn):
+    """
+    Mengumpulkan statistik penyimpanan database
+    - Ukuran file, ukuran dan jumlah halaman
+    - Jumlah halaman kosong (freelist) dan persentasenya
+    - Fragmentasi: persentase halaman b-tree yang tidak bersebelahan
+      dengan halaman sebelumnya (membutuhkan tabel virtual dbstat)
+    """
+    path = _database_file(conn)
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+    freelist_count = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    auto_vacuum = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+
+    stats = {
+        'file_size': os.path.getsize(path) if path and os.path.exists(path) else 0,
+        'page_size': page_size,
+        'page_count': page_count,
+        'freelist_count': freelist_count,
+        'free_percent': (freelist_count * 100.0 / page_count) if page_count else 0.0,
+        'auto_vacuum': auto_vacuum,
+        'fragmented_percent': None,
+        'unused_bytes': None,
+    }
+
+    # Fragmentasi dihitung dari urutan halaman setiap b-tree
+    try:
+        rows = conn.execute("SELECT name, pageno, unused FROM dbstat ORDER BY name, path").fetchall()
+    except sqlite3.OperationalError:
+        return stats  # SQLite dikompilasi tanpa dbstat
+
+    transitions = 0
+    jumps = 0
+    unused = 0
+    previous_name, previous_page = None, None
+    for name, pageno, page_unused in rows:
+        unused += page_unused or 0
+        if name == previous_name:
+            transitions += 1
+            if pageno != previous_page + 1:
+                jumps += 1
+        previous_name, previous_page = name, pageno
+
+    stats['fragmented_percent'] = (jumps * 100.0 / transitions) if transitions else 0.0
+    stats['unused_bytes'] = unused
+    return stats
+
+
+def format_stats(stats, title):
+    """Memformat statistik penyimpanan menjadi teks laporan"""
+    mode = {0: 'NONE', 1: 'FULL', 2: 'INCREMENTAL'}.get(stats['auto_vacuum'], '?')
+    text = f"{title}\n"
+    text += f"  Ukuran file      : {stats['file_size'] / 1024:.1f} KB\n"
+    text += f"  Halaman          : {stats['page_count']} x {stats['page_size']} byte\n"
+    text += f"  Halaman kosong   : {stats['freelist_count']} ({stats['free_percent']:.1f}%)\n"
+    if stats['fragmented_percent'] is not None:
+        text += f"  Fragmentasi      : {stats['fragmented_percent']:.1f}% halaman tidak berurutan\n"
+        text += f"  Ruang tak terpakai: {stats['unused_bytes'] / 1024:.1f} KB di dalam halaman\n"
+    text += f"  auto_vacuum      : {mode}\n"
+    return text
+
+
+def incremental_vacuum_step(conn, pages=VACUUM_STEP_PAGES):
+    """
+    Menjalankan satu langkah incremental vacuum
+    - Mengembalikan paling banyak `pages` halaman kosong ke sistem file
+    - Mengembalikan jumlah halaman kosong yang masih tersisa
+    """
+    # executescript menjalankan PRAGMA sampai selesai; execute() biasa hanya
+    # melakukan satu langkah sehingga hanya satu halaman yang dikembalikan
+    conn.executescript(f"PRAGMA incremental_vacuum({int(pages)});")
+    return conn.execute("PRAGMA freelist_count").fetchone()[0]
+
+
+def incremental_vacuum(conn, pages=VACUUM_STEP_PAGES, max_steps=None):
+    """
+    Menjalankan incremental vacuum bertahap sampai freelist kosong
+    - max_steps membatasi jumlah langkah (None = sampai selesai)
+    - Mengembalikan jumlah langkah yang dijalankan
+    """
+    steps = 0
+    remaining = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    while remaining and (max_steps is None or steps < max_steps):
+        remaining = incremental_vacuum_step(conn, pages)
+        steps += 1
+    return steps
+
+
+def _init_archive(cursor):
+    """Membuat tabel batch arsip pada database arsip yang di-ATTACH"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS arsip.archive_batches (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,    -- ID batch arsip
+            archived_at TEXT NOT NULL,               -- Waktu pengarsipan
+            source_table TEXT NOT NULL,              -- Tabel asal data
+            row_count INTEGER NOT NULL,              -- Jumlah baris dalam batch
+            columns TEXT NOT NULL,                   -- Nama kolom (JSON)
+            payload BLOB NOT NULL                    -- Baris data (JSON terkompresi zlib)
+        )
+    """)
+
+
+def _archive_rows(cursor, source_table, query, params=()):
+    """
+    Menyimpan hasil query sebagai satu batch terkompresi di database arsip
+    - Mengembalikan daftar ID baris yang diarsipkan
+    """
+    cursor.execute(query, params)
+    columns = [column[0] for column in cursor.description]
+    rows = cursor.fetchall()
+    if not rows:
+        return []
+
+    payload = zlib.compress(json.dumps(rows).encode('utf-8'), 9)
+    cursor.execute("""
+        INSERT INTO arsip.archive_batches (archived_at, source_table, row_count, columns, payload)
+        VALUES (?, ?, ?, ?, ?)
+    """, (datetime.now().strftime("%Y-%m-%d %H:%M:%S"), source_table, len(rows),
+          json.dumps(columns), payload))
+    return [row[0] for row in rows]
+
+
+def _delete_ids(cursor, table, ids, chunk_size=500):
+    """Menghapus baris berdasarkan daftar ID secara bertahap per chunk"""
+    for start in range(0, len(ids), chunk_size):
+        chunk = ids[start:start + chunk_size]
+        placeholders = ','.join(['?'] * len(chunk))
+        cursor.execute(f"DELETE FROM {table} WHERE id IN ({placeholders})", chunk)
+
+
+def archive_data(conn, archive_path=ARCHIVE_PATH):
+    """
+    Memindahkan data lama ke file database arsip terkompresi
+    - KRS semester yang sudah ditutup (status selain 'aktif') yang nilainya sudah
+      diposting (untuk enrollment ini atau enrollment ulang sesudahnya) dan bukan
+      bagian dari rollover yang masih bisa di-rollback; rollover lain yang
+      enrollment-nya ikut diarsipkan diberi archived_at agar tidak di-rollback
+    - Data mahasiswa yang dihapus beserta KRS-nya
+    - Penulisan arsip dan penghapusan data dilakukan dalam satu transaksi
+      (database arsip di-ATTACH) sehingga tidak ada data yang hilang
+    - Mengembalikan jumlah baris yang diarsipkan per tabel
+    """
+    if conn.in_transaction:
+        conn.commit()
+
+    cursor = conn.cursor()
+    init_schema(cursor)
+    cursor.execute("ATTACH DATABASE ? AS arsip", (archive_path,))
+    try:
+        _init_archive(cursor)
+
+        closed_ids = _archive_rows(cursor, 'enrollments', """
+            SELECT e.id, e.student_id, e.course_id, e.tanggal_daftar, e.status, e.created_at
+            FROM enrollments e
+            WHERE e.status <> 'aktif'
+              AND EXISTS (SELECT 1 FROM grades g
+                          WHERE g.student_id = e.student_id AND g.course_id = e.course_id
+                            AND g.enrollment_id >= e.id)
+              AND e.id NOT IN (SELECT enrollment_id FROM rollover_enrollments
+                               WHERE run_id = (SELECT MAX(id) FROM rollover_runs
+                                               WHERE rolled_back_at IS NULL AND finished_at IS NOT NULL))
+            ORDER BY e.id
+        """)
+        deleted_enrollment_ids = _archive_rows(cursor, 'deleted_enrollments', """
+            SELECT id, student_id, course_id, tanggal_daftar, status, created_at, deleted_at
+            FROM deleted_enrollments ORDER BY id
+        """)
+        deleted_student_ids = _archive_rows(cursor, 'deleted_students', """
+            SELECT id, nim, nama, semester, max_credits, created_at, deleted_at
+            FROM deleted_students ORDER BY id
+        """)
+
+        cursor.execute("""
+            UPDATE rollover_runs SET archived_at = ?
+            WHERE archived_at IS NULL AND rolled_back_at IS NULL AND id IN (
+                SELECT run_id FROM rollover_enrollments
+                WHERE enrollment_id IN (SELECT value FROM json_each(?)))
+        """, (datetime.now().strftime("%Y-%m-%d %H:%M:%S"), json.dumps(closed_ids)))
+        _delete_ids(cursor, 'enrollments', closed_ids)
+        _delete_ids(cursor, 'deleted_enrollments', deleted_enrollment_ids)
+        _delete_ids(cursor, 'deleted_students', deleted_student_ids)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.execute("DETACH DATABASE arsip")
+
+    return {
+        'enrollments': len(closed_ids),
+        'deleted_enrollments': len(deleted_enrollment_ids),
+        'deleted_students': len(deleted_student_ids),
+    }
+
+
+def read_archive(archive_path=ARCHIVE_PATH, source_table=None):
+    """
+    Membaca kembali isi arsip sebagai dictionary per baris
+    - source_table: filter tabel asal (None = semua)
+    """
+    archive = sqlite3.connect(archive_path)
+    try:
+        query = "SELECT source_table, columns, payload FROM archive_batches"
+        params = ()
+        if source_table:
+            query += " WHERE source_table = ?"
+            params = (source_table,)
+        for table, columns, payload in archive.execute(query + " ORDER BY id", params):
+            names = json.loads(columns)
+            for row in json.loads(zlib.decompress(payload).decode('utf-8')):
+                record = dict(zip(names, row))
+                record['source_table'] = table
+                yield record
+    finally:
+        archive.close()
+
+
+def run_maintenance(conn, archive_path=ARCHIVE_PATH, archive=True, vacuum=True, convert=False):
+    """
+    Menjalankan seluruh pekerjaan pemeliharaan dan membuat laporan
+    - Statistik sebelum, pengarsipan, incremental vacuum, statistik sesudah
+    - convert=True mengubah database lama ke auto_vacuum=INCREMENTAL (VACUUM penuh);
+      tanpa itu vacuum hanya berjalan jika mode INCREMENTAL sudah aktif
+    - Mengembalikan teks laporan
+    """
+    before = storage_stats(conn)
+    report = format_stats(before, "Sebelum pemeliharaan:")
+
+    if archive:
+        counts = archive_data(conn, archive_path)
+        report += "\nData diarsipkan ke " + archive_path + ":\n"
+        for table, count in counts.items():
+            report += f"  {table:<20}: {count} baris\n"
+
+    if convert and ensure_incremental_vacuum(conn):
+        report += "\nMode auto_vacuum diubah ke INCREMENTAL (VACUUM penuh satu kali)\n"
+    if vacuum:
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == AUTO_VACUUM_INCREMENTAL:
+            steps = incremental_vacuum(conn)
+            report += f"\nIncremental vacuum: {steps} langkah @ {VACUUM_STEP_PAGES} halaman\n"
+        else:
+            report += "\nIncremental vacuum dilewati: auto_vacuum belum INCREMENTAL " \
+                      "(jalankan dengan --convert-vacuum)\n"
+
+    after = storage_stats(conn)
+    report += "\n" + format_stats(after, "Sesudah pemeliharaan:")
+    return report
+
+
+def main():
+    """Menjalankan pemeliharaan dari command line tanpa GUI"""
+    parser = argparse.ArgumentParser(description="Pemeliharaan database KRS")
+    parser.add_argument('--database', default=DATABASE_PATH, help="File database KRS")
+    parser.add_argument('--archive', default=ARCHIVE_PATH, help="File database arsip")
+    parser.add_argument('--no-archive', action='store_true', help="Lewati pengarsipan")
+    parser.add_argument('--no-vacuum', action='store_true', help="Lewati incremental vacuum")
+    parser.add_argument('--convert-vacuum', action='store_true',
+                        help="Ubah database lama ke auto_vacuum=INCREMENTAL (VACUUM penuh, kunci eksklusif)")
+    parser.add_argument('--stats', action='store_true', help="Hanya tampilkan statistik")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.database)
+    try:
+        if args.stats:
+            print(format_stats(storage_stats(conn), "Statistik penyimpanan:"))
+        else:
+            print(run_maintenance(conn, args.archive,
+                                  archive=not args.no_archive, vacuum=not args.no_vacuum,
+                                  convert=args.convert_vacuum))
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
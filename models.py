@@ -0,0 +1,240 @@
+"""
+Modul model data dan akses data KRS
+- Record ringkas berbasis __slots__ untuk mahasiswa, mata kuliah, dan enrollment
+- row_factory khusus yang langsung membangun record dari hasil query
+- Identity map berbasis ID sehingga satu baris database diwakili satu objek,
+  dan tampilan (Treeview) cukup menyimpan ID sebagai iid tanpa query ulang
+"""
+import prerequisites
+
+
+class Record:
+    """
+    Kelas dasar record ringkas
+    - Atribut didefinisikan lewat __slots__ pada subclass (tanpa __dict__)
+    - Atribut yang tidak ada di hasil query bernilai None
+    """
+    __slots__ = ()
+
+    def __init__(self, **values):
+        for name in self.__slots__:
+            setattr(self, name, values.get(name))
+
+    @classmethod
+    def row_factory(cls, cursor, row):
+        """row_factory sqlite3: membangun record dari kolom hasil query sesuai nama"""
+        record = cls.__new__(cls)
+        for name in cls.__slots__:
+            setattr(record, name, None)
+        for column, value in zip(cursor.description, row):
+            setattr(record, column[0], value)
+        return record
+
+    def update_from(self, other):
+        """Menyalin nilai atribut dari record lain dengan ID yang sama"""
+        for name in self.__slots__:
+            setattr(self, name, getattr(other, name))
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+
+class Student(Record):
+    """Record mahasiswa"""
+    __slots__ = ('id', 'nim', 'nama', 'semester', 'max_credits', 'created_at')
+
+    @property
+    def label(self):
+        """Teks yang ditampilkan di combobox pemilihan mahasiswa"""
+        return f"{self.nim} - {self.nama}"
+
+
+class Course(Record):
+    """Record mata kuliah"""
+    __slots__ = ('id', 'kode_mk', 'nama_mk', 'sks', 'semester', 'jadwal', 'dosen',
+                 'kapasitas', 'terisi', 'ditahan')
+
+    @property
+    def sisa(self):
+        """Sisa kursi yang masih tersedia (kursi yang ditahan di keranjang dan belum kedaluwarsa ikut dikurangi)"""
+        return self.kapasitas - self.terisi - (self.ditahan or 0)
+
+    @property
+    def is_full(self):
+        """True jika jumlah terisi dan ditahan sudah mencapai kapasitas"""
+        return self.sisa <= 0
+
+
+class Enrollment(Record):
+    """Record pendaftaran KRS"""
+    __slots__ = ('id', 'student_id', 'course_id', 'tanggal_daftar', 'status')
+
+
+class IdentityMap:
+    """
+    Peta identitas record berdasarkan ID
+    - Memuat ulang baris yang sama memperbarui objek lama (identitas tetap)
+    - Dipakai sebagai cache di belakang Treeview: iid = ID record
+    """
+
+    def __init__(self):
+        self._records = {}
+
+    def __len__(self):
+        return len(self._records)
+
+    def __contains__(self, record_id):
+        return record_id in self._records
+
+    def get(self, record_id):
+        """Mengambil record berdasarkan ID (None jika tidak ada)"""
+        return self._records.get(record_id)
+
+    def from_iid(self, iid):
+        """Mengambil record dari iid Treeview"""
+        return self._records.get(int(iid))
+
+    def add(self, record):
+        """Menambahkan atau memperbarui satu record; mengembalikan objek yang tersimpan"""
+        existing = self._records.get(record.id)
+        if existing is None:
+            self._records[record.id] = record
+            return record
+        existing.update_from(record)
+        return existing
+
+    def load(self, records, replace=False):
+        """
+        Memasukkan banyak record sekaligus
+        - replace=True membuang record yang tidak ada di hasil terbaru
+        - Mengembalikan daftar record tersimpan sesuai urutan masukan
+        """
+        loaded = [self.add(record) for record in records]
+        if replace:
+            keep = {record.id for record in loaded}
+            for record_id in [record_id for record_id in self._records if record_id not in keep]:
+                del self._records[record_id]
+        return loaded
+
+    def discard(self, record_id):
+        """Membuang record dari peta"""
+        self._records.pop(record_id, None)
+
+
+def _query(conn, record_class, query, params=()):
+    """Menjalankan query dengan row_factory record pada cursor tersendiri"""
+    cursor = conn.cursor()
+    cursor.row_factory = record_class.row_factory
+    cursor.execute(query, params)
+    return cursor.fetchall()
+
+
+STUDENT_COLUMNS = "id, nim, nama, semester, max_credits, COALESCE(created_at, 'N/A') AS created_at"
+# Kursi yang ditahan dihitung dari tahanan yang belum kedaluwarsa, bukan dari penghitung
+# courses.ditahan yang baru turun setelah sapuan (lewat indeks seat_holds (course_id, expires_at))
+LIVE_HELD = """(SELECT COUNT(*) FROM seat_holds live
+                WHERE live.course_id = {course}.id AND live.expires_at > datetime('now', 'localtime'))"""
+COURSE_COLUMNS = ("id, kode_mk, nama_mk, sks, semester, jadwal, dosen, kapasitas, terisi, "
+                  f"{LIVE_HELD.format(course='courses')} AS ditahan")
+
+
+def fetch_students(conn):
+    """Mengambil semua mahasiswa urut NIM"""
+    return _query(conn, Student, f"SELECT {STUDENT_COLUMNS} FROM students ORDER BY nim")
+
+
+def fetch_student(conn, student_id):
+    """Mengambil satu mahasiswa berdasarkan ID (None jika tidak ada)"""
+    rows = _query(conn, Student, f"SELECT {STUDENT_COLUMNS} FROM students WHERE id = ?", (student_id,))
+    return rows[0] if rows else None
+
+
+def fetch_student_by_nim(conn, nim):
+    """Mengambil satu mahasiswa berdasarkan NIM (None jika tidak ada)"""
+    rows = _query(conn, Student, f"SELECT {STUDENT_COLUMNS} FROM students WHERE nim = ?", (nim,))
+    return rows[0] if rows else None
+
+
+def fetch_course_by_kode(conn, kode_mk):
+    """Mengambil satu mata kuliah berdasarkan kode (None jika tidak ada)"""
+    rows = _query(conn, Course, f"SELECT {COURSE_COLUMNS} FROM courses WHERE kode_mk = ?", (kode_mk,))
+    return rows[0] if rows else None
+
+
+def fetch_courses(conn, semester=None, include_retired=False):
+    """
+    Mengambil mata kuliah (opsional per semester) urut semester dan kode
+    - Mata kuliah yang dipensiunkan dari katalog hanya ikut jika include_retired
+    """
+    conditions, params = [], []
+    if semester is not None:
+        conditions.append("semester = ?")
+        params.append(semester)
+    if not include_retired:
+        conditions.append("retired_at IS NULL")
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    return _query(conn, Course, f"""
+        SELECT {COURSE_COLUMNS} FROM courses {where} ORDER BY semester, kode_mk
+    """, params)
+
+
+def fetch_enrolled_courses(conn, student_id):
+    """Mengambil mata kuliah yang sedang diambil (status aktif) oleh mahasiswa"""
+    return _query(conn, Course, f"""
+        SELECT c.id, c.kode_mk, c.nama_mk, c.sks, c.semester, c.jadwal, c.dosen, c.kapasitas, c.terisi,
+               {LIVE_HELD.format(course='c')} AS ditahan
+        FROM enrollments e
+        JOIN courses c ON e.course_id = c.id
+        WHERE e.student_id = ? AND e.status = 'aktif'
+        ORDER BY c.kode_mk
+    """, (student_id,))
+
+
+def fetch_held_courses(conn, student_id):
+    """Mengambil mata kuliah yang kursinya sedang ditahan mahasiswa (keranjang, belum kedaluwarsa)"""
+    return _query(conn, Course, f"""
+        SELECT c.id, c.kode_mk, c.nama_mk, c.sks, c.semester, c.jadwal, c.dosen, c.kapasitas, c.terisi,
+               {LIVE_HELD.format(course='c')} AS ditahan
+        FROM seat_holds h
+        JOIN courses c ON h.course_id = c.id
+        WHERE h.student_id = ? AND h.expires_at > datetime('now', 'localtime')
+        ORDER BY c.kode_mk
+    """, (student_id,))
+
+
+def fetch_course_students(conn, course_id):
+    """Mengambil mahasiswa yang sedang mengambil (status aktif) mata kuliah, urut NIM"""
+    return _query(conn, Student, """
+        SELECT s.id, s.nim, s.nama, s.semester, s.max_credits, COALESCE(s.created_at, 'N/A') AS created_at
+        FROM enrollments e
+        JOIN students s ON s.id = e.student_id
+        WHERE e.course_id = ? AND e.status = 'aktif'
+        ORDER BY s.nim
+    """, (course_id,))
+
+
+def fetch_enrollments(conn, student_id):
+    """Mengambil semua enrollment milik mahasiswa"""
+    return _query(conn, Enrollment, """
+        SELECT id, student_id, course_id, tanggal_daftar, status
+        FROM enrollments WHERE student_id = ? ORDER BY id
+    """, (student_id,))
+
+
+def fetch_available_courses(conn, student):
+    """
+    Mengambil mata kuliah yang masih bisa diambil mahasiswa
+    - Sesuai jenis semester mahasiswa (ganjil/genap) dan masih ditawarkan di katalog
+    - Belum diambil (status aktif), belum ditahan di keranjang, dan prasyarat sudah terpenuhi
+    """
+    return _query(conn, Course, f"""
+        SELECT {COURSE_COLUMNS} FROM courses
+        WHERE semester % 2 = ?
+          AND retired_at IS NULL
+          AND id NOT IN (SELECT course_id FROM enrollments WHERE student_id = ? AND status = 'aktif')
+          AND id NOT IN (SELECT course_id FROM seat_holds
+                         WHERE student_id = ? AND expires_at > datetime('now', 'localtime'))
+          AND {prerequisites.eligible_condition('courses')}
+        ORDER BY semester, kode_mk
+    """, (student.semester % 2, student.id, student.id, student.id, student.id))
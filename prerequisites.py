@@ -0,0 +1,362 @@
+"""
+Modul prasyarat mata kuliah
+- Prasyarat membentuk DAG atas kode_mk (siklus ditolak)
+- Transitive closure prasyarat disimpan dan diperbarui saat prasyarat berubah
+- Set kelayakan (eligibility) per mahasiswa dihitung di muka dan diperbarui
+  oleh trigger saat mahasiswa menyelesaikan mata kuliah, sehingga tampilan
+  KRS cukup melakukan lookup berindeks tanpa menelusuri graf
+"""
+import argparse
+
+import database
+
+# Lokasi default database utama
+DATABASE_PATH = 'krs_database.db'
+
+# Status enrollment yang menandakan mata kuliah sudah diselesaikan
+STATUS_SELESAI = 'selesai'
+
+# Prasyarat default untuk katalog bawaan: (kode_mk, prasyarat)
+DEFAULT_PREREQUISITES = [
+    ('IF102', 'IF101'),     # PBO <- Pemrograman Dasar
+    ('MTK102', 'MTK103'),   # Kalkulus II <- Kalkulus I
+    ('IF201', 'IF103'),     # Struktur Data <- Algoritma dan Pemrograman
+    ('IF203', 'IF103'),     # Basis Data <- Algoritma dan Pemrograman
+    ('IF205', 'IF102'),     # Pemrograman Web <- PBO
+    ('IF202', 'IF201'),     # Algoritma dan Kompleksitas <- Struktur Data
+    ('IF204', 'IF102'),     # Pemrograman Mobile <- PBO
+    ('IF206', 'IF203'),     # Manajemen Basis Data <- Basis Data
+    ('IF301', 'IF201'),     # RPL <- Struktur Data
+    ('IF303', 'IF209'),     # Jaringan Komputer <- Jaringan Komputer Dasar
+    ('IF311', 'IF203'),     # Data Mining <- Basis Data
+    ('IF302', 'IF301'),     # Manajemen Proyek TI <- RPL
+    ('IF304', 'IF303'),     # Keamanan Jaringan <- Jaringan Komputer
+    ('IF306', 'IF205'),     # Pengembangan Aplikasi Web <- Pemrograman Web
+    ('IF310', 'IF207'),     # Cloud Computing <- Sistem Operasi
+    ('IF401', 'IF202'),     # Kecerdasan Buatan <- Algoritma dan Kompleksitas
+    ('IF401', 'MTK104'),    # Kecerdasan Buatan <- Statistika dan Probabilitas
+    ('IF403', 'IF304'),     # Keamanan Sistem <- Keamanan Jaringan
+    ('IF405', 'IF311'),     # Pembelajaran Mesin <- Data Mining
+    ('IF407', 'IF207'),     # Sistem Terdistribusi <- Sistem Operasi
+    ('IF409', 'IF305'),     # Visi Komputer <- Komputer Grafik
+    ('IF402', 'IF411'),     # Skripsi <- Metodologi Penelitian
+    ('IF410', 'IF411'),     # Seminar Hasil <- Metodologi Penelitian
+    ('IF412', 'IF301'),     # Proyek Akhir <- RPL
+]
+
+# Trigger yang memperbarui kelayakan saat status penyelesaian berubah
+ELIGIBILITY_TRIGGERS = [
+    # Enrollment berstatus 'selesai' dicatat sebagai mata kuliah yang sudah lulus
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_prereq_enroll_complete AFTER UPDATE OF status ON enrollments
+    WHEN NEW.status = 'selesai' AND OLD.status <> 'selesai'
+    BEGIN
+        INSERT OR IGNORE INTO completed_courses (student_id, kode_mk, completed_at)
+        SELECT NEW.student_id, kode_mk, CURRENT_TIMESTAMP FROM courses WHERE id = NEW.course_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_prereq_enroll_reopen AFTER UPDATE OF status ON enrollments
+    WHEN OLD.status = 'selesai' AND NEW.status <> 'selesai'
+     AND NOT EXISTS (SELECT 1 FROM enrollments
+                     WHERE student_id = NEW.student_id AND course_id = NEW.course_id AND status = 'selesai')
+    BEGIN
+        DELETE FROM completed_courses
+        WHERE student_id = NEW.student_id
+          AND kode_mk = (SELECT kode_mk FROM courses WHERE id = NEW.course_id);
+    END
+    """,
+    # Kelulusan satu mata kuliah hanya membuka mata kuliah turunannya
+    # (ON CONFLICT DO NOTHING tetap berlaku walau dipicu dari upsert, tidak seperti OR IGNORE)
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_prereq_completed_insert AFTER INSERT ON completed_courses
+    BEGIN
+        INSERT INTO student_eligibility (student_id, kode_mk)
+        SELECT NEW.student_id, pc.kode_mk
+        FROM prerequisite_closure pc
+        WHERE pc.ancestor = NEW.kode_mk
+          AND NOT EXISTS (
+              SELECT 1 FROM prerequisite_closure missing
+              WHERE missing.kode_mk = pc.kode_mk
+                AND NOT EXISTS (SELECT 1 FROM completed_courses cc
+                                WHERE cc.student_id = NEW.student_id
+                                  AND cc.kode_mk = missing.ancestor))
+        ON CONFLICT DO NOTHING;
+    END
+    """,
+    # Pembatalan kelulusan menutup mata kuliah yang bergantung padanya
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_prereq_completed_delete AFTER DELETE ON completed_courses
+    BEGIN
+        DELETE FROM student_eligibility
+        WHERE student_id = OLD.student_id
+          AND kode_mk IN (SELECT kode_mk FROM prerequisite_closure WHERE ancestor = OLD.kode_mk);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_prereq_student_delete AFTER DELETE ON students
+    BEGIN
+        DELETE FROM student_eligibility WHERE student_id = OLD.id;
+        DELETE FROM completed_courses WHERE student_id = OLD.id;
+    END
+    """,
+]
+
+
+class PrerequisiteError(Exception):
+    """Kesalahan pada pengelolaan prasyarat (misalnya membentuk siklus)"""
+
+
+def init_schema(cursor):
+    """
+    Membuat tabel prasyarat, closure, kelulusan, dan kelayakan
+    - course_prerequisites: sisi DAG (kode_mk membutuhkan prasyarat)
+    - prerequisite_closure: semua leluhur (transitif) setiap kode_mk
+    - completed_courses: mata kuliah yang sudah diselesaikan mahasiswa
+    - student_eligibility: mata kuliah berprasyarat yang sudah boleh diambil
+    - Prasyarat default diisi saat tabel baru dibuat
+    """
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'course_prerequisites'")
+    is_new = cursor.fetchone() is None
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS course_prerequisites (
+            kode_mk TEXT NOT NULL,                   -- Mata kuliah yang membutuhkan prasyarat
+            prasyarat TEXT NOT NULL,                 -- Kode mata kuliah prasyarat
+            PRIMARY KEY (kode_mk, prasyarat)
+        ) WITHOUT ROWID
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS prerequisite_closure (
+            kode_mk TEXT NOT NULL,                   -- Mata kuliah
+            ancestor TEXT NOT NULL,                  -- Prasyarat langsung maupun tidak langsung
+            PRIMARY KEY (kode_mk, ancestor)
+        ) WITHOUT ROWID
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS completed_courses (
+            student_id INTEGER NOT NULL,             -- ID mahasiswa
+            kode_mk TEXT NOT NULL,                   -- Kode mata kuliah yang sudah diselesaikan
+            completed_at TEXT,                       -- Waktu penyelesaian
+            PRIMARY KEY (student_id, kode_mk)
+        ) WITHOUT ROWID
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS student_eligibility (
+            student_id INTEGER NOT NULL,             -- ID mahasiswa
+            kode_mk TEXT NOT NULL,                   -- Mata kuliah berprasyarat yang sudah terbuka
+            PRIMARY KEY (student_id, kode_mk)
+        ) WITHOUT ROWID
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_prerequisite_closure_ancestor
+        ON prerequisite_closure (ancestor, kode_mk)
+    """)
+
+    # Versi lama trigger pembukaan ulang tidak memperhitungkan mata kuliah yang diulang
+    cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = 'trg_prereq_enroll_reopen'")
+    row = cursor.fetchone()
+    if row and 'NOT EXISTS' not in row[0]:
+        cursor.execute("DROP TRIGGER trg_prereq_enroll_reopen")
+    cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = 'trg_prereq_completed_insert'")
+    row = cursor.fetchone()
+    if row and 'OR IGNORE' in row[0]:
+        cursor.execute("DROP TRIGGER trg_prereq_completed_insert")
+    for trigger in ELIGIBILITY_TRIGGERS:
+        cursor.execute(trigger)
+
+    if is_new:
+        cursor.executemany("INSERT OR IGNORE INTO course_prerequisites (kode_mk, prasyarat) VALUES (?, ?)",
+                           DEFAULT_PREREQUISITES)
+        cursor.execute("""
+            INSERT OR IGNORE INTO completed_courses (student_id, kode_mk, completed_at)
+            SELECT e.student_id, c.kode_mk, e.created_at
+            FROM enrollments e JOIN courses c ON c.id = e.course_id
+            WHERE e.status = ?
+        """, (STATUS_SELESAI,))
+        rebuild_closure(cursor)
+        rebuild_eligibility(cursor)
+
+
+def rebuild_closure(cursor):
+    """Menghitung ulang seluruh transitive closure dengan CTE rekursif"""
+    cursor.execute("DELETE FROM prerequisite_closure")
+    cursor.execute("""
+        INSERT OR IGNORE INTO prerequisite_closure (kode_mk, ancestor)
+        WITH RECURSIVE closure(kode_mk, ancestor) AS (
+            SELECT kode_mk, prasyarat FROM course_prerequisites
+            UNION
+            SELECT closure.kode_mk, p.prasyarat
+            FROM closure JOIN course_prerequisites p ON p.kode_mk = closure.ancestor
+        )
+        SELECT kode_mk, ancestor FROM closure
+    """)
+
+
+def rebuild_eligibility(cursor, kode_list=None):
+    """
+    Menghitung ulang kelayakan semua mahasiswa secara set-based
+    - kode_list membatasi perhitungan ke mata kuliah tertentu (None = semua)
+    - Hanya diperlukan saat prasyarat berubah; kelulusan ditangani trigger
+    """
+    if kode_list is None:
+        cursor.execute("DELETE FROM student_eligibility")
+        cursor.execute("SELECT DISTINCT kode_mk FROM prerequisite_closure")
+        kode_list = [row[0] for row in cursor.fetchall()]
+    else:
+        cursor.executemany("DELETE FROM student_eligibility WHERE kode_mk = ?",
+                           [(kode_mk,) for kode_mk in kode_list])
+
+    cursor.executemany("""
+        INSERT OR IGNORE INTO student_eligibility (student_id, kode_mk)
+        SELECT s.id, ?1 FROM students s
+        WHERE EXISTS (SELECT 1 FROM prerequisite_closure WHERE kode_mk = ?1)
+          AND NOT EXISTS (
+              SELECT 1 FROM prerequisite_closure pc
+              WHERE pc.kode_mk = ?1
+                AND NOT EXISTS (SELECT 1 FROM completed_courses cc
+                                WHERE cc.student_id = s.id AND cc.kode_mk = pc.ancestor))
+    """, [(kode_mk,) for kode_mk in kode_list])
+
+
+def _descendants(cursor, kode_mk):
+    """Mengambil kode_mk beserta semua mata kuliah yang bergantung padanya"""
+    cursor.execute("SELECT kode_mk FROM prerequisite_closure WHERE ancestor = ?", (kode_mk,))
+    return [kode_mk] + [row[0] for row in cursor.fetchall()]
+
+
+def add_prerequisite(conn, kode_mk, prasyarat):
+    """
+    Menambahkan prasyarat dan memperbarui closure serta kelayakan
+    - Ditolak jika membentuk siklus (prasyarat bergantung pada kode_mk)
+    - Closure diperbarui secara inkremental: semua turunan kode_mk
+      mendapatkan semua leluhur prasyarat
+    """
+    cursor = conn.cursor()
+    if kode_mk == prasyarat:
+        raise PrerequisiteError("Mata kuliah tidak bisa menjadi prasyarat dirinya sendiri")
+    cursor.execute("SELECT 1 FROM prerequisite_closure WHERE kode_mk = ? AND ancestor = ?",
+                   (prasyarat, kode_mk))
+    if cursor.fetchone():
+        raise PrerequisiteError(f"{prasyarat} sudah bergantung pada {kode_mk} (membentuk siklus)")
+
+    try:
+        cursor.execute("INSERT OR IGNORE INTO course_prerequisites (kode_mk, prasyarat) VALUES (?, ?)",
+                       (kode_mk, prasyarat))
+        affected = _descendants(cursor, kode_mk)
+        cursor.execute("SELECT ancestor FROM prerequisite_closure WHERE kode_mk = ?", (prasyarat,))
+        ancestors = [prasyarat] + [row[0] for row in cursor.fetchall()]
+        cursor.executemany("INSERT OR IGNORE INTO prerequisite_closure (kode_mk, ancestor) VALUES (?, ?)",
+                           [(node, ancestor) for node in affected for ancestor in ancestors])
+        rebuild_eligibility(cursor, affected)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def remove_prerequisite(conn, kode_mk, prasyarat):
+    """
+    Menghapus prasyarat lalu menghitung ulang closure dan kelayakan turunannya
+    - Penghapusan sisi DAG jarang terjadi sehingga closure dibangun ulang penuh
+    """
+    cursor = conn.cursor()
+    try:
+        affected = _descendants(cursor, kode_mk)
+        cursor.execute("DELETE FROM course_prerequisites WHERE kode_mk = ? AND prasyarat = ?",
+                       (kode_mk, prasyarat))
+        rebuild_closure(cursor)
+        rebuild_eligibility(cursor, affected)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def eligible_condition(course_alias='courses', student='?'):
+    """
+    Potongan SQL untuk memfilter mata kuliah yang boleh diambil mahasiswa
+    - student: ekspresi ID mahasiswa; default '?' membutuhkan dua parameter
+      student_id (kelayakan dan kelulusan)
+    - Mata kuliah tanpa prasyarat selalu terbuka; yang berprasyarat dicek
+      lewat lookup berindeks ke student_eligibility
+    """
+    return f"""(
+        (NOT EXISTS (SELECT 1 FROM course_prerequisites cp WHERE cp.kode_mk = {course_alias}.kode_mk)
+         OR EXISTS (SELECT 1 FROM student_eligibility se
+                    WHERE se.student_id = {student} AND se.kode_mk = {course_alias}.kode_mk))
+        AND NOT EXISTS (SELECT 1 FROM completed_courses cc
+                        WHERE cc.student_id = {student} AND cc.kode_mk = {course_alias}.kode_mk)
+    )"""
+
+
+def missing_prerequisites(cursor, student_id, kode_mk):
+    """
+    Mengambil prasyarat (transitif) yang belum diselesaikan mahasiswa
+    - Jalur cepat: lookup kelayakan berindeks; daftar lengkap hanya dihitung
+      jika mahasiswa belum layak (untuk pesan kesalahan)
+    """
+    cursor.execute("""
+        SELECT 1 WHERE NOT EXISTS (SELECT 1 FROM course_prerequisites WHERE kode_mk = ?)
+                    OR EXISTS (SELECT 1 FROM student_eligibility WHERE student_id = ? AND kode_mk = ?)
+    """, (kode_mk, student_id, kode_mk))
+    if cursor.fetchone():
+        return []
+
+    cursor.execute("""
+        SELECT pc.ancestor FROM prerequisite_closure pc
+        WHERE pc.kode_mk = ?
+          AND NOT EXISTS (SELECT 1 FROM completed_courses cc
+                          WHERE cc.student_id = ? AND cc.kode_mk = pc.ancestor)
+        ORDER BY pc.ancestor
+    """, (kode_mk, student_id))
+    return [row[0] for row in cursor.fetchall()]
+
+
+def main():
+    """Mengelola prasyarat dari command line tanpa GUI"""
+    parser = argparse.ArgumentParser(description="Pengelolaan prasyarat mata kuliah")
+    parser.add_argument('--database', help="Lokasi database: file, 'memory[:nama[=file]]', atau 'tmpfs:file' "
+                                           "(default: variabel KRS_DATABASE atau krs_database.db)")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    add_parser = subparsers.add_parser('add', help="Tambah prasyarat")
+    add_parser.add_argument('kode_mk')
+    add_parser.add_argument('prasyarat')
+
+    remove_parser = subparsers.add_parser('remove', help="Hapus prasyarat")
+    remove_parser.add_argument('kode_mk')
+    remove_parser.add_argument('prasyarat')
+
+    subparsers.add_parser('list', help="Tampilkan prasyarat dan closure")
+    subparsers.add_parser('rebuild', help="Hitung ulang closure dan kelayakan")
+
+    args = parser.parse_args()
+    storage = database.open_storage(args.database)
+    conn = storage.connect()
+    try:
+        database.init_database(conn)
+        conn.commit()
+        if args.command == 'add':
+            add_prerequisite(conn, args.kode_mk, args.prasyarat)
+        elif args.command == 'remove':
+            remove_prerequisite(conn, args.kode_mk, args.prasyarat)
+        elif args.command == 'rebuild':
+            cursor = conn.cursor()
+            rebuild_closure(cursor)
+            rebuild_eligibility(cursor)
+            conn.commit()
+        elif args.command == 'list':
+            cursor = conn.execute("""
+                SELECT kode_mk, GROUP_CONCAT(ancestor, ', ') FROM prerequisite_closure
+                GROUP BY kode_mk ORDER BY kode_mk
+            """)
+            for kode_mk, ancestors in cursor:
+                print(f"{kode_mk:<8} <- {ancestors}")
+    finally:
+        conn.close()
+        storage.close()
+
+
+if __name__ == "__main__":
+    main()
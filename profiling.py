@@ -0,0 +1,263 @@
+"""
+Modul profiling aksi antarmuka (opt-in)
+- Setiap aksi (command tombol, handler event) dijalankan di bawah cProfile dan
+  tracemalloc; dicatat waktu wall, waktu CPU, memori bersih dan puncak, serta
+  jumlah baris Treeview setelah aksi selesai
+- Waktu cProfile dipecah menjadi SQLite (method sqlite3), Tk (panggilan
+  _tkinter) dan sisanya Python (mis. parsing per baris), sehingga terlihat
+  di mana aksi yang lambat menghabiskan waktunya
+- Log per aksi ditulis streaming ke actions.jsonl; saat ditutup, statistik
+  kumulatif per aksi disimpan sebagai file .prof (format pstats) yang bisa
+  dibuka dengan pstats, snakeviz, atau gprof2dot
+
+Contoh:
+    python main.py --profile profil/
+    python profiling.py profil/
+    python profiling.py profil/ --action KRSApplication.refresh_students --top 20
+"""
+import argparse
+import cProfile
+import functools
+import json
+import os
+import pstats
+import re
+import time
+import tracemalloc
+from datetime import datetime
+
+# Variabel lingkungan pengganti argumen --profile pada main.py
+PROFILE_ENV = 'KRS_PROFILE'
+
+# Nama file log aksi dan ringkasan memori di direktori profil
+LOG_NAME = 'actions.jsonl'
+MEMORY_NAME = 'memory_top.txt'
+COMBINED_NAME = 'all.prof'
+
+# Jumlah baris alokasi terbesar yang ditulis ke MEMORY_NAME
+MEMORY_TOP = 25
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def action_name(func):
+    """
+    Nama aksi dari callback, mis. 'KRSApplication.refresh_students'
+    - Fungsi lokal ditulis tanpa '<locals>'; lambda diberi nomor baris agar unik
+    """
+    name = getattr(func, '__qualname__', None) or repr(func)
+    name = name.replace('<locals>.', '')
+    if '<lambda>' in name and hasattr(func, '__code__'):
+        name = f"{name}:{func.__code__.co_firstlineno}"
+    return name
+
+
+def file_name(name):
+    """Nama file .prof yang aman untuk sebuah aksi"""
+    return re.sub(r'[^\w.]+', '_', name).strip('_') + '.prof'
+
+
+def breakdown(stats):
+    """
+    Memecah waktu cProfile (tottime) menjadi (sqlite, tk, python, total) dalam detik
+    - sqlite: method objek sqlite3 (execute, fetchall, commit, ...)
+    - tk: panggilan ke interpreter Tcl/Tk (_tkinter)
+    """
+    sqlite = tk = 0.0
+    for (_, _, function), (_, _, tottime, _, _) in stats.stats.items():
+        if 'sqlite3.' in function:
+            sqlite += tottime
+        elif '_tkinter.' in function:
+            tk += tottime
+    total = stats.total_tt
+    return sqlite, tk, max(total - sqlite - tk, 0.0), total
+
+
+class ActionProfiler:
+    """
+    Pencatat profil per aksi antarmuka
+    - wrap(func) membungkus callback; aksi bersarang hanya dihitung sekali (yang terluar)
+    - item_counter (opsional) mengembalikan {nama Treeview: jumlah baris}
+    """
+
+    def __init__(self, directory, memory=True):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.memory = memory
+        if memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self.item_counter = None
+        self.stats = {}    # nama aksi -> pstats.Stats kumulatif
+        self.depth = 0
+        self.log = open(os.path.join(directory, LOG_NAME), 'a', encoding='utf-8')
+
+    def wrap(self, func, name=None):
+        """Membungkus callback sehingga setiap pemanggilannya diprofil"""
+        name = name or action_name(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return self.measure(name, func, *args, **kwargs)
+        return wrapper
+
+    def measure(self, name, func, *args, **kwargs):
+        """Menjalankan func(*args) sebagai aksi bernama name dan mencatat profilnya"""
+        if self.depth or self.log.closed:
+            return func(*args, **kwargs)
+
+        self.depth += 1
+        profile = cProfile.Profile()
+        if self.memory:
+            tracemalloc.reset_peak()
+            memory_before = tracemalloc.get_traced_memory()[0]
+        failed = True
+        started = time.perf_counter()
+        cpu_started = time.process_time()
+        profile.enable()
+        try:
+            result = func(*args, **kwargs)
+            failed = False
+            return result
+        finally:
+            profile.disable()
+            wall = time.perf_counter() - started
+            cpu = time.process_time() - cpu_started
+            self.depth -= 1
+            memory_net = memory_peak = 0
+            if self.memory:
+                current, peak = tracemalloc.get_traced_memory()
+                memory_net, memory_peak = current - memory_before, peak - memory_before
+            self.record(name, profile, wall, cpu, memory_net, memory_peak, failed)
+
+    def record(self, name, profile, wall, cpu, memory_net, memory_peak, failed):
+        stats = pstats.Stats(profile)
+        sqlite, tk, python, _ = breakdown(stats)
+        if name in self.stats:
+            self.stats[name].add(stats)
+        else:
+            self.stats[name] = stats
+        entry = {
+            'at': datetime.now().strftime(TIME_FORMAT),
+            'action': name,
+            'wall_ms': round(wall * 1000, 2),
+            'cpu_ms': round(cpu * 1000, 2),
+            'sqlite_ms': round(sqlite * 1000, 2),
+            'tk_ms': round(tk * 1000, 2),
+            'python_ms': round(python * 1000, 2),
+            'memory_net_kb': round(memory_net / 1024, 1),
+            'memory_peak_kb': round(memory_peak / 1024, 1),
+            'tree_items': self.item_counter() if self.item_counter else {},
+        }
+        if failed:
+            entry['error'] = True
+        self.log.write(json.dumps(entry) + '\n')
+        self.log.flush()
+
+    def dump(self):
+        """
+        Menyimpan statistik kumulatif per aksi (.prof) beserta gabungannya (all.prof)
+        - Jika tracemalloc aktif, alokasi yang masih hidup ditulis ke memory_top.txt
+        - Mengembalikan daftar file yang ditulis
+        """
+        paths = []
+        combined = None
+        for name, stats in self.stats.items():
+            path = os.path.join(self.directory, file_name(name))
+            stats.dump_stats(path)
+            paths.append(path)
+            if combined is None:
+                combined = pstats.Stats(path)
+            else:
+                combined.add(path)
+        if combined is not None:
+            path = os.path.join(self.directory, COMBINED_NAME)
+            combined.dump_stats(path)
+            paths.append(path)
+
+        if self.memory and tracemalloc.is_tracing():
+            snapshot = tracemalloc.take_snapshot().filter_traces([
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+            ])
+            path = os.path.join(self.directory, MEMORY_NAME)
+            with open(path, 'w', encoding='utf-8') as handle:
+                handle.write(f"Alokasi terbesar yang masih hidup ({datetime.now().strftime(TIME_FORMAT)})\n")
+                for statistic in snapshot.statistics('lineno')[:MEMORY_TOP]:
+                    handle.write(f"{statistic}\n")
+            paths.append(path)
+        return paths
+
+    def close(self):
+        """Menulis dump terakhir, menutup log, dan menghentikan tracemalloc"""
+        if self.log.closed:
+            return []
+        paths = self.dump()
+        self.log.close()
+        if self.memory:
+            tracemalloc.stop()
+        return paths
+
+
+def load_log(directory):
+    """Membaca semua catatan aksi dari actions.jsonl"""
+    with open(os.path.join(directory, LOG_NAME), encoding='utf-8') as handle:
+        return [json.loads(line) for line in handle if line.strip()]
+
+
+def summarize(entries):
+    """
+    Ringkasan per aksi, diurutkan dari total waktu wall terbesar
+    - Mengembalikan daftar dict: action, calls, total_ms, mean_ms, max_ms,
+      sqlite_ms, tk_ms, python_ms (rata-rata), peak_kb (maks), items (terakhir)
+    """
+    grouped = {}
+    for entry in entries:
+        grouped.setdefault(entry['action'], []).append(entry)
+    summary = []
+    for action, rows in grouped.items():
+        calls = len(rows)
+        total = sum(row['wall_ms'] for row in rows)
+        summary.append({
+            'action': action,
+            'calls': calls,
+            'total_ms': total,
+            'mean_ms': total / calls,
+            'max_ms': max(row['wall_ms'] for row in rows),
+            'sqlite_ms': sum(row['sqlite_ms'] for row in rows) / calls,
+            'tk_ms': sum(row['tk_ms'] for row in rows) / calls,
+            'python_ms': sum(row['python_ms'] for row in rows) / calls,
+            'peak_kb': max(row['memory_peak_kb'] for row in rows),
+            'items': sum(rows[-1]['tree_items'].values()),
+        })
+    return sorted(summary, key=lambda row: row['total_ms'], reverse=True)
+
+
+def format_summary(summary):
+    """Memformat ringkasan aksi menjadi tabel teks"""
+    lines = [f"{'Aksi':<48} {'Kali':>5} {'Total ms':>10} {'Rata2':>9} {'Maks':>9} "
+             f"{'SQLite':>8} {'Tk':>8} {'Python':>8} {'Puncak KB':>10} {'Baris':>7}"]
+    for row in summary:
+        lines.append(f"{row['action'][:48]:<48} {row['calls']:>5} {row['total_ms']:>10.1f} "
+                     f"{row['mean_ms']:>9.1f} {row['max_ms']:>9.1f} {row['sqlite_ms']:>8.1f} "
+                     f"{row['tk_ms']:>8.1f} {row['python_ms']:>8.1f} {row['peak_kb']:>10.1f} {row['items']:>7}")
+    return '\n'.join(lines)
+
+
+def main():
+    """Menampilkan ringkasan profil aksi atau fungsi teratas satu aksi"""
+    parser = argparse.ArgumentParser(description="Ringkasan profil aksi antarmuka KRS")
+    parser.add_argument('directory', help="Direktori profil (argumen --profile pada main.py)")
+    parser.add_argument('--action', help="Tampilkan fungsi teratas untuk aksi ini (dari file .prof)")
+    parser.add_argument('--top', type=int, default=25, help="Jumlah fungsi yang ditampilkan")
+    parser.add_argument('--sort', default='cumulative', help="Kunci urut pstats (cumulative, tottime, ...)")
+    args = parser.parse_args()
+
+    if args.action:
+        stats = pstats.Stats(os.path.join(args.directory, file_name(args.action)))
+        stats.sort_stats(args.sort).print_stats(args.top)
+        return
+    print(format_summary(summarize(load_log(args.directory))))
+
+
+if __name__ == "__main__":
+    main()
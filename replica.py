@@ -0,0 +1,217 @@
+"""
+Modul replika baca (read replica) untuk laporan dan export
+- Node penulis menerbitkan salinan konsisten database secara berkala dengan
+  API backup (modul backup), ditulis ke file sementara lalu diganti nama
+  secara atomik
+- Workstation laporan membuka replika read-only lewat URI file:...?mode=ro
+  dengan mmap besar, sehingga query laporan tidak pernah berebut kunci
+  dengan penulisan KRS
+- Setiap replika mencatat waktu terbitnya, sehingga umur replika bisa ditampilkan
+"""
+import argparse
+import os
+import sqlite3
+import time
+from datetime import datetime
+
+import backup
+import database
+
+# Lokasi default database utama dan file replika
+DATABASE_PATH = 'krs_database.db'
+REPLICA_PATH = 'krs_replica.db'
+
+# Ukuran mmap untuk koneksi replika (byte)
+REPLICA_MMAP_SIZE = 256 * 1024 * 1024
+
+# Format waktu terbit replika
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+class ReplicaError(Exception):
+    """Kesalahan saat menerbitkan atau membuka replika"""
+
+
+def publish_replica(source_path=DATABASE_PATH, replica_path=REPLICA_PATH):
+    """
+    Menerbitkan replika baru dari database utama
+    - Salinan dibuat bertahap tanpa menahan penulis (backup.hot_backup)
+    - Waktu terbit dicatat di tabel replica_info pada salinan
+    - File lama diganti secara atomik; pembaca yang masih membuka file lama
+      tetap membaca salinan lama sampai membuka ulang
+    - Mengembalikan informasi replika (path, ukuran, durasi, waktu terbit)
+    """
+    temp_path = replica_path + '.tmp'
+    started = time.perf_counter()
+    try:
+        backup.hot_backup(source_path, temp_path)
+        published_at = datetime.now().strftime(TIME_FORMAT)
+        copy = sqlite3.connect(temp_path)
+        try:
+            copy.execute("PRAGMA journal_mode = DELETE")
+            copy.execute("CREATE TABLE IF NOT EXISTS replica_info (published_at TEXT NOT NULL, source TEXT)")
+            copy.execute("DELETE FROM replica_info")
+            copy.execute("INSERT INTO replica_info (published_at, source) VALUES (?, ?)",
+                         (published_at, os.path.abspath(source_path)))
+            copy.commit()
+            messages = [row[0] for row in copy.execute("PRAGMA quick_check")]
+        finally:
+            copy.close()
+        if messages != ['ok']:
+            raise ReplicaError("Replika rusak: " + "; ".join(messages[:5]))
+        os.replace(temp_path, replica_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    return {
+        'path': replica_path,
+        'size': os.path.getsize(replica_path),
+        'elapsed': time.perf_counter() - started,
+        'published_at': published_at,
+    }
+
+
+def open_replica(replica_path=REPLICA_PATH, mmap_size=REPLICA_MMAP_SIZE):
+    """
+    Membuka replika read-only dengan mmap besar
+    - check_same_thread=False agar bisa dipakai thread export (hanya baca)
+    """
+    if not os.path.exists(replica_path):
+        raise ReplicaError(f"Replika {replica_path} belum diterbitkan")
+    conn = sqlite3.connect(f"file:{replica_path}?mode=ro", uri=True, check_same_thread=False)
+    conn.execute(f"PRAGMA mmap_size = {int(mmap_size)}")
+    conn.execute("PRAGMA query_only = 1")
+    return conn
+
+
+def published_at(conn):
+    """Mengambil waktu terbit replika dari koneksi replika (None jika bukan replika)"""
+    try:
+        row = conn.execute("SELECT published_at FROM replica_info").fetchone()
+    except sqlite3.OperationalError:
+        return None
+    return datetime.strptime(row[0], TIME_FORMAT) if row else None
+
+
+def replica_age(replica_path=REPLICA_PATH):
+    """Umur replika di disk dalam detik (None jika belum ada)"""
+    if not os.path.exists(replica_path):
+        return None
+    conn = open_replica(replica_path)
+    try:
+        moment = published_at(conn)
+    finally:
+        conn.close()
+    return (datetime.now() - moment).total_seconds() if moment else None
+
+
+def publish_if_stale(source_path, replica_path, max_age):
+    """
+    Menerbitkan replika hanya jika belum ada atau lebih tua dari max_age detik
+    - Beberapa node penulis bisa menjadwalkan publikasi tanpa saling mengulang
+    - Mengembalikan informasi replika baru atau None jika replika masih segar
+    """
+    age = replica_age(replica_path)
+    if age is not None and age < max_age:
+        return None
+    return publish_replica(source_path, replica_path)
+
+
+class ReplicaReader:
+    """
+    Koneksi replika yang dibuka ulang otomatis saat replika baru diterbitkan
+    - connection() membandingkan identitas file (inode dan waktu ubah), jadi
+      pemeriksaan saat replika tidak berubah hanya berupa satu os.stat
+    """
+
+    def __init__(self, replica_path=REPLICA_PATH, mmap_size=REPLICA_MMAP_SIZE):
+        self.replica_path = replica_path
+        self.mmap_size = mmap_size
+        self.conn = None
+        self.identity = None
+        self.published_at = None
+
+    def _identity(self):
+        stat = os.stat(self.replica_path)
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def connection(self):
+        """Mengembalikan koneksi ke replika terbaru (melempar ReplicaError jika belum ada)"""
+        try:
+            identity = self._identity()
+        except OSError:
+            raise ReplicaError(f"Replika {self.replica_path} belum diterbitkan")
+        if identity != self.identity:
+            self.close()
+            self.conn = open_replica(self.replica_path, self.mmap_size)
+            self.identity = identity
+            self.published_at = published_at(self.conn)
+        return self.conn
+
+    def age(self):
+        """Umur replika yang sedang dibuka dalam detik (None jika belum dibuka)"""
+        if self.published_at is None:
+            return None
+        return (datetime.now() - self.published_at).total_seconds()
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+        self.conn = None
+        self.identity = None
+        self.published_at = None
+
+
+def format_age(seconds):
+    """Memformat umur replika menjadi teks singkat"""
+    if seconds is None:
+        return "belum ada replika"
+    if seconds < 60:
+        return f"{int(seconds)} detik lalu"
+    if seconds < 3600:
+        return f"{int(seconds // 60)} menit lalu"
+    return f"{seconds / 3600:.1f} jam lalu"
+
+
+def format_publish(info):
+    """Memformat informasi replika menjadi satu baris log"""
+    return (f"Replika {info['path']} diterbitkan {info['published_at']} "
+            f"({info['size'] / 1024:.1f} KB, {info['elapsed']:.2f} detik)")
+
+
+def main():
+    """Menerbitkan dan memeriksa replika dari command line"""
+    parser = argparse.ArgumentParser(description="Replika baca database KRS")
+    parser.add_argument('--database', help="Lokasi database: file, 'memory[:nama[=file]]', atau 'tmpfs:file' "
+                                           "(default: variabel KRS_DATABASE atau krs_database.db)")
+    parser.add_argument('--replica', default=REPLICA_PATH, help="File replika")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    subparsers.add_parser('publish', help="Terbitkan satu replika")
+
+    schedule_parser = subparsers.add_parser('schedule', help="Terbitkan replika berkala")
+    schedule_parser.add_argument('--interval', type=float, default=5, help="Interval (menit)")
+
+    subparsers.add_parser('age', help="Tampilkan umur replika")
+
+    args = parser.parse_args()
+
+    if args.command == 'age':
+        print(f"Replika {args.replica}: {format_age(replica_age(args.replica))}")
+        return
+
+    # Replika diterbitkan dari lokasi penyimpanan yang sama dengan aplikasi
+    storage = database.open_storage(args.database)
+    try:
+        if args.command == 'publish':
+            print(format_publish(publish_replica(storage.path, args.replica)))
+        else:
+            while True:
+                print(format_publish(publish_replica(storage.path, args.replica)))
+                time.sleep(args.interval * 60)
+    finally:
+        storage.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,364 @@
+"""
+Modul pergantian semester (rollover) berbasis himpunan
+- Semua mahasiswa naik satu semester, mahasiswa tingkat akhir ditandai lulus,
+  dan seluruh enrollment aktif ditutup dengan beberapa pernyataan UPDATE
+  dalam satu transaksi (bukan edit satu per satu lewat form)
+- Sebelum menulis, daftar mahasiswa dan enrollment yang terdampak disimpan per
+  run sehingga rollover terakhir bisa dibatalkan (rollback)
+- Tersedia pratinjau (dry run) dan laporan kemajuan per langkah
+"""
+import argparse
+import sqlite3
+import time
+from datetime import datetime
+
+import events
+import prerequisites
+
+# Lokasi default database KRS
+DATABASE_PATH = 'krs_database.db'
+
+# Semester akhir: mahasiswa pada semester ini (atau lebih) ditandai lulus saat rollover
+GRADUATION_SEMESTER = 8
+
+# Urutan semester dalam satu tahun akademik
+TERMS = ('Ganjil', 'Genap')
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+class RolloverError(Exception):
+    """Rollover atau pembatalannya tidak dapat dijalankan"""
+
+
+def init_schema(cursor):
+    """
+    Membuat tabel pencatat rollover dan kolom penanda kelulusan
+    - students.lulus_at: waktu ditandai lulus (NULL = masih aktif)
+    - rollover_runs: satu baris per rollover beserta semester sebelum/sesudah
+    - rollover_students / rollover_enrollments: baris yang diubah per run (untuk rollback)
+    - rollover_runs.archived_at: enrollment run sudah diarsipkan (modul maintenance),
+      sehingga run tersebut tidak bisa lagi di-rollback
+    """
+    cursor.execute("PRAGMA table_info(students)")
+    if 'lulus_at' not in [row[1] for row in cursor.fetchall()]:
+        cursor.execute("ALTER TABLE students ADD COLUMN lulus_at TEXT")
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS rollover_runs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,    -- Nomor run
+            started_at TEXT NOT NULL,                -- Waktu mulai
+            finished_at TEXT,                        -- Waktu selesai
+            from_year TEXT,                          -- Tahun akademik sebelum rollover
+            from_term TEXT,                          -- Semester (Ganjil/Genap) sebelum rollover
+            to_year TEXT,                            -- Tahun akademik sesudah rollover
+            to_term TEXT,                            -- Semester sesudah rollover
+            advanced INTEGER DEFAULT 0,              -- Jumlah mahasiswa naik semester
+            graduated INTEGER DEFAULT 0,             -- Jumlah mahasiswa ditandai lulus
+            closed INTEGER DEFAULT 0,                -- Jumlah enrollment aktif yang ditutup
+            actor TEXT,                              -- Pengguna yang menjalankan
+            rolled_back_at TEXT                      -- Waktu dibatalkan (NULL = berlaku)
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS rollover_students (
+            run_id INTEGER NOT NULL,                 -- Nomor run
+            student_id INTEGER NOT NULL,             -- ID mahasiswa
+            graduated INTEGER NOT NULL,              -- 1 = ditandai lulus, 0 = naik semester
+            PRIMARY KEY (run_id, student_id)
+        ) WITHOUT ROWID
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS rollover_enrollments (
+            run_id INTEGER NOT NULL,                 -- Nomor run
+            enrollment_id INTEGER NOT NULL,          -- ID enrollment yang ditutup
+            PRIMARY KEY (run_id, enrollment_id)
+        ) WITHOUT ROWID
+    """)
+    cursor.execute("PRAGMA table_info(rollover_runs)")
+    if 'archived_at' not in [row[1] for row in cursor.fetchall()]:
+        cursor.execute("ALTER TABLE rollover_runs ADD COLUMN archived_at TEXT")
+
+
+def _config(cursor, key, default=''):
+    cursor.execute("SELECT config_value FROM system_config WHERE config_key = ?", (key,))
+    row = cursor.fetchone()
+    return row[0] if row else default
+
+
+def _set_config(cursor, key, value):
+    cursor.execute("""
+        INSERT INTO system_config (config_key, config_value, updated_at)
+        VALUES (?, ?, CURRENT_TIMESTAMP)
+        ON CONFLICT(config_key) DO UPDATE SET
+            config_value = excluded.config_value,
+            updated_at = excluded.updated_at
+    """, (key, value))
+
+
+def graduation_semester(cursor):
+    """Semester akhir dari system_config (graduation_semester) atau GRADUATION_SEMESTER"""
+    try:
+        return int(_config(cursor, 'graduation_semester', GRADUATION_SEMESTER))
+    except ValueError:
+        return GRADUATION_SEMESTER
+
+
+def next_term(academic_year, term):
+    """
+    Menghitung semester berikutnya
+    - Ganjil 2024/2025 -> Genap 2024/2025 -> Ganjil 2025/2026
+    - Tahun akademik yang tidak berformat YYYY/YYYY dibiarkan apa adanya
+    """
+    if term != TERMS[-1]:
+        return academic_year, TERMS[(TERMS.index(term) + 1) if term in TERMS else 0]
+    try:
+        start, end = (int(part) for part in academic_year.split('/'))
+    except ValueError:
+        return academic_year, TERMS[0]
+    return f"{start + 1}/{end + 1}", TERMS[0]
+
+
+def preview(cursor):
+    """
+    Menghitung dampak rollover tanpa menulis apa pun (dry run)
+    - Mengembalikan dict: from_year, from_term, to_year, to_term, advanced,
+      graduated, closed, courses (mata kuliah yang terisi-nya dinolkan)
+    """
+    final = graduation_semester(cursor)
+    from_year = _config(cursor, 'academic_year')
+    from_term = _config(cursor, 'current_semester', TERMS[0])
+    to_year, to_term = next_term(from_year, from_term)
+    cursor.execute("""
+        SELECT COALESCE(SUM(semester < ?), 0), COALESCE(SUM(semester >= ?), 0)
+        FROM students WHERE lulus_at IS NULL
+    """, (final, final))
+    advanced, graduated = cursor.fetchone()
+    cursor.execute("SELECT COUNT(*) FROM enrollments WHERE status = 'aktif'")
+    closed = cursor.fetchone()[0]
+    cursor.execute("SELECT COUNT(*) FROM courses WHERE terisi <> 0")
+    courses = cursor.fetchone()[0]
+    return {
+        'from_year': from_year, 'from_term': from_term,
+        'to_year': to_year, 'to_term': to_term,
+        'advanced': advanced, 'graduated': graduated,
+        'closed': closed, 'courses': courses,
+    }
+
+
+def _run_steps(conn, steps, progress):
+    """
+    Menjalankan daftar (pesan, sql, parameter) dalam satu transaksi
+    - progress(nomor, total, pesan, jumlah_baris) dipanggil setelah tiap langkah
+    - Seluruh langkah dibatalkan jika salah satunya gagal
+    """
+    cursor = conn.cursor()
+    counts = []
+    for number, (message, query, params) in enumerate(steps, 1):
+        cursor.execute(query, params)
+        counts.append(cursor.rowcount)
+        if progress:
+            progress(number, len(steps), message, cursor.rowcount)
+    return counts
+
+
+def rollover(conn, progress=None, actor=None):
+    """
+    Menjalankan pergantian semester dalam satu transaksi
+    - Enrollment aktif ditutup sebagai 'selesai' (tercatat sebagai mata kuliah lulus
+      oleh trigger prasyarat) dan terisi semua mata kuliah dinolkan
+    - Mahasiswa pada semester akhir ditandai lulus, sisanya naik satu semester
+    - academic_year dan current_semester di system_config ikut maju
+    - Mengembalikan dict hasil preview() ditambah run_id dan elapsed (detik)
+    """
+    if conn.in_transaction:
+        conn.commit()
+
+    started = time.perf_counter()
+    now = datetime.now().strftime(TIME_FORMAT)
+    actor = actor or events.default_actor()
+    cursor = conn.cursor()
+    cursor.execute("BEGIN IMMEDIATE")
+    try:
+        summary = preview(cursor)
+        final = graduation_semester(cursor)
+        cursor.execute("""
+            INSERT INTO rollover_runs (started_at, from_year, from_term, to_year, to_term, actor)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, (now, summary['from_year'], summary['from_term'], summary['to_year'], summary['to_term'], actor))
+        run_id = cursor.lastrowid
+        events.set_context(cursor, 'rollover', actor)
+
+        _run_steps(conn, [
+            ("Mencatat mahasiswa yang terdampak", """
+                INSERT INTO rollover_students (run_id, student_id, graduated)
+                SELECT ?, id, semester >= ? FROM students WHERE lulus_at IS NULL
+            """, (run_id, final)),
+            ("Mencatat enrollment aktif", """
+                INSERT INTO rollover_enrollments (run_id, enrollment_id)
+                SELECT ?, id FROM enrollments WHERE status = 'aktif'
+            """, (run_id,)),
+            ("Menutup enrollment aktif", """
+                UPDATE enrollments SET status = ? WHERE status = 'aktif'
+            """, (prerequisites.STATUS_SELESAI,)),
+            ("Mengosongkan terisi mata kuliah", """
+                UPDATE courses SET terisi = 0 WHERE terisi <> 0
+            """, ()),
+            ("Menandai mahasiswa lulus", """
+                UPDATE students SET lulus_at = ? WHERE lulus_at IS NULL AND semester >= ?
+            """, (now, final)),
+            ("Menaikkan semester mahasiswa", """
+                UPDATE students SET semester = semester + 1 WHERE lulus_at IS NULL
+            """, ()),
+        ], progress)
+
+        _set_config(cursor, 'academic_year', summary['to_year'])
+        _set_config(cursor, 'current_semester', summary['to_term'])
+        cursor.execute("""
+            UPDATE rollover_runs SET finished_at = ?, advanced = ?, graduated = ?, closed = ?
+            WHERE id = ?
+        """, (datetime.now().strftime(TIME_FORMAT), summary['advanced'], summary['graduated'],
+              summary['closed'], run_id))
+        events.clear_context(cursor)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    summary['run_id'] = run_id
+    summary['elapsed'] = time.perf_counter() - started
+    return summary
+
+
+def last_run(cursor):
+    """Rollover terakhir yang masih berlaku sebagai tuple baris rollover_runs (None jika tidak ada)"""
+    cursor.execute("""
+        SELECT id, started_at, from_year, from_term, to_year, to_term, advanced, graduated, closed
+        FROM rollover_runs WHERE rolled_back_at IS NULL AND finished_at IS NOT NULL
+        ORDER BY id DESC LIMIT 1
+    """)
+    return cursor.fetchone()
+
+
+def rollback(conn, progress=None, actor=None):
+    """
+    Membatalkan rollover terakhir yang masih berlaku
+    - Semester mahasiswa diturunkan kembali, tanda lulus dihapus, dan enrollment
+      yang ditutup dibuka kembali (terisi mata kuliahnya dihitung ulang)
+    - Enrollment yang sudah diubah atau dihapus setelah rollover tidak disentuh, begitu
+      pula enrollment yang mata kuliahnya sudah diambil ulang (aktif) sejak rollover
+    - Run yang enrollment-nya sudah diarsipkan ditolak (RolloverError)
+    - Mengembalikan dict berisi run_id, advanced, graduated, reopened, elapsed
+    """
+    if conn.in_transaction:
+        conn.commit()
+
+    started = time.perf_counter()
+    cursor = conn.cursor()
+    cursor.execute("BEGIN IMMEDIATE")
+    try:
+        run = last_run(cursor)
+        if run is None:
+            raise RolloverError("Belum ada rollover yang bisa dibatalkan")
+        run_id, _, from_year, from_term = run[:4]
+        cursor.execute("SELECT archived_at FROM rollover_runs WHERE id = ?", (run_id,))
+        archived_at = cursor.fetchone()[0]
+        if archived_at:
+            raise RolloverError(f"Enrollment rollover #{run_id} sudah diarsipkan pada {archived_at}; "
+                                "rollback tidak bisa dilakukan")
+        events.set_context(cursor, 'rollback', actor)
+
+        counts = _run_steps(conn, [
+            ("Menurunkan semester mahasiswa", """
+                UPDATE students SET semester = semester - 1
+                WHERE lulus_at IS NULL
+                  AND id IN (SELECT student_id FROM rollover_students WHERE run_id = ? AND graduated = 0)
+            """, (run_id,)),
+            ("Menghapus tanda lulus", """
+                UPDATE students SET lulus_at = NULL
+                WHERE id IN (SELECT student_id FROM rollover_students WHERE run_id = ? AND graduated = 1)
+            """, (run_id,)),
+            # Mata kuliah yang sudah diambil ulang sejak rollover tidak dibuka dua kali
+            ("Membuka kembali enrollment", """
+                UPDATE enrollments SET status = 'aktif'
+                WHERE status = ?
+                  AND id IN (SELECT enrollment_id FROM rollover_enrollments WHERE run_id = ?)
+                  AND NOT EXISTS (SELECT 1 FROM enrollments aktif
+                                  WHERE aktif.student_id = enrollments.student_id
+                                    AND aktif.course_id = enrollments.course_id
+                                    AND aktif.status = 'aktif')
+            """, (prerequisites.STATUS_SELESAI, run_id)),
+            ("Menghitung ulang terisi mata kuliah", """
+                UPDATE courses SET terisi = (
+                    SELECT COUNT(*) FROM enrollments e
+                    WHERE e.course_id = courses.id AND e.status = 'aktif')
+                WHERE id IN (SELECT e.course_id FROM rollover_enrollments r
+                             JOIN enrollments e ON e.id = r.enrollment_id
+                             WHERE r.run_id = ?)
+            """, (run_id,)),
+        ], progress)
+
+        _set_config(cursor, 'academic_year', from_year)
+        _set_config(cursor, 'current_semester', from_term)
+        cursor.execute("UPDATE rollover_runs SET rolled_back_at = ? WHERE id = ?",
+                       (datetime.now().strftime(TIME_FORMAT), run_id))
+        events.clear_context(cursor)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    return {
+        'run_id': run_id,
+        'advanced': counts[0],
+        'graduated': counts[1],
+        'reopened': counts[2],
+        'elapsed': time.perf_counter() - started,
+    }
+
+
+def format_preview(summary):
+    """Menyusun ringkasan dampak rollover yang mudah dibaca"""
+    return (f"{summary['from_term']} {summary['from_year']} -> {summary['to_term']} {summary['to_year']}\n"
+            f"Mahasiswa naik semester : {summary['advanced']}\n"
+            f"Mahasiswa ditandai lulus: {summary['graduated']}\n"
+            f"Enrollment aktif ditutup: {summary['closed']}\n"
+            f"Mata kuliah dikosongkan : {summary['courses']}")
+
+
+def format_progress(number, total, message, rows):
+    """Memformat satu baris laporan kemajuan"""
+    return f"[{number}/{total}] {message}: {rows} baris"
+
+
+def main():
+    """Menjalankan, mempratinjau, atau membatalkan rollover dari command line"""
+    parser = argparse.ArgumentParser(description="Pergantian semester KRS berbasis himpunan")
+    parser.add_argument('--database', default=DATABASE_PATH, help="File database KRS")
+    parser.add_argument('--dry-run', action='store_true', help="Tampilkan dampak tanpa menyimpan")
+    parser.add_argument('--rollback', action='store_true', help="Batalkan rollover terakhir")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.database)
+    try:
+        init_schema(conn.cursor())
+        conn.commit()
+
+        def report(*step):
+            print(format_progress(*step))
+
+        if args.rollback:
+            result = rollback(conn, report)
+            print(f"Rollover #{result['run_id']} dibatalkan dalam {result['elapsed']:.2f} detik")
+        elif args.dry_run:
+            print(format_preview(preview(conn.cursor())))
+            print("(dry run: tidak ada perubahan disimpan)")
+        else:
+            result = rollover(conn, report)
+            print(format_preview(result))
+            print(f"Rollover #{result['run_id']} selesai dalam {result['elapsed']:.2f} detik")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,345 @@
+"""
+Modul ruang kuliah dan alokasi ruang otomatis
+- Tabel rooms menyimpan kapasitas dan jenis ruang (kelas, lab, aula)
+- Jadwal mata kuliah diurai menjadi interval waktu per hari; alokasi memakai
+  pewarnaan graf interval (interval partitioning): kelas diproses urut jam
+  mulai, ruang dilepas begitu kelas sebelumnya selesai, dan setiap kelas
+  mendapat ruang kosong terkecil yang memuat kapasitasnya (best fit)
+- Kelas yang tidak mendapat ruang dilaporkan beserta alasannya (tidak ada ruang
+  sebesar itu, atau semua ruang yang cukup sedang dipakai kelas lain)
+- Mata kuliah berkelas paralel (modul sections) dialokasikan per kelas dengan
+  jadwal dan kapasitas kelasnya masing-masing
+- Hasil alokasi disimpan sekaligus dalam satu transaksi
+"""
+import argparse
+import bisect
+import csv
+import heapq
+import time
+from datetime import datetime
+
+import database
+from jadwal import HARI, parse_jadwal
+
+# Lokasi default database KRS
+DATABASE_PATH = 'krs_database.db'
+
+# Jenis ruang
+JENIS_KELAS = 'kelas'
+JENIS_LAB = 'lab'
+JENIS_AULA = 'aula'
+JENIS_RUANG = (JENIS_KELAS, JENIS_LAB, JENIS_AULA)
+
+# Ruang default: (kode_ruang, nama, kapasitas, jenis)
+DEFAULT_ROOMS = [
+    ('A101', 'Gedung A 101', 40, JENIS_KELAS),
+    ('A102', 'Gedung A 102', 40, JENIS_KELAS),
+    ('A103', 'Gedung A 103', 35, JENIS_KELAS),
+    ('A201', 'Gedung A 201', 35, JENIS_KELAS),
+    ('A202', 'Gedung A 202', 30, JENIS_KELAS),
+    ('A203', 'Gedung A 203', 30, JENIS_KELAS),
+    ('B101', 'Gedung B 101', 50, JENIS_KELAS),
+    ('B102', 'Gedung B 102', 45, JENIS_KELAS),
+    ('LAB1', 'Laboratorium Komputer 1', 40, JENIS_LAB),
+    ('LAB2', 'Laboratorium Komputer 2', 30, JENIS_LAB),
+    ('AULA', 'Aula Utama', 120, JENIS_AULA),
+]
+
+
+class RoomError(Exception):
+    """Data ruang tidak valid"""
+
+
+def init_schema(cursor):
+    """
+    Membuat tabel ruang dan hasil alokasi ruang
+    - rooms: kapasitas dan jenis ruang (diisi ruang default jika masih kosong)
+    - room_assignments: ruang untuk setiap mata kuliah atau kelas paralel (hasil alokasi terakhir);
+      tabel lama berkunci course_id dipindahkan ke bentuk baru tanpa kehilangan isinya
+    - courses.jenis_ruang: jenis ruang yang dibutuhkan (NULL = jenis apa pun)
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS rooms (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,    -- ID unik ruang
+            kode_ruang TEXT UNIQUE NOT NULL,         -- Kode ruang (harus unik)
+            nama TEXT NOT NULL,                      -- Nama ruang
+            kapasitas INTEGER NOT NULL,              -- Jumlah kursi
+            jenis TEXT NOT NULL DEFAULT 'kelas',     -- Jenis ruang (kelas/lab/aula)
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP -- Waktu pembuatan data
+        )
+    """)
+    cursor.execute("PRAGMA table_info(room_assignments)")
+    columns = [row[1] for row in cursor.fetchall()]
+    if columns and 'section_id' not in columns:
+        cursor.execute("CREATE TEMP TABLE room_assignments_lama AS SELECT * FROM room_assignments")
+        cursor.execute("DROP TABLE room_assignments")
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS room_assignments (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,    -- ID alokasi
+            course_id INTEGER NOT NULL,              -- ID mata kuliah
+            section_id INTEGER,                      -- ID kelas paralel (NULL = tanpa kelas paralel)
+            room_id INTEGER NOT NULL,                -- ID ruang
+            assigned_at TEXT NOT NULL,               -- Waktu alokasi
+            FOREIGN KEY (course_id) REFERENCES courses (id),
+            FOREIGN KEY (room_id) REFERENCES rooms (id)
+        )
+    """)
+    if columns and 'section_id' not in columns:
+        cursor.execute("""
+            INSERT INTO room_assignments (course_id, room_id, assigned_at)
+            SELECT course_id, room_id, assigned_at FROM temp.room_assignments_lama
+        """)
+        cursor.execute("DROP TABLE temp.room_assignments_lama")
+    cursor.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_room_assignments_unit
+        ON room_assignments (course_id, COALESCE(section_id, 0))
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_room_assignments_room ON room_assignments (room_id)")
+    cursor.execute("PRAGMA table_info(courses)")
+    if 'jenis_ruang' not in [row[1] for row in cursor.fetchall()]:
+        cursor.execute("ALTER TABLE courses ADD COLUMN jenis_ruang TEXT")
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_room_course_delete AFTER DELETE ON courses
+        BEGIN
+            DELETE FROM room_assignments WHERE course_id = OLD.id;
+        END
+    """)
+
+    cursor.execute("SELECT COUNT(*) FROM rooms")
+    if cursor.fetchone()[0] == 0:
+        cursor.executemany("INSERT INTO rooms (kode_ruang, nama, kapasitas, jenis) VALUES (?, ?, ?, ?)",
+                           DEFAULT_ROOMS)
+
+
+def import_rooms(conn, path):
+    """
+    Mengimpor ruang dari CSV berkolom kode_ruang, nama, kapasitas[, jenis]
+    - Ruang dengan kode yang sudah ada diperbarui
+    - Mengembalikan jumlah baris yang diimpor
+    """
+    with open(path, newline='', encoding='utf-8') as handle:
+        reader = csv.DictReader(handle)
+        missing = [column for column in ('kode_ruang', 'nama', 'kapasitas')
+                   if column not in (reader.fieldnames or [])]
+        if missing:
+            raise RoomError(f"Kolom wajib tidak ada: {', '.join(missing)}")
+        rows = []
+        for line, row in enumerate(reader, 2):
+            jenis = (row.get('jenis') or JENIS_KELAS).strip().lower()
+            if jenis not in JENIS_RUANG:
+                raise RoomError(f"Baris {line}: jenis ruang harus salah satu dari {', '.join(JENIS_RUANG)}")
+            try:
+                rows.append((row['kode_ruang'].strip(), row['nama'].strip(), int(row['kapasitas']), jenis))
+            except ValueError:
+                raise RoomError(f"Baris {line}: kapasitas harus berupa angka")
+
+    cursor = conn.cursor()
+    try:
+        cursor.executemany("""
+            INSERT INTO rooms (kode_ruang, nama, kapasitas, jenis) VALUES (?, ?, ?, ?)
+            ON CONFLICT(kode_ruang) DO UPDATE SET
+                nama = excluded.nama,
+                kapasitas = excluded.kapasitas,
+                jenis = excluded.jenis
+        """, rows)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return len(rows)
+
+
+def load_problem(cursor):
+    """
+    Memuat ruang dan kelas yang perlu dialokasikan
+    - rooms: daftar (id, kode_ruang, kapasitas, jenis)
+    - sections: daftar ((course_id, section_id), kode_mk, jadwal, kapasitas, jenis_ruang) yang masih
+      ditawarkan; mata kuliah berkelas paralel muncul sekali per kelas (kode_mk-kelas) dengan jadwal
+      dan kapasitas kelasnya, mata kuliah lain sekali dengan section_id None
+    """
+    cursor.execute("SELECT id, kode_ruang, kapasitas, jenis FROM rooms ORDER BY kapasitas, kode_ruang")
+    rooms = cursor.fetchall()
+    cursor.execute("""
+        SELECT c.id, NULL, c.kode_mk, c.jadwal, c.kapasitas, c.jenis_ruang FROM courses c
+        WHERE c.retired_at IS NULL
+          AND NOT EXISTS (SELECT 1 FROM course_sections cs WHERE cs.course_id = c.id)
+        UNION ALL
+        SELECT c.id, cs.id, c.kode_mk || '-' || cs.kelas, cs.jadwal, cs.kapasitas, c.jenis_ruang
+        FROM course_sections cs
+        JOIN courses c ON c.id = cs.course_id
+        WHERE c.retired_at IS NULL
+        ORDER BY 3
+    """)
+    return rooms, [((row[0], row[1]),) + row[2:] for row in cursor.fetchall()]
+
+
+def _fits(room, kapasitas, jenis):
+    return room[2] >= kapasitas and (jenis is None or room[3] == jenis)
+
+
+def solve(rooms, sections):
+    """
+    Mengalokasikan ruang dengan interval partitioning dan best fit kapasitas
+    - rooms: daftar (id, kode_ruang, kapasitas, jenis)
+    - sections: daftar (kunci, kode_mk, jadwal, kapasitas, jenis_ruang); kunci berupa nilai
+      apa pun yang unik per kelas, mis. (course_id, section_id) dari load_problem
+    - Mengembalikan (assignment {kunci: room_id}, infeasible [(kunci, alasan)],
+      unscheduled [kunci tanpa slot waktu])
+    - Kompleksitas O(n log n + n * r) untuk n kelas dan r ruang
+    """
+    by_capacity = sorted(rooms, key=lambda room: (room[2], room[1]))
+    largest = {}
+    for room in rooms:
+        for jenis in (None, room[3]):
+            largest[jenis] = max(largest.get(jenis, 0), room[2])
+
+    slots, unscheduled = [], []
+    for section in sections:
+        slot = parse_jadwal(section[2])
+        if slot is None:
+            unscheduled.append(section[0])
+        else:
+            # Kelas besar lebih dulu jika mulai bersamaan, agar tidak kalah ruang oleh kelas kecil
+            slots.append((slot[0], slot[1], -section[3], section[1], slot[2], section))
+    slots.sort()
+
+    assignment, infeasible = {}, []
+    day = None
+    for hari, mulai, _, _, selesai, section in slots:
+        if hari != day:
+            day = hari
+            free = [(room[2], room[1], room) for room in by_capacity]
+            busy = []   # heap (selesai, kode_ruang, ruang, section)
+        # Ruang yang kelasnya sudah selesai kembali kosong
+        while busy and busy[0][0] <= mulai:
+            _, _, room, _ = heapq.heappop(busy)
+            bisect.insort(free, (room[2], room[1], room))
+
+        key, kode_mk, jadwal, kapasitas, jenis = section
+        index = bisect.bisect_left(free, (kapasitas,))
+        while index < len(free) and not _fits(free[index][2], kapasitas, jenis):
+            index += 1
+        if index < len(free):
+            room = free.pop(index)[2]
+            assignment[key] = room[0]
+            heapq.heappush(busy, (selesai, room[1], room, section))
+            continue
+
+        label = f"ruang {jenis}" if jenis else "ruang"
+        if kapasitas > largest.get(jenis, 0):
+            reason = f"tidak ada {label} berkapasitas >= {kapasitas}"
+        else:
+            holders = sorted(held[3][1] for held in busy if _fits(held[2], kapasitas, jenis))
+            reason = (f"semua {label} berkapasitas >= {kapasitas} terpakai pada {jadwal}"
+                      + (f" ({', '.join(holders)})" if holders else ""))
+        infeasible.append((key, reason))
+    return assignment, infeasible, unscheduled
+
+
+def assign_rooms(conn, dry_run=False):
+    """
+    Menjalankan alokasi ruang untuk semua mata kuliah yang ditawarkan
+    - Mata kuliah berkelas paralel mendapat satu ruang per kelas
+    - Hasil menggantikan alokasi sebelumnya dalam satu transaksi (executemany)
+    - dry_run=True hanya menghitung tanpa menyimpan
+    - Mengembalikan dict: assigned, infeasible [(kode_mk, jadwal, alasan)],
+      unscheduled [kode_mk], peak {hari: jumlah ruang terpakai maksimum}, elapsed
+    """
+    started = time.perf_counter()
+    cursor = conn.cursor()
+    rooms, sections = load_problem(cursor)
+    assignment, infeasible, unscheduled = solve(rooms, sections)
+
+    if not dry_run:
+        assigned_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        try:
+            cursor.execute("DELETE FROM room_assignments")
+            cursor.executemany("""
+                INSERT INTO room_assignments (course_id, section_id, room_id, assigned_at) VALUES (?, ?, ?, ?)
+            """, [(course_id, section_id, room_id, assigned_at)
+                  for (course_id, section_id), room_id in assignment.items()])
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+    by_key = {section[0]: section for section in sections}
+    return {
+        'assigned': len(assignment),
+        'infeasible': [(by_key[key][1], by_key[key][2], reason) for key, reason in infeasible],
+        'unscheduled': [by_key[key][1] for key in unscheduled],
+        'peak': peak_usage([by_key[key] for key in assignment]),
+        'elapsed': time.perf_counter() - started,
+    }
+
+
+def peak_usage(sections):
+    """Jumlah ruang terpakai bersamaan paling banyak per hari (clique terbesar graf interval)"""
+    events = []
+    for section in sections:
+        slot = parse_jadwal(section[2])
+        if slot:
+            events.append((slot[0], slot[1], 1))
+            events.append((slot[0], slot[2], -1))
+    peak, current = {}, {}
+    # Selesai (-1) diurutkan sebelum mulai (+1) pada menit yang sama
+    for hari, _, delta in sorted(events):
+        current[hari] = current.get(hari, 0) + delta
+        peak[HARI[hari]] = max(peak.get(HARI[hari], 0), current[hari])
+    return peak
+
+
+def room_schedule(cursor):
+    """
+    Alokasi ruang tersimpan: (kode_ruang, nama, kapasitas, kode_mk, nama_mk, jadwal, kapasitas_mk)
+    - Alokasi kelas paralel ditampilkan sebagai kode_mk-kelas dengan jadwal dan kapasitas kelasnya
+    """
+    cursor.execute("""
+        SELECT r.kode_ruang, r.nama, r.kapasitas,
+               c.kode_mk || COALESCE('-' || cs.kelas, ''), c.nama_mk,
+               COALESCE(cs.jadwal, c.jadwal), COALESCE(cs.kapasitas, c.kapasitas)
+        FROM room_assignments a
+        JOIN rooms r ON r.id = a.room_id
+        JOIN courses c ON c.id = a.course_id
+        LEFT JOIN course_sections cs ON cs.id = a.section_id
+        ORDER BY r.kode_ruang, 6
+    """)
+    return cursor.fetchall()
+
+
+def format_result(result):
+    """Menyusun ringkasan hasil alokasi ruang"""
+    lines = [f"Kelas mendapat ruang: {result['assigned']}, tidak mendapat ruang: {len(result['infeasible'])}, "
+             f"tanpa slot waktu: {len(result['unscheduled'])} ({result['elapsed'] * 1000:.0f} ms)"]
+    if result['peak']:
+        lines.append("Ruang terpakai bersamaan: " +
+                     ", ".join(f"{hari} {count}" for hari, count in result['peak'].items()))
+    for kode_mk, jadwal, reason in result['infeasible']:
+        lines.append(f"! {kode_mk} ({jadwal}): {reason}")
+    return '\n'.join(lines)
+
+
+def main():
+    """Mengalokasikan ruang dari command line"""
+    parser = argparse.ArgumentParser(description="Alokasi ruang kuliah (pewarnaan graf interval)")
+    parser.add_argument('--database', help="Lokasi database: file, 'memory[:nama[=file]]', atau 'tmpfs:file' "
+                                           "(default: variabel KRS_DATABASE atau krs_database.db)")
+    parser.add_argument('--import-rooms', metavar='CSV', help="Impor ruang dari CSV sebelum alokasi")
+    parser.add_argument('--dry-run', action='store_true', help="Hitung tanpa menyimpan")
+    args = parser.parse_args()
+
+    storage = database.open_storage(args.database)
+    conn = storage.connect()
+    try:
+        database.init_database(conn)
+        conn.commit()
+        if args.import_rooms:
+            print(f"Ruang diimpor: {import_rooms(conn, args.import_rooms)}")
+        print(format_result(assign_rooms(conn, args.dry_run)))
+    finally:
+        conn.close()
+        storage.close()
+
+
+if __name__ == "__main__":
+    main()
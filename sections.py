@@ -0,0 +1,378 @@
+"""
+Modul kelas paralel (section) untuk mata kuliah besar
+- Satu kode_mk bisa punya beberapa kelas (A, B, ...) dengan jadwal, dosen, dan
+  kapasitas masing-masing; courses.kapasitas menjadi jumlah kapasitas kelasnya
+  (dijaga trigger, sehingga tidak bisa ditimpa lewat katalog)
+- Pendaftaran menempatkan mahasiswa di kelas paling sepi yang tidak bentrok
+  dengan jadwalnya (lookup berindeks course_sections (course_id, terisi))
+- Jumlah terisi per kelas dijaga trigger di enrollments, sehingga semua jalur
+  (pendaftaran, pembatalan, undo, pergantian semester) tetap konsisten; insert
+  tanpa section_id (mis. alokasi batch, undo) otomatis masuk kelas paling sepi
+  tanpa pemeriksaan bentrok (bentrok seperti ini dilaporkan oleh audit)
+- Mata kuliah tanpa kelas paralel berjalan seperti biasa (section_id NULL)
+"""
+import argparse
+import sqlite3
+
+import database
+import lecturers
+import models
+from jadwal import bentrok, parse_jadwal
+
+# Lokasi default database KRS
+DATABASE_PATH = 'krs_database.db'
+
+# Nama kelas pertama saat mata kuliah dipecah menjadi kelas paralel
+FIRST_SECTION = 'A'
+
+# Kelas paling sepi untuk mata kuliah NEW.course_id (dipakai trigger)
+_LEAST_FILLED = """
+    SELECT id FROM course_sections WHERE course_id = NEW.course_id
+    ORDER BY terisi >= kapasitas, terisi, id LIMIT 1
+"""
+
+SECTION_TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_section_enroll_insert AFTER INSERT ON enrollments
+    WHEN NEW.section_id IS NOT NULL AND NEW.status = 'aktif'
+    BEGIN
+        UPDATE course_sections SET terisi = terisi + 1 WHERE id = NEW.section_id;
+    END
+    """,
+    # Insert tanpa kelas pada mata kuliah berkelas paralel: masuk kelas paling sepi
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_section_enroll_default AFTER INSERT ON enrollments
+    WHEN NEW.section_id IS NULL AND NEW.status = 'aktif'
+     AND EXISTS (SELECT 1 FROM course_sections WHERE course_id = NEW.course_id)
+    BEGIN
+        UPDATE enrollments SET section_id = ({_LEAST_FILLED}) WHERE id = NEW.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_section_enroll_move AFTER UPDATE OF section_id ON enrollments
+    WHEN NEW.status = 'aktif' AND OLD.section_id IS NOT NEW.section_id
+    BEGIN
+        UPDATE course_sections SET terisi = MAX(terisi - 1, 0) WHERE id = OLD.section_id;
+        UPDATE course_sections SET terisi = terisi + 1 WHERE id = NEW.section_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_section_enroll_delete AFTER DELETE ON enrollments
+    WHEN OLD.section_id IS NOT NULL AND OLD.status = 'aktif'
+    BEGIN
+        UPDATE course_sections SET terisi = MAX(terisi - 1, 0) WHERE id = OLD.section_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_section_enroll_status AFTER UPDATE OF status ON enrollments
+    WHEN NEW.section_id IS NOT NULL AND (OLD.status = 'aktif') <> (NEW.status = 'aktif')
+    BEGIN
+        UPDATE course_sections
+        SET terisi = MAX(terisi + CASE WHEN NEW.status = 'aktif' THEN 1 ELSE -1 END, 0)
+        WHERE id = NEW.section_id;
+    END
+    """,
+    # Kapasitas mata kuliah = jumlah kapasitas kelas paralelnya
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_section_capacity_insert AFTER INSERT ON course_sections
+    BEGIN
+        UPDATE courses SET kapasitas = (SELECT SUM(kapasitas) FROM course_sections WHERE course_id = NEW.course_id)
+        WHERE id = NEW.course_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_section_capacity_update AFTER UPDATE OF kapasitas ON course_sections
+    BEGIN
+        UPDATE courses SET kapasitas = (SELECT SUM(kapasitas) FROM course_sections WHERE course_id = NEW.course_id)
+        WHERE id = NEW.course_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_section_capacity_delete AFTER DELETE ON course_sections
+    BEGIN
+        UPDATE courses SET kapasitas = COALESCE(
+            (SELECT SUM(kapasitas) FROM course_sections WHERE course_id = OLD.course_id), courses.kapasitas)
+        WHERE id = OLD.course_id;
+    END
+    """,
+    # Kapasitas mata kuliah berkelas paralel hanya bisa diubah lewat kelasnya
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_section_capacity_guard BEFORE UPDATE OF kapasitas ON courses
+    WHEN EXISTS (SELECT 1 FROM course_sections WHERE course_id = NEW.id)
+     AND NEW.kapasitas IS NOT (SELECT SUM(kapasitas) FROM course_sections WHERE course_id = NEW.id)
+    BEGIN
+        SELECT RAISE(ABORT, 'Kapasitas mata kuliah berkelas paralel diatur per kelas');
+    END
+    """,
+    # Alokasi ruang kelas yang dihapus ikut dilepas (modul rooms)
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_section_room_delete AFTER DELETE ON course_sections
+    BEGIN
+        DELETE FROM room_assignments WHERE section_id = OLD.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_section_course_delete AFTER DELETE ON courses
+    BEGIN
+        DELETE FROM course_sections WHERE course_id = OLD.id;
+    END
+    """,
+]
+
+
+class SectionError(Exception):
+    """Kelas paralel tidak valid atau tidak ada kelas yang bisa ditempati"""
+
+
+def init_schema(cursor):
+    """
+    Membuat tabel course_sections, kolom enrollments.section_id, indeks, dan trigger
+    - Indeks (course_id, terisi) dipakai mencari kelas paling sepi
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS course_sections (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,    -- ID unik kelas
+            course_id INTEGER NOT NULL,              -- ID mata kuliah
+            kelas TEXT NOT NULL,                     -- Nama kelas (A, B, ...)
+            jadwal TEXT NOT NULL,                    -- Jadwal kelas
+            dosen TEXT NOT NULL,                     -- Nama dosen pengampu kelas
+            lecturer_id INTEGER,                     -- ID dosen (NULL jika belum terdaftar)
+            kapasitas INTEGER NOT NULL,              -- Kapasitas kelas
+            terisi INTEGER NOT NULL DEFAULT 0,       -- Jumlah peserta aktif (dijaga trigger)
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP, -- Waktu pembuatan data
+            UNIQUE (course_id, kelas),
+            FOREIGN KEY (course_id) REFERENCES courses (id),
+            FOREIGN KEY (lecturer_id) REFERENCES lecturers (id)
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_course_sections_fill ON course_sections (course_id, terisi)")
+    cursor.execute("PRAGMA table_info(enrollments)")
+    if 'section_id' not in [row[1] for row in cursor.fetchall()]:
+        cursor.execute("ALTER TABLE enrollments ADD COLUMN section_id INTEGER REFERENCES course_sections (id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_enrollments_section ON enrollments (section_id)")
+    for trigger in SECTION_TRIGGERS:
+        cursor.execute(trigger)
+
+
+def list_sections(cursor, course_id):
+    """Kelas paralel mata kuliah: (id, kelas, jadwal, dosen, kapasitas, terisi), urut nama kelas"""
+    cursor.execute("""
+        SELECT id, kelas, jadwal, dosen, kapasitas, terisi FROM course_sections
+        WHERE course_id = ? ORDER BY kelas
+    """, (course_id,))
+    return cursor.fetchall()
+
+
+def _lecturer(cursor, dosen):
+    """Nama tampilan dan ID dosen (nama apa adanya jika dosen belum terdaftar)"""
+    found = lecturers.find_lecturer(cursor, dosen)
+    return (found[1], found[0]) if found else (dosen, None)
+
+
+def _validate(jadwal, kapasitas):
+    if parse_jadwal(jadwal) is None:
+        raise SectionError(f"Jadwal '{jadwal}' tidak valid (contoh: 'Senin 08:00-10:30')")
+    if kapasitas <= 0:
+        raise SectionError("Kapasitas kelas harus lebih dari 0")
+
+
+def add_section(conn, course, kelas, jadwal, dosen, kapasitas):
+    """
+    Menambah kelas paralel pada mata kuliah
+    - Kelas pertama kali: jadwal, dosen, dan kapasitas mata kuliah menjadi kelas A
+      dan peserta aktifnya dipindahkan ke sana, lalu kelas baru ditambahkan
+    - Mengembalikan ID kelas baru
+    """
+    kelas = kelas.strip().upper()
+    _validate(jadwal, kapasitas)
+    cursor = conn.cursor()
+    try:
+        if not list_sections(cursor, course.id):
+            cursor.execute("SELECT jadwal, dosen, kapasitas, lecturer_id FROM courses WHERE id = ?", (course.id,))
+            first_jadwal, first_dosen, first_kapasitas, first_lecturer = cursor.fetchone()
+            if kelas == FIRST_SECTION:
+                raise SectionError(f"Kelas {FIRST_SECTION} dibuat otomatis dari jadwal mata kuliah saat ini")
+            cursor.execute("""
+                INSERT INTO course_sections (course_id, kelas, jadwal, dosen, lecturer_id, kapasitas)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, (course.id, FIRST_SECTION, first_jadwal, first_dosen, first_lecturer, first_kapasitas))
+            cursor.execute("""
+                UPDATE enrollments SET section_id = ? WHERE course_id = ? AND status = 'aktif' AND section_id IS NULL
+            """, (cursor.lastrowid, course.id))
+
+        nama, lecturer_id = _lecturer(cursor, dosen)
+        cursor.execute("""
+            INSERT INTO course_sections (course_id, kelas, jadwal, dosen, lecturer_id, kapasitas)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, (course.id, kelas, jadwal, nama, lecturer_id, kapasitas))
+        section_id = cursor.lastrowid
+        conn.commit()
+    except sqlite3.IntegrityError:
+        conn.rollback()
+        raise SectionError(f"Kelas {kelas} sudah ada di {course.kode_mk}")
+    except Exception:
+        conn.rollback()
+        raise
+    return section_id
+
+
+def update_section(conn, section_id, jadwal, dosen, kapasitas):
+    """Mengubah jadwal, dosen, dan kapasitas kelas (kapasitas tidak boleh di bawah jumlah terisi)"""
+    _validate(jadwal, kapasitas)
+    cursor = conn.cursor()
+    cursor.execute("SELECT terisi FROM course_sections WHERE id = ?", (section_id,))
+    row = cursor.fetchone()
+    if row is None:
+        raise SectionError("Kelas tidak ditemukan")
+    if kapasitas < row[0]:
+        raise SectionError(f"Kapasitas {kapasitas} lebih kecil dari jumlah peserta ({row[0]})")
+    nama, lecturer_id = _lecturer(cursor, dosen)
+    try:
+        cursor.execute("""
+            UPDATE course_sections SET jadwal = ?, dosen = ?, lecturer_id = ?, kapasitas = ? WHERE id = ?
+        """, (jadwal, nama, lecturer_id, kapasitas, section_id))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def remove_section(conn, section_id):
+    """
+    Menghapus kelas paralel yang sudah tidak punya peserta aktif
+    - Enrollment lama (selesai) yang menunjuk kelas ini dilepas dari kelasnya
+    """
+    cursor = conn.cursor()
+    cursor.execute("SELECT terisi FROM course_sections WHERE id = ?", (section_id,))
+    row = cursor.fetchone()
+    if row is None:
+        raise SectionError("Kelas tidak ditemukan")
+    if row[0]:
+        raise SectionError(f"Kelas masih memiliki {row[0]} peserta aktif")
+    try:
+        cursor.execute("UPDATE enrollments SET section_id = NULL WHERE section_id = ?", (section_id,))
+        cursor.execute("DELETE FROM course_sections WHERE id = ?", (section_id,))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def student_slots(cursor, student_id):
+    """Slot jadwal mahasiswa dari enrollment aktif (jadwal kelas paralel jika ada)"""
+    cursor.execute("""
+        SELECT COALESCE(cs.jadwal, c.jadwal) FROM enrollments e
+        JOIN courses c ON c.id = e.course_id
+        LEFT JOIN course_sections cs ON cs.id = e.section_id
+        WHERE e.student_id = ? AND e.status = 'aktif'
+    """, (student_id,))
+    return [slot for slot in (parse_jadwal(row[0]) for row in cursor.fetchall()) if slot]
+
+
+def student_sections(cursor, student_id):
+    """
+    Kelas paralel yang ditempati mahasiswa: {course_id: (kelas, jadwal, dosen)}
+    - Dipisah dari record Course karena record mata kuliah dibagi bersama di identity map
+    """
+    cursor.execute("""
+        SELECT e.course_id, cs.kelas, cs.jadwal, cs.dosen FROM enrollments e
+        JOIN course_sections cs ON cs.id = e.section_id
+        WHERE e.student_id = ? AND e.status = 'aktif'
+    """, (student_id,))
+    return {course_id: (kelas, jadwal, dosen) for course_id, kelas, jadwal, dosen in cursor.fetchall()}
+
+
+def pick_section(cursor, student_id, course_id, allow_full=False):
+    """
+    Memilih kelas paralel paling sepi yang tidak bentrok dengan jadwal mahasiswa
+    - Mengembalikan (section_id, kelas), atau None jika mata kuliah tidak punya kelas paralel
+    - Melempar SectionError jika semua kelas penuh atau bentrok
+    - allow_full=True mengizinkan kelas penuh (tetap memilih yang paling sepi)
+    """
+    cursor.execute("""
+        SELECT id, kelas, jadwal, kapasitas, terisi FROM course_sections
+        WHERE course_id = ? ORDER BY terisi, id
+    """, (course_id,))
+    candidates = cursor.fetchall()
+    if not candidates:
+        return None
+
+    slots = student_slots(cursor, student_id)
+    free = [row for row in candidates
+            if not any(bentrok(parse_jadwal(row[2]), slot) for slot in slots)]
+    if not free:
+        raise SectionError("Semua kelas paralel bentrok dengan jadwal mahasiswa: " +
+                           ", ".join(f"{kelas} ({jadwal})" for _, kelas, jadwal, _, _ in candidates))
+    for section_id, kelas, _, kapasitas, terisi in free:
+        if terisi < kapasitas:
+            return section_id, kelas
+    if allow_full:
+        return free[0][0], free[0][1]
+    raise SectionError("Kelas paralel yang tidak bentrok sudah penuh: " +
+                       ", ".join(f"{kelas} ({terisi}/{kapasitas})" for _, kelas, _, kapasitas, terisi in free))
+
+
+def count_mismatches(cursor):
+    """Kelas paralel yang kolom terisi-nya tidak sama dengan peserta aktif: (kode_mk, kelas, terisi, aktif)"""
+    cursor.execute("""
+        SELECT c.kode_mk, cs.kelas, cs.terisi, COUNT(e.id)
+        FROM course_sections cs
+        JOIN courses c ON c.id = cs.course_id
+        LEFT JOIN enrollments e ON e.section_id = cs.id AND e.status = 'aktif'
+        GROUP BY cs.id
+        HAVING cs.terisi <> COUNT(e.id)
+        ORDER BY c.kode_mk, cs.kelas
+    """)
+    return cursor.fetchall()
+
+
+def fix_counts(conn):
+    """Menyamakan terisi kelas paralel dengan jumlah peserta aktif; mengembalikan jumlah kelas diubah"""
+    cursor = conn.cursor()
+    cursor.execute("""
+        UPDATE course_sections SET terisi = (
+            SELECT COUNT(*) FROM enrollments e WHERE e.section_id = course_sections.id AND e.status = 'aktif'
+        )
+        WHERE terisi <> (
+            SELECT COUNT(*) FROM enrollments e WHERE e.section_id = course_sections.id AND e.status = 'aktif'
+        )
+    """)
+    conn.commit()
+    return cursor.rowcount
+
+
+def format_sections(cursor, course):
+    """Menyusun daftar kelas paralel satu mata kuliah"""
+    rows = list_sections(cursor, course.id)
+    if not rows:
+        return f"{course.kode_mk} - {course.nama_mk}: tanpa kelas paralel ({course.jadwal}, {course.dosen})"
+    lines = [f"{course.kode_mk} - {course.nama_mk}: {len(rows)} kelas paralel"]
+    for _, kelas, jadwal, dosen, kapasitas, terisi in rows:
+        lines.append(f"  {kelas:<3} {jadwal:<22} {dosen[:28]:<28} {terisi}/{kapasitas}")
+    return '\n'.join(lines)
+
+
+def main():
+    """Menampilkan kelas paralel mata kuliah dari command line"""
+    parser = argparse.ArgumentParser(description="Kelas paralel mata kuliah")
+    parser.add_argument('--database', help="Lokasi database: file, 'memory[:nama[=file]]', atau 'tmpfs:file' "
+                                           "(default: variabel KRS_DATABASE atau krs_database.db)")
+    parser.add_argument('kode_mk', help="Kode mata kuliah")
+    args = parser.parse_args()
+
+    storage = database.open_storage(args.database)
+    conn = storage.connect()
+    try:
+        database.init_database(conn)
+        conn.commit()
+        course = models.fetch_course_by_kode(conn, args.kode_mk)
+        if course is None:
+            raise SystemExit(f"Mata kuliah {args.kode_mk} tidak ditemukan")
+        print(format_sections(conn.cursor(), course))
+    finally:
+        conn.close()
+        storage.close()
+
+
+if __name__ == "__main__":
+    main()
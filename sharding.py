@@ -0,0 +1,441 @@
+"""
+Modul sharding database KRS per fakultas/program studi
+- Setiap shard adalah file database KRS biasa (struktur dari database.init_database)
+  sehingga penulis di fakultas berbeda tidak berebut satu kunci SQLite
+- Penulisan diarahkan ke shard berdasarkan awalan NIM (mahasiswa, KRS) atau
+  awalan kode mata kuliah (katalog)
+- Mata kuliah yang awalannya tidak dimiliki shard mana pun (mata kuliah umum)
+  disalin ke semua shard; kapasitasnya dibagi antar shard sehingga kursi tidak
+  terjual berkali-kali
+- Query lintas shard (pencarian global, rekap institusi) memakai ATTACH DATABASE
+  pada koneksi in-memory dengan view gabungan all_students, all_courses, all_enrollments
+
+Contoh file konfigurasi (JSON):
+    {
+        "default": "fti",
+        "shards": [
+            {"name": "fti", "path": "shards/krs_fti.db", "nim_prefixes": ["21"], "course_prefixes": ["IF"]},
+            {"name": "fmipa", "path": "shards/krs_fmipa.db", "nim_prefixes": ["22"], "course_prefixes": ["MTK"]}
+        ]
+    }
+"""
+import argparse
+import json
+import os
+import sqlite3
+
+import database
+import enrollment
+import events
+import lecturers
+import models
+import prerequisites
+
+# Lokasi default konfigurasi shard dan database sumber untuk pemecahan
+SHARD_CONFIG_PATH = 'shards.json'
+DATABASE_PATH = 'krs_database.db'
+
+# Batas database yang bisa di-ATTACH pada build SQLite standar
+MAX_ATTACHED = 10
+
+# Tabel yang digabung pada koneksi lintas shard
+UNIFIED_TABLES = ('students', 'courses', 'enrollments')
+
+
+class ShardError(Exception):
+    """Konfigurasi shard tidak valid atau data tidak bisa diarahkan ke shard"""
+
+
+def _longest_prefix(value, table):
+    """Mencari nama shard dengan awalan terpanjang yang cocok (None jika tidak ada)"""
+    best = None
+    for prefix, name in table.items():
+        if value.startswith(prefix) and (best is None or len(prefix) > len(best[0])):
+            best = (prefix, name)
+    return best[1] if best else None
+
+
+class ShardRouter:
+    """
+    Peta shard dan koneksi ke masing-masing shard
+    - shard_for_nim/shard_for_course memilih shard dengan awalan terpanjang
+    - connect() membuka shard sekali lalu menyimpan koneksinya
+    """
+
+    def __init__(self, shards, default=None):
+        if not shards:
+            raise ShardError("Minimal satu shard harus didefinisikan")
+        self.shards = {}
+        self.nim_prefixes = {}
+        self.course_prefixes = {}
+        for shard in shards:
+            name = shard['name']
+            if name in self.shards:
+                raise ShardError(f"Nama shard {name} dipakai lebih dari sekali")
+            self.shards[name] = shard['path']
+            for prefix in shard.get('nim_prefixes', []):
+                if prefix in self.nim_prefixes:
+                    raise ShardError(f"Awalan NIM {prefix} dipakai lebih dari satu shard")
+                self.nim_prefixes[prefix] = name
+            for prefix in shard.get('course_prefixes', []):
+                if prefix in self.course_prefixes:
+                    raise ShardError(f"Awalan kode {prefix} dipakai lebih dari satu shard")
+                self.course_prefixes[prefix] = name
+        self.default = default or shards[0]['name']
+        if self.default not in self.shards:
+            raise ShardError(f"Shard default {self.default} tidak didefinisikan")
+        if len(self.shards) > MAX_ATTACHED:
+            raise ShardError(f"Jumlah shard melebihi batas ATTACH ({MAX_ATTACHED})")
+        self.connections = {}
+
+    def shard_for_nim(self, nim):
+        """Shard tujuan untuk mahasiswa (dan KRS-nya) berdasarkan awalan NIM"""
+        return _longest_prefix(nim, self.nim_prefixes) or self.default
+
+    def shard_for_course(self, kode_mk):
+        """Shard pemilik mata kuliah, atau None untuk mata kuliah umum (ada di semua shard)"""
+        return _longest_prefix(kode_mk, self.course_prefixes)
+
+    def connect(self, name):
+        """Membuka (sekali) koneksi ke shard; struktur tabel dibuat jika belum ada"""
+        if name not in self.shards:
+            raise ShardError(f"Shard {name} tidak dikenal")
+        if name not in self.connections:
+            path = self.shards[name]
+            if os.path.dirname(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+            conn = database.connect(path)
+            database.init_database(conn)
+            self.connections[name] = conn
+        return self.connections[name]
+
+    def connect_nim(self, nim):
+        """Koneksi ke shard pemilik NIM"""
+        return self.connect(self.shard_for_nim(nim))
+
+    def close(self):
+        for conn in self.connections.values():
+            conn.close()
+        self.connections = {}
+
+
+def load_config(path=SHARD_CONFIG_PATH):
+    """Membaca konfigurasi shard dari file JSON dan membuat ShardRouter"""
+    try:
+        with open(path, encoding='utf-8') as handle:
+            config = json.load(handle)
+    except (OSError, ValueError) as e:
+        raise ShardError(f"Konfigurasi shard {path} tidak bisa dibaca: {e}")
+    base = os.path.dirname(os.path.abspath(path))
+    shards = [dict(shard, path=os.path.join(base, shard['path'])) for shard in config.get('shards', [])]
+    return ShardRouter(shards, config.get('default'))
+
+
+def _split_capacity(kapasitas, active, holders, sellers):
+    """
+    Membagi kapasitas satu mata kuliah (atau satu kelas paralel) ke shard yang memegang salinannya
+    - active: {shard: peserta aktif}; shard yang bukan penjual dikunci pada jumlah pesertanya
+      sehingga tidak menjual kursi baru
+    - Sisa kursi dibagi rata ke shard penjual (sisa pembagian ke shard pertama), sehingga
+      jumlah kapasitas semua shard sama dengan kapasitas di database sumber
+    - Mengembalikan {shard: kapasitas}
+    """
+    quota = {name: active.get(name, 0) for name in holders}
+    sellers = [name for name in holders if name in sellers]
+    free = max(kapasitas - sum(quota.values()), 0)
+    for index, name in enumerate(sellers):
+        quota[name] += free // len(sellers) + (1 if index < free % len(sellers) else 0)
+    return quota
+
+
+def split_database(router, source_path=DATABASE_PATH):
+    """
+    Memecah database tunggal menjadi shard sesuai konfigurasi
+    - ID asli dipertahankan sehingga ID tetap unik secara global
+    - Setiap shard menerima mahasiswanya, enrollment mahasiswa tersebut, mata kuliah
+      miliknya, mata kuliah umum, dan mata kuliah lain yang dirujuk enrollment-nya,
+      beserta kelas paralel, nilai (IPK/IPS), prasyarat, mata kuliah lulus, dan system_config
+    - Kapasitas tidak digandakan: mata kuliah umum dibagi ke semua shard, salinan mata
+      kuliah milik shard lain dikunci pada jumlah pesertanya (lihat _split_capacity)
+    - Penyalinan berbasis himpunan (INSERT ... SELECT lewat ATTACH), satu transaksi per shard;
+      aman diulang karena baris yang sudah ada dilewati
+    - Kolom terisi dihitung ulang dan kelayakan prasyarat dibangun ulang per shard;
+      mengembalikan {shard: (mahasiswa, mata kuliah, enrollment)}
+    """
+    source = sqlite3.connect(f"file:{source_path}?mode=ro", uri=True)
+    try:
+        student_shard = {}
+        student_ids = {name: [] for name in router.shards}
+        for student_id, nim in source.execute("SELECT id, nim FROM students"):
+            student_shard[student_id] = router.shard_for_nim(nim)
+            student_ids[student_shard[student_id]].append(student_id)
+
+        # Shard penjual (pemilik atau semua shard untuk mata kuliah umum) dan shard pemegang salinan
+        sellers, holders, capacity = {}, {}, {}
+        for course_id, kode_mk, kapasitas in source.execute("SELECT id, kode_mk, kapasitas FROM courses"):
+            owner = router.shard_for_course(kode_mk)
+            sellers[course_id] = {owner} if owner else set(router.shards)
+            holders[course_id] = set(sellers[course_id])
+            capacity[course_id] = kapasitas
+        active, section_active = {}, {}
+        for course_id, section_id, student_id, status in source.execute(
+                "SELECT course_id, section_id, student_id, status FROM enrollments"):
+            name = student_shard.get(student_id)
+            if name is None or course_id not in holders:
+                continue
+            holders[course_id].add(name)
+            if status == 'aktif':
+                active.setdefault(course_id, {}).setdefault(name, 0)
+                active[course_id][name] += 1
+                if section_id is not None:
+                    section_active.setdefault(section_id, {}).setdefault(name, 0)
+                    section_active[section_id][name] += 1
+
+        order = list(router.shards)
+        course_capacity = {name: {} for name in router.shards}
+        for course_id, shards in holders.items():
+            quota = _split_capacity(capacity[course_id], active.get(course_id, {}),
+                                    [name for name in order if name in shards], sellers[course_id])
+            for name, kapasitas in quota.items():
+                course_capacity[name][str(course_id)] = kapasitas
+        section_capacity = {name: {} for name in router.shards}
+        for section_id, course_id, kapasitas in source.execute(
+                "SELECT id, course_id, kapasitas FROM course_sections"):
+            quota = _split_capacity(kapasitas, section_active.get(section_id, {}),
+                                    [name for name in order if name in holders[course_id]], sellers[course_id])
+            for name, kapasitas in quota.items():
+                section_capacity[name][str(section_id)] = kapasitas
+    finally:
+        source.close()
+
+    result = {}
+    for name in router.shards:
+        conn = router.connect(name)
+        cursor = conn.cursor()
+        cursor.execute("ATTACH DATABASE ? AS source", (source_path,))
+        try:
+            students_json = json.dumps(student_ids[name])
+            capacity_json = json.dumps(course_capacity[name])
+            events.set_context(cursor, 'split')
+            cursor.execute("""
+                INSERT INTO main.system_config (config_key, config_value, updated_at)
+                SELECT config_key, config_value, updated_at FROM source.system_config WHERE true
+                ON CONFLICT(config_key) DO UPDATE SET
+                    config_value = excluded.config_value, updated_at = excluded.updated_at
+            """)
+            cursor.execute("""
+                INSERT OR IGNORE INTO main.students (id, nim, nama, semester, max_credits, created_at, lulus_at)
+                SELECT id, nim, nama, semester, max_credits, created_at, lulus_at FROM source.students
+                WHERE id IN (SELECT value FROM json_each(?))
+            """, (students_json,))
+            students = cursor.rowcount
+            cursor.execute("""
+                INSERT OR IGNORE INTO main.courses
+                    (id, kode_mk, nama_mk, sks, semester, jadwal, dosen, kapasitas, terisi, created_at, retired_at,
+                     jenis_ruang)
+                SELECT c.id, c.kode_mk, c.nama_mk, c.sks, c.semester, c.jadwal, c.dosen, q.value, 0,
+                       c.created_at, c.retired_at, c.jenis_ruang
+                FROM source.courses c
+                JOIN json_each(?) q ON q.key = CAST(c.id AS TEXT)
+            """, (capacity_json,))
+            courses = cursor.rowcount
+            # Kapasitas mata kuliah berkelas paralel mengikuti jumlah kelasnya (trigger modul sections)
+            cursor.execute(f"""
+                INSERT OR IGNORE INTO main.course_sections
+                    (id, course_id, kelas, jadwal, dosen, lecturer_id, kapasitas, terisi, created_at)
+                SELECT cs.id, cs.course_id, cs.kelas, cs.jadwal, cs.dosen,
+                       (SELECT id FROM main.lecturers WHERE kunci = {lecturers.key_sql('cs.dosen')}),
+                       q.value, 0, cs.created_at
+                FROM source.course_sections cs
+                JOIN json_each(?) q ON q.key = CAST(cs.id AS TEXT)
+            """, (json.dumps(section_capacity[name]),))
+            cursor.execute("""
+                INSERT OR IGNORE INTO main.enrollments
+                    (id, student_id, course_id, tanggal_daftar, status, created_at, section_id)
+                SELECT id, student_id, course_id, tanggal_daftar, status, created_at, section_id
+                FROM source.enrollments
+                WHERE student_id IN (SELECT value FROM json_each(?))
+            """, (students_json,))
+            enrollments = cursor.rowcount
+            cursor.execute("""
+                UPDATE main.courses SET terisi = (
+                    SELECT COUNT(*) FROM main.enrollments e
+                    WHERE e.course_id = courses.id AND e.status = 'aktif'
+                )
+            """)
+
+            # Nilai disalin lewat trigger modul grades sehingga IPK/IPS (student_ipk, student_ips)
+            # dan batas SKS shard dihitung ulang dari nilai yang sama dengan sumber
+            cursor.execute("DELETE FROM main.credit_brackets")
+            cursor.execute("""
+                INSERT INTO main.credit_brackets (min_ipk, max_credits)
+                SELECT min_ipk, max_credits FROM source.credit_brackets
+            """)
+            cursor.execute("""
+                INSERT OR IGNORE INTO main.grades
+                    (student_id, course_id, enrollment_id, term, nilai, bobot, sks, posted_at)
+                SELECT student_id, course_id, enrollment_id, term, nilai, bobot, sks, posted_at
+                FROM source.grades
+                WHERE student_id IN (SELECT value FROM json_each(?))
+            """, (students_json,))
+
+            # Prasyarat dan mata kuliah lulus disalin apa adanya, lalu closure dan kelayakan dibangun ulang
+            # (trigger prasyarat hanya berjalan saat status enrollment berubah, bukan saat disalin)
+            cursor.execute("DELETE FROM main.course_prerequisites")
+            cursor.execute("""
+                INSERT INTO main.course_prerequisites (kode_mk, prasyarat)
+                SELECT kode_mk, prasyarat FROM source.course_prerequisites
+            """)
+            cursor.execute("""
+                INSERT OR IGNORE INTO main.completed_courses (student_id, kode_mk, completed_at)
+                SELECT student_id, kode_mk, completed_at FROM source.completed_courses
+                WHERE student_id IN (SELECT value FROM json_each(?))
+            """, (students_json,))
+            prerequisites.rebuild_closure(cursor)
+            prerequisites.rebuild_eligibility(cursor)
+            events.clear_context(cursor)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.execute("DETACH DATABASE source")
+        result[name] = (students, courses, enrollments)
+    return result
+
+
+def attach_all(router):
+    """
+    Membuka koneksi in-memory yang meng-ATTACH semua shard (read-only)
+    - View sementara all_students, all_courses, all_enrollments menggabungkan
+      tabel dari semua shard dengan kolom tambahan `shard`
+    - Mata kuliah umum muncul sekali per shard (terisi per shard)
+    """
+    conn = sqlite3.connect("file::memory:", uri=True)
+    for index, (name, path) in enumerate(router.shards.items()):
+        if not os.path.exists(path):
+            router.connect(name)
+        conn.execute(f"ATTACH DATABASE ? AS shard{index}", (f"file:{path}?mode=ro",))
+    for table in UNIFIED_TABLES:
+        union = "\nUNION ALL\n".join(
+            f"SELECT '{name}' AS shard, * FROM shard{index}.{table}"
+            for index, name in enumerate(router.shards))
+        conn.execute(f"CREATE TEMP VIEW all_{table} AS {union}")
+    return conn
+
+
+def search_students(router, text, limit=100):
+    """Mencari mahasiswa di semua shard berdasarkan NIM atau nama: (shard, nim, nama, semester)"""
+    conn = attach_all(router)
+    try:
+        pattern = f"%{text}%"
+        return conn.execute("""
+            SELECT shard, nim, nama, semester FROM all_students
+            WHERE nim LIKE ? OR nama LIKE ?
+            ORDER BY nim LIMIT ?
+        """, (pattern, pattern, limit)).fetchall()
+    finally:
+        conn.close()
+
+
+def institution_summary(router):
+    """
+    Rekap seluruh institusi per shard
+    - Mengembalikan daftar (shard, mahasiswa, mata kuliah, enrollment aktif, total SKS aktif)
+    """
+    conn = attach_all(router)
+    try:
+        return conn.execute("""
+            SELECT s.shard,
+                   (SELECT COUNT(*) FROM all_students WHERE shard = s.shard),
+                   (SELECT COUNT(*) FROM all_courses WHERE shard = s.shard),
+                   COUNT(e.id),
+                   COALESCE(SUM(c.sks), 0)
+            FROM (SELECT DISTINCT shard FROM all_students
+                  UNION SELECT DISTINCT shard FROM all_courses) s
+            LEFT JOIN all_enrollments e ON e.shard = s.shard AND e.status = 'aktif'
+            LEFT JOIN all_courses c ON c.shard = e.shard AND c.id = e.course_id
+            GROUP BY s.shard
+            ORDER BY s.shard
+        """).fetchall()
+    finally:
+        conn.close()
+
+
+def add_student(router, nim, nama, semester, max_credits=24):
+    """Menambahkan mahasiswa ke shard pemilik NIM; mengembalikan nama shard"""
+    name = router.shard_for_nim(nim)
+    conn = router.connect(name)
+    try:
+        conn.execute("INSERT INTO students (nim, nama, semester, max_credits) VALUES (?, ?, ?, ?)",
+                     (nim, nama, semester, max_credits))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return name
+
+
+def enroll(router, nim, kode_mk, allow_full=False, source='shard'):
+    """
+    Mendaftarkan mahasiswa lewat shard pemilik NIM dengan aturan modul enrollment
+    - Mata kuliah harus tersedia di shard tersebut (milik shard atau mata kuliah umum)
+    """
+    conn = router.connect_nim(nim)
+    student = models.fetch_student_by_nim(conn, nim)
+    if student is None:
+        raise ShardError(f"Mahasiswa dengan NIM {nim} tidak ada di shard {router.shard_for_nim(nim)}")
+    course = models.fetch_course_by_kode(conn, kode_mk)
+    if course is None:
+        raise ShardError(f"Mata kuliah {kode_mk} tidak tersedia di shard {router.shard_for_nim(nim)}")
+    return enrollment.enroll(conn, student, course, allow_full, source)
+
+
+def main():
+    """Memecah database, mendaftarkan KRS, dan menjalankan query lintas shard dari command line"""
+    parser = argparse.ArgumentParser(description="Sharding database KRS per fakultas")
+    parser.add_argument('--config', default=SHARD_CONFIG_PATH, help="File konfigurasi shard (JSON)")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    split_parser = subparsers.add_parser('split', help="Pecah database tunggal menjadi shard")
+    split_parser.add_argument('--database', default=DATABASE_PATH, help="Database sumber")
+
+    route_parser = subparsers.add_parser('route', help="Tampilkan shard tujuan untuk NIM")
+    route_parser.add_argument('nim')
+
+    enroll_parser = subparsers.add_parser('enroll', help="Daftarkan mahasiswa lewat shard-nya")
+    enroll_parser.add_argument('nim')
+    enroll_parser.add_argument('kode')
+    enroll_parser.add_argument('--force', action='store_true', help="Tetap daftar meski kapasitas penuh")
+
+    search_parser = subparsers.add_parser('search', help="Cari mahasiswa di semua shard")
+    search_parser.add_argument('text')
+
+    subparsers.add_parser('summary', help="Rekap institusi per shard")
+
+    args = parser.parse_args()
+    router = load_config(args.config)
+    try:
+        if args.command == 'split':
+            for name, (students, courses, enrollments) in split_database(router, args.database).items():
+                print(f"{name}: {students} mahasiswa, {courses} mata kuliah, {enrollments} enrollment")
+        elif args.command == 'route':
+            print(f"{args.nim} -> {router.shard_for_nim(args.nim)}")
+        elif args.command == 'enroll':
+            enroll(router, args.nim, args.kode, args.force)
+            print(f"{args.nim} terdaftar di {args.kode} (shard {router.shard_for_nim(args.nim)})")
+        elif args.command == 'search':
+            for shard, nim, nama, semester in search_students(router, args.text):
+                print(f"[{shard}] {nim} - {nama} (semester {semester})")
+        else:
+            for shard, students, courses, active, total_sks in institution_summary(router):
+                print(f"{shard:<12} {students:>7} mahasiswa {courses:>5} mata kuliah "
+                      f"{active:>8} enrollment aktif {total_sks:>9} SKS")
+    except (ShardError, enrollment.EnrollmentError) as e:
+        raise SystemExit(str(e))
+    finally:
+        router.close()
+
+
+if __name__ == "__main__":
+    main()
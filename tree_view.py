@@ -0,0 +1,251 @@
+"""
+Modul pengurutan dan penyaringan Treeview di sisi klien
+- Data tabel disimpan per kolom (column store) di memori
+- Kunci urut setiap kolom dihitung sekali lalu di-cache, begitu juga
+  urutan hasil pengurutannya, sehingga klik header tidak menyentuh SQLite
+- Filter diterapkan dengan mengganti isi akar Treeview sekaligus
+  (set_children): baris yang tidak lolos terlepas, sisanya tersusun sesuai
+  urutan, tanpa insert ulang
+"""
+from jadwal import parse_jadwal
+
+ARROW_ASC = " ▲"
+ARROW_DESC = " ▼"
+
+
+def text_key(value):
+    """Kunci urut teks tanpa membedakan huruf besar/kecil"""
+    return (value is None, str(value or '').casefold())
+
+
+def number_key(value):
+    """Kunci urut angka; nilai bukan angka ('-', 'N/A') diletakkan di akhir"""
+    if isinstance(value, (int, float)):
+        return (False, value)
+    try:
+        return (False, float(value))
+    except (TypeError, ValueError):
+        return (True, 0)
+
+
+def jadwal_key(value):
+    """Kunci urut jadwal berdasarkan hari lalu jam mulai; tanpa slot di akhir"""
+    slot = parse_jadwal(value)
+    return (slot is None, slot or (0, 0, 0), text_key(value))
+
+
+def date_key(value):
+    """Kunci urut tanggal format dd/mm/yyyy; nilai lain di akhir"""
+    try:
+        hari, bulan, tahun = str(value).split('/')
+        return (False, (int(tahun), int(bulan), int(hari)))
+    except ValueError:
+        return (True, (0, 0, 0))
+
+
+def choice_filter(column, selected, all_label="Semua", value_of=str):
+    """
+    Membuat filter pilihan tunggal dari combobox
+    - Mengembalikan None (tanpa filter) jika pilihan kosong atau all_label
+    - value_of mengubah nilai kolom sebelum dibandingkan dengan pilihan
+    """
+    selected = str(selected)
+    if selected in ("", all_label):
+        return None
+    return (column, lambda value: value_of(value) == selected)
+
+
+def text_filter(columns, text):
+    """Membuat filter pencarian teks (tanpa beda huruf besar/kecil) pada beberapa kolom"""
+    text = text.strip().casefold()
+    if not text:
+        return None
+    return (tuple(columns), lambda values: any(text in str(value).casefold() for value in values))
+
+
+class ColumnStore:
+    """
+    Penyimpanan baris tabel berbasis kolom
+    - values setiap kolom disimpan dalam list tersendiri
+    - sort_keys: {kolom: fungsi kunci}; kolom lain memakai text_key
+    - Kunci dan urutan per kolom dihitung saat pertama dibutuhkan lalu di-cache
+    """
+
+    def __init__(self, columns, sort_keys=None):
+        self.columns = list(columns)
+        self.sort_keys = dict(sort_keys or {})
+        self.clear()
+
+    def __len__(self):
+        return len(self.iids)
+
+    def clear(self):
+        """Mengosongkan data beserta semua cache"""
+        self.iids = []
+        self.tags = []
+        self.data = {column: [] for column in self.columns}
+        self._keys = {}
+        self._orders = {}
+
+    def load(self, rows):
+        """
+        Mengisi ulang data dari daftar (iid, values, tags)
+        - Urutan masukan dipakai sebagai urutan bawaan (tanpa sort)
+        """
+        self.clear()
+        columns = [self.data[column] for column in self.columns]
+        for iid, values, tags in rows:
+            self.iids.append(iid)
+            self.tags.append(tuple(tags))
+            for column, value in zip(columns, values):
+                column.append(value)
+
+    def keys(self, column):
+        """Mengambil kunci urut kolom (dihitung sekali per load)"""
+        keys = self._keys.get(column)
+        if keys is None:
+            key = self.sort_keys.get(column, text_key)
+            keys = self._keys[column] = [key(value) for value in self.data[column]]
+        return keys
+
+    def order(self, column, reverse=False):
+        """
+        Mengambil urutan indeks baris menurut kolom
+        - Urutan naik di-cache; urutan turun cukup dibalik dari cache tersebut
+        """
+        order = self._orders.get(column)
+        if order is None:
+            keys = self.keys(column)
+            order = self._orders[column] = sorted(range(len(keys)), key=keys.__getitem__)
+        return order[::-1] if reverse else order
+
+    def mask(self, filters):
+        """
+        Menghitung baris yang lolos semua filter
+        - filters: daftar (kolom, predikat) yang diterapkan pada nilai kolom
+        - Kolom berupa tuple nama kolom memberi predikat tuple nilai per baris
+        - Mengembalikan None jika tidak ada filter (semua baris lolos)
+        """
+        mask = None
+        for column, predicate in filters:
+            if isinstance(column, tuple):
+                values = list(zip(*(self.data[name] for name in column)))
+            else:
+                values = self.data[column]
+            if mask is None:
+                mask = [predicate(value) for value in values]
+            else:
+                mask = [keep and predicate(value) for keep, value in zip(mask, values)]
+        return mask
+
+    def select(self, sort_column=None, reverse=False, filters=()):
+        """Mengambil indeks baris yang terlihat sesuai urutan dan filter"""
+        order = self.order(sort_column, reverse) if sort_column else range(len(self.iids))
+        mask = self.mask(filters)
+        if mask is None:
+            return list(order)
+        return [index for index in order if mask[index]]
+
+
+class SortableTree:
+    """
+    Pengikat ColumnStore ke ttk.Treeview
+    - Klik header mengurutkan kolom (klik lagi membalik arah)
+    - set_filters menambah/menghapus filter bernama pada kolom tertentu
+    - Baris yang tidak punya tag khusus diberi warna selang-seling
+      (stripe_tags) sesuai posisi tampilnya
+    - keep_selection=False untuk tabel yang event pilihnya mengisi form,
+      agar refresh tidak menimpa isian pengguna
+    """
+
+    def __init__(self, tree, sort_keys=None, stripe_tags=None, keep_selection=True):
+        self.tree = tree
+        self.keep_selection = keep_selection
+        self.store = ColumnStore(tree['columns'], sort_keys)
+        self.stripe_tags = stripe_tags
+        self.sort_column = None
+        self.reverse = False
+        self.filters = {}
+        self._shown_tags = {}
+        self._headings = {}
+        for column in self.store.columns:
+            self._headings[column] = tree.heading(column, 'text')
+            tree.heading(column, command=lambda column=column: self.sort_by(column))
+
+    def load(self, rows):
+        """
+        Mengganti isi tabel dengan daftar (iid, values, tags)
+        - Semua baris di-insert sekali; urutan dan filter diterapkan lewat apply
+        - Baris lama dihapus berdasarkan iid yang tersimpan, karena baris yang dilepas
+          filter tidak muncul di get_children() tetapi masih ada di Treeview
+        - Jika keep_selection, baris yang sedang dipilih tetap terpilih bila masih terlihat
+        """
+        rows = list(rows)
+        selected = self.tree.selection()
+        # Semua baris dari load sebelumnya dihapus, termasuk yang sedang dilepas filter
+        if self.store.iids:
+            self.tree.delete(*self.store.iids)
+        self._shown_tags = {}
+        for iid, values, tags in rows:
+            self.tree.insert("", "end", iid=iid, values=values, tags=tags)
+            self._shown_tags[iid] = tuple(tags)
+        self.store.load(rows)
+        visible = self.apply()
+
+        # Mempertahankan pilihan pengguna untuk baris yang masih terlihat
+        if self.keep_selection:
+            shown = set(self.tree.get_children())
+            selected = [iid for iid in selected if iid in shown]
+            if selected:
+                self.tree.selection_set(selected)
+        return visible
+
+    def sort_by(self, column):
+        """Mengurutkan berdasarkan kolom; klik kedua pada kolom yang sama membalik arah"""
+        if self.sort_column == column:
+            self.reverse = not self.reverse
+        else:
+            self.sort_column, self.reverse = column, False
+        for name, text in self._headings.items():
+            if name == column:
+                text += ARROW_DESC if self.reverse else ARROW_ASC
+            self.tree.heading(name, text=text)
+        self.apply()
+
+    def set_filters(self, **filters):
+        """
+        Memasang filter bernama, masing-masing berupa (kolom, predikat)
+        - Nilai None menghapus filter dengan nama tersebut
+        - Semua perubahan diterapkan ke tampilan sekaligus
+        """
+        for name, spec in filters.items():
+            if spec is None:
+                self.filters.pop(name, None)
+            else:
+                self.filters[name] = spec
+        return self.apply()
+
+    def visible(self):
+        """Mengambil indeks baris yang sedang terlihat sesuai urutan tampil"""
+        return self.store.select(self.sort_column, self.reverse, list(self.filters.values()))
+
+    def apply(self):
+        """
+        Menerapkan urutan dan filter ke Treeview
+        - Isi dan urutan akar diganti dengan satu panggilan set_children; baris yang
+          tersaring otomatis terlepas (detach) tanpa dipindah satu per satu
+        - Tag hanya diperbarui untuk baris yang warnanya berubah
+        """
+        store = self.store
+        indexes = self.visible()
+        tree = self.tree
+        tree.set_children("", *[store.iids[index] for index in indexes])
+        for position, index in enumerate(indexes):
+            iid = store.iids[index]
+            tags = store.tags[index]
+            if not tags and self.stripe_tags:
+                tags = (self.stripe_tags[position % 2],)
+            if self._shown_tags.get(iid) != tags:
+                tree.item(iid, tags=tags)
+                self._shown_tags[iid] = tags
+        return len(indexes)